@@ -12,13 +12,22 @@ Arquitetura:
 """
 
 import os
+import sys
+import hashlib
+import io
 import streamlit as st
-import requests
 import pandas as pd
+import plotly.express as px
 import json
-from typing import Any, Dict, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
 from datetime import datetime
 
+# Raiz do repositório no path para o cliente da API (src/client)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.client.sdk import ClienteRisco, ErroAPI
+
 
 # ============================================================================
 # CONFIGURAÇÕES E CONSTANTES
@@ -49,6 +58,40 @@ OPCOES_LOAN_GRADE = ["A", "B", "C", "D", "E", "F", "G"]
 OPCOES_DEFAULT_HISTORY = ["N", "Y"]
 OPCOES_FAIXA_ETARIA = ["20-29", "30-39", "40-49", "50-59", "60-69", "70+"]
 
+# Avaliação em lote: colunas esperadas no CSV (schema de data/interim/dados_novos.csv)
+COLUNAS_ENTRADA_LOTE = [
+    "person_income", "person_home_ownership", "person_emp_length",
+    "loan_intent", "loan_grade", "loan_amnt", "loan_int_rate",
+    "loan_percent_income", "cb_person_default_on_file",
+    "cb_person_cred_hist_length", "faixa_etaria"
+]
+# Esquema bruto (data/raw): a API deriva estas colunas quando ausentes
+COLUNAS_DERIVAVEIS_LOTE = {
+    "faixa_etaria": ["person_age"],
+    "loan_percent_income": ["loan_amnt", "person_income"],
+}
+TAMANHO_CHUNK_PADRAO = 500          # Registros por chamada ao /predict_batch
+CHUNKS_PARALELOS_PADRAO = 4         # Chamadas simultâneas à API
+CHUNKS_PARALELOS_MAX = 16           # Conexões keep-alive mantidas pelo cliente
+TIMEOUT_LOTE = 60                   # Timeout (s) de cada chamada em lote
+
+# Análise de sensibilidade: faixas das grades numéricas (mín, máx) e opções categóricas
+FAIXAS_SENSIBILIDADE = {
+    "loan_amnt": (500.0, 35000.0),
+    "loan_int_rate": (5.0, 23.0),
+    "person_income": (4000.0, 200000.0),
+    "loan_percent_income": (0.0, 0.8),
+    "person_emp_length": (0.0, 30.0),
+    "cb_person_cred_hist_length": (2.0, 30.0),
+}
+OPCOES_SENSIBILIDADE = {
+    "loan_grade": OPCOES_LOAN_GRADE,
+    "loan_intent": OPCOES_LOAN_INTENT,
+    "person_home_ownership": OPCOES_HOME_OWNERSHIP,
+    "cb_person_default_on_file": OPCOES_DEFAULT_HISTORY,
+    "faixa_etaria": OPCOES_FAIXA_ETARIA[:4],  # Faixas vistas no treino do preprocessor
+}
+
 
 # ============================================================================
 # FUNÇÕES AUXILIARES
@@ -111,9 +154,29 @@ def obter_cor_risco(nivel_risco: str) -> str:
     return cores.get(nivel_risco, "#6c757d")  # Cinza como padrão
 
 
+@st.cache_resource
+def obter_cliente(api_url: str) -> ClienteRisco:
+    """
+    Retorna o cliente da API para a URL, compartilhado entre execuções e sessões
+    (pool de conexões keep-alive e novas tentativas com backoff).
+    
+    Args:
+        api_url: URL base da API
+    
+    Returns:
+        Cliente síncrono reutilizável
+    """
+    return ClienteRisco(
+        api_url,
+        timeout_lote=TIMEOUT_LOTE,
+        tamanho_pool=CHUNKS_PARALELOS_MAX,
+        threshold=DEFAULT_THRESHOLD,
+    )
+
+
 def chamar_api_predicao(api_url: str, features: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Realiza chamada HTTP POST para o endpoint de predição da API.
+    Realiza a predição de um cliente no endpoint /predict da API.
     O threshold é fixo em 0.42 (threshold ideal calculado pelo modelo).
     
     Args:
@@ -124,21 +187,85 @@ def chamar_api_predicao(api_url: str, features: Dict[str, Any]) -> Dict[str, Any
         Dicionário com os resultados da predição
     
     Raises:
-        requests.HTTPError: Se a requisição falhar
-        requests.RequestException: Se houver erro de conexão
+        ErroAPI: Se a API recusar a requisição ou estiver inacessível
     """
-    url = api_url.rstrip("/") + "/predict"
-    payload = {"features": features, "threshold": DEFAULT_THRESHOLD}
-    
     try:
-        resp = requests.post(url, json=payload, timeout=10)
-        resp.raise_for_status()
-        return resp.json()
-    except requests.exceptions.RequestException as e:
+        return obter_cliente(api_url).predict(features).como_dict()
+    except ErroAPI as e:
         st.error(f"Erro ao conectar com a API: {e}")
         raise
 
 
+def chamar_api_sensibilidade(
+    api_url: str, features: Dict[str, Any], variacoes: Dict[str, List[Any]]
+) -> Dict[str, Any]:
+    """
+    Realiza chamada HTTP POST para o endpoint de sensibilidade da API.
+    Todos os cenários da grade são pontuados em uma única requisição.
+    
+    Args:
+        api_url: URL base da API
+        features: Dicionário com as features do cliente base
+        variacoes: {feature: valores} com uma ou duas features variadas
+    
+    Returns:
+        Dicionário com as probabilidades da grade
+    """
+    payload = {"features": features, "variacoes": variacoes, "threshold": DEFAULT_THRESHOLD}
+    return obter_cliente(api_url).post_json("/sensitivity", payload, timeout=30)
+
+
+@st.cache_data(show_spinner=False, max_entries=20)
+def pontuar_csv(
+    hash_arquivo: str,
+    api_url: str,
+    tamanho_chunk: int,
+    chunks_paralelos: int,
+    _conteudo: bytes,
+    _progresso: Optional[Callable[[float, str], None]] = None,
+) -> pd.DataFrame:
+    """
+    Pontua um CSV completo enviando chunks em paralelo ao /predict_batch.
+    O resultado fica em cache pelo hash do arquivo: reenviar o mesmo arquivo
+    não gera novas chamadas à API.
+    
+    Args:
+        hash_arquivo: SHA-256 do conteúdo (chave do cache)
+        api_url: URL base da API
+        tamanho_chunk: Registros por requisição
+        chunks_paralelos: Requisições simultâneas
+        _conteudo: Bytes do CSV (fora da chave de cache)
+        _progresso: Callback opcional (fração concluída, mensagem)
+    
+    Returns:
+        DataFrame original acrescido das colunas de score
+    """
+    df = pd.read_csv(io.BytesIO(_conteudo))
+
+    # Progresso atualizado na thread principal, conforme os chunks terminam
+    def progresso(concluidos: int, total: int):
+        if _progresso is not None:
+            _progresso(concluidos / total, f"{concluidos}/{total} chunks processados")
+
+    # Só as colunas de entrada (e person_age) são enviadas; NaN vira null
+    lote = obter_cliente(api_url).predict_batch(
+        df, tamanho_chunk=tamanho_chunk, paralelo=chunks_paralelos, progresso=progresso
+    )
+
+    # Linhas rejeitadas pela validação da API chegam com status/erro e sem score
+    scores = lote.como_dataframe(index=df.index)
+    df["status"] = scores["codigo"].fillna(scores["status"])
+    df["erro"] = scores["erro"]
+    df["probabilidade_default"] = scores["probabilidade_default"]
+    df["classificacao"] = scores["classificacao"]
+    df["nivel_risco"] = pd.cut(
+        df["probabilidade_default"],
+        bins=[-float("inf"), RISCO_BAIXO_MAX, RISCO_MEDIO_MAX, float("inf")],
+        labels=["Baixo", "Médio", "Alto"],
+    ).astype(object).where(df["probabilidade_default"].notna(), None)
+    return df
+
+
 # ============================================================================
 # FUNÇÕES DE INTERFACE
 # ============================================================================
@@ -176,15 +303,10 @@ def renderizar_sidebar():
         
         # Status da conexão
         if st.button("🔍 Verificar Conexão"):
-            try:
-                health_url = api_url.rstrip("/") + "/health"
-                resp = requests.get(health_url, timeout=5)
-                if resp.status_code == 200:
-                    st.success("✅ API conectada com sucesso!")
-                else:
-                    st.warning(f"⚠️ API retornou status {resp.status_code}")
-            except Exception as e:
-                st.error(f"❌ Erro ao conectar: {e}")
+            if obter_cliente(api_url).health():
+                st.success("✅ API conectada com sucesso!")
+            else:
+                st.error("❌ Erro ao conectar: API inacessível ou com falha no /health")
     
     return api_url
 
@@ -450,6 +572,184 @@ def renderizar_resultados(resultado_api: Dict[str, Any], threshold: float):
             st.json(resultado_api)
 
 
+def renderizar_painel_sensibilidade(api_url: str, features: Dict[str, Any]):
+    """
+    Renderiza o painel de análise "e se" para o cliente avaliado.
+    Uma feature gera uma curva; duas features geram um mapa de calor.
+    
+    Args:
+        api_url: URL base da API
+        features: Features do cliente base (última avaliação)
+    """
+    st.markdown("---")
+    st.subheader("🔬 Análise de Sensibilidade")
+    st.markdown("Veja como a probabilidade muda ao variar uma ou duas características do cliente.")
+    
+    opcoes = list(FAIXAS_SENSIBILIDADE) + list(OPCOES_SENSIBILIDADE)
+    with st.form("formulario_sensibilidade"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            feature_x = st.selectbox("Feature principal", options=opcoes, index=0)
+        with col2:
+            feature_y = st.selectbox("Segunda feature (opcional)", options=["—"] + opcoes, index=0)
+        with col3:
+            n_pontos = st.slider("Pontos por feature numérica", min_value=5, max_value=100, value=30)
+        submitted = st.form_submit_button("📈 Calcular Sensibilidade", use_container_width=True)
+    
+    if not submitted:
+        return
+    
+    selecionadas = [feature_x] if feature_y in ("—", feature_x) else [feature_x, feature_y]
+    variacoes = {}
+    for f in selecionadas:
+        if f in FAIXAS_SENSIBILIDADE:
+            minimo, maximo = FAIXAS_SENSIBILIDADE[f]
+            passo = (maximo - minimo) / (n_pontos - 1)
+            variacoes[f] = [round(minimo + i * passo, 4) for i in range(n_pontos)]
+        else:
+            variacoes[f] = OPCOES_SENSIBILIDADE[f]
+    
+    try:
+        with st.spinner("🔄 Calculando cenários..."):
+            resultado = chamar_api_sensibilidade(api_url, features, variacoes)
+    except ErroAPI as e:
+        st.error(f"❌ Erro ao calcular sensibilidade: {e}")
+        return
+    
+    probs = resultado["probabilidades"]
+    if len(selecionadas) == 1:
+        fig = px.line(
+            x=variacoes[feature_x],
+            y=probs,
+            markers=True,
+            labels={"x": feature_x, "y": "Probabilidade de Inadimplência"},
+        )
+        fig.add_hline(y=DEFAULT_THRESHOLD, line_dash="dash", annotation_text="Threshold")
+        fig.add_hline(y=resultado["probabilidade_base"], line_dash="dot", annotation_text="Cliente atual")
+    else:
+        fig = px.imshow(
+            probs,
+            x=[str(v) for v in variacoes[selecionadas[1]]],
+            y=[str(v) for v in variacoes[selecionadas[0]]],
+            labels={"x": selecionadas[1], "y": selecionadas[0], "color": "Probabilidade"},
+            color_continuous_scale=["#28a745", "#ffc107", "#dc3545"],
+            zmin=0.0,
+            zmax=1.0,
+            aspect="auto",
+        )
+    fig.update_layout(title=f"Probabilidade base: {resultado['probabilidade_base']:.2%}")
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def renderizar_pagina_lote(api_url: str):
+    """
+    Renderiza a página de avaliação em lote a partir de um arquivo CSV.
+    Envia o arquivo em chunks paralelos à API e exibe distribuição e download.
+    
+    Args:
+        api_url: URL base da API
+    """
+    st.header("📂 Avaliação em Lote")
+    st.markdown(
+        "Envie um CSV com o mesmo schema de `dados_novos.csv` ou o bruto de `credit_risk_dataset.csv` "
+        "(com `person_age` no lugar de `faixa_etaria`). "
+        "Colunas extras (ex.: `loan_status`) são ignoradas no envio e mantidas no arquivo final."
+    )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        tamanho_chunk = st.number_input(
+            "Registros por requisição",
+            min_value=50,
+            max_value=10000,
+            value=TAMANHO_CHUNK_PADRAO,
+            step=50,
+            help="Quantidade de clientes enviados em cada chamada ao /predict_batch"
+        )
+    with col2:
+        chunks_paralelos = st.number_input(
+            "Requisições em paralelo",
+            min_value=1,
+            max_value=CHUNKS_PARALELOS_MAX,
+            value=CHUNKS_PARALELOS_PADRAO,
+            step=1,
+            help="Quantidade de chunks enviados simultaneamente à API"
+        )
+    
+    arquivo = st.file_uploader("Arquivo CSV", type=["csv"])
+    if arquivo is None:
+        return
+    
+    conteudo = arquivo.getvalue()
+    hash_arquivo = hashlib.sha256(conteudo).hexdigest()
+    
+    # Validação do schema antes de qualquer chamada à API
+    colunas = pd.read_csv(io.BytesIO(conteudo), nrows=0).columns
+    faltantes = [
+        c for c in COLUNAS_ENTRADA_LOTE
+        if c not in colunas and not set(COLUNAS_DERIVAVEIS_LOTE.get(c, [None])).issubset(colunas)
+    ]
+    if faltantes:
+        st.error(f"❌ Colunas obrigatórias ausentes no CSV: {faltantes}")
+        return
+    
+    if not st.button("🔍 Avaliar Arquivo", type="primary", use_container_width=True):
+        return
+    
+    barra = st.progress(0.0, text="Enviando chunks para a API...")
+    try:
+        resultado = pontuar_csv(
+            hash_arquivo,
+            api_url,
+            int(tamanho_chunk),
+            int(chunks_paralelos),
+            _conteudo=conteudo,
+            _progresso=lambda fracao, texto: barra.progress(fracao, text=texto),
+        )
+    except ErroAPI as e:
+        st.error(f"❌ Erro ao processar o arquivo: {e}")
+        st.info("Verifique se a API está rodando e se a URL está correta nas configurações.")
+        return
+    barra.progress(1.0, text=f"{len(resultado)} clientes avaliados")
+    
+    rejeitados = resultado[resultado["status"] != "ok"]
+    if len(rejeitados):
+        st.warning(
+            f"⚠️ {len(rejeitados)} linha(s) rejeitada(s) pela validação e não pontuada(s): "
+            + ", ".join(f"{c} ({n})" for c, n in rejeitados["status"].value_counts().items())
+        )
+        st.dataframe(rejeitados[["status", "erro"]].head(100), use_container_width=True)
+    
+    # Resumo por nível de risco
+    contagem = resultado["nivel_risco"].value_counts()
+    col1, col2, col3 = st.columns(3)
+    for coluna, nivel in zip((col1, col2, col3), ("Baixo", "Médio", "Alto")):
+        with coluna:
+            st.metric(label=f"Risco {nivel}", value=int(contagem.get(nivel, 0)))
+    
+    fig = px.histogram(
+        resultado,
+        x="probabilidade_default",
+        color="nivel_risco",
+        nbins=50,
+        category_orders={"nivel_risco": ["Baixo", "Médio", "Alto"]},
+        color_discrete_map={n: obter_cor_risco(n) for n in ("Baixo", "Médio", "Alto")},
+        labels={"probabilidade_default": "Probabilidade de Inadimplência", "nivel_risco": "Nível de Risco"},
+        title="Distribuição das probabilidades por nível de risco",
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.dataframe(resultado.head(100), use_container_width=True)
+    
+    st.download_button(
+        "⬇️ Baixar arquivo avaliado",
+        data=resultado.to_csv(index=False).encode("utf-8"),
+        file_name=f"{os.path.splitext(arquivo.name)[0]}_avaliado.csv",
+        mime="text/csv",
+        use_container_width=True,
+    )
+
+
 # ============================================================================
 # FUNÇÃO PRINCIPAL
 # ============================================================================
@@ -479,6 +779,11 @@ def main():
     # Renderiza sidebar e obtém configurações
     api_url = renderizar_sidebar()
     
+    pagina = st.sidebar.radio("📑 Página", ["Avaliação Individual", "Avaliação em Lote"])
+    if pagina == "Avaliação em Lote":
+        renderizar_pagina_lote(api_url)
+        return
+    
     # Renderiza formulário de entrada
     features = renderizar_formulario_entrada()
     
@@ -488,15 +793,21 @@ def main():
             with st.spinner("🔄 Processando avaliação..."):
                 resultado = chamar_api_predicao(api_url, features)
             
-            st.markdown("---")
-            renderizar_resultados(resultado, DEFAULT_THRESHOLD)
+            # Mantém a última avaliação entre reexecuções (usada pelo painel de sensibilidade)
+            st.session_state["ultima_avaliacao"] = (features, resultado)
             
-        except requests.exceptions.RequestException as e:
+        except ErroAPI as e:
             st.error(f"❌ Erro ao processar a avaliação: {e}")
             st.info("Verifique se a API está rodando e se a URL está correta nas configurações.")
         except Exception as e:
             st.error(f"❌ Erro inesperado: {e}")
             st.exception(e)
+    
+    if "ultima_avaliacao" in st.session_state:
+        features, resultado = st.session_state["ultima_avaliacao"]
+        st.markdown("---")
+        renderizar_resultados(resultado, DEFAULT_THRESHOLD)
+        renderizar_painel_sensibilidade(api_url, features)
 
 
 # ============================================================================
@@ -0,0 +1,148 @@
+"""Benchmark de cold start da API: perfil de imports e tempo até a primeira predição.
+
+Cada medição sobe um processo uvicorn novo e registra, a partir do spawn:
+tempo até /health responder, até /ready (artefatos em memória) e até a
+primeira resposta de /predict. Usa apenas a biblioteca padrão como cliente
+HTTP, para rodar também na instalação enxuta de serving.
+
+Run with:
+    python -m benchmarks.bench_cold_start
+    python -m benchmarks.bench_cold_start --repeticoes 5 --historico benchmarks/cold_start.jsonl
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+from src.utils.paths import BASE_DIR
+
+MODULO_API = "src.api.app"
+
+PAYLOAD_EXEMPLO = {
+    "features": {
+        "person_income": 50000.0, "person_home_ownership": "RENT", "person_emp_length": 5.0,
+        "loan_intent": "EDUCATION", "loan_grade": "C", "loan_amnt": 10000.0,
+        "loan_int_rate": 12.0, "loan_percent_income": 0.2, "cb_person_default_on_file": "N",
+        "cb_person_cred_hist_length": 3, "faixa_etaria": "20-29",
+    }
+}
+
+
+def perfil_imports(modulo: str = MODULO_API, top: int = 15) -> dict:
+    """Executa `python -X importtime` e retorna o tempo total e os pacotes mais caros"""
+    saida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    pacotes = {}
+    total_us = 0
+    for linha in saida.stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        _, acumulado, nome = linha[len("import time:"):].split("|")
+        if nome.strip() == modulo:
+            total_us = int(acumulado)
+        # Agrega pelo pacote raiz, considerando apenas imports de primeiro nível
+        if len(nome) - len(nome.lstrip()) <= 3:
+            raiz = nome.strip().split(".")[0]
+            pacotes[raiz] = max(pacotes.get(raiz, 0), int(acumulado))
+    mais_caros = sorted(pacotes.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {"total_ms": total_us / 1000, "pacotes_ms": {k: v / 1000 for k, v in mais_caros}}
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _aguardar(url: str, inicio: float, timeout: float) -> float:
+    """Faz polling até a URL responder 200; retorna segundos desde `inicio`"""
+    while time.perf_counter() - inicio < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:
+                if resp.status == 200:
+                    return time.perf_counter() - inicio
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} não respondeu em {timeout}s")
+
+
+def _post(url: str, corpo: dict) -> dict:
+    requisicao = urllib.request.Request(
+        url, data=json.dumps(corpo).encode(), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(requisicao, timeout=60) as resp:
+        return json.loads(resp.read())
+
+
+def medir_primeira_predicao(preload: bool, timeout: float = 120.0) -> dict:
+    """Sobe a API em um processo novo e mede os marcos do cold start"""
+    porta = _porta_livre()
+    base = f"http://127.0.0.1:{porta}"
+    env = dict(os.environ, PRELOAD_MODEL="1" if preload else "0", AUDIT_ENABLED="0")
+
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{MODULO_API}:app", "--port", str(porta), "--log-level", "warning"],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        marcos = {"health_s": _aguardar(f"{base}/health", inicio, timeout)}
+        if preload:
+            marcos["ready_s"] = _aguardar(f"{base}/ready", inicio, timeout)
+
+        resposta = _post(f"{base}/predict", PAYLOAD_EXEMPLO)
+        marcos["primeira_predicao_s"] = time.perf_counter() - inicio
+        if "probabilidade_default" not in resposta:
+            raise RuntimeError(f"Resposta inesperada de /predict: {resposta}")
+
+        t = time.perf_counter()
+        _post(f"{base}/predict", PAYLOAD_EXEMPLO)
+        marcos["segunda_predicao_ms"] = (time.perf_counter() - t) * 1000
+        return marcos
+    finally:
+        processo.terminate()
+        processo.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--historico", default=None,
+                        help="Arquivo JSONL onde o resultado é acrescentado para acompanhamento")
+    args = parser.parse_args()
+
+    perfil = perfil_imports()
+    print(f"Import de {MODULO_API}: {perfil['total_ms']:.0f} ms")
+    for pacote, ms in perfil["pacotes_ms"].items():
+        print(f"  {pacote:<24}{ms:>10.1f} ms")
+
+    resultado = {"data": datetime.now(timezone.utc).isoformat(), "import_ms": perfil["total_ms"]}
+    print(f"\n{'cenário':<16}{'health (s)':>12}{'ready (s)':>12}{'1ª pred (s)':>14}{'2ª pred (ms)':>14}")
+    for preload in (False, True):
+        medicoes = [medir_primeira_predicao(preload) for _ in range(args.repeticoes)]
+        mediana = {k: statistics.median(m[k] for m in medicoes) for k in medicoes[0]}
+        cenario = "preload" if preload else "sob demanda"
+        resultado[cenario] = mediana
+        print(
+            f"{cenario:<16}{mediana['health_s']:>12.2f}{mediana.get('ready_s', float('nan')):>12.2f}"
+            f"{mediana['primeira_predicao_s']:>14.2f}{mediana['segunda_predicao_ms']:>14.1f}"
+        )
+
+    if args.historico:
+        with open(args.historico, "a", encoding="utf-8") as f:
+            f.write(json.dumps(resultado) + "\n")
+        print(f"\nResultado acrescentado em {args.historico}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark de carregamento dos datasets processados: pickle vs Parquet vs Feather.
+
+Cada cenário roda em um subprocesso novo para medir tempo de carga e pico de RSS
+sem interferência de cache do interpretador.
+
+Run with:
+    python -m benchmarks.bench_datasets
+    python -m benchmarks.bench_datasets --repeticoes 5 --dataset X_test
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from src.utils.paths import BASE_DIR
+
+# Colunas usadas em cenários de projeção (subconjunto típico de análise)
+COLUNAS_PROJECAO = ["loan_amnt", "loan_grade"]
+
+CENARIOS = {
+    "pickle (completo)": "pd.read_pickle(processed_path(NOME, 'pickle'))",
+    "parquet (completo)": "carregar_dataset(NOME, formato='parquet')",
+    "parquet (2 colunas)": "carregar_dataset(NOME, colunas=COLUNAS, formato='parquet')",
+    "parquet (filtro)": "carregar_dataset(NOME, filtros=[('loan_grade', '>=', 3.0)], formato='parquet')",
+    "feather mmap (completo)": "carregar_dataset(NOME, formato='feather')",
+    "feather mmap (2 colunas)": "carregar_dataset(NOME, colunas=COLUNAS, formato='feather')",
+}
+
+# Executado no subprocesso: imports ficam fora da medição de tempo
+_SCRIPT = """
+import json, resource, time
+import pandas as pd
+from src.data.datasets import carregar_dataset
+from src.utils.paths import processed_path
+NOME = {nome!r}
+COLUNAS = {colunas!r}
+rss_antes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+inicio = time.perf_counter()
+obj = {expressao}
+duracao = time.perf_counter() - inicio
+rss_pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"segundos": duracao, "rss_pico_kb": rss_pico, "delta_rss_kb": rss_pico - rss_antes, "shape": list(obj.shape)}}))
+"""
+
+
+def medir(nome: str, expressao: str) -> dict:
+    """Executa um cenário em subprocesso isolado e retorna tempo e memória"""
+    codigo = _SCRIPT.format(nome=nome, colunas=COLUNAS_PROJECAO, expressao=expressao)
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default="X_train")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Dataset: {args.dataset} | repetições por cenário: {args.repeticoes}\n")
+    print(f"{'cenário':<28}{'tempo (ms)':>12}{'Δ RSS (MB)':>12}{'pico RSS (MB)':>15}  shape")
+
+    for cenario, expressao in CENARIOS.items():
+        medicoes = [medir(args.dataset, expressao) for _ in range(args.repeticoes)]
+        tempo_ms = statistics.median(m["segundos"] for m in medicoes) * 1000
+        delta_mb = statistics.median(m["delta_rss_kb"] for m in medicoes) / 1024
+        pico_mb = statistics.median(m["rss_pico_kb"] for m in medicoes) / 1024
+        print(f"{cenario:<28}{tempo_ms:>12.2f}{delta_mb:>12.2f}{pico_mb:>15.1f}  {tuple(medicoes[0]['shape'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Benchmark de vazão: POST /predict vs canal WebSocket /ws com a mesma concorrência.
+
+Requer a API em execução (python -m src.api.run). Os dois cenários mantêm
+`--concorrencia` requisições em voo: no HTTP, N clientes assíncronos em paralelo;
+no WebSocket, N mensagens pendentes em uma única conexão.
+
+Run with:
+    python -m benchmarks.bench_websocket
+    python -m benchmarks.bench_websocket --url http://localhost:8000 --concorrencia 64 --total 5000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+import pandas as pd
+import websockets
+
+from src.features.feature_store import COLUNAS_ENTRADA
+from src.utils.paths import data_path
+
+
+def carregar_amostra(n: int) -> list:
+    """Registros reais de dados_novos.csv, apenas com categorias vistas no treino"""
+    df = pd.read_csv(data_path("dados_novos.csv", "interim"), usecols=COLUNAS_ENTRADA).dropna()
+    df = df[df["faixa_etaria"].isin(["20-29", "30-39", "40-49", "50-59"])]
+    return df.head(n).to_dict(orient="records")
+
+
+async def bench_http(url: str, registros: list, total: int, concorrencia: int) -> dict:
+    latencias = []
+    proximo = iter(range(total))
+
+    async def cliente(http: httpx.AsyncClient):
+        for i in proximo:
+            inicio = time.perf_counter()
+            resp = await http.post("/predict", json={"features": registros[i % len(registros)]})
+            resp.raise_for_status()
+            latencias.append(time.perf_counter() - inicio)
+
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=120) as http:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente(http) for _ in range(concorrencia)))
+        duracao = time.perf_counter() - inicio
+
+    return {"duracao": duracao, "latencias": latencias}
+
+
+async def bench_ws(url: str, registros: list, total: int, concorrencia: int) -> dict:
+    ws_url = url.replace("http", "ws", 1).rstrip("/") + "/ws"
+    enviados = {}
+    latencias = []
+    vagas = asyncio.Semaphore(concorrencia)
+
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        async def receber():
+            for _ in range(total):
+                resposta = json.loads(await ws.recv())
+                if "erro" in resposta:
+                    raise RuntimeError(resposta["erro"])
+                latencias.append(time.perf_counter() - enviados.pop(resposta["id"]))
+                vagas.release()
+
+        inicio = time.perf_counter()
+        receptor = asyncio.create_task(receber())
+        for i in range(total):
+            await vagas.acquire()
+            enviados[i] = time.perf_counter()
+            await ws.send(json.dumps({"id": i, "features": registros[i % len(registros)]}))
+        await receptor
+        duracao = time.perf_counter() - inicio
+
+    return {"duracao": duracao, "latencias": latencias}
+
+
+def resumir(nome: str, medicao: dict, total: int) -> None:
+    latencias_ms = sorted(l * 1000 for l in medicao["latencias"])
+    p99 = latencias_ms[int(len(latencias_ms) * 0.99) - 1]
+    print(
+        f"{nome:<12}{total / medicao['duracao']:>14.1f}"
+        f"{statistics.median(latencias_ms):>14.2f}{p99:>14.2f}"
+    )
+
+
+async def executar(args) -> None:
+    registros = carregar_amostra(1000)
+
+    # Aquecimento: carrega FeatureStore/modelo e inicia o monitor de drift
+    await bench_ws(args.url, registros, 50, 8)
+    await bench_http(args.url, registros, 10, 2)
+
+    print(f"Total: {args.total} predições | concorrência: {args.concorrencia}\n")
+    print(f"{'canal':<12}{'pred/s':>14}{'p50 (ms)':>14}{'p99 (ms)':>14}")
+    resumir("/predict", await bench_http(args.url, registros, args.total_http or args.total, args.concorrencia),
+            args.total_http or args.total)
+    resumir("/ws", await bench_ws(args.url, registros, args.total, args.concorrencia), args.total)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concorrencia", type=int, default=32)
+    parser.add_argument("--total", type=int, default=5000)
+    parser.add_argument("--total-http", type=int, default=None,
+                        help="Total de predições no cenário HTTP (padrão: igual a --total)")
+    args = parser.parse_args()
+    asyncio.run(executar(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,29 @@
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import os
+import secrets
+import numpy as np
 import pandas as pd
 import traceback
 import logging
 import sys
 
-from src.features.feature_store import FeatureStore
+try:
+    import msgpack  # opcional: frames binários no canal WebSocket
+except ImportError:
+    msgpack = None
+
+from src.api import runtime
+from src.api.inference import obter_micro_batcher, pontuar_registros
+from src.features.feature_store import COLUNAS_ENTRADA, FeatureStore, faltantes_entrada
 from src.models.predictor import ModelProducao
+from src.monitoring.audit import novo_prediction_id
 
 # Configurar logging com mais detalhes
 logging.basicConfig(
@@ -22,7 +36,14 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-class SingleInput(BaseModel):
+class SelecaoModelo(BaseModel):
+    # Sem seleção: modelo de produção (lgb_prob_default, alias Production)
+    model_name: Optional[str] = None
+    model_version: Optional[int] = Field(None, ge=1)
+    model_alias: Optional[str] = None
+
+
+class SingleInput(SelecaoModelo):
     features: Dict[str, Any]
     threshold: Optional[float] = Field(0.42, ge=0.0, le=1.0)
     
@@ -31,12 +52,98 @@ class SingleInput(BaseModel):
         extra = "allow"
 
 
-class BatchInput(BaseModel):
+class BatchInput(SelecaoModelo):
     records: List[Dict[str, Any]]
     threshold: Optional[float] = Field(0.42, ge=0.0, le=1.0)
 
 
-app = FastAPI(title="Credit Risk Prediction API")
+class SensitivityInput(BaseModel):
+    features: Dict[str, Any]
+    variacoes: Dict[str, List[Any]]
+    threshold: Optional[float] = Field(0.42, ge=0.0, le=1.0)
+
+
+class PortfolioInput(BaseModel):
+    records: Optional[List[Dict[str, Any]]] = None
+    # Arquivo no servidor (CSV/Parquet/Feather), relativo à pasta data/
+    arquivo: Optional[str] = None
+    # None: src.models.portfolio.CHUNK_SIZE_PADRAO
+    chunk_size: Optional[int] = Field(None, ge=1)
+    threshold: Optional[float] = Field(0.42, ge=0.0, le=1.0)
+
+
+class JobInput(SelecaoModelo):
+    # Arquivo no servidor (CSV/Parquet/Feather), relativo à pasta data/
+    arquivo: str
+    # None: src.api.jobs.CHUNK_SIZE_JOBS
+    chunk_size: Optional[int] = Field(None, ge=1)
+    threshold: Optional[float] = Field(0.42, ge=0.0, le=1.0)
+
+
+class CalibracaoInput(SelecaoModelo):
+    # Registros brutos já decididos e seus outcomes observados (1 = inadimplência)
+    records: List[Dict[str, Any]]
+    rotulos: List[int]
+    metodo: Optional[str] = None
+    # Snapshot novo só é servido quando ativado explicitamente (ou via /calibration/ativar)
+    ativar: bool = False
+
+
+class AtivarCalibracaoInput(SelecaoModelo):
+    versao: int
+
+
+class OutcomeInput(BaseModel):
+    # prediction_id devolvido pela API e loan_status observado (1 = inadimplência)
+    prediction_ids: List[str]
+    loan_status: List[int]
+
+
+# Máximo de jobs pendentes/em execução aceitos pela fila (acima disso: 429)
+JOBS_MAX_ATIVOS = int(os.environ.get("JOBS_MAX_ATIVOS", "100"))
+
+# Máximo de mensagens em processamento por conexão WebSocket (backpressure)
+WS_MAX_EM_VOO = 1024
+
+# Limites da análise de sensibilidade
+MAX_FEATURES_SENSIBILIDADE = 2
+MAX_PONTOS_SENSIBILIDADE = 10000
+
+# Token dos endpoints /admin (header X-Admin-Token); sem ele, os endpoints ficam desativados
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Dispara o pré-carregamento dos artefatos sem atrasar o bind do servidor"""
+    if os.environ.get("PRELOAD_MODEL", "1") != "0":
+        runtime.precarregar()
+    yield
+    runtime.encerrar_jobs()
+
+
+class _ContadorProfiler:
+    """
+    Conta requisições concluídas só durante uma sessão de /admin/tracemalloc.
+    O profiler é importado apenas pelo endpoint: enquanto o módulo não foi
+    carregado não há sessão ativa e a requisição passa direto.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._contador = None
+
+    async def __call__(self, scope, receive, send):
+        profiler = sys.modules.get("src.monitoring.profiler")
+        if profiler is None:
+            return await self.app(scope, receive, send)
+        if self._contador is None:
+            self._contador = profiler.ContadorRequisicoes(self.app)
+        return await self._contador(scope, receive, send)
+
+
+app = FastAPI(title="Credit Risk Prediction API", lifespan=lifespan)
+app.add_middleware(_ContadorProfiler)
 
 
 # Handler global de exceções
@@ -76,8 +183,38 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 @app.get("/health")
 def health():
-    """Endpoint de health check básico"""
-    return {"status": "ok"}
+    """Endpoint de health check básico (com os contadores da auditoria: gravadas, descartadas, falhas)"""
+    return {"status": "ok", "auditoria": runtime.estado_auditoria()}
+
+
+@app.get("/ready")
+def ready():
+    """Readiness: 200 apenas quando FeatureStore e modelo já estão carregados em memória"""
+    if not runtime.pronto():
+        return JSONResponse(status_code=503, content={"status": "loading"})
+    return {"status": "ready"}
+
+
+def _selecionar_modelo(model_name: Optional[str], version: Optional[int], alias: Optional[str]):
+    """Modelo pedido na requisição; 404 quando o nome/versão/alias não existe no registry"""
+    try:
+        return runtime.selecionar_modelo(model_name, version, alias)
+    except (FileNotFoundError, ValueError) as exc:
+        raise HTTPException(status_code=404, detail=f"modelo indisponível: {exc}")
+
+
+@app.get("/models")
+def models():
+    """Modelos do registry, modelo padrão, escalonamento aluno/professor e estado do pool (memória, tempo de carga, LRU)"""
+    from src.models.loader_model import listar_modelos
+
+    padrao = runtime.obter_modelo() if runtime.pronto() else None
+    return {
+        "registry": listar_modelos(),
+        "padrao": {"model_name": padrao.model_name, "version": padrao.version} if padrao else None,
+        "escalonamento": padrao.estatisticas() if hasattr(padrao, "estatisticas") else None,
+        "pool": runtime.obter_pool().estado(),
+    }
 
 
 @app.get("/test-model")
@@ -196,6 +333,594 @@ def check_files():
     return results
 
 
+@app.get("/drift")
+def drift(resetar: bool = False):
+    """
+    Relatório de drift do tráfego recebido contra a referência de treino.
+    PSI e KS por feature transformada e por decil de score do modelo.
+    """
+    monitor = runtime.obter_monitor_drift(bloquear=True)
+    if monitor is None:
+        raise HTTPException(status_code=503, detail="monitor de drift indisponível")
+
+    relatorio = monitor.relatorio()
+    if resetar:
+        monitor.resetar()
+    return relatorio
+
+
+@app.post("/sensitivity")
+def sensitivity(payload: SensitivityInput):
+    """
+    Análise "e se": varia uma ou duas features de um cliente base sobre grades
+    de valores e pontua todos os cenários em uma única chamada ao modelo.
+
+    Os cenários não são decisões reais: não entram na auditoria nem no drift.
+    """
+    variacoes = payload.variacoes
+    try:
+        missing_cols = faltantes_entrada(payload.features)
+        if missing_cols:
+            raise ValueError(f"Colunas faltando: {missing_cols}")
+        if not 1 <= len(variacoes) <= MAX_FEATURES_SENSIBILIDADE:
+            raise ValueError(f"Informe de 1 a {MAX_FEATURES_SENSIBILIDADE} features em variacoes")
+        invalidas = set(variacoes) - set(COLUNAS_ENTRADA)
+        if invalidas:
+            raise ValueError(f"Features desconhecidas em variacoes: {invalidas}")
+        if any(len(v) == 0 for v in variacoes.values()):
+            raise ValueError("Cada feature variada precisa de ao menos um valor")
+        n_pontos = int(np.prod([len(v) for v in variacoes.values()]))
+        if n_pontos > MAX_PONTOS_SENSIBILIDADE:
+            raise ValueError(f"Grade com {n_pontos} pontos excede o limite de {MAX_PONTOS_SENSIBILIDADE}")
+
+        base_raw = pd.DataFrame([payload.features])
+    except Exception as exc:
+        logger.error(f"Entrada inválida para sensibilidade: {exc}")
+        raise HTTPException(status_code=400, detail=f"invalid input: {exc}")
+
+    try:
+        feature_store = runtime.obter_feature_store()
+        modelo = runtime.obter_modelo()
+
+        # Base e grade em um único predict_proba (base na primeira linha)
+        X_base = feature_store.select_features(feature_store.transform_all(base_raw))
+        X_grade = feature_store.select_features(feature_store.transform_variacoes(base_raw, variacoes))
+        proba = modelo.predict_proba(pd.concat([X_base, X_grade], ignore_index=True))[:, 1]
+    except Exception as exc:
+        error_detail = str(exc)
+        error_traceback = traceback.format_exc()
+        logger.error(f"Erro na análise de sensibilidade: {error_detail}\n{error_traceback}")
+        return JSONResponse(
+            status_code=500,
+            content={
+                "error": "sensitivity error",
+                "message": error_detail,
+                "traceback": error_traceback
+            }
+        )
+
+    forma = [len(v) for v in variacoes.values()]
+    logger.info(f"Sensibilidade calculada: {n_pontos} cenários, variacoes={list(variacoes)}")
+
+    return {
+        "probabilidade_base": round(float(proba[0]), 4),
+        "features": list(variacoes),
+        "valores": variacoes,
+        # 1 feature: lista; 2 features: matriz [valores da 1ª][valores da 2ª]
+        "probabilidades": np.round(proba[1:], 4).reshape(forma).tolist(),
+        "threshold_usado": float(payload.threshold),
+    }
+
+
+@app.post("/portfolio/summary")
+def portfolio_summary(payload: PortfolioInput):
+    """
+    Resumo de risco da carteira: perda esperada, exposição por nível de risco e
+    distribuição das probabilidades por loan_grade e loan_intent.
+    Processa em chunks sem reter a saída por linha (memória limitada ao chunk).
+    """
+    from src.models.portfolio import CHUNK_SIZE_PADRAO, avaliar_carteira, dividir_registros, iterar_chunks
+
+    chunk_size = payload.chunk_size or CHUNK_SIZE_PADRAO
+    try:
+        if (payload.records is None) == (payload.arquivo is None):
+            raise ValueError("Informe exatamente um entre 'records' e 'arquivo'")
+
+        if payload.arquivo is not None:
+            chunks = iterar_chunks(_resolver_arquivo_dados(payload.arquivo), chunk_size)
+        else:
+            chunks = dividir_registros(payload.records, chunk_size)
+    except Exception as exc:
+        logger.error(f"Entrada inválida para resumo da carteira: {exc}")
+        raise HTTPException(status_code=400, detail=f"invalid input: {exc}")
+
+    try:
+        return avaliar_carteira(
+            chunks, runtime.obter_feature_store(), runtime.obter_modelo(), float(payload.threshold)
+        )
+    except Exception as exc:
+        error_detail = str(exc)
+        error_traceback = traceback.format_exc()
+        logger.error(f"Erro no resumo da carteira: {error_detail}\n{error_traceback}")
+        return JSONResponse(
+            status_code=500,
+            content={
+                "error": "portfolio error",
+                "message": error_detail,
+                "traceback": error_traceback
+            }
+        )
+
+
+def _resolver_arquivo_dados(arquivo: str):
+    """Caminho dentro de data/ (rejeita caminhos que escapam da pasta)"""
+    from src.utils.paths import DATA_DIR
+
+    caminho = (DATA_DIR / arquivo).resolve()
+    if not caminho.is_relative_to(DATA_DIR.resolve()):
+        raise ValueError(f"Arquivo fora da pasta de dados: {arquivo}")
+    if not caminho.exists():
+        raise ValueError(f"Arquivo não encontrado: {arquivo}")
+    return caminho
+
+
+def _fila_com_vaga():
+    fila = runtime.obter_fila_jobs()
+    if fila.contar_ativos() >= JOBS_MAX_ATIVOS:
+        raise HTTPException(status_code=429, detail=f"fila de jobs cheia ({JOBS_MAX_ATIVOS} jobs ativos)")
+    return fila
+
+
+def _parametros_job(threshold, chunk_size, model_name, model_version, model_alias) -> Dict[str, Any]:
+    """
+    Parâmetros gravados no job. Uma seleção de modelo é resolvida para a versão
+    já na submissão (404 se não existe): o job não muda de versão se o alias
+    for movido enquanto ele espera na fila.
+    """
+    from src.api.jobs import CHUNK_SIZE_JOBS
+
+    parametros = {"threshold": float(threshold), "chunk_size": int(chunk_size or CHUNK_SIZE_JOBS)}
+    if model_name is not None or model_version is not None or model_alias is not None:
+        from src.models.loader_model import localizar_artefatos, resolve_model_version
+
+        model_name = model_name or "lgb_prob_default"
+        try:
+            parametros["model_version"] = resolve_model_version(model_name, model_version, model_alias or "Production")
+            localizar_artefatos(model_name, parametros["model_version"])
+        except (FileNotFoundError, ValueError) as exc:
+            raise HTTPException(status_code=404, detail=f"modelo indisponível: {exc}")
+        parametros["model_name"] = model_name
+    return parametros
+
+
+def _estado_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    total = job["linhas_total"]
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "linhas_processadas": job["linhas_processadas"],
+        "linhas_total": total,
+        "progresso": round(job["linhas_processadas"] / total, 4) if total else None,
+        "resumo": job["resumo"],
+        "tentativas": job["tentativas"],
+        "criado_em": job["criado_em"],
+        "iniciado_em": job["iniciado_em"],
+        "concluido_em": job["concluido_em"],
+        "model_name": job["model_name"],
+        "model_version": job["model_version"],
+        "erro": job["erro"],
+    }
+
+
+@app.post("/jobs", status_code=202)
+def criar_job(payload: JobInput):
+    """
+    Enfileira a pontuação de um arquivo de data/ (CSV, Parquet ou Feather).
+    Retorna o job_id; acompanhe em GET /jobs/{job_id} e baixe o Parquet em
+    GET /jobs/{job_id}/resultado.
+    """
+    try:
+        caminho = _resolver_arquivo_dados(payload.arquivo)
+        if caminho.suffix.lower() not in (".csv", ".parquet", ".feather"):
+            raise ValueError(f"Formato não suportado: {caminho.suffix}. Use .csv, .parquet ou .feather")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"invalid input: {exc}")
+
+    parametros = _parametros_job(
+        payload.threshold, payload.chunk_size, payload.model_name, payload.model_version, payload.model_alias
+    )
+    job_id = _fila_com_vaga().submeter(caminho, parametros)
+    return {"job_id": job_id, "status": "pendente"}
+
+
+@app.post("/jobs/upload", status_code=202)
+async def criar_job_upload(
+    request: Request,
+    formato: str = "csv",
+    threshold: float = 0.42,
+    chunk_size: Optional[int] = None,
+    model_name: Optional[str] = None,
+    model_version: Optional[int] = None,
+    model_alias: Optional[str] = None,
+):
+    """
+    Enfileira a pontuação do arquivo enviado no corpo da requisição (bytes
+    brutos, ?formato=csv|parquet|feather). O corpo é gravado em disco em
+    streaming; o arquivo é removido quando o job termina.
+    """
+    from src.api.jobs import caminho_entrada, novo_job_id
+
+    if formato not in ("csv", "parquet", "feather"):
+        raise HTTPException(status_code=400, detail=f"invalid input: formato '{formato}' não suportado")
+    if not 0.0 <= threshold <= 1.0 or (chunk_size is not None and chunk_size < 1):
+        raise HTTPException(status_code=400, detail="invalid input: threshold deve estar em [0, 1] e chunk_size >= 1")
+
+    loop = asyncio.get_running_loop()
+    parametros = await loop.run_in_executor(
+        None, _parametros_job, threshold, chunk_size, model_name, model_version, model_alias
+    )
+    fila = await loop.run_in_executor(None, _fila_com_vaga)
+
+    job_id = novo_job_id()
+    caminho = caminho_entrada(job_id, f".{formato}")
+    tamanho = 0
+    try:
+        with open(caminho, "wb") as f:
+            async for bloco in request.stream():
+                f.write(bloco)
+                tamanho += len(bloco)
+        if tamanho == 0:
+            raise ValueError("corpo da requisição vazio")
+    except Exception as exc:
+        caminho.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail=f"invalid input: {exc}")
+
+    await loop.run_in_executor(None, lambda: fila.submeter(caminho, parametros, job_id, entrada_temporaria=True))
+    return {"job_id": job_id, "status": "pendente", "bytes_recebidos": tamanho}
+
+
+@app.get("/jobs")
+def listar_jobs(status: Optional[str] = None, limite: int = 100):
+    return {"jobs": [_estado_job(j) for j in runtime.obter_fila_jobs().listar(status, limite)]}
+
+
+@app.get("/jobs/{job_id}")
+def estado_job(job_id: str):
+    job = runtime.obter_fila_jobs().obter(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"job {job_id} não encontrado")
+    return _estado_job(job)
+
+
+@app.get("/jobs/{job_id}/resultado")
+def resultado_job(job_id: str):
+    """Parquet com linha, status, erro, probabilidade_default e classificacao"""
+    from fastapi.responses import FileResponse
+
+    job = runtime.obter_fila_jobs().obter(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"job {job_id} não encontrado")
+    if job["status"] != "concluido":
+        raise HTTPException(status_code=409, detail=f"job {job_id} está '{job['status']}'")
+    return FileResponse(job["saida"], media_type="application/vnd.apache.parquet", filename=f"{job_id}.parquet")
+
+
+@app.delete("/jobs/{job_id}")
+def cancelar_job(job_id: str):
+    """Cancela o job; em execução, o worker para no próximo chunk"""
+    status = runtime.obter_fila_jobs().cancelar(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"job {job_id} não encontrado")
+    return {"job_id": job_id, "status": status}
+
+
+@app.get("/calibration")
+def calibracao(model_name: Optional[str] = None, model_version: Optional[int] = None, model_alias: Optional[str] = None):
+    """Snapshots de calibração do modelo (o ativo marcado) e a versão em uso neste processo"""
+    from src.models.calibration import RepositorioCalibracao
+
+    modelo = _selecionar_modelo(model_name, model_version, model_alias)
+    snapshots = RepositorioCalibracao(modelo.model_name, modelo.version).listar()
+    for snapshot in snapshots:
+        snapshot.pop("estado", None)
+    return {
+        "model_name": modelo.model_name,
+        "model_version": modelo.version,
+        "em_uso": modelo.versao_calibracao,
+        "snapshots": snapshots,
+    }
+
+
+@app.post("/calibration/feedback")
+def calibracao_feedback(payload: CalibracaoInput, x_admin_token: Optional[str] = Header(None)):
+    """
+    Atualiza a calibração com outcomes rotulados: os registros são pontuados
+    sem calibração, o estado é atualizado incrementalmente a partir do último
+    snapshot e um novo snapshot é gravado (e ativado, se `ativar`).
+    O modelo LightGBM não é recarregado. Exige X-Admin-Token.
+    """
+    _exigir_admin(x_admin_token)
+    from src.features.validation import registros_para_dataframe, validar_lote
+    from src.models.calibration import METODOS, RepositorioCalibracao
+
+    if len(payload.records) != len(payload.rotulos):
+        raise HTTPException(status_code=400, detail="invalid input: records e rotulos com tamanhos diferentes")
+    if any(r not in (0, 1) for r in payload.rotulos):
+        raise HTTPException(status_code=400, detail="invalid input: rotulos devem ser 0 ou 1")
+    if payload.metodo is not None and payload.metodo not in METODOS:
+        raise HTTPException(status_code=400, detail=f"invalid input: metodo deve ser um de {list(METODOS)}")
+
+    modelo = _selecionar_modelo(payload.model_name, payload.model_version, payload.model_alias)
+    feature_store = runtime.obter_feature_store()
+    df, ausentes = registros_para_dataframe(payload.records)
+    validacao = validar_lote(feature_store, df, ausentes)
+    validas = validacao.validas
+    if not validas.any():
+        raise HTTPException(status_code=400, detail="invalid input: nenhum registro válido")
+
+    _, proba = modelo.pontuar(validacao.df[validas], feature_store, calibrar=False)
+    repositorio = RepositorioCalibracao(modelo.model_name, modelo.version)
+    versao, calibrador = repositorio.atualizar(
+        proba[:, 1], np.asarray(payload.rotulos)[validas], payload.metodo, ativar=payload.ativar,
+        origem="api /calibration/feedback",
+    )
+    # Neste processo a troca é imediata; os demais workers leem o ponteiro periodicamente
+    runtime.sincronizar_calibracao(modelo, forcar=True)
+
+    return {
+        "versao": versao,
+        "ativa": repositorio.versao_ativa(),
+        "metodo": calibrador.metodo,
+        "observacoes_usadas": int(validas.sum()),
+        "rejeitados": int((~validas).sum()),
+        "n_observacoes": calibrador.n_observacoes,
+        "metricas_prequenciais": calibrador.resumo_metricas(),
+    }
+
+
+@app.post("/calibration/ativar")
+def calibracao_ativar(payload: AtivarCalibracaoInput, x_admin_token: Optional[str] = Header(None)):
+    """Ativa um snapshot existente (rollback). Exige X-Admin-Token"""
+    _exigir_admin(x_admin_token)
+    from src.models.calibration import RepositorioCalibracao
+
+    modelo = _selecionar_modelo(payload.model_name, payload.model_version, payload.model_alias)
+    try:
+        RepositorioCalibracao(modelo.model_name, modelo.version).ativar(payload.versao)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    runtime.sincronizar_calibracao(modelo, forcar=True)
+    return {"model_name": modelo.model_name, "model_version": modelo.version, "em_uso": modelo.versao_calibracao}
+
+
+@app.post("/outcomes")
+def registrar_outcomes(payload: OutcomeInput):
+    """
+    Recebe outcomes observados, junta-os às decisões auditadas pelo
+    prediction_id e atualiza incrementalmente os histogramas de performance.
+    Outcomes repetidos são ignorados; ids sem decisão auditada são contados.
+    """
+    if len(payload.prediction_ids) != len(payload.loan_status):
+        raise HTTPException(status_code=400, detail="invalid input: prediction_ids e loan_status com tamanhos diferentes")
+    if any(r not in (0, 1) for r in payload.loan_status):
+        raise HTTPException(status_code=400, detail="invalid input: loan_status deve ser 0 ou 1")
+
+    return runtime.obter_monitor_performance().ingerir(
+        payload.prediction_ids, payload.loan_status, runtime.diretorio_auditoria()
+    )
+
+
+@app.get("/performance")
+def performance(
+    janela_dias: int = 30,
+    model_name: Optional[str] = None,
+    model_version: Optional[int] = None,
+    model_alias: Optional[str] = None,
+):
+    """
+    Métricas de produção (AUC, KS, PR-AUC, ECE) na janela móvel, a série
+    diária e, lado a lado, as métricas de teste do run de treino (mlruns).
+    """
+    from src.models.loader_model import metricas_offline, resolve_model_version
+    from src.monitoring.performance import metricas_offline_comparaveis
+
+    if janela_dias < 1:
+        raise HTTPException(status_code=400, detail="invalid input: janela_dias deve ser >= 1")
+
+    model_name = model_name or "lgb_prob_default"
+    try:
+        versao = resolve_model_version(model_name, model_version, model_alias or "Production")
+        offline = metricas_offline(model_name, versao)
+    except (FileNotFoundError, ValueError) as exc:
+        raise HTTPException(status_code=404, detail=f"modelo indisponível: {exc}")
+
+    monitor = runtime.obter_monitor_performance()
+    return {
+        "model_name": model_name,
+        "model_version": versao,
+        "janela_dias": janela_dias,
+        "producao": monitor.metricas(model_name, versao, janela_dias),
+        "offline": metricas_offline_comparaveis(offline),
+        "offline_completo": offline,
+        "serie": monitor.serie(model_name, versao, janela_dias),
+    }
+
+
+def _exigir_admin(token: Optional[str]) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="endpoints de administração desativados (defina ADMIN_TOKEN)")
+    if token is None or not secrets.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="X-Admin-Token inválido")
+
+
+def _saida_profiler(resultado, formato: str, top: Optional[int]):
+    from src.monitoring import profiler
+
+    if formato == "collapsed":
+        return PlainTextResponse(resultado.colapsado())
+    return resultado.resumo(top or profiler.TOP_PADRAO)
+
+
+@app.post("/admin/profile")
+def admin_profile(
+    duracao_s: float = 10.0,
+    intervalo_ms: float = 5.0,
+    incluir_ociosas: bool = False,
+    linhas: bool = False,
+    formato: str = "collapsed",
+    top: Optional[int] = None,
+    x_admin_token: Optional[str] = Header(None),
+):
+    """
+    Perfil por amostragem do worker em execução: pilhas de todas as threads
+    lidas a cada `intervalo_ms` durante `duracao_s` (máx. 60s). A requisição
+    fica aberta durante a coleta. `formato=collapsed` devolve a entrada do
+    flamegraph.pl/speedscope; `formato=json`, as funções com mais amostras.
+    """
+    _exigir_admin(x_admin_token)
+    from src.monitoring import profiler
+
+    if formato not in ("collapsed", "json"):
+        raise HTTPException(status_code=400, detail="invalid input: formato deve ser 'collapsed' ou 'json'")
+    try:
+        perfil = profiler.amostrar_pilhas(duracao_s, intervalo_ms / 1000.0, incluir_ociosas, linhas)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"invalid input: {exc}")
+    except profiler.PerfilOcupado as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return _saida_profiler(perfil, formato, top)
+
+
+@app.post("/admin/tracemalloc")
+def admin_tracemalloc(
+    requisicoes: int = 100,
+    timeout_s: float = 60.0,
+    frames: int = 1,
+    formato: str = "json",
+    top: Optional[int] = None,
+    x_admin_token: Optional[str] = Header(None),
+):
+    """
+    Diff de alocações (tracemalloc) ao longo das próximas `requisicoes`
+    requisições HTTP (ou `timeout_s`): o que foi alocado e continua vivo,
+    por linha ou, com `frames` > 1, por pilha de alocação.
+    """
+    _exigir_admin(x_admin_token)
+    from src.monitoring import profiler
+
+    if formato not in ("collapsed", "json"):
+        raise HTTPException(status_code=400, detail="invalid input: formato deve ser 'collapsed' ou 'json'")
+    try:
+        diff = profiler.diff_tracemalloc(requisicoes, timeout_s, frames)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"invalid input: {exc}")
+    except profiler.PerfilOcupado as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return _saida_profiler(diff, formato, top)
+
+
+def _decodificar_ws(mensagem: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Frame WebSocket (texto JSON ou binário msgpack) -> lista de mensagens"""
+    if mensagem.get("text") is not None:
+        dados = json.loads(mensagem["text"])
+    else:
+        dados = msgpack.unpackb(mensagem["bytes"])
+    return dados if isinstance(dados, list) else [dados]
+
+
+def _features_da_mensagem(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Aceita {"features": {...}} ou a forma compacta {"x": [...]} na ordem de COLUNAS_ENTRADA"""
+    if "x" in item:
+        if len(item["x"]) != len(COLUNAS_ENTRADA):
+            raise ValueError(f"'x' deve ter {len(COLUNAS_ENTRADA)} valores na ordem {COLUNAS_ENTRADA}")
+        return dict(zip(COLUNAS_ENTRADA, item["x"]))
+    return item["features"]
+
+
+@app.websocket("/ws")
+async def websocket_scoring(
+    websocket: WebSocket,
+    threshold: float = 0.42,
+    model_name: Optional[str] = None,
+    model_version: Optional[int] = None,
+    model_alias: Optional[str] = None,
+):
+    """
+    Canal persistente de pontuação para chamadores de alta frequência.
+
+    Cada mensagem traz um "id" de correlação do cliente e as features
+    ({"id": ..., "features": {...}} ou {"id": ..., "x": [...]}); um frame pode
+    conter uma lista de mensagens. As mensagens entram no micro-batcher e as
+    respostas voltam fora de ordem, assim que cada lote termina, no mesmo
+    formato do frame recebido (JSON em texto ou msgpack em binário).
+    O modelo é escolhido na conexão: /ws?model_name=...&model_version=... (ou model_alias).
+    """
+    await websocket.accept()
+
+    modelo = None
+    if model_name is not None or model_version is not None or model_alias is not None:
+        try:
+            modelo = await asyncio.get_running_loop().run_in_executor(
+                None, runtime.selecionar_modelo, model_name, model_version, model_alias
+            )
+        except (FileNotFoundError, ValueError) as exc:
+            await websocket.send_text(json.dumps({"id": None, "erro": f"modelo indisponível: {exc}"}))
+            await websocket.close(code=1008)
+            return
+
+    batcher = obter_micro_batcher()
+    envio: asyncio.Queue = asyncio.Queue()
+    em_voo = asyncio.Semaphore(WS_MAX_EM_VOO)
+
+    async def enviar():
+        while True:
+            resposta, binario = await envio.get()
+            if binario:
+                await websocket.send_bytes(msgpack.packb(resposta))
+            else:
+                await websocket.send_text(json.dumps(resposta))
+
+    async def processar(item: Dict[str, Any], binario: bool):
+        correlacao = item.get("id") if isinstance(item, dict) else None
+        try:
+            resultado = await batcher.submeter(_features_da_mensagem(item), threshold, modelo)
+        except Exception as exc:
+            resultado = {"erro": str(exc)}
+        finally:
+            em_voo.release()
+        await envio.put(({"id": correlacao, **resultado}, binario))
+
+    tarefa_envio = asyncio.create_task(enviar())
+    tarefas = set()
+    try:
+        while True:
+            mensagem = await websocket.receive()
+            if mensagem["type"] == "websocket.disconnect":
+                break
+            binario = mensagem.get("bytes") is not None
+            if binario and msgpack is None:
+                await envio.put(({"id": None, "erro": "frames binários exigem o pacote msgpack no servidor"}, False))
+                continue
+            try:
+                itens = _decodificar_ws(mensagem)
+            except Exception as exc:
+                await envio.put(({"id": None, "erro": f"mensagem inválida: {exc}"}, binario))
+                continue
+
+            for item in itens:
+                await em_voo.acquire()
+                tarefa = asyncio.create_task(processar(item, binario))
+                tarefas.add(tarefa)
+                tarefa.add_done_callback(tarefas.discard)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        tarefa_envio.cancel()
+        for tarefa in tarefas:
+            tarefa.cancel()
+        logger.info("Conexão WebSocket encerrada")
+
+
 @app.post("/predict")
 def predict(payload: SingleInput):
     logger.info("=" * 80)
@@ -223,13 +948,7 @@ def predict(payload: SingleInput):
         logger.info(f"DataFrame criado com shape: {df.shape}, colunas: {list(df.columns)}")
         
         # Verificar se as colunas esperadas estão presentes
-        expected_cols = [
-            'person_income', 'person_home_ownership', 'person_emp_length',
-            'loan_intent', 'loan_grade', 'loan_amnt', 'loan_int_rate',
-            'loan_percent_income', 'cb_person_default_on_file',
-            'cb_person_cred_hist_length', 'faixa_etaria'
-        ]
-        missing_cols = set(expected_cols) - set(df.columns)
+        missing_cols = faltantes_entrada(df.columns)
         if missing_cols:
             error_msg = (
                 f"Colunas faltando: {missing_cols}\n"
@@ -261,16 +980,8 @@ def predict(payload: SingleInput):
             logger.info(f"preprocessor.pkl existe: {preprocessor_path.exists()}")
             logger.info(f"feature_selection.pkl existe: {feature_selection_path.exists()}")
         
-        feature_store = FeatureStore.load()
+        feature_store = runtime.obter_feature_store()
         logger.info("✓ FeatureStore carregado com sucesso")
-
-        logger.info("Aplicando transform_all...")
-        X_full = feature_store.transform_all(df)
-        logger.info(f"✓ X_full shape: {X_full.shape}, colunas: {list(X_full.columns)[:10]}...")
-
-        logger.info("Aplicando select_features...")
-        X_final = feature_store.select_features(X_full)
-        logger.info(f"✓ X_final shape: {X_final.shape}, colunas: {list(X_final.columns)[:10]}...")
     except Exception as exc:
         error_detail = str(exc)
         error_traceback = traceback.format_exc()
@@ -288,6 +999,8 @@ def predict(payload: SingleInput):
             }
         )
 
+    modelo = _selecionar_modelo(payload.model_name, payload.model_version, payload.model_alias)
+
     try:
         logger.info("=" * 80)
         logger.info("Iniciando carregamento do modelo...")
@@ -298,15 +1011,17 @@ def predict(payload: SingleInput):
         mlflow_uri = os.environ.get("MLFLOW_TRACKING_URI", "not set")
         logger.info(f"MLFLOW_TRACKING_URI: {mlflow_uri}")
         
-        modelo = ModelProducao()
-        logger.info("✓ Modelo carregado com sucesso")
-        
+        logger.info(f"✓ Modelo selecionado: {modelo.model_name} v{modelo.version}")
+
+        # Transformação + predição pelo backend do modelo (MODEL_BACKEND=onnx: uma chamada ao grafo)
         logger.info("Fazendo predição...")
-        logger.info(f"Shape do X_final para predição: {X_final.shape}")
-        proba = modelo.predict_proba(X_final)
+        X_final, proba = modelo.pontuar(df, feature_store)
+        logger.info(f"✓ X_final shape: {X_final.shape}, colunas: {list(X_final.columns)[:10]}...")
         logger.info(f"Shape do resultado da predição: {proba.shape}")
         prob_default = float(proba[0, 1])
         logger.info(f"✓ Probabilidade calculada: {prob_default}")
+
+        runtime.registrar_drift(X_final, proba[:, 1], modelo)
     except Exception as exc:
         error_detail = str(exc)
         error_traceback = traceback.format_exc()
@@ -340,7 +1055,14 @@ def predict(payload: SingleInput):
     # Calcula nível de confiança normalizado (0.0 a 1.0)
     nivel_confianca = min(confianca * 2, 1.0)
 
+    # Registro regulatório da decisão (assíncrono, sem I/O nesta requisição)
+    prediction_id = novo_prediction_id()
+    runtime.registrar_auditoria(
+        [prediction_id], [features_dict], [prob_default], [classificacao], threshold, modelo
+    )
+
     return {
+        "prediction_id": prediction_id,
         "probabilidade_default": round(prob_default, 4),
         "probabilidade_percentual": round(prob_default * 100, 2),
         "classificacao": classificacao,
@@ -348,47 +1070,25 @@ def predict(payload: SingleInput):
         "confianca": round(confianca, 4),
         "nivel_confianca": round(nivel_confianca, 4),
         "threshold_usado": threshold,
+        "model_name": modelo.model_name,
+        "model_version": modelo.version,
     }
 
 
 @app.post("/predict_batch")
 def predict_batch(payload: BatchInput):
-    try:
-        logger.info(f"Recebendo predição em lote com {len(payload.records)} registros")
-        df = pd.DataFrame(payload.records)
-        logger.info(f"DataFrame criado com shape: {df.shape}")
-    except Exception as exc:
-        logger.error(f"Erro ao criar DataFrame: {exc}\n{traceback.format_exc()}")
-        raise HTTPException(status_code=400, detail=f"invalid input: {exc}")
-
-    try:
-        # Carregar FeatureStore e aplicar pipeline completo
-        logger.info("Carregando FeatureStore...")
-        feature_store = FeatureStore.load()
-        logger.info("Aplicando transformações...")
-        X_full = feature_store.transform_all(df)
-        X_final = feature_store.select_features(X_full)
-        logger.info(f"Features transformadas: {X_final.shape}")
-    except Exception as exc:
-        error_detail = str(exc)
-        error_traceback = traceback.format_exc()
-        logger.error(f"Erro no FeatureStore: {error_detail}\n{error_traceback}")
-        # Retornar mais informações no erro para debug
-        return JSONResponse(
-            status_code=500,
-            content={
-                "error": "feature store error",
-                "message": error_detail,
-                "traceback": error_traceback
-            }
-        )
+    """
+    Pontua um lote isolando erros por linha: registros inválidos voltam com
+    status "erro" e código (coluna_ausente, valor_invalido, categoria_desconhecida)
+    e as linhas válidas são pontuadas em uma única passada.
+    """
+    logger.info(f"Recebendo predição em lote com {len(payload.records)} registros")
+    modelo = _selecionar_modelo(payload.model_name, payload.model_version, payload.model_alias)
+    threshold = float(payload.threshold)
 
     try:
-        logger.info("Carregando modelo e fazendo predições...")
-        modelo = ModelProducao()
-        proba = modelo.predict_proba(X_final)
-        prob_default = proba[:, 1].astype(float)
-        logger.info(f"Predições concluídas para {len(prob_default)} registros")
+        logger.info(f"Fazendo predições com {modelo.model_name} v{modelo.version}...")
+        results = pontuar_registros(payload.records, threshold, modelo)
     except Exception as exc:
         error_detail = str(exc)
         error_traceback = traceback.format_exc()
@@ -403,15 +1103,16 @@ def predict_batch(payload: BatchInput):
             }
         )
 
-    threshold = float(payload.threshold)
-    results = []
-    for p in prob_default:
-        classificacao = "Alto Risco" if p >= threshold else "Baixo Risco"
-        confianca = abs(p - threshold)
-        results.append({
-            "probabilidade_default": round(float(p), 4),
-            "classificacao": classificacao,
-            "confianca": round(float(confianca), 4),
-        })
-
-    return {"results": results, "threshold_usado": threshold}
+    resumo: Dict[str, int] = {}
+    for r in results:
+        codigo = r.get("codigo", "ok")
+        resumo[codigo] = resumo.get(codigo, 0) + 1
+    logger.info(f"Lote concluído: {resumo}")
+
+    return {
+        "results": results,
+        "resumo": resumo,
+        "threshold_usado": threshold,
+        "model_name": modelo.model_name,
+        "model_version": modelo.version,
+    }
@@ -0,0 +1,284 @@
+"""Autotuner de serving: escolhe workers, threads e micro-batch para esta máquina.
+
+Fase 1 mede `ModelProducao.predict_proba` em subprocessos isolados para cada
+combinação de threads do LightGBM, threads de BLAS (por padrão, potências de 2
+até o número de núcleos, como as do LightGBM) e tamanho de lote. Fase 2
+sobe a API (via src/api/run.py) para as melhores combinações, variando o
+número de workers, e mede a vazão ponta a ponta no canal /ws. A melhor
+configuração é gravada em configs/serving.json, lido por src/api/run.py.
+
+Run with:
+    python -m src.api.autotune
+    python -m src.api.autotune --sem-api --duracao 2
+    python -m src.api.autotune --blas-threads 1 2 --tamanhos-lote 64 256
+    python -m src.api.autotune --pinning --saida configs/serving.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.api.run import CONFIG_SERVING, VARIAVEIS_BLAS
+from src.utils.paths import BASE_DIR
+
+logger = logging.getLogger(__name__)
+
+TAMANHOS_LOTE_PADRAO = [16, 64, 256]
+TOP_FASE_1 = 3
+
+# Executado em subprocesso: variáveis de BLAS precisam valer antes do import do numpy
+_SCRIPT_PREDICT = """
+import json, time, logging
+logging.disable(logging.INFO)
+import numpy as np
+from src.data.datasets import carregar_dataset
+from src.features.feature_store import FeatureStore
+from src.models.predictor import ModelProducao
+modelo = ModelProducao(num_threads={lgbm_threads})
+X = carregar_dataset("X_test", colunas=FeatureStore.load().selected_features)
+lotes = [X.iloc[i:i + {tamanho_lote}] for i in range(0, len(X) - {tamanho_lote} + 1, {tamanho_lote})]
+modelo.predict_proba(lotes[0])
+linhas, latencias, inicio = 0, [], time.perf_counter()
+while time.perf_counter() - inicio < {duracao}:
+    for lote in lotes:
+        t = time.perf_counter()
+        modelo.predict_proba(lote)
+        latencias.append(time.perf_counter() - t)
+        linhas += len(lote)
+        if time.perf_counter() - inicio >= {duracao}:
+            break
+duracao = time.perf_counter() - inicio
+print(json.dumps({{"linhas_por_s": linhas / duracao, "p50_lote_ms": float(np.median(latencias)) * 1000}}))
+"""
+
+
+def cpus_disponiveis() -> List[int]:
+    """Núcleos que este processo pode usar (respeita cgroups/taskset)"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _potencias_ate(n: int) -> List[int]:
+    valores = {1, n}
+    k = 2
+    while k < n:
+        valores.add(k)
+        k *= 2
+    return sorted(valores)
+
+
+def _env_threads(blas_threads: int) -> Dict[str, str]:
+    return {**os.environ, **{v: str(blas_threads) for v in VARIAVEIS_BLAS}}
+
+
+def medir_predict_proba(lgbm_threads: int, blas_threads: int, tamanho_lote: int, duracao: float) -> Dict[str, float]:
+    """Vazão de predict_proba para uma combinação, em processo novo"""
+    codigo = _SCRIPT_PREDICT.format(lgbm_threads=lgbm_threads, tamanho_lote=tamanho_lote, duracao=duracao)
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=BASE_DIR, env=_env_threads(blas_threads),
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _aguardar_ready(base: str, timeout: float = 120.0) -> None:
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < timeout:
+        try:
+            with urllib.request.urlopen(f"{base}/ready", timeout=1) as resp:
+                if resp.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"API em {base} não ficou pronta em {timeout}s")
+
+
+async def _carga_ws(url: str, registros: List[Dict[str, Any]], duracao: float, concorrencia: int) -> float:
+    """Mantém `concorrencia` mensagens em voo no /ws por `duracao` segundos; retorna predições/s"""
+    import websockets
+
+    respondidas = 0
+    vagas = asyncio.Semaphore(concorrencia)
+    async with websockets.connect(url, max_size=None) as ws:
+        async def receber():
+            nonlocal respondidas
+            while True:
+                await ws.recv()
+                respondidas += 1
+                vagas.release()
+
+        receptor = asyncio.create_task(receber())
+        inicio = time.perf_counter()
+        i = 0
+        while time.perf_counter() - inicio < duracao:
+            await vagas.acquire()
+            await ws.send(json.dumps({"id": i, "features": registros[i % len(registros)]}))
+            i += 1
+        decorrido = time.perf_counter() - inicio
+        receptor.cancel()
+    return respondidas / decorrido
+
+
+async def _carga_multi_conexao(url: str, registros, duracao: float, concorrencia: int, conexoes: int) -> float:
+    """Uma conexão por worker, para que o balanceamento do SO distribua a carga"""
+    vazoes = await asyncio.gather(*(
+        _carga_ws(url, registros, duracao, max(1, concorrencia // conexoes)) for _ in range(conexoes)
+    ))
+    return float(sum(vazoes))
+
+
+def _encerrar_servidor(processo: subprocess.Popen, timeout: float = 30.0) -> None:
+    """SIGTERM no uvicorn; se não encerrar no prazo, SIGKILL no grupo inteiro (mestre e workers)"""
+    processo.terminate()
+    try:
+        processo.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        logger.warning(f"API (pid {processo.pid}) não encerrou em {timeout:.0f}s; forçando kill")
+        if hasattr(os, "killpg"):
+            os.killpg(processo.pid, signal.SIGKILL)
+        else:
+            processo.kill()
+        processo.wait()
+
+
+def medir_api(config: Dict[str, Any], registros: List[Dict[str, Any]], duracao: float) -> float:
+    """Sobe a API com a configuração candidata e mede predições/s no /ws"""
+    porta = _porta_livre()
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(config, f)
+        caminho_config = f.name
+
+    env = dict(os.environ, AUDIT_ENABLED="0")
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "src.api.run", "--config", caminho_config, "--host", "127.0.0.1", "--port", str(porta)],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        # Grupo de processos próprio: o kill alcança os workers do uvicorn
+        start_new_session=True,
+    )
+    try:
+        base = f"http://127.0.0.1:{porta}"
+        _aguardar_ready(base)
+        url = f"ws://127.0.0.1:{porta}/ws"
+        concorrencia = config["ws_batch_max"] * config["workers"] * 2
+        # Aquecimento: garante todos os workers com artefatos carregados
+        asyncio.run(_carga_multi_conexao(url, registros, 2.0, concorrencia, config["workers"] * 2))
+        return asyncio.run(_carga_multi_conexao(url, registros, duracao, concorrencia, config["workers"] * 2))
+    finally:
+        try:
+            _encerrar_servidor(processo)
+        finally:
+            os.unlink(caminho_config)
+
+
+def _amostra_registros(n: int = 1000) -> List[Dict[str, Any]]:
+    import pandas as pd
+    from src.features.feature_store import COLUNAS_ENTRADA, FeatureStore
+    from src.utils.paths import data_path
+
+    df = pd.read_csv(data_path("dados_novos.csv", "interim"), usecols=COLUNAS_ENTRADA).dropna()
+    df = df[FeatureStore.load().mascara_categorias_validas(df)]
+    return df.head(n).to_dict(orient="records")
+
+
+def autotune(
+    tamanhos_lote: List[int],
+    duracao: float,
+    com_api: bool = True,
+    pinning: bool = False,
+    blas_threads: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """Executa as duas fases e retorna a melhor configuração com as medições"""
+    cpus = cpus_disponiveis()
+    n_cpus = len(cpus)
+    opcoes_threads = _potencias_ate(n_cpus)
+    opcoes_blas = blas_threads or _potencias_ate(n_cpus)
+    print(f"CPUs disponíveis: {n_cpus} | threads LightGBM: {opcoes_threads} | "
+          f"threads BLAS: {opcoes_blas} | lotes: {tamanhos_lote}")
+
+    # Fase 1: predict_proba isolado
+    fase_1 = []
+    for lgbm_threads, blas_threads, tamanho_lote in itertools.product(opcoes_threads, opcoes_blas, tamanhos_lote):
+        medicao = medir_predict_proba(lgbm_threads, blas_threads, tamanho_lote, duracao)
+        fase_1.append({"lgbm_num_threads": lgbm_threads, "blas_threads": blas_threads,
+                       "ws_batch_max": tamanho_lote, **medicao})
+        print(f"  predict_proba threads={lgbm_threads} blas={blas_threads} lote={tamanho_lote}: "
+              f"{medicao['linhas_por_s']:.0f} linhas/s (p50 {medicao['p50_lote_ms']:.2f} ms)")
+    fase_1.sort(key=lambda m: m["linhas_por_s"], reverse=True)
+
+    if not com_api:
+        melhor = {k: fase_1[0][k] for k in ("lgbm_num_threads", "blas_threads", "ws_batch_max")}
+        melhor["workers"] = max(1, n_cpus // melhor["lgbm_num_threads"])
+        return {**melhor, "cpu_afinidade": None, "medicoes": {"predict_proba": fase_1}}
+
+    # Fase 2: API ponta a ponta, variando workers sem exceder os núcleos
+    registros = _amostra_registros()
+    fase_2 = []
+    for candidato in fase_1[:TOP_FASE_1]:
+        for workers in _potencias_ate(n_cpus):
+            if workers * candidato["lgbm_num_threads"] > n_cpus and workers > 1:
+                continue
+            config = {k: candidato[k] for k in ("lgbm_num_threads", "blas_threads", "ws_batch_max")}
+            config["workers"] = workers
+            usados = min(n_cpus, workers * config["lgbm_num_threads"])
+            config["cpu_afinidade"] = cpus[:usados] if pinning else None
+
+            vazao = medir_api(config, registros, duracao)
+            fase_2.append({**config, "predicoes_por_s": vazao})
+            print(f"  API workers={workers} threads={config['lgbm_num_threads']} "
+                  f"lote={config['ws_batch_max']}: {vazao:.0f} pred/s")
+
+    fase_2.sort(key=lambda m: m["predicoes_por_s"], reverse=True)
+    melhor = {k: v for k, v in fase_2[0].items() if k != "predicoes_por_s"}
+    return {**melhor, "medicoes": {"predict_proba": fase_1, "api": fase_2}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos-lote", type=int, nargs="+", default=TAMANHOS_LOTE_PADRAO)
+    parser.add_argument("--blas-threads", type=int, nargs="+", default=None,
+                        help="Threads de BLAS testadas (padrão: potências de 2 até o número de núcleos)")
+    parser.add_argument("--duracao", type=float, default=3.0, help="Segundos por medição")
+    parser.add_argument("--sem-api", action="store_true", help="Apenas a fase de predict_proba")
+    parser.add_argument("--pinning", action="store_true", help="Restringe o servidor aos núcleos usados")
+    parser.add_argument("--saida", type=Path, default=CONFIG_SERVING)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    resultado = autotune(
+        args.tamanhos_lote, args.duracao, com_api=not args.sem_api, pinning=args.pinning,
+        blas_threads=args.blas_threads,
+    )
+    resultado["cpus"] = len(cpus_disponiveis())
+    resultado["gerado_em"] = datetime.now(timezone.utc).isoformat()
+
+    args.saida.parent.mkdir(parents=True, exist_ok=True)
+    args.saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nMelhor configuração: workers={resultado['workers']} "
+          f"lgbm_num_threads={resultado['lgbm_num_threads']} blas_threads={resultado['blas_threads']} "
+          f"ws_batch_max={resultado['ws_batch_max']} afinidade={resultado['cpu_afinidade']}")
+    print(f"Salva em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Micro-batching assíncrono para canais de alta frequência (WebSocket).
+
+Mensagens individuais entram em uma fila asyncio; um único worker agrupa o que
+chegar em até `espera_max_ms` (ou `tamanho_max` itens) e pontua o lote inteiro
+com uma chamada ao FeatureStore + modelo em thread separada, sem bloquear o
+event loop. Cada chamador recebe seu resultado por um Future, na ordem em que
+os lotes terminam.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.api import runtime
+from src.features.validation import registros_para_dataframe, validar_lote
+from src.monitoring.audit import novo_prediction_id
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_MAX_PADRAO = int(os.environ.get("WS_BATCH_MAX", "256"))
+ESPERA_MAX_MS_PADRAO = float(os.environ.get("WS_BATCH_ESPERA_MS", "2"))
+
+
+def pontuar_registros(registros: List[Dict[str, Any]], threshold: float, modelo=None) -> List[Dict[str, Any]]:
+    """
+    Pontua um lote de registros brutos, isolando linhas inválidas.
+    A validação é vetorizada e as linhas válidas são pontuadas em uma única passada.
+    `modelo`: versão selecionada pelo chamador; None usa o modelo de produção.
+
+    Returns:
+        Lista na ordem de `registros`; cada item tem "status" ("ok" ou "erro") e,
+        nos inválidos, "codigo" e "erro"
+    """
+    feature_store = runtime.obter_feature_store()
+    modelo = modelo or runtime.obter_modelo()
+
+    df, ausentes = registros_para_dataframe(registros)
+    validacao = validar_lote(feature_store, df, ausentes)
+
+    resultados: List[Dict[str, Any]] = [
+        {"status": "erro", "codigo": codigo, "erro": erro}
+        for codigo, erro in zip(validacao.codigos, validacao.erros)
+    ]
+
+    indices = np.flatnonzero(validacao.validas)
+    if len(indices) == 0:
+        return resultados
+
+    X_final, proba = modelo.pontuar(validacao.df.iloc[indices], feature_store)
+    prob = proba[:, 1].astype(float)
+    runtime.registrar_drift(X_final, prob, modelo)
+
+    classificacoes = np.where(prob >= threshold, "Alto Risco", "Baixo Risco")
+    prediction_ids = [novo_prediction_id() for _ in indices]
+    for i, pid, p, c in zip(indices, prediction_ids, prob, classificacoes):
+        resultados[i] = {
+            "status": "ok",
+            "prediction_id": pid,
+            "probabilidade_default": round(float(p), 4),
+            "classificacao": str(c),
+            "confianca": round(abs(float(p) - threshold), 4),
+        }
+
+    runtime.registrar_auditoria(
+        prediction_ids, [registros[i] for i in indices], prob, classificacoes.tolist(), threshold, modelo
+    )
+    return resultados
+
+
+class MicroBatcher:
+    """
+    Agrupa requisições individuais em lotes para uma única inferência.
+
+    Args:
+        tamanho_max: Máximo de itens por lote
+        espera_max_ms: Tempo máximo que o primeiro item espera por companhia
+    """
+
+    def __init__(self, tamanho_max: int = TAMANHO_MAX_PADRAO, espera_max_ms: float = ESPERA_MAX_MS_PADRAO):
+        self.tamanho_max = tamanho_max
+        self.espera_max = espera_max_ms / 1000.0
+        self._fila: "asyncio.Queue[Tuple[Dict[str, Any], Tuple[float, Any], asyncio.Future]]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    def iniciar(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._loop())
+
+    async def submeter(self, registro: Dict[str, Any], threshold: float, modelo=None) -> Dict[str, Any]:
+        """Enfileira um registro e aguarda o resultado do lote em que ele entrar"""
+        self.iniciar()
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((registro, (threshold, modelo), futuro))
+        return await futuro
+
+    async def _coletar(self) -> List[Tuple[Dict[str, Any], Tuple[float, Any], asyncio.Future]]:
+        lote = [await self._fila.get()]
+        limite = asyncio.get_running_loop().time() + self.espera_max
+        while len(lote) < self.tamanho_max:
+            # Esvazia o que já está na fila sem esperar
+            while not self._fila.empty() and len(lote) < self.tamanho_max:
+                lote.append(self._fila.get_nowait())
+            restante = limite - asyncio.get_running_loop().time()
+            if len(lote) >= self.tamanho_max or restante <= 0:
+                break
+            try:
+                lote.append(await asyncio.wait_for(self._fila.get(), restante))
+            except asyncio.TimeoutError:
+                break
+        return lote
+
+    async def _loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = await self._coletar()
+
+            # Um lote por (threshold, modelo) (normalmente há apenas um)
+            por_grupo: Dict[tuple, list] = {}
+            for item in lote:
+                por_grupo.setdefault(item[1], []).append(item)
+
+            for (threshold, modelo), itens in por_grupo.items():
+                argumentos = (threshold,) if modelo is None else (threshold, modelo)
+                try:
+                    resultados = await loop.run_in_executor(
+                        None, pontuar_registros, [r for r, _, _ in itens], *argumentos
+                    )
+                    for (_, _, futuro), resultado in zip(itens, resultados):
+                        if not futuro.done():
+                            futuro.set_result(resultado)
+                except Exception as e:
+                    logger.error(f"Erro ao pontuar lote de {len(itens)} registros: {e}")
+                    for _, _, futuro in itens:
+                        if not futuro.done():
+                            futuro.set_exception(e)
+
+
+_batcher: Optional[MicroBatcher] = None
+
+
+def obter_micro_batcher() -> MicroBatcher:
+    """Batcher único do processo, ligado ao event loop do servidor"""
+    global _batcher
+    if _batcher is None:
+        _batcher = MicroBatcher()
+    return _batcher
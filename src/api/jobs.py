@@ -0,0 +1,744 @@
+"""Fila local de jobs de pontuação em massa (SQLite + processos worker).
+
+Repontuar milhões de linhas não cabe em uma requisição HTTP: a API apenas
+enfileira o job (arquivo em data/ ou upload) e devolve o id. Processos worker
+mantêm FeatureStore e modelo carregados, reservam jobs na fila SQLite, leem a
+entrada em chunks (src.models.portfolio.iterar_chunks), validam cada chunk
+(src.features.validation) e gravam o resultado em Parquet.
+
+- Progresso é gravado na fila a cada chunk; o heartbeat, por uma thread a
+  cada INTERVALO_HEARTBEAT_S segundos, mesmo durante um chunk longo
+- Cancelamento: job pendente sai da fila na hora; em execução, o worker para
+  no próximo chunk e descarta a saída parcial
+- Crash de worker: o supervisor recoloca o job na fila (até `max_tentativas`);
+  jobs sem heartbeat há mais de JOBS_HEARTBEAT_TIMEOUT segundos também voltam
+- Um supervisor por fila: com vários workers do uvicorn, só o processo que
+  obtém o lock `<fila>.supervisor.lock` sobe workers; os demais assumem se
+  ele morrer
+- Isolamento do /predict: poucos workers (JOBS_WORKERS), com prioridade
+  reduzida (nice) e JOBS_LGBM_THREADS threads de LightGBM/BLAS cada (padrão
+  1), independente das threads da API
+
+Run with:
+    python -m src.api.jobs --workers 2          # workers fora do processo da API
+    python -m src.api.jobs --listar
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl  # eleição do supervisor entre processos (POSIX)
+except ImportError:
+    fcntl = None
+
+from src.utils.paths import data_path
+
+logger = logging.getLogger(__name__)
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+FALHOU = "falhou"
+CANCELADO = "cancelado"
+STATUS_FINAIS = (CONCLUIDO, FALHOU, CANCELADO)
+
+CHUNK_SIZE_JOBS = 50_000
+MAX_TENTATIVAS_PADRAO = 3
+INTERVALO_OCIOSO_S = 0.5
+INTERVALO_HEARTBEAT_S = 10.0
+
+
+class JobPerdido(RuntimeError):
+    """O job foi recuperado ou finalizado por outro processo: este worker não é mais o dono"""
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    entrada TEXT NOT NULL,
+    entrada_temporaria INTEGER NOT NULL DEFAULT 0,
+    parametros TEXT NOT NULL,
+    saida TEXT,
+    criado_em REAL NOT NULL,
+    iniciado_em REAL,
+    concluido_em REAL,
+    heartbeat REAL,
+    worker_pid INTEGER,
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    max_tentativas INTEGER NOT NULL,
+    cancelar INTEGER NOT NULL DEFAULT 0,
+    linhas_total INTEGER,
+    linhas_processadas INTEGER NOT NULL DEFAULT 0,
+    resumo TEXT,
+    model_name TEXT,
+    model_version INTEGER,
+    erro TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, criado_em);
+"""
+
+
+def caminho_fila() -> Path:
+    """Banco da fila (JOBS_DB ou data/jobs/fila.sqlite)"""
+    return Path(os.environ.get("JOBS_DB") or data_path("fila.sqlite", "jobs"))
+
+
+def caminho_entrada(job_id: str, sufixo: str) -> Path:
+    """Destino de um arquivo enviado por upload"""
+    return data_path(f"{job_id}{sufixo}", "jobs/entradas")
+
+
+def caminho_resultado(job_id: str) -> Path:
+    return data_path(f"{job_id}.parquet", "jobs/resultados")
+
+
+def caminho_temporario(job: Dict[str, Any]) -> Path:
+    """Saída parcial de uma tentativa: um worker antigo não escreve no arquivo da tentativa nova"""
+    return caminho_resultado(job["id"]).with_name(f"{job['id']}.t{job['tentativas']}.parquet.tmp")
+
+
+def novo_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+class FilaJobs:
+    """
+    Fila persistente em SQLite, segura entre processos.
+
+    Cada operação abre a própria conexão (modo WAL); a reserva de um job é
+    feita em uma transação BEGIN IMMEDIATE, então dois workers nunca pegam
+    o mesmo job.
+    """
+
+    def __init__(self, caminho: Optional[Path] = None):
+        self.caminho = Path(caminho) if caminho else caminho_fila()
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        with self._conectar() as conexao:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.executescript(_SCHEMA)
+
+    @contextmanager
+    def _conectar(self) -> Iterator[sqlite3.Connection]:
+        """Conexão em autocommit, sempre fechada (uma transação aberta é desfeita no close)"""
+        conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+        conexao.row_factory = sqlite3.Row
+        try:
+            yield conexao
+        finally:
+            conexao.close()
+
+    @staticmethod
+    def _para_dict(linha: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(linha)
+        job["parametros"] = json.loads(job["parametros"])
+        job["resumo"] = json.loads(job["resumo"]) if job["resumo"] else {}
+        job["cancelar"] = bool(job["cancelar"])
+        job["entrada_temporaria"] = bool(job["entrada_temporaria"])
+        return job
+
+    # ------------------------------------------------------------------
+    # Lado da API
+    # ------------------------------------------------------------------
+
+    def submeter(
+        self,
+        entrada: Path,
+        parametros: Dict[str, Any],
+        job_id: Optional[str] = None,
+        entrada_temporaria: bool = False,
+        max_tentativas: int = MAX_TENTATIVAS_PADRAO,
+    ) -> str:
+        job_id = job_id or novo_job_id()
+        with self._conectar() as conexao:
+            conexao.execute(
+                "INSERT INTO jobs (id, status, entrada, entrada_temporaria, parametros, criado_em, max_tentativas) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, PENDENTE, str(entrada), int(entrada_temporaria), json.dumps(parametros),
+                 time.time(), max_tentativas),
+            )
+        logger.info(f"Job {job_id} enfileirado ({entrada})")
+        return job_id
+
+    def obter(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._conectar() as conexao:
+            linha = conexao.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._para_dict(linha) if linha else None
+
+    def listar(self, status: Optional[str] = None, limite: int = 100) -> List[Dict[str, Any]]:
+        consulta, argumentos = "SELECT * FROM jobs", []
+        if status:
+            consulta += " WHERE status = ?"
+            argumentos.append(status)
+        consulta += " ORDER BY criado_em DESC LIMIT ?"
+        with self._conectar() as conexao:
+            linhas = conexao.execute(consulta, (*argumentos, limite)).fetchall()
+        return [self._para_dict(linha) for linha in linhas]
+
+    def contar_ativos(self) -> int:
+        """Jobs pendentes ou em execução (limite de fila da API)"""
+        with self._conectar() as conexao:
+            return conexao.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (PENDENTE, EXECUTANDO)
+            ).fetchone()[0]
+
+    def cancelar(self, job_id: str) -> Optional[str]:
+        """
+        Cancela um job. Pendente: cancelado na hora. Em execução: sinaliza o
+        worker, que para no próximo chunk. Retorna o status resultante (None se não existe).
+        """
+        with self._conectar() as conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            linha = conexao.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if linha is None:
+                conexao.execute("ROLLBACK")
+                return None
+            status = linha["status"]
+            if status == PENDENTE:
+                conexao.execute(
+                    "UPDATE jobs SET status = ?, concluido_em = ? WHERE id = ?", (CANCELADO, time.time(), job_id)
+                )
+                status = CANCELADO
+            elif status == EXECUTANDO:
+                conexao.execute("UPDATE jobs SET cancelar = 1 WHERE id = ?", (job_id,))
+            conexao.execute("COMMIT")
+        return status
+
+    # ------------------------------------------------------------------
+    # Lado do worker
+    # ------------------------------------------------------------------
+
+    def reservar(self, worker_pid: int) -> Optional[Dict[str, Any]]:
+        """Reserva o job pendente mais antigo para o worker (None se a fila está vazia)"""
+        agora = time.time()
+        with self._conectar() as conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            linha = conexao.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY criado_em LIMIT 1", (PENDENTE,)
+            ).fetchone()
+            if linha is None:
+                conexao.execute("ROLLBACK")
+                return None
+            conexao.execute(
+                "UPDATE jobs SET status = ?, worker_pid = ?, iniciado_em = ?, heartbeat = ?, "
+                "tentativas = tentativas + 1, linhas_processadas = 0, resumo = NULL, erro = NULL WHERE id = ?",
+                (EXECUTANDO, worker_pid, agora, agora, linha["id"]),
+            )
+            conexao.execute("COMMIT")
+        return self.obter(linha["id"])
+
+    @staticmethod
+    def _condicao_dono(job_id: str, worker_pid: Optional[int]):
+        """WHERE do job; com `worker_pid`, só enquanto o job está em execução por esse worker"""
+        if worker_pid is None:
+            return "id = ?", (job_id,)
+        return "id = ? AND worker_pid = ? AND status = ?", (job_id, worker_pid, EXECUTANDO)
+
+    def registrar_progresso(
+        self,
+        job_id: str,
+        linhas_processadas: int,
+        resumo: Dict[str, int],
+        linhas_total: Optional[int] = None,
+        worker_pid: Optional[int] = None,
+    ) -> bool:
+        """
+        Atualiza progresso e heartbeat; retorna True se o cancelamento foi pedido.
+        Com `worker_pid`, levanta JobPerdido se o job não é mais deste worker.
+        """
+        condicao, argumentos = self._condicao_dono(job_id, worker_pid)
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                "UPDATE jobs SET linhas_processadas = ?, resumo = ?, heartbeat = ?, "
+                f"linhas_total = COALESCE(?, linhas_total) WHERE {condicao}",
+                (linhas_processadas, json.dumps(resumo), time.time(), linhas_total, *argumentos),
+            )
+            if worker_pid is not None and cursor.rowcount == 0:
+                raise JobPerdido(f"Job {job_id} não está mais com o worker {worker_pid}")
+            linha = conexao.execute("SELECT cancelar FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(linha and linha["cancelar"])
+
+    def registrar_heartbeat(self, job_id: str, worker_pid: int) -> bool:
+        """
+        Renova o heartbeat do job se ele ainda está em execução por este
+        worker; retorna False se o job foi recuperado ou finalizado.
+        """
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = ? AND worker_pid = ?",
+                (time.time(), job_id, EXECUTANDO, worker_pid),
+            )
+        return cursor.rowcount > 0
+
+    def finalizar(self, job_id: str, status: str, worker_pid: Optional[int] = None, **campos) -> None:
+        """
+        Grava o status final (concluido, falhou ou cancelado) e campos adicionais.
+        Com `worker_pid`, levanta JobPerdido se o job não é mais deste worker.
+        """
+        campos.update(status=status, concluido_em=time.time())
+        if "resumo" in campos:
+            campos["resumo"] = json.dumps(campos["resumo"])
+        atribuicoes = ", ".join(f"{c} = ?" for c in campos)
+        condicao, argumentos = self._condicao_dono(job_id, worker_pid)
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                f"UPDATE jobs SET {atribuicoes} WHERE {condicao}", (*campos.values(), *argumentos)
+            )
+        if worker_pid is not None and cursor.rowcount == 0:
+            raise JobPerdido(f"Job {job_id} não está mais com o worker {worker_pid}")
+
+    def recuperar(self, worker_pid: Optional[int] = None, heartbeat_antes_de: Optional[float] = None) -> List[str]:
+        """
+        Devolve à fila os jobs em execução de um worker que morreu (por pid) ou
+        sem heartbeat desde `heartbeat_antes_de`. Jobs que esgotaram as
+        tentativas (ou cujo cancelamento foi pedido) são finalizados.
+        """
+        condicoes, argumentos = [], []
+        if worker_pid is not None:
+            condicoes.append("worker_pid = ?")
+            argumentos.append(worker_pid)
+        if heartbeat_antes_de is not None:
+            condicoes.append("heartbeat < ?")
+            argumentos.append(heartbeat_antes_de)
+        if not condicoes:
+            return []
+
+        recuperados = []
+        with self._conectar() as conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            linhas = conexao.execute(
+                f"SELECT id, tentativas, max_tentativas, cancelar FROM jobs "
+                f"WHERE status = ? AND ({' OR '.join(condicoes)})",
+                (EXECUTANDO, *argumentos),
+            ).fetchall()
+            agora = time.time()
+            for linha in linhas:
+                if linha["cancelar"]:
+                    conexao.execute(
+                        "UPDATE jobs SET status = ?, concluido_em = ? WHERE id = ?", (CANCELADO, agora, linha["id"])
+                    )
+                elif linha["tentativas"] >= linha["max_tentativas"]:
+                    conexao.execute(
+                        "UPDATE jobs SET status = ?, concluido_em = ?, erro = ? WHERE id = ?",
+                        (FALHOU, agora, f"Worker interrompido em {linha['tentativas']} tentativas", linha["id"]),
+                    )
+                else:
+                    conexao.execute(
+                        "UPDATE jobs SET status = ?, worker_pid = NULL, heartbeat = NULL WHERE id = ?",
+                        (PENDENTE, linha["id"]),
+                    )
+                    recuperados.append(linha["id"])
+            conexao.execute("COMMIT")
+
+        for job_id in recuperados:
+            logger.warning(f"Job {job_id} devolvido à fila após falha do worker")
+        return recuperados
+
+
+def contar_linhas(caminho: Path) -> Optional[int]:
+    """Total de linhas da entrada sem carregá-la (metadados Parquet/Feather; quebras de linha no CSV)"""
+    sufixo = caminho.suffix.lower()
+    try:
+        if sufixo == ".parquet":
+            import pyarrow.parquet as pq
+            return pq.ParquetFile(caminho).metadata.num_rows
+        if sufixo == ".feather":
+            import pyarrow.dataset as ds
+            return ds.dataset(caminho, format="ipc").count_rows()
+        if sufixo == ".csv":
+            linhas = 0
+            with open(caminho, "rb") as f:
+                while bloco := f.read(1 << 20):
+                    linhas += bloco.count(b"\n")
+            return max(linhas - 1, 0)
+    except Exception as e:
+        logger.warning(f"Não foi possível contar as linhas de {caminho}: {e}")
+    return None
+
+
+def _schema_resultado():
+    import pyarrow as pa
+    return pa.schema([
+        ("linha", pa.int64()),
+        ("status", pa.string()),
+        ("erro", pa.string()),
+        ("probabilidade_default", pa.float64()),
+        ("classificacao", pa.string()),
+    ])
+
+
+@contextmanager
+def _heartbeat(fila: FilaJobs, job_id: str, worker_pid: int, intervalo: float) -> Iterator[None]:
+    """Thread que renova o heartbeat do job enquanto o bloco executa"""
+    parar = threading.Event()
+
+    def renovar():
+        while not parar.wait(intervalo):
+            try:
+                if not fila.registrar_heartbeat(job_id, worker_pid):
+                    return
+            except Exception as e:
+                logger.warning(f"Falha ao renovar o heartbeat do job {job_id}: {e}")
+
+    thread = threading.Thread(target=renovar, name=f"heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        parar.set()
+        thread.join()
+
+
+def executar_job(
+    fila: FilaJobs,
+    job: Dict[str, Any],
+    feature_store,
+    modelo,
+    intervalo_heartbeat: float = INTERVALO_HEARTBEAT_S,
+) -> str:
+    """
+    Executa o job com o heartbeat renovado em background (um chunk pode
+    demorar mais que o timeout do supervisor). A entrada temporária (upload)
+    é removida também quando o job falha, mas não se o job foi perdido para
+    outro worker: a tentativa nova ainda vai lê-la.
+
+    Returns:
+        Status final do job
+
+    Raises:
+        JobPerdido: o job foi recuperado por outro worker durante a execução
+    """
+    try:
+        with _heartbeat(fila, job["id"], job["worker_pid"], intervalo_heartbeat):
+            status = _pontuar_job(fila, job, feature_store, modelo)
+    except Exception:
+        caminho_temporario(job).unlink(missing_ok=True)
+        # Só apaga o upload se o job ainda é deste worker (não vale para JobPerdido)
+        if job["entrada_temporaria"] and fila.registrar_heartbeat(job["id"], job["worker_pid"]):
+            Path(job["entrada"]).unlink(missing_ok=True)
+        raise
+    if job["entrada_temporaria"]:
+        Path(job["entrada"]).unlink(missing_ok=True)
+    return status
+
+
+def _pontuar_job(fila: FilaJobs, job: Dict[str, Any], feature_store, modelo) -> str:
+    """
+    Pontua a entrada do job chunk a chunk e grava o Parquet de resultado.
+    A saída é escrita em um arquivo temporário da tentativa e renomeada só ao
+    final, se o job ainda for deste worker; progresso e status final também
+    só são gravados enquanto ele for o dono (senão, JobPerdido).
+
+    Returns:
+        Status final do job
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from src.features.validation import validar_lote
+    from src.models.portfolio import iterar_chunks
+
+    job_id = job["id"]
+    worker_pid = job["worker_pid"]
+    parametros = job["parametros"]
+    threshold = float(parametros.get("threshold", 0.42))
+    entrada = Path(job["entrada"])
+    saida = caminho_resultado(job_id)
+    temporario = caminho_temporario(job)
+    schema = _schema_resultado()
+
+    linhas_total = contar_linhas(entrada)
+    processadas = 0
+    resumo: Dict[str, int] = {}
+    cancelado = False
+
+    with pq.ParquetWriter(temporario, schema) as escritor:
+        for chunk in iterar_chunks(entrada, int(parametros.get("chunk_size", CHUNK_SIZE_JOBS))):
+            validacao = validar_lote(feature_store, chunk)
+            validas = validacao.validas
+            prob = np.full(len(chunk), np.nan)
+            if validas.any():
+                _, proba = modelo.pontuar(validacao.df[validas], feature_store)
+                prob[validas] = proba[:, 1]
+
+            classificacao = np.where(prob >= threshold, "Alto Risco", "Baixo Risco")
+            tabela = pd.DataFrame({
+                "linha": np.arange(processadas, processadas + len(chunk), dtype=np.int64),
+                "status": validacao.codigos.astype(str),
+                "erro": validacao.erros,
+                "probabilidade_default": prob,
+                "classificacao": np.where(validas, classificacao, None),
+            })
+            escritor.write_table(pa.Table.from_pandas(tabela, schema=schema, preserve_index=False))
+
+            processadas += len(chunk)
+            for codigo, quantidade in validacao.contagem().items():
+                resumo[codigo] = resumo.get(codigo, 0) + quantidade
+            if fila.registrar_progresso(job_id, processadas, resumo, linhas_total, worker_pid=worker_pid):
+                cancelado = True
+                break
+
+    if cancelado:
+        temporario.unlink(missing_ok=True)
+        status = CANCELADO
+        fila.finalizar(job_id, status, worker_pid=worker_pid, linhas_processadas=processadas, resumo=resumo)
+    else:
+        # Um worker que perdeu o job (heartbeat expirado) não sobrescreve o resultado da tentativa nova
+        if not fila.registrar_heartbeat(job_id, worker_pid):
+            raise JobPerdido(f"Job {job_id} não está mais com o worker {worker_pid}")
+        temporario.replace(saida)
+        status = CONCLUIDO
+        fila.finalizar(
+            job_id, status, worker_pid=worker_pid, saida=str(saida), linhas_processadas=processadas,
+            linhas_total=processadas, resumo=resumo, model_name=modelo.model_name, model_version=getattr(modelo, "version", None),
+        )
+
+    logger.info(f"Job {job_id} {status}: {processadas} linhas ({resumo})")
+    return status
+
+
+def _limitar_recursos() -> int:
+    """
+    Prioridade reduzida e JOBS_LGBM_THREADS threads de cálculo por worker (padrão 1):
+    o /predict tem precedência na CPU. As variáveis são sobrescritas, não só
+    definidas: o worker herda do processo da API as threads do configs/serving.json.
+
+    Returns:
+        Threads de LightGBM/BLAS do worker
+    """
+    from src.api.run import VARIAVEIS_BLAS
+
+    try:
+        os.nice(int(os.environ.get("JOBS_NICE", "10")))
+    except (AttributeError, OSError):
+        pass
+    threads = max(1, int(os.environ.get("JOBS_LGBM_THREADS", "1")))
+    os.environ["LGBM_NUM_THREADS"] = str(threads)
+    for variavel in VARIAVEIS_BLAS:
+        os.environ[variavel] = str(threads)
+    try:
+        # numpy/BLAS já foram importados neste ponto: limita em tempo de execução
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+    return threads
+
+
+def loop_worker(caminho: Optional[str] = None, parar: Optional[threading.Event] = None) -> None:
+    """
+    Laço de um processo worker: carrega os artefatos uma vez e consome a fila.
+    Falhas do job (entrada ilegível, modelo inexistente) finalizam o job como
+    `falhou`, sem nova tentativa; só a morte do processo gera retry.
+    """
+    from src.api import runtime
+
+    # Modelos deste processo (produção, pool e aluno do modo escalonado) com as threads do worker
+    runtime.definir_threads_inferencia(_limitar_recursos())
+    fila = FilaJobs(caminho)
+    pid = os.getpid()
+    # Várias renovações dentro do timeout do supervisor, mesmo com um timeout curto
+    timeout_heartbeat = float(os.environ.get("JOBS_HEARTBEAT_TIMEOUT", "300"))
+    intervalo_heartbeat = min(INTERVALO_HEARTBEAT_S, timeout_heartbeat / 3)
+
+    # Artefatos quentes: o primeiro job não paga a carga
+    feature_store = runtime.obter_feature_store()
+    runtime.obter_modelo()
+    logger.info(f"Worker de jobs {pid} pronto")
+
+    while parar is None or not parar.is_set():
+        job = fila.reservar(pid)
+        if job is None:
+            time.sleep(INTERVALO_OCIOSO_S)
+            continue
+
+        logger.info(f"Worker {pid} executando job {job['id']} (tentativa {job['tentativas']})")
+        try:
+            parametros = job["parametros"]
+            modelo = runtime.selecionar_modelo(
+                parametros.get("model_name"), parametros.get("model_version"), parametros.get("model_alias")
+            )
+            executar_job(fila, job, feature_store, modelo, intervalo_heartbeat)
+        except JobPerdido as e:
+            # Outro worker já refaz o job: esta tentativa é descartada sem tocar na fila
+            logger.warning(f"{e}; tentativa {job['tentativas']} descartada")
+        except Exception as e:
+            logger.error(f"Job {job['id']} falhou: {e}")
+            try:
+                fila.finalizar(job["id"], FALHOU, worker_pid=pid, erro=str(e))
+            except JobPerdido:
+                logger.warning(f"Job {job['id']} já não era deste worker; falha não registrada")
+
+
+def _processo_worker(caminho: str) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    loop_worker(caminho)
+
+
+class SupervisorJobs:
+    """
+    Mantém `n_workers` processos worker vivos e recupera jobs de workers mortos.
+
+    Processos são criados com "spawn" (o processo da API tem threads ativas).
+    A cada `intervalo` segundos: worker morto -> jobs dele voltam para a fila e
+    um novo processo é criado; jobs sem heartbeat há `timeout_heartbeat`
+    segundos (workers de outro processo) também voltam.
+    """
+
+    def __init__(
+        self,
+        n_workers: int = 1,
+        caminho: Optional[Path] = None,
+        intervalo: float = 2.0,
+        timeout_heartbeat: float = 300.0,
+    ):
+        self.n_workers = n_workers
+        self.caminho = str(caminho or caminho_fila())
+        self.fila = FilaJobs(self.caminho)
+        self.intervalo = intervalo
+        self.timeout_heartbeat = timeout_heartbeat
+        self._contexto = multiprocessing.get_context("spawn")
+        self._processos: List[multiprocessing.Process] = []
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_eleicao: Optional[threading.Thread] = None
+        self._arquivo_lock = None
+        self.eleito = False
+        self.reinicios = 0
+
+    def _iniciar_processo(self) -> multiprocessing.Process:
+        processo = self._contexto.Process(
+            target=_processo_worker, args=(self.caminho,), name="jobs-worker", daemon=True
+        )
+        processo.start()
+        return processo
+
+    def iniciar(self) -> None:
+        if self._thread is not None:
+            return
+        self._processos = [self._iniciar_processo() for _ in range(self.n_workers)]
+        self._thread = threading.Thread(target=self._loop, name="jobs-supervisor", daemon=True)
+        self._thread.start()
+        logger.info(f"Supervisor de jobs iniciado com {self.n_workers} worker(s)")
+
+    def _tentar_lock(self) -> bool:
+        """Tenta o lock exclusivo da fila sem bloquear; mantido enquanto o processo viver"""
+        if self._arquivo_lock is None:
+            self._arquivo_lock = open(f"{self.caminho}.supervisor.lock", "a")
+        try:
+            fcntl.flock(self._arquivo_lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def _aguardar_eleicao(self) -> None:
+        while not self._parar.is_set():
+            if self._tentar_lock():
+                if not self._parar.is_set():
+                    self.eleito = True
+                    logger.info(f"Processo {os.getpid()} eleito supervisor da fila {self.caminho}")
+                    self.iniciar()
+                return
+            self._parar.wait(self.intervalo)
+
+    def iniciar_quando_eleito(self) -> None:
+        """
+        Inicia os workers só se este processo for o supervisor da fila.
+
+        Cada worker do uvicorn cria o seu SupervisorJobs, mas apenas o que obtém
+        o lock `<fila>.supervisor.lock` sobe processos worker; os demais tentam
+        de novo a cada `intervalo` segundos e assumem se o eleito morrer (o SO
+        libera o lock). Sem fcntl (Windows), inicia direto.
+        """
+        if fcntl is None:
+            self.eleito = True
+            self.iniciar()
+            return
+        if self._thread_eleicao is not None:
+            return
+        self._thread_eleicao = threading.Thread(
+            target=self._aguardar_eleicao, name="jobs-eleicao", daemon=True
+        )
+        self._thread_eleicao.start()
+
+    def verificar(self) -> None:
+        """Uma rodada de supervisão (também chamada pelo laço em background)"""
+        for i, processo in enumerate(self._processos):
+            if processo.is_alive():
+                continue
+            logger.warning(f"Worker de jobs {processo.pid} terminou (exit code {processo.exitcode}); reiniciando")
+            self.fila.recuperar(worker_pid=processo.pid)
+            if not self._parar.is_set():
+                self._processos[i] = self._iniciar_processo()
+                self.reinicios += 1
+        self.fila.recuperar(heartbeat_antes_de=time.time() - self.timeout_heartbeat)
+
+    def _loop(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception as e:
+                logger.error(f"Erro na supervisão dos jobs: {e}")
+
+    def estado(self) -> Dict[str, Any]:
+        return {
+            "eleito": self.eleito,
+            "workers": [{"pid": p.pid, "vivo": p.is_alive()} for p in self._processos],
+            "reinicios": self.reinicios,
+        }
+
+    def parar(self, timeout: float = 5.0) -> None:
+        """Encerra os workers; jobs interrompidos voltam para a fila"""
+        self._parar.set()
+        if self._thread_eleicao is not None:
+            self._thread_eleicao.join(timeout)
+        for processo in self._processos:
+            processo.terminate()
+        for processo in self._processos:
+            processo.join(timeout)
+            self.fila.recuperar(worker_pid=processo.pid)
+        if self._arquivo_lock is not None:
+            # Fechar libera o lock: outro processo assume a supervisão
+            self._arquivo_lock.close()
+            self._arquivo_lock = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("JOBS_WORKERS", "1")))
+    parser.add_argument("--fila", type=Path, default=None, help="Padrão: JOBS_DB ou data/jobs/fila.sqlite")
+    parser.add_argument("--timeout-heartbeat", type=float, default=float(os.environ.get("JOBS_HEARTBEAT_TIMEOUT", "300")))
+    parser.add_argument("--listar", action="store_true", help="Apenas lista os jobs e sai")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    if args.listar:
+        for job in FilaJobs(args.fila).listar():
+            print(f"{job['id']}  {job['status']:<10} {job['linhas_processadas']}/{job['linhas_total']}  {job['entrada']}")
+        return
+
+    supervisor = SupervisorJobs(args.workers, args.fila, timeout_heartbeat=args.timeout_heartbeat)
+    supervisor.iniciar_quando_eleito()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        supervisor.parar()
+
+
+if __name__ == "__main__":
+    main()
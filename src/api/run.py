@@ -1,12 +1,84 @@
 """Utility to run the FastAPI app with Uvicorn.
 
+Lê configs/serving.json (gerado por `python -m src.api.autotune`), se existir:
+workers do uvicorn, threads do LightGBM e de BLAS, tamanho do micro-batch e
+afinidade de CPU. Variáveis de ambiente já definidas têm precedência.
+
 Run with:
     python -m src.api.run
+    python -m src.api.run --config configs/serving.json --port 8000
 """
+import argparse
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
 import uvicorn
 
+from src.utils.paths import CONFIGS_DIR
+
+logger = logging.getLogger(__name__)
+
+CONFIG_SERVING = CONFIGS_DIR / "serving.json"
+
+# Variáveis de threads de BLAS/OpenMP lidas por numpy/scipy/LightGBM no import
+VARIAVEIS_BLAS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def carregar_config(caminho: Optional[Path] = None) -> Dict[str, Any]:
+    """Lê a configuração de serving; retorna {} se o arquivo não existir"""
+    caminho = Path(caminho) if caminho else CONFIG_SERVING
+    if not caminho.exists():
+        return {}
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def aplicar_config(config: Dict[str, Any]) -> None:
+    """
+    Exporta a configuração como variáveis de ambiente antes do import da app,
+    para que valham em todos os workers (processos filhos herdam o ambiente).
+    """
+    if config.get("blas_threads"):
+        for variavel in VARIAVEIS_BLAS:
+            os.environ.setdefault(variavel, str(config["blas_threads"]))
+    if config.get("lgbm_num_threads"):
+        os.environ.setdefault("LGBM_NUM_THREADS", str(config["lgbm_num_threads"]))
+    if config.get("ws_batch_max"):
+        os.environ.setdefault("WS_BATCH_MAX", str(config["ws_batch_max"]))
+
+    afinidade = config.get("cpu_afinidade")
+    if afinidade and hasattr(os, "sched_setaffinity"):
+        # Herdada pelos workers: o servidor inteiro fica restrito a esses núcleos
+        os.sched_setaffinity(0, afinidade)
+
+
 def main():
-    uvicorn.run("src.api.app:app", host="0.0.0.0", port=8000, reload=False)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", type=Path, default=None, help="Padrão: configs/serving.json")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    config = carregar_config(args.config)
+    if config:
+        aplicar_config(config)
+        logger.info(f"Configuração de serving aplicada: {json.dumps({k: v for k, v in config.items() if k != 'medicoes'})}")
+    else:
+        logger.info(f"Sem configuração de serving em {args.config or CONFIG_SERVING}; usando os padrões")
+
+    uvicorn.run(
+        "src.api.app:app",
+        host=args.host,
+        port=args.port,
+        workers=int(config.get("workers", 1)),
+        reload=False,
+    )
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,405 @@
+"""
+Estado compartilhado do processo da API.
+
+Componentes de monitoramento são criados sob demanda e reutilizados entre
+requisições; falhas aqui nunca devem interromper uma predição.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_monitor_drift = None
+_thread_drift: Optional[threading.Thread] = None
+# Após uma falha na construção do monitor de drift, nova tentativa só depois do
+# cooldown (dobra a cada falha seguida, até o máximo)
+DRIFT_RETRY_BASE_S = float(os.environ.get("DRIFT_RETRY_BASE_S", "30"))
+DRIFT_RETRY_MAX_S = float(os.environ.get("DRIFT_RETRY_MAX_S", "1800"))
+_falhas_drift = 0
+_drift_retry_em = 0.0
+_audit_sink = None
+_feature_store = None
+_modelo = None
+_pool = None
+_bundle = None
+_lock_bundle = threading.Lock()
+_fila_jobs = None
+_supervisor_jobs = None
+_monitor_performance = None
+# Threads de inferência fixadas pelo processo (workers de jobs); None: LGBM_NUM_THREADS
+_threads_inferencia: Optional[int] = None
+# (modelo, versão) -> instante da última verificação do ponteiro de calibração
+_calibracao_verificada_em: Dict[Tuple[str, int], float] = {}
+
+
+def obter_bundle():
+    """
+    Bundle de inferência indicado por INFERENCE_BUNDLE (caminho do arquivo ou
+    "registry" para o bundle registrado na versão Production); None se não definido.
+    Com bundle, FeatureStore e modelo saem do mesmo arquivo.
+    """
+    global _bundle
+
+    origem = os.environ.get("INFERENCE_BUNDLE")
+    if not origem:
+        return None
+
+    if _bundle is None:
+        with _lock_bundle:
+            if _bundle is None:
+                from src.models.bundle import BundleInferencia, localizar_bundle
+                caminho = localizar_bundle("lgb_prob_default") if origem == "registry" else origem
+                _bundle = BundleInferencia(caminho)
+
+    return _bundle
+
+
+def obter_feature_store():
+    """FeatureStore carregada uma única vez por processo"""
+    global _feature_store
+
+    if _feature_store is None:
+        with _lock:
+            if _feature_store is None:
+                from src.features.feature_store import FeatureStore
+                bundle = obter_bundle()
+                _feature_store = FeatureStore.from_bundle(bundle) if bundle else FeatureStore.load()
+
+    return _feature_store
+
+
+def definir_threads_inferencia(num_threads: Optional[int]) -> None:
+    """Fixa as threads dos modelos criados daqui em diante neste processo (ignora LGBM_NUM_THREADS)"""
+    global _threads_inferencia
+    _threads_inferencia = num_threads
+
+
+def _threads_modelo() -> Optional[int]:
+    if _threads_inferencia is not None:
+        return _threads_inferencia
+    # LGBM_NUM_THREADS: definido pelo autotuner via src/api/run.py
+    num_threads = os.environ.get("LGBM_NUM_THREADS")
+    return int(num_threads) if num_threads else None
+
+
+def _criar_modelo(model_name: str = "lgb_prob_default", version: Optional[int] = None, bundle=None):
+    """ModelProducao com backend (MODEL_BACKEND) e threads (LGBM_NUM_THREADS) do ambiente"""
+    from src.models.predictor import ModelProducao
+    modelo = ModelProducao(
+        model_name,
+        version=version,
+        backend=os.environ.get("MODEL_BACKEND", "lightgbm"),
+        num_threads=_threads_modelo(),
+        bundle=bundle,
+    )
+    sincronizar_calibracao(modelo, forcar=True)
+    return modelo
+
+
+def _criar_modelo_escalonado(professor):
+    """
+    Modo escalonado (TIERED_MODE=1): aluno destilado (src.models.distillation,
+    alias TIERED_STUDENT_ALIAS, padrão Student) pontua tudo e o professor repontua
+    as linhas a menos de TIERED_MARGIN do TIERED_THRESHOLD (padrão 0.42). Sem
+    TIERED_MARGIN vale a margem registrada nas métricas do aluno.
+    """
+    from src.models.distillation import ALIAS_ALUNO, THRESHOLD_PADRAO, ModeloEscalonado, margem_registrada
+    from src.models.loader_model import resolve_model_version
+    from src.models.predictor import ModelProducao
+
+    versao_aluno = resolve_model_version(
+        professor.model_name, alias=os.environ.get("TIERED_STUDENT_ALIAS", ALIAS_ALUNO)
+    )
+    aluno = ModelProducao(professor.model_name, version=versao_aluno, num_threads=_threads_modelo())
+    margem = os.environ.get("TIERED_MARGIN")
+    modelo = ModeloEscalonado(
+        professor,
+        aluno,
+        threshold=float(os.environ.get("TIERED_THRESHOLD", THRESHOLD_PADRAO)),
+        margem=float(margem) if margem else margem_registrada(professor.model_name, versao_aluno),
+    )
+    logger.info(
+        f"Modo escalonado: aluno v{versao_aluno} -> professor v{professor.version} "
+        f"(threshold {modelo.threshold}, margem {modelo.margem:.4f})"
+    )
+    return modelo
+
+
+def sincronizar_calibracao(modelo, forcar: bool = False) -> None:
+    """
+    Aplica ao modelo o snapshot de calibração ativo (src.models.calibration),
+    lendo o ponteiro no máximo a cada CALIBRATION_RELOAD_S segundos (padrão 30).
+    A troca é atômica e não recarrega o modelo. CALIBRATION_ENABLED=0 desativa.
+    """
+    if os.environ.get("CALIBRATION_ENABLED", "1") == "0":
+        return
+
+    chave = (modelo.model_name, modelo.version)
+    agora = time.monotonic()
+    if not forcar and agora - _calibracao_verificada_em.get(chave, 0.0) < float(
+        os.environ.get("CALIBRATION_RELOAD_S", "30")
+    ):
+        return
+    _calibracao_verificada_em[chave] = agora
+
+    try:
+        from src.models.calibration import RepositorioCalibracao
+        repositorio = RepositorioCalibracao(modelo.model_name, modelo.version)
+        ativa = repositorio.versao_ativa()
+        if ativa is None or ativa == modelo.versao_calibracao:
+            return
+        calibracao, _ = repositorio.carregar(ativa)
+        modelo.definir_calibracao(calibracao, ativa)
+        logger.info(f"Calibração {ativa} ({calibracao.metodo}) ativa em {modelo.model_name} v{modelo.version}")
+    except Exception as e:
+        logger.warning(f"Falha ao carregar calibração de {modelo.model_name} v{modelo.version}: {e}")
+
+
+def obter_modelo():
+    """
+    Modelo de produção carregado uma única vez por processo.
+    LGBM_NUM_THREADS define as threads de inferência; MODEL_BACKEND=onnx usa o
+    grafo exportado por src.models.onnx_backend para pontuar dados brutos.
+    TIERED_MODE=1 põe o aluno destilado na frente (ver _criar_modelo_escalonado).
+    """
+    global _modelo
+
+    if _modelo is None:
+        with _lock:
+            if _modelo is None:
+                modelo = _criar_modelo(bundle=obter_bundle())
+                if os.environ.get("TIERED_MODE", "0") == "1":
+                    modelo = _criar_modelo_escalonado(modelo)
+                _modelo = modelo
+
+    sincronizar_calibracao(_modelo)
+    return _modelo
+
+
+def obter_pool():
+    """Pool LRU das demais versões do registry (orçamento via MODEL_POOL_MEMORIA_MB)"""
+    global _pool
+
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                from src.models.model_pool import PoolModelos
+                orcamento = float(os.environ.get("MODEL_POOL_MEMORIA_MB", "256")) * 1024 * 1024
+                _pool = PoolModelos(int(orcamento), carregar=_criar_modelo)
+
+    return _pool
+
+
+def selecionar_modelo(model_name: Optional[str] = None, version: Optional[int] = None, alias: Optional[str] = None):
+    """
+    Modelo pedido pela requisição. Sem seleção (ou quando a seleção resolve para
+    o modelo padrão) usa o modelo de produção fixo; demais versões vêm do pool.
+    """
+    if model_name is None and version is None and alias is None:
+        return obter_modelo()
+
+    padrao = obter_modelo()
+    pool = obter_pool()
+    nome, versao = pool.resolver(model_name or padrao.model_name, version, alias)
+    if (nome, versao) == (padrao.model_name, padrao.version):
+        return padrao
+    modelo = pool.obter(nome, versao)
+    sincronizar_calibracao(modelo)
+    return modelo
+
+
+def obter_fila_jobs():
+    """
+    Fila de jobs de pontuação em massa (JOBS_DB, padrão data/jobs/fila.sqlite).
+    Na primeira chamada inicia JOBS_WORKERS processos worker (padrão 1) se este
+    processo for eleito supervisor da fila (um por fila, mesmo com vários workers
+    do uvicorn); com JOBS_WORKERS=0 a API só enfileira e os workers rodam via
+    `python -m src.api.jobs`.
+    """
+    global _fila_jobs, _supervisor_jobs
+
+    if _fila_jobs is None:
+        with _lock:
+            if _fila_jobs is None:
+                from src.api.jobs import FilaJobs, SupervisorJobs
+                n_workers = int(os.environ.get("JOBS_WORKERS", "1"))
+                if n_workers > 0:
+                    _supervisor_jobs = SupervisorJobs(
+                        n_workers, timeout_heartbeat=float(os.environ.get("JOBS_HEARTBEAT_TIMEOUT", "300"))
+                    )
+                    _supervisor_jobs.iniciar_quando_eleito()
+                    _fila_jobs = _supervisor_jobs.fila
+                else:
+                    _fila_jobs = FilaJobs()
+
+    return _fila_jobs
+
+
+def encerrar_jobs() -> None:
+    """Para os workers de jobs deste processo (jobs em andamento voltam para a fila)"""
+    if _supervisor_jobs is not None:
+        _supervisor_jobs.parar()
+
+
+def precarregar() -> threading.Thread:
+    """
+    Carrega FeatureStore e modelo em background logo após o start do processo,
+    para que a primeira predição não pague o custo de imports e unpickling.
+    """
+    def _carregar():
+        try:
+            obter_feature_store()
+            obter_modelo()
+            logger.info("Artefatos de inferência pré-carregados")
+        except Exception as e:
+            logger.error(f"Falha no pré-carregamento dos artefatos: {e}")
+
+    thread = threading.Thread(target=_carregar, name="preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def pronto() -> bool:
+    """True quando FeatureStore e modelo já estão em memória (readiness)"""
+    return _feature_store is not None and _modelo is not None
+
+
+def _construir_monitor_drift():
+    """Cria o monitor de drift com bins e scores de referência do X_train"""
+    global _monitor_drift, _thread_drift, _falhas_drift, _drift_retry_em
+
+    from src.data.datasets import carregar_dataset
+    from src.monitoring.drift import MonitorDrift
+
+    try:
+        features = obter_feature_store().selected_features
+        X_treino = carregar_dataset("X_train", colunas=features)
+        modelo = obter_modelo()
+        # No modo escalonado a referência vem do professor, sem entrar na contagem de escalonamento
+        scores_treino = getattr(modelo, "professor", modelo).predict_proba(X_treino)[:, 1]
+        _monitor_drift = MonitorDrift.from_treino(features, scores_treino)
+        _falhas_drift = 0
+    except Exception as e:
+        # Cada tentativa pontua o X_train inteiro: com erro persistente (artefato
+        # ausente, memória), as requisições não disparam uma reconstrução cada
+        with _lock:
+            _falhas_drift += 1
+            espera = min(DRIFT_RETRY_MAX_S, DRIFT_RETRY_BASE_S * 2 ** (_falhas_drift - 1))
+            _drift_retry_em = time.monotonic() + espera
+            _thread_drift = None
+        logger.error(
+            f"Não foi possível inicializar o monitor de drift (falha {_falhas_drift}): {e}. "
+            f"Nova tentativa em {espera:.0f}s"
+        )
+
+
+def obter_monitor_drift(bloquear: bool = False):
+    """
+    Retorna o monitor de drift, iniciando sua construção em background na primeira chamada.
+
+    Args:
+        bloquear: Se True, aguarda a construção terminar (usado pelo endpoint /drift)
+
+    Depois de uma falha, retorna None sem nova tentativa até o fim do cooldown.
+    """
+    global _thread_drift
+
+    if _monitor_drift is None:
+        with _lock:
+            if _thread_drift is None and time.monotonic() >= _drift_retry_em:
+                _thread_drift = threading.Thread(target=_construir_monitor_drift, name="drift-init", daemon=True)
+                _thread_drift.start()
+            thread = _thread_drift
+        if bloquear and thread is not None:
+            thread.join()
+
+    return _monitor_drift
+
+
+def registrar_drift(X_final, prob_default: np.ndarray, modelo=None) -> None:
+    """
+    Acumula o lote nos histogramas de drift (ignorado enquanto o monitor não estiver pronto).
+    Scores de outras versões do pool não entram: a referência é o modelo de produção.
+    """
+    if modelo is not None and modelo is not _modelo:
+        return
+
+    monitor = obter_monitor_drift()
+    if monitor is None:
+        return
+
+    try:
+        monitor.atualizar(X_final, prob_default)
+    except Exception as e:
+        logger.warning(f"Falha ao atualizar monitor de drift: {e}")
+
+
+def diretorio_auditoria():
+    """Diretório dos arquivos de auditoria (AUDIT_DIR, padrão: data/audit)"""
+    from src.utils.paths import data_path
+    return os.environ.get("AUDIT_DIR") or data_path("", "audit")
+
+
+def obter_audit_sink():
+    """
+    Retorna o sink de auditoria configurado por variáveis de ambiente:
+
+    - AUDIT_ENABLED: "0" desativa a auditoria (padrão: "1")
+    - AUDIT_DIR: diretório dos arquivos (padrão: data/audit)
+    - AUDIT_MAX_MB / AUDIT_ROTACAO_SEGUNDOS: limites de rotação por tamanho e tempo
+    - AUDIT_FLUSH_SEGUNDOS: intervalo máximo entre gravações (perda máxima em crash)
+    - AUDIT_MAX_LOTES_MEMORIA: lotes retidos em memória com a escrita falhando (acima disso, descarte contado)
+    """
+    global _audit_sink
+
+    if _audit_sink is None and os.environ.get("AUDIT_ENABLED", "1") != "0":
+        with _lock:
+            if _audit_sink is None:
+                from src.monitoring.audit import AuditSink
+
+                _audit_sink = AuditSink(
+                    diretorio=diretorio_auditoria(),
+                    max_bytes=int(float(os.environ.get("AUDIT_MAX_MB", "64")) * 1024 * 1024),
+                    rotacao_segundos=float(os.environ.get("AUDIT_ROTACAO_SEGUNDOS", "3600")),
+                    intervalo_flush=float(os.environ.get("AUDIT_FLUSH_SEGUNDOS", "1.0")),
+                    max_lotes_memoria=int(os.environ.get("AUDIT_MAX_LOTES_MEMORIA", "100000")),
+                )
+
+    return _audit_sink
+
+
+def estado_auditoria() -> Optional[Dict[str, int]]:
+    """Contadores do sink de auditoria (None se ainda não foi criado ou está desativado)"""
+    return _audit_sink.estatisticas() if _audit_sink is not None else None
+
+
+def registrar_auditoria(prediction_ids, entradas, probabilidades, classificacoes, threshold, modelo) -> None:
+    """Enfileira as decisões no sink de auditoria sem I/O no caminho da requisição"""
+    sink = obter_audit_sink()
+    if sink is None:
+        return
+
+    try:
+        sink.registrar(prediction_ids, entradas, probabilidades, classificacoes,
+                       threshold, modelo.model_name, getattr(modelo, "version", None))
+    except Exception as e:
+        logger.warning(f"Falha ao registrar auditoria: {e}")
+
+
+def obter_monitor_performance():
+    """Histogramas de performance com outcomes (PERFORMANCE_DB, padrão data/performance/performance.sqlite)"""
+    global _monitor_performance
+
+    if _monitor_performance is None:
+        with _lock:
+            if _monitor_performance is None:
+                from src.monitoring.performance import MonitorPerformance
+                _monitor_performance = MonitorPerformance()
+
+    return _monitor_performance
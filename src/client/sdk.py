@@ -0,0 +1,749 @@
+"""Cliente Python da API de risco: /predict e /predict_batch, síncrono e asyncio.
+
+- Conexões keep-alive em pool: uma requests.Session (síncrono) ou um
+  httpx.AsyncClient (asyncio) por cliente, reaproveitados entre chamadas
+- `agrupar=True`: chamadas individuais a `predict` feitas ao mesmo tempo por
+  várias threads/tasks são reunidas em um único /predict_batch (até
+  `agrupar_max_lote` registros ou `agrupar_espera_ms` após a primeira)
+- Novas tentativas com backoff exponencial e jitter para erro de conexão, 429,
+  502, 503 e 504 (Retry-After é respeitado). Timeout de leitura não é repetido:
+  a API pode ter registrado a decisão na auditoria
+- Resultados tipados: `ResultadoPredicao` por cliente e `ResultadoLote` com
+  arrays NumPy por coluna (probabilidades em float64, NaN nas linhas rejeitadas)
+
+Run with:
+    python -m src.client.sdk data/raw/credit_risk_dataset.csv --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+URL_PADRAO = "http://localhost:8000"
+THRESHOLD_PADRAO = 0.42
+TIMEOUT_S = 10.0
+TIMEOUT_LOTE_S = 60.0
+TAMANHO_POOL_PADRAO = 8
+MAX_TENTATIVAS_PADRAO = 3
+BACKOFF_BASE_S = 0.1
+BACKOFF_MAX_S = 2.0
+STATUS_REPETIVEIS = {429, 502, 503, 504}
+AGRUPAR_MAX_LOTE_PADRAO = 64
+AGRUPAR_ESPERA_MS_PADRAO = 5.0
+
+# Faixas de nível de risco (mesmas do /predict)
+RISCO_BAIXO_MAX = 0.30
+RISCO_MEDIO_MAX = 0.60
+
+Registros = Union[pd.DataFrame, Sequence[Dict[str, Any]]]
+
+
+class ErroAPI(RuntimeError):
+    """
+    Resposta de erro da API ou falha de conexão após esgotar as tentativas.
+    `status_code` é None quando a API não respondeu.
+    """
+
+    def __init__(self, mensagem: str, status_code: Optional[int] = None, detalhe: Any = None):
+        super().__init__(mensagem)
+        self.status_code = status_code
+        self.detalhe = detalhe
+
+
+def espera_backoff(tentativa: int, retry_after: Optional[str] = None) -> float:
+    """Full jitter: uniforme em [0, min(BACKOFF_MAX_S, BACKOFF_BASE_S·2^tentativa)], no mínimo o Retry-After"""
+    espera = random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** tentativa))
+    try:
+        return max(espera, float(retry_after)) if retry_after else espera
+    except ValueError:
+        # Retry-After em formato de data HTTP: ignorado
+        return espera
+
+
+def nivel_risco(probabilidade: float) -> str:
+    if probabilidade <= RISCO_BAIXO_MAX:
+        return "Baixo"
+    return "Médio" if probabilidade <= RISCO_MEDIO_MAX else "Alto"
+
+
+def criar_sessao(url: str, tamanho_pool: int) -> requests.Session:
+    """Sessão com pool de `tamanho_pool` conexões keep-alive para o host de `url`"""
+    sessao = requests.Session()
+    sessao.mount(url.rstrip("/"), HTTPAdapter(pool_connections=1, pool_maxsize=tamanho_pool))
+    return sessao
+
+
+def _json_padrao(valor: Any) -> Any:
+    # Escalares NumPy vindos de DataFrames/arrays
+    if isinstance(valor, np.generic):
+        return valor.item()
+    raise TypeError(f"Tipo não serializável em JSON: {type(valor).__name__}")
+
+
+def serializar_registros(registros: Registros) -> str:
+    """
+    Array JSON de registros. DataFrames são serializados direto (to_json), só
+    com as colunas de entrada presentes; NaN vira null.
+    """
+    if isinstance(registros, pd.DataFrame):
+        # Só com DataFrame: importar o cliente não carrega o pacote de features
+        from src.features.feature_store import COLUNAS_ENTRADA
+        from src.features.raw_schema import COLUNAS_BRUTAS_EXTRAS
+
+        colunas = [c for c in COLUNAS_ENTRADA + COLUNAS_BRUTAS_EXTRAS if c in registros.columns]
+        return registros[colunas].to_json(orient="records")
+    return json.dumps(list(registros), default=_json_padrao)
+
+
+def corpo_lote(registros_json: str, parametros: Dict[str, Any]) -> bytes:
+    """Corpo do /predict_batch a partir do array já serializado"""
+    sufixo = "".join(f', "{k}": {json.dumps(v)}' for k, v in parametros.items() if v is not None)
+    return ('{"records": ' + registros_json + sufixo + "}").encode()
+
+
+class ResultadoPredicao:
+    """Resultado de um cliente (resposta do /predict ou linha de um lote agrupado)"""
+
+    __slots__ = ("prediction_id", "probabilidade_default", "classificacao", "confianca",
+                 "threshold", "model_name", "model_version")
+
+    def __init__(
+        self,
+        prediction_id: str,
+        probabilidade_default: float,
+        classificacao: str,
+        confianca: float,
+        threshold: float,
+        model_name: Optional[str],
+        model_version: Optional[int],
+    ):
+        self.prediction_id = prediction_id
+        self.probabilidade_default = probabilidade_default
+        self.classificacao = classificacao
+        self.confianca = confianca
+        self.threshold = threshold
+        self.model_name = model_name
+        self.model_version = model_version
+
+    @classmethod
+    def de_resposta(cls, corpo: Dict[str, Any]) -> "ResultadoPredicao":
+        return cls(
+            corpo["prediction_id"], corpo["probabilidade_default"], corpo["classificacao"], corpo["confianca"],
+            corpo["threshold_usado"], corpo.get("model_name"), corpo.get("model_version"),
+        )
+
+    @property
+    def probabilidade_percentual(self) -> float:
+        return round(self.probabilidade_default * 100, 2)
+
+    @property
+    def nivel_risco(self) -> str:
+        return nivel_risco(self.probabilidade_default)
+
+    @property
+    def nivel_confianca(self) -> float:
+        return round(min(self.confianca * 2, 1.0), 4)
+
+    def como_dict(self) -> Dict[str, Any]:
+        """Mesmos campos da resposta do /predict"""
+        return {
+            "prediction_id": self.prediction_id,
+            "probabilidade_default": self.probabilidade_default,
+            "probabilidade_percentual": self.probabilidade_percentual,
+            "classificacao": self.classificacao,
+            "nivel_risco": self.nivel_risco,
+            "confianca": self.confianca,
+            "nivel_confianca": self.nivel_confianca,
+            "threshold_usado": self.threshold,
+            "model_name": self.model_name,
+            "model_version": self.model_version,
+        }
+
+    def __repr__(self) -> str:
+        return (f"ResultadoPredicao(probabilidade_default={self.probabilidade_default}, "
+                f"classificacao={self.classificacao!r}, model_version={self.model_version})")
+
+
+class ResultadoLote:
+    """
+    Resultado do /predict_batch em arrays NumPy alinhados com os registros enviados.
+    Linhas rejeitadas pela validação têm status "erro", `codigo`/`erro`
+    preenchidos e NaN em `probabilidade_default` e `confianca`.
+    """
+
+    COLUNAS = ["status", "codigo", "erro", "prediction_id", "probabilidade_default", "classificacao", "confianca"]
+
+    def __init__(
+        self,
+        status: np.ndarray,
+        codigo: np.ndarray,
+        erro: np.ndarray,
+        prediction_id: np.ndarray,
+        probabilidade_default: np.ndarray,
+        classificacao: np.ndarray,
+        confianca: np.ndarray,
+        model_version: np.ndarray,
+        threshold: float,
+        model_name: Optional[str],
+    ):
+        self.status = status
+        self.codigo = codigo
+        self.erro = erro
+        self.prediction_id = prediction_id
+        self.probabilidade_default = probabilidade_default
+        self.classificacao = classificacao
+        self.confianca = confianca
+        self.model_version = model_version
+        self.threshold = threshold
+        self.model_name = model_name
+
+    @classmethod
+    def de_resposta(cls, corpo: Dict[str, Any]) -> "ResultadoLote":
+        resultados = corpo["results"]
+
+        def coluna(nome: str) -> np.ndarray:
+            return np.array([r.get(nome) for r in resultados], dtype=object)
+
+        def numerica(nome: str) -> np.ndarray:
+            return np.array([r.get(nome, np.nan) for r in resultados], dtype=np.float64)
+
+        return cls(
+            coluna("status"), coluna("codigo"), coluna("erro"), coluna("prediction_id"),
+            numerica("probabilidade_default"), coluna("classificacao"), numerica("confianca"),
+            # dtype object: None quando a API não informa a versão (nunca 0)
+            np.full(len(resultados), corpo.get("model_version"), dtype=object),
+            corpo["threshold_usado"], corpo.get("model_name"),
+        )
+
+    @classmethod
+    def concatenar(cls, partes: Sequence["ResultadoLote"]) -> "ResultadoLote":
+        """Junta os lotes de vários chunks, na ordem recebida"""
+        if len(partes) == 1:
+            return partes[0]
+        campos = cls.COLUNAS + ["model_version"]
+        arrays = {c: np.concatenate([getattr(p, c) for p in partes]) for c in campos}
+        versoes = set(arrays["model_version"].tolist())
+        if len(versoes) > 1:
+            logger.warning(f"Lote pontuado por versões diferentes do modelo: {sorted(versoes, key=str)}")
+        return cls(**arrays, threshold=partes[0].threshold, model_name=partes[0].model_name)
+
+    def __len__(self) -> int:
+        return len(self.status)
+
+    @property
+    def validas(self) -> np.ndarray:
+        return self.status == "ok"
+
+    def resumo(self) -> Dict[str, int]:
+        """Contagem por código ("ok" para as linhas pontuadas)"""
+        codigos, contagens = np.unique(np.where(self.validas, "ok", self.codigo).astype(str), return_counts=True)
+        return dict(zip(codigos.tolist(), contagens.tolist()))
+
+    def predicao(self, i: int) -> ResultadoPredicao:
+        """Linha `i` como ResultadoPredicao; linha rejeitada levanta ErroAPI (400)"""
+        if self.status[i] != "ok":
+            raise ErroAPI(f"invalid input: {self.codigo[i]}: {self.erro[i]}", 400, self.erro[i])
+        return ResultadoPredicao(
+            self.prediction_id[i], float(self.probabilidade_default[i]), self.classificacao[i],
+            float(self.confianca[i]), self.threshold, self.model_name, self.model_version[i],
+        )
+
+    def como_dataframe(self, index=None) -> pd.DataFrame:
+        dados = {c: getattr(self, c) for c in self.COLUNAS}
+        dados["model_version"] = self.model_version
+        return pd.DataFrame(dados, index=index)
+
+
+def _detalhe_erro(status_code: int, texto: str) -> Tuple[str, Any]:
+    try:
+        corpo = json.loads(texto)
+        detalhe = corpo.get("detail", corpo.get("message", corpo)) if isinstance(corpo, dict) else corpo
+    except ValueError:
+        detalhe = texto[:500]
+    return f"HTTP {status_code}: {detalhe}", detalhe
+
+
+def _fatias(registros: Registros, tamanho: Optional[int]) -> List[Registros]:
+    n = len(registros)
+    if not tamanho or n <= tamanho:
+        return [registros]
+    if isinstance(registros, pd.DataFrame):
+        return [registros.iloc[i:i + tamanho] for i in range(0, n, tamanho)]
+    return [registros[i:i + tamanho] for i in range(0, n, tamanho)]
+
+
+class _ClienteBase:
+    """Configuração e montagem dos corpos comuns aos clientes síncrono e asyncio"""
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float,
+        timeout_lote: float,
+        tamanho_pool: int,
+        max_tentativas: int,
+        threshold: float,
+        model_name: Optional[str],
+        model_version: Optional[int],
+        model_alias: Optional[str],
+        agrupar: bool,
+        agrupar_max_lote: int,
+        agrupar_espera_ms: float,
+    ):
+        if max_tentativas < 1 or tamanho_pool < 1:
+            raise ValueError("max_tentativas e tamanho_pool devem ser >= 1")
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.timeout_lote = timeout_lote
+        self.tamanho_pool = tamanho_pool
+        self.max_tentativas = max_tentativas
+        self.threshold = threshold
+        self.selecao_modelo = {"model_name": model_name, "model_version": model_version, "model_alias": model_alias}
+        self.agrupar = agrupar
+        self.agrupar_max_lote = agrupar_max_lote
+        self.agrupar_espera_s = agrupar_espera_ms / 1000.0
+
+    def _parametros(self, threshold: Optional[float]) -> Dict[str, Any]:
+        return {"threshold": self.threshold if threshold is None else threshold, **self.selecao_modelo}
+
+    def _corpo_predicao(self, features: Dict[str, Any], threshold: Optional[float]) -> bytes:
+        corpo = {"features": features, **self._parametros(threshold)}
+        return json.dumps({k: v for k, v in corpo.items() if v is not None}, default=_json_padrao).encode()
+
+    def _repetir(self, tentativa: int, motivo: str, retry_after: Optional[str] = None) -> Optional[float]:
+        """Espera antes da próxima tentativa; None quando as tentativas acabaram"""
+        if tentativa + 1 >= self.max_tentativas:
+            return None
+        espera = espera_backoff(tentativa, retry_after)
+        logger.debug(f"{motivo}; nova tentativa em {espera:.2f}s")
+        return espera
+
+
+# ----------------------------------------------------------------------
+# Cliente síncrono
+# ----------------------------------------------------------------------
+
+class _AgrupadorThreads:
+    """
+    Reúne `predict` de várias threads em lotes: uma thread coletora espera até
+    `espera_s` após o primeiro registro (ou até `max_lote`) e despacha o lote
+    em um executor, sem bloquear a coleta do próximo.
+    """
+
+    def __init__(self, enviar: Callable[[List[Dict[str, Any]], float], ResultadoLote],
+                 max_lote: int, espera_s: float, max_em_voo: int):
+        self._enviar = enviar
+        self.max_lote = max_lote
+        self.espera_s = espera_s
+        self._condicao = threading.Condition()
+        self._pendentes: Dict[float, List[Tuple[Dict[str, Any], Future]]] = {}
+        self._executor = ThreadPoolExecutor(max_em_voo, thread_name_prefix="agrupar-predict")
+        self._thread: Optional[threading.Thread] = None
+        self._fechado = False
+
+    def submeter(self, features: Dict[str, Any], threshold: float) -> Future:
+        futuro: Future = Future()
+        with self._condicao:
+            if self._fechado:
+                raise ErroAPI("cliente fechado")
+            self._pendentes.setdefault(threshold, []).append((features, futuro))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._coletar, name="agrupar-coleta", daemon=True)
+                self._thread.start()
+            self._condicao.notify()
+        return futuro
+
+    def _coletar(self) -> None:
+        while True:
+            with self._condicao:
+                while not self._pendentes and not self._fechado:
+                    self._condicao.wait()
+                if not self._pendentes:
+                    return
+                limite = time.monotonic() + self.espera_s
+                while not self._fechado and max(map(len, self._pendentes.values())) < self.max_lote:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._condicao.wait(restante)
+                pendentes, self._pendentes = self._pendentes, {}
+
+            for threshold, itens in pendentes.items():
+                for inicio in range(0, len(itens), self.max_lote):
+                    self._executor.submit(self._despachar, threshold, itens[inicio:inicio + self.max_lote])
+
+    def _despachar(self, threshold: float, itens: List[Tuple[Dict[str, Any], Future]]) -> None:
+        try:
+            lote = self._enviar([features for features, _ in itens], threshold)
+        except Exception as exc:
+            for _, futuro in itens:
+                futuro.set_exception(exc)
+            return
+        for i, (_, futuro) in enumerate(itens):
+            try:
+                futuro.set_result(lote.predicao(i))
+            except ErroAPI as exc:
+                futuro.set_exception(exc)
+
+    def fechar(self) -> None:
+        with self._condicao:
+            self._fechado = True
+            self._condicao.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown(wait=True)
+
+
+class ClienteRisco(_ClienteBase):
+    """
+    Cliente síncrono da API. Seguro para uso por várias threads.
+
+    Args:
+        url: URL base da API
+        timeout / timeout_lote: Timeout (s) do /predict e de cada chamada ao /predict_batch
+        tamanho_pool: Conexões keep-alive mantidas com a API
+        max_tentativas: Envios por requisição (1 = sem novas tentativas)
+        threshold: Threshold padrão (pode ser trocado por chamada)
+        model_name / model_version / model_alias: Seleção de modelo repassada à API
+        agrupar: Reunir chamadas simultâneas a `predict` em /predict_batch
+        agrupar_max_lote / agrupar_espera_ms: Tamanho máximo do lote agrupado e
+            espera máxima do primeiro registro
+    """
+
+    def __init__(
+        self,
+        url: str = URL_PADRAO,
+        timeout: float = TIMEOUT_S,
+        timeout_lote: float = TIMEOUT_LOTE_S,
+        tamanho_pool: int = TAMANHO_POOL_PADRAO,
+        max_tentativas: int = MAX_TENTATIVAS_PADRAO,
+        threshold: float = THRESHOLD_PADRAO,
+        model_name: Optional[str] = None,
+        model_version: Optional[int] = None,
+        model_alias: Optional[str] = None,
+        agrupar: bool = False,
+        agrupar_max_lote: int = AGRUPAR_MAX_LOTE_PADRAO,
+        agrupar_espera_ms: float = AGRUPAR_ESPERA_MS_PADRAO,
+    ):
+        super().__init__(url, timeout, timeout_lote, tamanho_pool, max_tentativas, threshold,
+                         model_name, model_version, model_alias, agrupar, agrupar_max_lote, agrupar_espera_ms)
+        self.sessao = criar_sessao(self.url, tamanho_pool)
+        self._agrupador = (
+            _AgrupadorThreads(self._enviar_agrupado, agrupar_max_lote, self.agrupar_espera_s, tamanho_pool)
+            if agrupar else None
+        )
+
+    def _post(self, caminho: str, corpo: bytes, timeout: float) -> Dict[str, Any]:
+        for tentativa in range(self.max_tentativas):
+            try:
+                resposta = self.sessao.post(
+                    self.url + caminho, data=corpo, headers={"Content-Type": "application/json"}, timeout=timeout
+                )
+            except requests.ConnectionError as exc:
+                # Inclui ConnectTimeout; ReadTimeout não é repetido
+                espera = self._repetir(tentativa, f"{caminho}: {exc}")
+                if espera is None:
+                    raise ErroAPI(f"{self.url}{caminho}: {exc}") from exc
+                time.sleep(espera)
+                continue
+            except requests.RequestException as exc:
+                raise ErroAPI(f"{self.url}{caminho}: {exc}") from exc
+
+            if resposta.status_code < 400:
+                return resposta.json()
+            mensagem, detalhe = _detalhe_erro(resposta.status_code, resposta.text)
+            espera = None
+            if resposta.status_code in STATUS_REPETIVEIS:
+                espera = self._repetir(tentativa, mensagem, resposta.headers.get("Retry-After"))
+            if espera is None:
+                raise ErroAPI(mensagem, resposta.status_code, detalhe)
+            time.sleep(espera)
+        raise AssertionError("inalcançável")
+
+    def post_json(self, caminho: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """POST em outro endpoint da API com o mesmo pool e política de novas tentativas"""
+        return self._post(caminho, json.dumps(payload, default=_json_padrao).encode(), timeout or self.timeout)
+
+    def _enviar_agrupado(self, registros: List[Dict[str, Any]], threshold: float) -> ResultadoLote:
+        corpo = corpo_lote(serializar_registros(registros), self._parametros(threshold))
+        return ResultadoLote.de_resposta(self._post("/predict_batch", corpo, self.timeout_lote))
+
+    def predict(self, features: Dict[str, Any], threshold: Optional[float] = None) -> ResultadoPredicao:
+        """Pontua um cliente (via /predict, ou em lote com outras threads se `agrupar`)"""
+        if self._agrupador is not None:
+            return self._agrupador.submeter(features, self._parametros(threshold)["threshold"]).result()
+        corpo = self._post("/predict", self._corpo_predicao(features, threshold), self.timeout)
+        return ResultadoPredicao.de_resposta(corpo)
+
+    def predict_batch(
+        self,
+        registros: Registros,
+        threshold: Optional[float] = None,
+        tamanho_chunk: Optional[int] = None,
+        paralelo: int = 1,
+        progresso: Optional[Callable[[int, int], None]] = None,
+    ) -> ResultadoLote:
+        """
+        Pontua registros (DataFrame ou lista de dicts) no /predict_batch.
+
+        Args:
+            tamanho_chunk: Registros por requisição (None: uma requisição)
+            paralelo: Requisições simultâneas (limitado na prática por `tamanho_pool`)
+            progresso: Callback (chunks concluídos, total), chamado na thread do chamador
+        """
+        parametros = self._parametros(threshold)
+        fatias = _fatias(registros, tamanho_chunk)
+
+        def enviar(fatia: Registros) -> ResultadoLote:
+            corpo = corpo_lote(serializar_registros(fatia), parametros)
+            return ResultadoLote.de_resposta(self._post("/predict_batch", corpo, self.timeout_lote))
+
+        partes: List[Optional[ResultadoLote]] = [None] * len(fatias)
+        if paralelo <= 1 or len(fatias) == 1:
+            for i, fatia in enumerate(fatias):
+                partes[i] = enviar(fatia)
+                if progresso is not None:
+                    progresso(i + 1, len(fatias))
+        else:
+            with ThreadPoolExecutor(max_workers=paralelo, thread_name_prefix="predict-batch") as executor:
+                futuros = {executor.submit(enviar, fatia): i for i, fatia in enumerate(fatias)}
+                for concluidos, futuro in enumerate(as_completed(futuros), start=1):
+                    partes[futuros[futuro]] = futuro.result()
+                    if progresso is not None:
+                        progresso(concluidos, len(fatias))
+        return ResultadoLote.concatenar(partes)
+
+    def health(self) -> bool:
+        try:
+            return self.sessao.get(self.url + "/health", timeout=self.timeout).status_code == 200
+        except requests.RequestException:
+            return False
+
+    def fechar(self) -> None:
+        if self._agrupador is not None:
+            self._agrupador.fechar()
+        self.sessao.close()
+
+    def __enter__(self) -> "ClienteRisco":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.fechar()
+
+
+# ----------------------------------------------------------------------
+# Cliente asyncio
+# ----------------------------------------------------------------------
+
+class _AgrupadorAsync:
+    """
+    Versão asyncio do agrupamento: o primeiro registro agenda o envio para
+    daqui a `espera_s`; um grupo que chega a `max_lote` é enviado na hora.
+    """
+
+    def __init__(self, enviar, max_lote: int, espera_s: float):
+        self._enviar = enviar
+        self.max_lote = max_lote
+        self.espera_s = espera_s
+        self._pendentes: Dict[float, List[Tuple[Dict[str, Any], asyncio.Future]]] = {}
+        self._agendado: Optional[asyncio.TimerHandle] = None
+        self._tarefas: set = set()
+
+    async def submeter(self, features: Dict[str, Any], threshold: float) -> ResultadoPredicao:
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        grupo = self._pendentes.setdefault(threshold, [])
+        grupo.append((features, futuro))
+        if len(grupo) >= self.max_lote:
+            self._despachar(threshold)
+        elif self._agendado is None:
+            self._agendado = loop.call_later(self.espera_s, self._despachar_todos)
+        return await futuro
+
+    def _despachar_todos(self) -> None:
+        self._agendado = None
+        for threshold in list(self._pendentes):
+            self._despachar(threshold)
+
+    def _despachar(self, threshold: float) -> None:
+        itens = self._pendentes.pop(threshold)
+        if not self._pendentes and self._agendado is not None:
+            self._agendado.cancel()
+            self._agendado = None
+        tarefa = asyncio.get_running_loop().create_task(self._enviar_lote(threshold, itens))
+        # Referência forte até terminar (o loop guarda só referências fracas)
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._tarefas.discard)
+
+    async def _enviar_lote(self, threshold: float, itens: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            lote = await self._enviar([features for features, _ in itens], threshold)
+        except Exception as exc:
+            for _, futuro in itens:
+                if not futuro.done():
+                    futuro.set_exception(exc)
+            return
+        for i, (_, futuro) in enumerate(itens):
+            if futuro.done():
+                continue
+            try:
+                futuro.set_result(lote.predicao(i))
+            except ErroAPI as exc:
+                futuro.set_exception(exc)
+
+    async def fechar(self) -> None:
+        if self._agendado is not None:
+            self._despachar_todos()
+        if self._tarefas:
+            await asyncio.gather(*self._tarefas, return_exceptions=True)
+
+
+class ClienteRiscoAsync(_ClienteBase):
+    """
+    Cliente asyncio da API (httpx). Mesmos argumentos de ClienteRisco; use
+    `async with` ou `await fechar()` para liberar as conexões.
+    """
+
+    def __init__(
+        self,
+        url: str = URL_PADRAO,
+        timeout: float = TIMEOUT_S,
+        timeout_lote: float = TIMEOUT_LOTE_S,
+        tamanho_pool: int = TAMANHO_POOL_PADRAO,
+        max_tentativas: int = MAX_TENTATIVAS_PADRAO,
+        threshold: float = THRESHOLD_PADRAO,
+        model_name: Optional[str] = None,
+        model_version: Optional[int] = None,
+        model_alias: Optional[str] = None,
+        agrupar: bool = False,
+        agrupar_max_lote: int = AGRUPAR_MAX_LOTE_PADRAO,
+        agrupar_espera_ms: float = AGRUPAR_ESPERA_MS_PADRAO,
+    ):
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError("ClienteRiscoAsync requer httpx (pip install '.[client]')") from e
+
+        super().__init__(url, timeout, timeout_lote, tamanho_pool, max_tentativas, threshold,
+                         model_name, model_version, model_alias, agrupar, agrupar_max_lote, agrupar_espera_ms)
+        self._httpx = httpx
+        self.http = httpx.AsyncClient(
+            base_url=self.url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=tamanho_pool, max_keepalive_connections=tamanho_pool),
+            headers={"Content-Type": "application/json"},
+        )
+        # Falhas em que a requisição não chegou a ser processada
+        self._erros_repetiveis = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.RemoteProtocolError)
+        self._agrupador = _AgrupadorAsync(self._enviar_agrupado, agrupar_max_lote, self.agrupar_espera_s) if agrupar else None
+
+    async def _post(self, caminho: str, corpo: bytes, timeout: float) -> Dict[str, Any]:
+        for tentativa in range(self.max_tentativas):
+            try:
+                resposta = await self.http.post(caminho, content=corpo, timeout=timeout)
+            except self._erros_repetiveis as exc:
+                espera = self._repetir(tentativa, f"{caminho}: {exc!r}")
+                if espera is None:
+                    raise ErroAPI(f"{self.url}{caminho}: {exc!r}") from exc
+                await asyncio.sleep(espera)
+                continue
+            except self._httpx.HTTPError as exc:
+                raise ErroAPI(f"{self.url}{caminho}: {exc!r}") from exc
+
+            if resposta.status_code < 400:
+                return resposta.json()
+            mensagem, detalhe = _detalhe_erro(resposta.status_code, resposta.text)
+            espera = None
+            if resposta.status_code in STATUS_REPETIVEIS:
+                espera = self._repetir(tentativa, mensagem, resposta.headers.get("Retry-After"))
+            if espera is None:
+                raise ErroAPI(mensagem, resposta.status_code, detalhe)
+            await asyncio.sleep(espera)
+        raise AssertionError("inalcançável")
+
+    async def post_json(self, caminho: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        return await self._post(caminho, json.dumps(payload, default=_json_padrao).encode(), timeout or self.timeout)
+
+    async def _enviar_agrupado(self, registros: List[Dict[str, Any]], threshold: float) -> ResultadoLote:
+        corpo = corpo_lote(serializar_registros(registros), self._parametros(threshold))
+        return ResultadoLote.de_resposta(await self._post("/predict_batch", corpo, self.timeout_lote))
+
+    async def predict(self, features: Dict[str, Any], threshold: Optional[float] = None) -> ResultadoPredicao:
+        if self._agrupador is not None:
+            return await self._agrupador.submeter(features, self._parametros(threshold)["threshold"])
+        corpo = await self._post("/predict", self._corpo_predicao(features, threshold), self.timeout)
+        return ResultadoPredicao.de_resposta(corpo)
+
+    async def predict_batch(
+        self,
+        registros: Registros,
+        threshold: Optional[float] = None,
+        tamanho_chunk: Optional[int] = None,
+        paralelo: int = 1,
+    ) -> ResultadoLote:
+        """Como ClienteRisco.predict_batch; os chunks são enviados em até `paralelo` tasks"""
+        parametros = self._parametros(threshold)
+        semaforo = asyncio.Semaphore(max(paralelo, 1))
+
+        async def enviar(fatia: Registros) -> ResultadoLote:
+            async with semaforo:
+                corpo = corpo_lote(serializar_registros(fatia), parametros)
+                return ResultadoLote.de_resposta(await self._post("/predict_batch", corpo, self.timeout_lote))
+
+        partes = await asyncio.gather(*(enviar(f) for f in _fatias(registros, tamanho_chunk)))
+        return ResultadoLote.concatenar(partes)
+
+    async def health(self) -> bool:
+        try:
+            return (await self.http.get("/health")).status_code == 200
+        except self._httpx.HTTPError:
+            return False
+
+    async def fechar(self) -> None:
+        if self._agrupador is not None:
+            await self._agrupador.fechar()
+        await self.http.aclose()
+
+    async def __aenter__(self) -> "ClienteRiscoAsync":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.fechar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("arquivo", type=Path, help="CSV ou Parquet com os registros")
+    parser.add_argument("--url", default=URL_PADRAO)
+    parser.add_argument("--tamanho-chunk", type=int, default=1000)
+    parser.add_argument("--paralelo", type=int, default=4)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD_PADRAO)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    df = pd.read_parquet(args.arquivo) if args.arquivo.suffix == ".parquet" else pd.read_csv(args.arquivo)
+    with ClienteRisco(args.url, tamanho_pool=args.paralelo, threshold=args.threshold) as cliente:
+        inicio = time.perf_counter()
+        lote = cliente.predict_batch(df, tamanho_chunk=args.tamanho_chunk, paralelo=args.paralelo)
+        duracao = time.perf_counter() - inicio
+
+    print(f"{len(lote)} registros em {duracao:.2f}s ({len(lote) / duracao:.0f}/s): {lote.resumo()}")
+    print(f"probabilidade média: {np.nanmean(lote.probabilidade_default):.4f}")
+
+
+if __name__ == "__main__":
+    main()
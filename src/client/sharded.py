@@ -0,0 +1,334 @@
+"""Cliente de pontuação distribuída entre várias réplicas da API.
+
+Um DataFrame grande é dividido em shards contíguos, enviados ao /predict_batch
+de uma lista de réplicas e remontados na ordem original.
+
+- Cada réplica tem um limite de requisições simultâneas: uma thread por vaga,
+  todas sobre a mesma requests.Session da réplica (conexões keep-alive do pool)
+- Shards vêm de uma agenda compartilhada: réplicas mais rápidas pegam mais shards
+- Falha de transporte, timeout, 5xx ou 429 devolvem o shard à agenda,
+  com prioridade e sem a réplica que falhou (até `max_tentativas` envios)
+- Réplica com falhas seguidas fica suspensa por alguns segundos; erros 4xx
+  (ex.: modelo indisponível) interrompem a pontuação
+- O corpo JSON é serializado direto do DataFrame (to_json), sem dicts por linha
+
+Run with:
+    uvicorn src.api.app:app --port 8001 &
+    uvicorn src.api.app:app --port 8002 &
+    python -m src.client.sharded data/raw/credit_risk_dataset.csv \\
+        --endpoints http://127.0.0.1:8001 http://127.0.0.1:8002 --saida resultado.parquet
+"""
+import argparse
+import logging
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import requests
+
+from src.client.sdk import corpo_lote, criar_sessao, serializar_registros
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_SHARD_PADRAO = 5000
+LIMITE_POR_REPLICA_PADRAO = 2
+MAX_TENTATIVAS_PADRAO = 3
+FALHAS_PARA_SUSPENDER = 3
+SUSPENSAO_S = 5.0
+TIMEOUT_S = 120.0
+
+# Colunas por linha no resultado (mesmos campos do /predict_batch)
+COLUNAS_RESULTADO = [
+    "status", "codigo", "erro", "prediction_id", "probabilidade_default", "classificacao", "confianca",
+]
+
+
+class ErroPontuacao(RuntimeError):
+    """Shard esgotou as tentativas ou uma réplica recusou a requisição (4xx)"""
+
+
+class _FalhaReplica(Exception):
+    """Falha transitória: o shard pode ser reenviado a outra réplica"""
+
+
+class Replica:
+    """Endpoint da API com sua sessão HTTP, limite de concorrência e estatísticas"""
+
+    def __init__(self, url: str, limite: int):
+        self.url = url.rstrip("/")
+        self.limite = limite
+        # Uma conexão keep-alive por vaga de concorrência
+        self.sessao = criar_sessao(self.url, limite)
+
+        self.falhas_seguidas = 0
+        self.suspensa_ate = 0.0
+        # Estatísticas (atualizadas sob o lock da agenda)
+        self.shards = 0
+        self.linhas = 0
+        self.falhas = 0
+        self.segundos = 0.0
+
+    def disponivel(self, agora: float) -> bool:
+        return agora >= self.suspensa_ate
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "shards": self.shards,
+            "linhas": self.linhas,
+            "falhas": self.falhas,
+            "latencia_media_s": round(self.segundos / self.shards, 3) if self.shards else None,
+        }
+
+
+class _Agenda:
+    """
+    Shards pendentes compartilhados pelas threads de todas as réplicas.
+    Um shard que falhou em uma réplica não volta para ela enquanto houver
+    outra réplica disponível que ainda não falhou com ele.
+    """
+
+    def __init__(self, n_shards: int, replicas: List[Replica], max_tentativas: int):
+        self.pendentes = deque(range(n_shards))
+        self.replicas = replicas
+        self.max_tentativas = max_tentativas
+        self.tentativas = [0] * n_shards
+        self.excluidas = [set() for _ in range(n_shards)]
+        self.resultados: List[Optional[pd.DataFrame]] = [None] * n_shards
+        self.restantes = n_shards
+        self.erro: Optional[Exception] = None
+        self._condicao = threading.Condition()
+
+    def _elegivel(self, shard: int, replica: Replica, agora: float) -> bool:
+        excluidas = self.excluidas[shard]
+        if replica.url not in excluidas:
+            return True
+        # Todas as réplicas disponíveis já falharam com este shard: qualquer uma serve
+        return all(r.url in excluidas for r in self.replicas if r.disponivel(agora))
+
+    def proximo(self, replica: Replica) -> Optional[int]:
+        """Próximo shard para a réplica; None quando tudo terminou (ou foi abortado)"""
+        with self._condicao:
+            while True:
+                if self.erro is not None or self.restantes == 0:
+                    return None
+                agora = time.monotonic()
+                if replica.disponivel(agora):
+                    for shard in self.pendentes:
+                        if self._elegivel(shard, replica, agora):
+                            self.pendentes.remove(shard)
+                            self.tentativas[shard] += 1
+                            return shard
+                    espera = 0.1
+                else:
+                    espera = replica.suspensa_ate - agora
+                self._condicao.wait(timeout=max(espera, 0.01))
+
+    def concluir(self, shard: int, replica: Replica, resultado: pd.DataFrame, segundos: float) -> None:
+        with self._condicao:
+            self.resultados[shard] = resultado
+            self.restantes -= 1
+            replica.falhas_seguidas = 0
+            replica.shards += 1
+            replica.linhas += len(resultado)
+            replica.segundos += segundos
+            self._condicao.notify_all()
+
+    def devolver(self, shard: int, replica: Replica, erro: Exception) -> None:
+        with self._condicao:
+            replica.falhas += 1
+            replica.falhas_seguidas += 1
+            if replica.falhas_seguidas >= FALHAS_PARA_SUSPENDER:
+                replica.suspensa_ate = time.monotonic() + SUSPENSAO_S
+                logger.warning(f"Réplica {replica.url} suspensa por {SUSPENSAO_S:.0f}s após {replica.falhas_seguidas} falhas")
+
+            if self.tentativas[shard] >= self.max_tentativas:
+                self.erro = ErroPontuacao(f"Shard {shard} falhou {self.tentativas[shard]} vezes; último erro: {erro}")
+            else:
+                self.excluidas[shard].add(replica.url)
+                self.pendentes.appendleft(shard)
+            self._condicao.notify_all()
+
+    def abortar(self, erro: Exception) -> None:
+        with self._condicao:
+            self.erro = erro
+            self._condicao.notify_all()
+
+
+class ClienteShardeado:
+    """
+    Pontua DataFrames distribuindo shards entre réplicas da API.
+
+    Args:
+        endpoints: URLs base das réplicas (ex.: http://10.0.0.5:8000)
+        limite_por_replica: Requisições simultâneas por réplica (um valor ou um por endpoint)
+        tamanho_shard: Linhas por requisição ao /predict_batch
+        max_tentativas: Envios de um mesmo shard antes de desistir
+        threshold: Threshold de decisão repassado à API
+        model_name / model_version / model_alias: Seleção de modelo repassada à API;
+            fixar a versão evita misturar versões se as réplicas estiverem em deploy
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[str],
+        limite_por_replica: Union[int, Sequence[int]] = LIMITE_POR_REPLICA_PADRAO,
+        tamanho_shard: int = TAMANHO_SHARD_PADRAO,
+        max_tentativas: int = MAX_TENTATIVAS_PADRAO,
+        timeout: float = TIMEOUT_S,
+        threshold: float = 0.42,
+        model_name: Optional[str] = None,
+        model_version: Optional[int] = None,
+        model_alias: Optional[str] = None,
+    ):
+        if not endpoints:
+            raise ValueError("Informe ao menos um endpoint")
+        limites = [limite_por_replica] * len(endpoints) if isinstance(limite_por_replica, int) else list(limite_por_replica)
+        if len(limites) != len(endpoints) or min(limites) < 1:
+            raise ValueError("limite_por_replica deve ser >= 1 para cada endpoint")
+
+        self.replicas = [Replica(url, limite) for url, limite in zip(endpoints, limites)]
+        self.tamanho_shard = tamanho_shard
+        self.max_tentativas = max_tentativas
+        self.timeout = timeout
+
+        self._parametros = {"threshold": threshold, "model_name": model_name,
+                            "model_version": model_version, "model_alias": model_alias}
+
+    # ------------------------------------------------------------------
+    # Envio de um shard
+    # ------------------------------------------------------------------
+
+    def _corpo(self, shard: pd.DataFrame) -> bytes:
+        return corpo_lote(serializar_registros(shard), self._parametros)
+
+    def _enviar(self, replica: Replica, shard: pd.DataFrame) -> pd.DataFrame:
+        try:
+            resposta = replica.sessao.post(
+                f"{replica.url}/predict_batch",
+                data=self._corpo(shard),
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout,
+            )
+        except requests.RequestException as exc:
+            raise _FalhaReplica(f"{replica.url}: {exc}") from exc
+
+        if resposta.status_code == 429 or resposta.status_code >= 500:
+            raise _FalhaReplica(f"{replica.url}: HTTP {resposta.status_code} {resposta.text[:200]}")
+        if resposta.status_code >= 400:
+            raise ErroPontuacao(f"{replica.url}: HTTP {resposta.status_code} {resposta.text[:500]}")
+
+        corpo = resposta.json()
+        if len(corpo["results"]) != len(shard):
+            raise _FalhaReplica(f"{replica.url}: {len(corpo['results'])} resultados para {len(shard)} linhas")
+
+        resultado = pd.DataFrame(corpo["results"]).reindex(columns=COLUNAS_RESULTADO)
+        resultado["model_version"] = corpo.get("model_version")
+        return resultado
+
+    def _trabalhar(self, replica: Replica, agenda: _Agenda, shards: List[pd.DataFrame]) -> None:
+        while True:
+            indice = agenda.proximo(replica)
+            if indice is None:
+                return
+            inicio = time.perf_counter()
+            try:
+                resultado = self._enviar(replica, shards[indice])
+            except _FalhaReplica as exc:
+                logger.warning(f"Shard {indice} falhou: {exc}")
+                agenda.devolver(indice, replica, exc)
+            except Exception as exc:
+                agenda.abortar(exc)
+                return
+            else:
+                agenda.concluir(indice, replica, resultado, time.perf_counter() - inicio)
+
+    # ------------------------------------------------------------------
+    # Interface
+    # ------------------------------------------------------------------
+
+    def pontuar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Pontua todas as linhas de `df` e devolve o resultado por linha
+        (COLUNAS_RESULTADO + model_version) com o mesmo índice de `df`.
+        Colunas extras (ex.: loan_status) não são enviadas.
+        """
+        shards = [df.iloc[i:i + self.tamanho_shard] for i in range(0, len(df), self.tamanho_shard)]
+        if not shards:
+            return pd.DataFrame(columns=COLUNAS_RESULTADO + ["model_version"], index=df.index)
+
+        agenda = _Agenda(len(shards), self.replicas, self.max_tentativas)
+        threads = [
+            threading.Thread(target=self._trabalhar, args=(replica, agenda, shards),
+                             name=f"shard-{replica.url}-{vaga}", daemon=True)
+            for replica in self.replicas
+            for vaga in range(replica.limite)
+        ]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if agenda.erro is not None:
+            raise agenda.erro
+
+        resultado = pd.concat(agenda.resultados, ignore_index=True)
+        resultado.index = df.index
+        versoes = resultado["model_version"].dropna().unique()
+        if len(versoes) > 1:
+            logger.warning(f"Réplicas responderam com versões diferentes do modelo: {sorted(versoes)}")
+
+        duracao = time.perf_counter() - inicio
+        logger.info(f"{len(df)} linhas em {len(shards)} shards: {duracao:.2f}s ({len(df) / duracao:.0f} linhas/s)")
+        return resultado
+
+    def estatisticas(self) -> List[Dict[str, Any]]:
+        """Shards, linhas, falhas e latência média por réplica (acumulados desde a criação)"""
+        return [replica.estatisticas() for replica in self.replicas]
+
+    def fechar(self) -> None:
+        for replica in self.replicas:
+            replica.sessao.close()
+
+    def __enter__(self) -> "ClienteShardeado":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.fechar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("arquivo", type=Path, help="CSV ou Parquet com os dados brutos")
+    parser.add_argument("--endpoints", nargs="+", required=True, help="URLs base das réplicas")
+    parser.add_argument("--limite", type=int, default=LIMITE_POR_REPLICA_PADRAO, help="Requisições simultâneas por réplica")
+    parser.add_argument("--tamanho-shard", type=int, default=TAMANHO_SHARD_PADRAO)
+    parser.add_argument("--threshold", type=float, default=0.42)
+    parser.add_argument("--model-version", type=int, default=None)
+    parser.add_argument("--saida", type=Path, default=None, help="Parquet de saída (padrão: resumo no stdout)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    df = pd.read_parquet(args.arquivo) if args.arquivo.suffix == ".parquet" else pd.read_csv(args.arquivo)
+    with ClienteShardeado(
+        args.endpoints, args.limite, args.tamanho_shard, threshold=args.threshold, model_version=args.model_version
+    ) as cliente:
+        resultado = cliente.pontuar(df)
+        for estatistica in cliente.estatisticas():
+            print(estatistica)
+
+    print(resultado["status"].value_counts().to_dict())
+    print(f"probabilidade média: {np.nanmean(resultado['probabilidade_default'].astype(float)):.4f}")
+    if args.saida:
+        resultado.to_parquet(args.saida)
+        print(f"Resultado gravado em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
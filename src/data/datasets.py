@@ -0,0 +1,214 @@
+import logging
+import pickle
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from src.utils.paths import FORMATOS_DATASET, processed_path, resolve_processed_path
+
+logger = logging.getLogger(__name__)
+
+# Datasets gerados pelo notebook 3 (pré-processamento)
+DATASETS_PROCESSADOS = ("X_train", "X_test", "y_train", "y_test")
+
+# Linhas por row group no Parquet: grupos menores permitem descartar
+# blocos inteiros via estatísticas (min/max) ao aplicar filtros
+ROW_GROUP_PADRAO = 4096
+
+# Chave gravada nos metadados do schema para reconstruir pd.Series (alvos y_*)
+_CHAVE_TIPO = b"riskml_tipo"
+
+Filtros = List[Tuple[str, str, object]]
+
+
+def _para_tabela(obj: Union[pd.DataFrame, pd.Series]) -> pa.Table:
+    """Converte DataFrame/Series em tabela Arrow preservando índice e o tipo original"""
+    tipo = b"series" if isinstance(obj, pd.Series) else b"frame"
+    df = obj.to_frame() if isinstance(obj, pd.Series) else obj
+
+    tabela = pa.Table.from_pandas(df, preserve_index=True)
+    metadata = dict(tabela.schema.metadata or {})
+    metadata[_CHAVE_TIPO] = tipo
+    return tabela.replace_schema_metadata(metadata)
+
+
+def _para_pandas(tabela: pa.Table) -> Union[pd.DataFrame, pd.Series]:
+    """Reconstrói DataFrame ou Series a partir da tabela Arrow"""
+    metadata = tabela.schema.metadata or {}
+    df = tabela.to_pandas()
+
+    if metadata.get(_CHAVE_TIPO) == b"series" and df.shape[1] == 1:
+        return df.iloc[:, 0]
+    return df
+
+
+def _colunas_indice(schema: pa.Schema) -> List[str]:
+    """Colunas físicas que guardam o índice pandas (RangeIndex não ocupa coluna)"""
+    pandas_meta = schema.pandas_metadata or {}
+    return [c for c in pandas_meta.get("index_columns", []) if isinstance(c, str)]
+
+
+def _formato_do_caminho(caminho: Path) -> str:
+    for formato, extensao in FORMATOS_DATASET.items():
+        if caminho.suffix == extensao:
+            return formato
+    raise ValueError(f"Extensão de arquivo não suportada: {caminho}")
+
+
+def salvar_dataset(
+    obj: Union[pd.DataFrame, pd.Series],
+    nome: str,
+    formato: str = "parquet",
+    row_group_size: int = ROW_GROUP_PADRAO,
+) -> Path:
+    """
+    Salva um dataset processado em formato colunar.
+
+    - parquet: compressão zstd e row groups de `row_group_size` linhas
+    - feather: Arrow IPC sem compressão, permitindo leitura zero-copy via mmap
+    """
+    caminho = processed_path(nome, formato)
+    logger.info(f"Salvando dataset '{nome}' ({formato}) em: {caminho}")
+
+    if formato == "pickle":
+        obj.to_pickle(caminho)
+        return caminho
+
+    tabela = _para_tabela(obj)
+
+    if formato == "parquet":
+        pq.write_table(tabela, caminho, row_group_size=row_group_size, compression="zstd")
+    else:
+        feather.write_feather(tabela, caminho, compression="uncompressed")
+
+    logger.info(f"Dataset '{nome}' salvo: {tabela.num_rows} linhas, {tabela.num_columns} colunas")
+    return caminho
+
+
+def carregar_dataset(
+    nome: str,
+    colunas: Optional[Sequence[str]] = None,
+    filtros: Optional[Filtros] = None,
+    formato: Optional[str] = None,
+    memory_map: bool = True,
+) -> Union[pd.DataFrame, pd.Series]:
+    """
+    Carrega um dataset processado lendo apenas o necessário.
+
+    Args:
+        nome: Nome do dataset (ex.: X_train, y_test)
+        colunas: Projeção de colunas; None carrega todas
+        filtros: Filtros no formato do pyarrow, ex.: [("loan_grade", ">=", 3.0)].
+                 No Parquet, row groups fora do intervalo nem são lidos.
+        formato: parquet, feather ou pickle. Se None, usa o primeiro disponível
+                 (feather > parquet > pickle)
+        memory_map: Lê o arquivo via mmap (feather sem compressão é zero-copy)
+    """
+    caminho = processed_path(nome, formato) if formato else resolve_processed_path(nome)
+    formato = _formato_do_caminho(caminho)
+    expressao = pq.filters_to_expression(filtros) if filtros else None
+
+    logger.info(f"Carregando dataset '{nome}' de: {caminho}")
+    logger.debug(f"Colunas: {colunas} | Filtros: {filtros} | memory_map: {memory_map}")
+
+    if formato == "pickle":
+        # Fallback legado: desserializa tudo e aplica projeção/filtros depois
+        with open(caminho, "rb") as f:
+            obj = pickle.load(f)
+        tabela = _para_tabela(obj)
+        if expressao is not None:
+            tabela = tabela.filter(expressao)
+        if colunas is not None:
+            tabela = tabela.select(list(colunas) + _colunas_indice(tabela.schema))
+        return _para_pandas(tabela)
+
+    if formato == "parquet":
+        tabela = pq.read_table(
+            caminho,
+            columns=list(colunas) if colunas is not None else None,
+            filters=filtros,
+            memory_map=memory_map,
+            use_pandas_metadata=True,
+        )
+        return _para_pandas(tabela)
+
+    # Feather / Arrow IPC
+    with pa.memory_map(str(caminho)) as fonte:
+        schema = pa.ipc.open_file(fonte).schema
+    projecao = None
+    if colunas is not None:
+        projecao = list(colunas) + _colunas_indice(schema)
+
+    if expressao is None:
+        tabela = feather.read_table(caminho, columns=projecao, memory_map=memory_map)
+    else:
+        tabela = ds.dataset(caminho, format="ipc").to_table(columns=projecao, filter=expressao)
+
+    # Projeções via dataset perdem os metadados pandas do schema original
+    tabela = tabela.replace_schema_metadata(schema.metadata)
+    return _para_pandas(tabela)
+
+
+def remover_outliers_iqr(df: pd.DataFrame, colunas: Sequence[str]) -> pd.DataFrame:
+    """Remoção sequencial de outliers por IQR (1.5x), como no notebook 3"""
+    df_limpo = df
+    for col in colunas:
+        q1, q3 = df_limpo[col].quantile(0.25), df_limpo[col].quantile(0.75)
+        iqr = q3 - q1
+        df_limpo = df_limpo[(df_limpo[col] >= q1 - 1.5 * iqr) & (df_limpo[col] <= q3 + 1.5 * iqr)]
+    return df_limpo
+
+
+def carregar_teste_bruto() -> pd.DataFrame:
+    """
+    Reconstrói o conjunto de teste em dados brutos (antes do preprocessor).
+
+    O notebook 3 remove outliers de dados_novos.csv, transforma tudo e só então
+    separa treino/teste; o índice de X_test aponta, portanto, para a posição da
+    linha no dataset sem outliers. Inclui a coluna alvo `loan_status`.
+    """
+    from src.utils.paths import data_path
+
+    dados = pd.read_csv(data_path("dados_novos.csv", "interim"))
+    colunas_numericas = [
+        c for c in dados.columns
+        if dados[c].dtype in ("int64", "float64") and c != "loan_status"
+    ]
+    dados = remover_outliers_iqr(dados, colunas_numericas).reset_index(drop=True)
+
+    indice_teste = carregar_dataset("X_test", colunas=[]).index
+    return dados.iloc[indice_teste]
+
+
+def migrar_pickles(
+    nomes: Sequence[str] = DATASETS_PROCESSADOS,
+    formatos: Sequence[str] = ("parquet", "feather"),
+) -> dict:
+    """Converte os pickles de data/processed para os formatos colunares"""
+    gerados = {}
+
+    for nome in nomes:
+        origem = processed_path(nome, "pickle")
+        if not origem.exists():
+            logger.warning(f"Pickle '{origem}' não encontrado, ignorando")
+            continue
+
+        obj = pd.read_pickle(origem)
+        gerados[nome] = [salvar_dataset(obj, nome, formato) for formato in formatos]
+
+        # Garante que a conversão preserva valores, índice e tipos
+        for caminho in gerados[nome]:
+            convertido = carregar_dataset(nome, formato=_formato_do_caminho(caminho))
+            if isinstance(obj, pd.Series):
+                pd.testing.assert_series_equal(obj, convertido)
+            else:
+                pd.testing.assert_frame_equal(obj, convertido)
+
+        logger.info(f"Dataset '{nome}' migrado para {list(formatos)}")
+
+    return gerados
@@ -0,0 +1,29 @@
+"""Converte os datasets pickle de data/processed para Parquet e Feather (Arrow).
+
+Run with:
+    python -m src.data.migrate_pickles
+    python -m src.data.migrate_pickles --formatos parquet
+"""
+import argparse
+import logging
+
+from src.data.datasets import DATASETS_PROCESSADOS, migrar_pickles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nomes", nargs="+", default=list(DATASETS_PROCESSADOS))
+    parser.add_argument("--formatos", nargs="+", default=["parquet", "feather"],
+                        choices=["parquet", "feather"])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    gerados = migrar_pickles(args.nomes, args.formatos)
+    for nome, caminhos in gerados.items():
+        for caminho in caminhos:
+            print(f"{nome}: {caminho} ({caminho.stat().st_size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
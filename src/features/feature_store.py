@@ -1,11 +1,27 @@
 import pickle
+import numpy as np
 import pandas as pd
 import logging
+from typing import Any, Dict, List
 from src.utils.paths import data_path
+from src.features.raw_schema import aplicar_limpeza, carregar_regras_limpeza, colunas_faltantes, derivar_colunas
 
 # Sistema de registro de eventos
 logger = logging.getLogger(__name__)
 
+# Colunas brutas de entrada esperadas pelo preprocessor (contrato das APIs)
+COLUNAS_ENTRADA = [
+    'person_income', 'person_home_ownership', 'person_emp_length',
+    'loan_intent', 'loan_grade', 'loan_amnt', 'loan_int_rate',
+    'loan_percent_income', 'cb_person_default_on_file',
+    'cb_person_cred_hist_length', 'faixa_etaria'
+]
+
+
+def faltantes_entrada(colunas) -> List[str]:
+    """Colunas de COLUNAS_ENTRADA ausentes e não deriváveis do esquema bruto (ex.: person_age)"""
+    return colunas_faltantes(colunas, COLUNAS_ENTRADA)
+
 class FeatureStore:
     """
     Camada responsável por padronizar o acesso às features em producao
@@ -20,6 +36,7 @@ class FeatureStore:
     def __init__(self):
         self.preprocessor = None        # Pipeline de pré-processamento treinado
         self.selected_features = None   # Lista final de features usadas no modelo
+        self.regras_limpeza = None      # Limites IQR do treino por coluna numérica (cleaning_rules.json)
         self._loaded = False            # Controle de carregamento da store
 
     @classmethod
@@ -85,11 +102,38 @@ class FeatureStore:
             logger.error(f"Erro ao carregar feature_selection: {e}")
             raise
 
+        # Regras de limpeza do notebook 3 (opcional: sem o arquivo, nada é limitado)
+        store.regras_limpeza = carregar_regras_limpeza(scalers_dir / "cleaning_rules.json")
+
         # Marca explicitamente que a FeatureStore está pronta para uso
         store._loaded = True
         return store
 
 
+    @classmethod
+    def from_bundle(cls, bundle) -> "FeatureStore":
+        """
+        FeatureStore a partir de um bundle de inferência (src.models.bundle).
+        As features selecionadas já vêm resolvidas para os nomes transformados,
+        garantindo o mesmo preprocessor e a mesma seleção usados pelo modelo do bundle.
+        """
+        store = cls()
+        store.preprocessor = bundle.preprocessor
+        store.selected_features = list(bundle.colunas_selecionadas)
+        # Bundles anteriores às regras de limpeza usam o arquivo de data/scalers
+        store.regras_limpeza = bundle.metadados.get("regras_limpeza") or carregar_regras_limpeza()
+        store._loaded = True
+        logger.info(f"FeatureStore carregada do bundle: {bundle.caminho}")
+        return store
+
+    def preparar_entrada(self, df_raw: pd.DataFrame) -> pd.DataFrame:
+        """
+        Aceita o esquema bruto (data/raw): deriva faixa_etaria e loan_percent_income
+        ausentes e limita os outliers numéricos aos limites do treino (src.features.raw_schema).
+        Idempotente; sem nada a fazer, devolve o próprio DataFrame.
+        """
+        return aplicar_limpeza(derivar_colunas(df_raw), self.regras_limpeza)
+
     def transform_all(self, df_raw: pd.DataFrame) -> pd.DataFrame:
         """
         Aplica o pipeline completo de pré-processamento aos dados brutos
@@ -100,6 +144,8 @@ class FeatureStore:
             # Proteção contra uso incorreto do componente
             raise RuntimeError("FeatureStore não carregada. Use FeatureStore.load().")
 
+        df_raw = self.preparar_entrada(df_raw)
+
         try:
             # Observabilidade: shape de entrata para detectar quebra de contrato
             logger.info(f"Transformando DataFrame com shape: {df_raw.shape}")
@@ -189,6 +235,83 @@ class FeatureStore:
         return X_full[updated_selected_features]
 
 
+    def categorias_conhecidas(self) -> Dict[str, np.ndarray]:
+        """Categorias vistas no treino por coluna categórica (encoders do preprocessor)"""
+        categorias = {}
+        for _, transformador, colunas in self.preprocessor.transformers_:
+            if isinstance(transformador, str):
+                continue
+            encoder = transformador[-1] if hasattr(transformador, "steps") else transformador
+            if hasattr(encoder, "categories_"):
+                categorias.update(zip(colunas, encoder.categories_))
+        return categorias
+
+    def mascara_categorias_validas(self, df_raw: pd.DataFrame) -> np.ndarray:
+        """
+        Máscara das linhas cujas categorias foram vistas no treino.
+        Valores ausentes são válidos (o preprocessor os imputa).
+        """
+        df_raw = derivar_colunas(df_raw)
+        mascara = np.ones(len(df_raw), dtype=bool)
+        for coluna, categorias in self.categorias_conhecidas().items():
+            valores = df_raw[coluna]
+            mascara &= (valores.isin(categorias) | valores.isna()).to_numpy()
+        return mascara
+
+    def transform_variacoes(self, base_raw: pd.DataFrame, variacoes: Dict[str, List[Any]]) -> pd.DataFrame:
+        """
+        Transforma uma grade de cenários "e se" sobre um registro base.
+
+        O registro base é transformado uma única vez; para cada grupo do
+        ColumnTransformer que contém colunas variadas, apenas esse grupo é
+        retransformado sobre a grade. As demais colunas repetem o vetor base.
+
+        Args:
+            base_raw: DataFrame com uma única linha (dados brutos)
+            variacoes: {coluna: valores}; a grade é o produto cartesiano na ordem do dict
+
+        Returns:
+            DataFrame com todas as features transformadas, uma linha por ponto da grade
+        """
+        if not self._loaded:
+            raise RuntimeError("FeatureStore não carregada. Use FeatureStore.load().")
+        if len(base_raw) != 1:
+            raise ValueError(f"O registro base deve ter exatamente 1 linha, recebido: {len(base_raw)}")
+
+        base_raw = self.preparar_entrada(base_raw)
+        base_full = self.transform_all(base_raw)
+
+        # Produto cartesiano: a primeira coluna varia mais devagar (ordem "C")
+        malha = np.meshgrid(*[np.asarray(v, dtype=object) for v in variacoes.values()], indexing="ij")
+        grade = {coluna: eixo.ravel() for coluna, eixo in zip(variacoes, malha)}
+        n_pontos = len(next(iter(grade.values())))
+
+        X_full = pd.DataFrame(
+            np.repeat(base_full.to_numpy(), n_pontos, axis=0),
+            columns=base_full.columns,
+        )
+
+        for nome, transformador, colunas in self.preprocessor.transformers_:
+            colunas = list(colunas) if not isinstance(colunas, str) else [colunas]
+            if transformador == "drop" or not set(variacoes) & set(colunas):
+                continue
+
+            # Apenas o grupo afetado passa pelo pipeline, com as demais colunas do base
+            grupo_raw = base_raw[colunas].iloc[np.zeros(n_pontos, dtype=int)].reset_index(drop=True)
+            for coluna in set(variacoes) & set(colunas):
+                grupo_raw[coluna] = grade[coluna]
+            grupo_raw = aplicar_limpeza(grupo_raw, self.regras_limpeza)
+
+            if transformador == "passthrough":
+                valores, nomes_saida = grupo_raw.to_numpy(), colunas
+            else:
+                valores = transformador.transform(grupo_raw)
+                nomes_saida = transformador.get_feature_names_out(colunas)
+            X_full[[f"{nome}__{c}" for c in nomes_saida]] = valores
+
+        logger.info(f"Grade de sensibilidade transformada: {n_pontos} pontos, colunas variadas: {list(variacoes)}")
+        return X_full
+
     def transform(self, df_raw: pd.DataFrame) -> pd.DataFrame:
         """
         Interface única para inferência
@@ -0,0 +1,184 @@
+"""Esquema bruto de entrada: features derivadas e regras de limpeza do treino.
+
+O modelo recebe `faixa_etaria`, mas data/raw/credit_risk_dataset.csv e os
+sistemas de origem trazem `person_age`. Este módulo reproduz, de forma
+vetorizada, o que os notebooks fazem antes do preprocessor:
+
+- Notebook 2: `faixa_etaria` = pd.cut(person_age, [20, 30, 40, 50, 60, 65, 95], right=False),
+  aqui com np.digitize; idades fora das faixas ficam ausentes (imputadas)
+- `loan_percent_income` = loan_amnt / person_income (2 casas), quando ausente
+- Notebook 3: limites IQR (Q1 - 1.5·IQR, Q3 + 1.5·IQR) calculados em sequência
+  sobre as colunas numéricas. No treino as linhas fora deles foram removidas;
+  na inferência os valores são limitados (clip) a eles, então outliers como
+  person_emp_length = 123 viram o maior valor visto no treino. Como todo
+  split das árvores cai dentro desses limites, o score não muda
+
+Os limites ficam em data/scalers/cleaning_rules.json, ao lado do preprocessor.
+
+Run with:
+    python -m src.features.raw_schema          # recalcula os limites a partir de data/interim/dados_novos.csv
+"""
+import argparse
+import json
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.utils.paths import data_path
+
+logger = logging.getLogger(__name__)
+
+BORDAS_FAIXA_ETARIA = np.array([20, 30, 40, 50, 60, 65, 95], dtype=np.float64)
+ROTULOS_FAIXA_ETARIA = np.array(["20-29", "30-39", "40-49", "50-59", "60-64", "65+"], dtype=object)
+
+# Coluna esperada pelo preprocessor -> colunas brutas das quais pode ser derivada
+COLUNAS_ORIGEM = {
+    "faixa_etaria": ("person_age",),
+    "loan_percent_income": ("loan_amnt", "person_income"),
+}
+# Colunas do esquema bruto que não fazem parte de COLUNAS_ENTRADA
+COLUNAS_BRUTAS_EXTRAS = ["person_age"]
+
+# Colunas numéricas na ordem em que o notebook 3 removeu outliers
+COLUNAS_LIMPEZA = [
+    "person_income", "person_emp_length", "loan_amnt",
+    "loan_int_rate", "loan_percent_income", "cb_person_cred_hist_length",
+]
+FATOR_IQR = 1.5
+ARQUIVO_REGRAS = "cleaning_rules.json"
+
+
+def calcular_faixa_etaria(idades) -> np.ndarray:
+    """Faixa etária do notebook 2 (intervalos fechados à esquerda); fora das faixas: NaN"""
+    idades = np.asarray(idades, dtype=np.float64)
+    indices = np.digitize(idades, BORDAS_FAIXA_ETARIA)
+    # digitize: 0 abaixo da primeira borda, len(bordas) acima da última ou NaN
+    dentro = (indices > 0) & (indices < len(BORDAS_FAIXA_ETARIA))
+    faixas = np.full(len(idades), np.nan, dtype=object)
+    faixas[dentro] = ROTULOS_FAIXA_ETARIA[indices[dentro] - 1]
+    return faixas
+
+
+def calcular_percentual_renda(loan_amnt, person_income) -> np.ndarray:
+    """loan_amnt / person_income arredondado como no dataset; renda <= 0 gera NaN"""
+    valor = np.asarray(loan_amnt, dtype=np.float64)
+    renda = np.asarray(person_income, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(renda > 0, np.round(valor / renda, 2), np.nan)
+
+
+def colunas_faltantes(presentes: Iterable[str], esperadas: Sequence[str]) -> List[str]:
+    """Colunas esperadas ausentes que também não podem ser derivadas das presentes"""
+    presentes = set(presentes)
+    return [
+        c for c in esperadas
+        if c not in presentes and not (c in COLUNAS_ORIGEM and presentes.issuperset(COLUNAS_ORIGEM[c]))
+    ]
+
+
+def derivar_colunas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Preenche `faixa_etaria` e `loan_percent_income` ausentes (coluna inteira
+    ou valores nulos) a partir das colunas brutas. Valores informados são
+    mantidos. Sem nada a derivar, devolve o próprio DataFrame (sem cópia).
+    """
+    copiado = False
+    for coluna, origens in COLUNAS_ORIGEM.items():
+        if not set(origens).issubset(df.columns):
+            continue
+        faltando = df[coluna].isna().to_numpy() if coluna in df.columns else np.ones(len(df), dtype=bool)
+        if not faltando.any():
+            continue
+
+        if not copiado:
+            df, copiado = df.copy(), True
+        fontes = [pd.to_numeric(df[o], errors="coerce").to_numpy(dtype=np.float64) for o in origens]
+        derivado = calcular_faixa_etaria(*fontes) if coluna == "faixa_etaria" else calcular_percentual_renda(*fontes)
+
+        if coluna not in df.columns:
+            df[coluna] = derivado
+        else:
+            valores = df[coluna].to_numpy(dtype=object if coluna == "faixa_etaria" else np.float64, copy=True)
+            valores[faltando] = derivado[faltando]
+            df[coluna] = valores
+    return df
+
+
+def calcular_regras_limpeza(df: pd.DataFrame, colunas: Sequence[str] = COLUNAS_LIMPEZA) -> Dict[str, Any]:
+    """Limites IQR sequenciais do notebook 3 (cada coluna sobre as linhas que sobraram das anteriores)"""
+    restante = df
+    limites = {}
+    for coluna in colunas:
+        q1, q3 = restante[coluna].quantile([0.25, 0.75])
+        iqr = q3 - q1
+        inferior, superior = q1 - FATOR_IQR * iqr, q3 + FATOR_IQR * iqr
+        limites[coluna] = [float(inferior), float(superior)]
+        restante = restante[(restante[coluna] >= inferior) & (restante[coluna] <= superior)]
+
+    return {
+        "limites": limites,
+        "fator_iqr": FATOR_IQR,
+        "linhas_origem": len(df),
+        "linhas_mantidas": len(restante),
+        "criado_em": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def caminho_regras() -> Path:
+    return data_path(ARQUIVO_REGRAS, "scalers")
+
+
+def carregar_regras_limpeza(caminho: Optional[Path] = None) -> Optional[Dict[str, List[float]]]:
+    """Limites por coluna; None (sem limpeza) se o arquivo não existe"""
+    caminho = Path(caminho) if caminho else caminho_regras()
+    if not caminho.exists():
+        logger.warning(f"Regras de limpeza não encontradas em {caminho}; outliers não serão limitados")
+        return None
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)["limites"]
+
+
+def aplicar_limpeza(df: pd.DataFrame, limites: Optional[Dict[str, List[float]]]) -> pd.DataFrame:
+    """Limita as colunas numéricas presentes aos limites do treino (NaN é preservado)"""
+    colunas = [c for c in (limites or {}) if c in df.columns]
+    if not colunas:
+        return df
+
+    valores = df[colunas].to_numpy(dtype=np.float64)
+    inferior = np.array([limites[c][0] for c in colunas])
+    superior = np.array([limites[c][1] for c in colunas])
+    limitados = np.clip(valores, inferior, superior)
+
+    fora = (limitados != valores) & ~np.isnan(valores)
+    if fora.any():
+        logger.debug(f"Limpeza: {int(fora.sum())} valores limitados em {np.array(colunas)[fora.any(axis=0)].tolist()}")
+        df = df.copy()
+        df[colunas] = limitados
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--arquivo", type=Path, default=None, help="Dados do notebook 3 (padrão: data/interim/dados_novos.csv)")
+    parser.add_argument("--saida", type=Path, default=None, help="Destino (padrão: data/scalers/cleaning_rules.json)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    dados = pd.read_csv(args.arquivo or data_path("dados_novos.csv", "interim"))
+    regras = calcular_regras_limpeza(derivar_colunas(dados))
+    saida = args.saida or caminho_regras()
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(regras, f, indent=2, ensure_ascii=False)
+
+    print(f"Regras gravadas em {saida} ({regras['linhas_mantidas']}/{regras['linhas_origem']} linhas dentro dos limites)")
+    for coluna, (inferior, superior) in regras["limites"].items():
+        print(f"  {coluna:<28} [{inferior:.4f}, {superior:.4f}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Validação vetorizada de lotes de entrada antes da pontuação.
+
+Cada linha recebe um código de status; apenas as linhas "ok" seguem para o
+preprocessor, de modo que um registro inválido não derruba o lote inteiro.
+Valores ausentes (None/NaN) são válidos: o preprocessor os imputa.
+O esquema bruto também é aceito: `faixa_etaria` e `loan_percent_income`
+ausentes são derivados de person_age, loan_amnt e person_income
+(src.features.raw_schema) depois da validação numérica.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.features.feature_store import COLUNAS_ENTRADA, faltantes_entrada
+from src.features.raw_schema import COLUNAS_BRUTAS_EXTRAS, derivar_colunas
+
+OK = "ok"
+COLUNA_AUSENTE = "coluna_ausente"
+VALOR_INVALIDO = "valor_invalido"
+CATEGORIA_DESCONHECIDA = "categoria_desconhecida"
+
+
+class ResultadoValidacao:
+    """
+    Atributos:
+        df: Lote com as colunas de entrada e numéricas já convertidas para float
+        codigos: Código por linha (OK, COLUNA_AUSENTE, VALOR_INVALIDO, CATEGORIA_DESCONHECIDA)
+        erros: Mensagem por linha (None nas linhas válidas)
+    """
+
+    def __init__(self, df: pd.DataFrame, codigos: np.ndarray, erros: List[Optional[str]]):
+        self.df = df
+        self.codigos = codigos
+        self.erros = erros
+
+    @property
+    def validas(self) -> np.ndarray:
+        return self.codigos == OK
+
+    def contagem(self) -> Dict[str, int]:
+        codigos, quantidades = np.unique(self.codigos, return_counts=True)
+        return {str(c): int(q) for c, q in zip(codigos, quantidades)}
+
+
+def registros_para_dataframe(registros: Sequence[Dict[str, Any]]):
+    """
+    Converte registros JSON no DataFrame de entrada, distinguindo chave ausente
+    (erro) de valor nulo (imputado). Retorna (df, colunas ausentes por linha);
+    colunas deriváveis do esquema bruto não contam como ausentes.
+    """
+    ausentes = [faltantes_entrada(r.keys()) for r in registros]
+    df = pd.DataFrame(list(registros), columns=COLUNAS_ENTRADA + COLUNAS_BRUTAS_EXTRAS).fillna(np.nan)
+    return df, ausentes
+
+
+def validar_lote(
+    feature_store,
+    df_raw: pd.DataFrame,
+    colunas_ausentes: Optional[List[List[str]]] = None,
+) -> ResultadoValidacao:
+    """
+    Valida todas as linhas de uma vez, coluna a coluna.
+
+    Prioridade dos códigos: coluna ausente > valor não numérico/infinito >
+    categoria não vista no treino.
+
+    Args:
+        feature_store: FeatureStore carregada (fornece as categorias conhecidas)
+        df_raw: Lote no contrato de COLUNAS_ENTRADA ou no esquema bruto; demais colunas são ignoradas
+        colunas_ausentes: Colunas faltantes por linha (registros_para_dataframe);
+            se None, apenas colunas inteiramente ausentes do DataFrame contam
+    """
+    n = len(df_raw)
+    codigos = np.full(n, OK, dtype=object)
+    erros: List[Optional[str]] = [None] * n
+    categorias = feature_store.categorias_conhecidas()
+
+    faltando_no_df = faltantes_entrada(df_raw.columns)
+    colunas = [c for c in COLUNAS_ENTRADA + COLUNAS_BRUTAS_EXTRAS if c in df_raw.columns]
+    df = df_raw[colunas].fillna(np.nan)
+
+    # Máscaras por coluna: (linhas inválidas, código)
+    problemas = {}
+    for coluna in colunas:
+        if coluna in categorias:
+            continue
+        valores = df[coluna]
+        numericos = pd.to_numeric(valores, errors="coerce").astype(float)
+        invalidos = (numericos.isna() & valores.notna()) | np.isinf(numericos)
+        problemas[coluna] = invalidos.to_numpy(), VALOR_INVALIDO
+        df[coluna] = numericos.where(~invalidos)
+
+    # Derivação sobre os números já convertidos; só então as categorias são verificadas
+    df = derivar_colunas(df).reindex(columns=COLUNAS_ENTRADA)
+    for coluna in categorias:
+        if coluna in faltando_no_df:
+            continue
+        valores = df[coluna]
+        problemas[coluna] = (~(valores.isin(categorias[coluna]) | valores.isna())).to_numpy(), CATEGORIA_DESCONHECIDA
+
+    # Percorre da menor para a maior prioridade; mensagens do mesmo código se acumulam
+    por_linha: Dict[int, tuple] = {}
+    for codigo in (CATEGORIA_DESCONHECIDA, VALOR_INVALIDO):
+        for coluna, (mascara, codigo_coluna) in problemas.items():
+            if codigo_coluna != codigo:
+                continue
+            for i in np.flatnonzero(mascara):
+                if i not in por_linha or por_linha[i][0] != codigo:
+                    por_linha[i] = (codigo, [])
+                original = df_raw[coluna] if coluna in df_raw.columns else df[coluna]
+                por_linha[i][1].append(f"{coluna}={original.iloc[i]!r}")
+    for i, (codigo, mensagens) in por_linha.items():
+        codigos[i] = codigo
+        erros[i] = "; ".join(mensagens)
+
+    # Ausência sobrepõe os demais erros
+    if faltando_no_df:
+        codigos[:] = COLUNA_AUSENTE
+        erros = [f"Colunas faltando: {faltando_no_df}"] * n
+    if colunas_ausentes is not None:
+        for i, faltantes in enumerate(colunas_ausentes):
+            if faltantes:
+                codigos[i] = COLUNA_AUSENTE
+                erros[i] = f"Colunas faltando: {faltantes}"
+
+    return ResultadoValidacao(df, codigos, erros)
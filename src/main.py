@@ -3,6 +3,7 @@ import numpy as np
 from typing import Union, Dict
 from src.models.predictor import ModelProducao
 from src.features.feature_store import FeatureStore
+from src.features.validation import validar_lote
 
 def prever_risco(dados_entrada: Union[Dict, pd.DataFrame], threshold: float = 0.42) -> Dict:
     # Converter entrada para DataFrame
@@ -40,30 +41,35 @@ def prever_risco(dados_entrada: Union[Dict, pd.DataFrame], threshold: float = 0.
 
 
 def prever_risco_lote(dados_lote: pd.DataFrame, threshold: float = 0.42) -> pd.DataFrame:
-    df_input = dados_lote.copy()
-
-    # Carregar FeatureStore
+    """
+    Pontua um lote linha a linha isolada: linhas inválidas recebem status/código
+    de erro e probabilidade NaN, sem interromper a pontuação das demais.
+    O resultado mantém o índice de `dados_lote`.
+    """
+    # Carregar FeatureStore e validar o lote de uma vez
     feature_store = FeatureStore.load()
+    validacao = validar_lote(feature_store, dados_lote)
+    validas = validacao.validas
 
-    # Passo 1: transforma todas as features
-    X_full = feature_store.transform_all(df_input)
+    prob_default = np.full(len(dados_lote), np.nan)
+    if validas.any():
+        # Passo 1 e 2: transforma e seleciona as features do RFECV só nas linhas válidas
+        X_final = feature_store.transform(validacao.df[validas])
 
-    # Passo 2: seleciona apenas as features do RFECV
-    X_final = feature_store.select_features(X_full)
-
-    # Carregar modelo de produção
-    modelo = ModelProducao()
-    proba = modelo.predict_proba(X_final)
-    prob_default = proba[:, 1]
+        # Carregar modelo de produção
+        modelo = ModelProducao()
+        prob_default[validas] = modelo.predict_proba(X_final)[:, 1]
 
     # Classificação
     classificacao = np.where(prob_default >= threshold, "Alto Risco", "Baixo Risco")
     confianca = np.abs(prob_default - threshold)
 
     resultado = pd.DataFrame({
+        'status': validacao.codigos,
+        'erro': validacao.erros,
         'probabilidade_default': np.round(prob_default, 4),
-        'classificacao': classificacao,
+        'classificacao': np.where(validas, classificacao, None),
         'confianca': np.round(confianca, 4)
-    })
+    }, index=dados_lote.index)
 
     return resultado
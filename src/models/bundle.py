@@ -0,0 +1,240 @@
+"""Bundle de inferência: preprocessor, seleção, modelo e threshold em um único arquivo.
+
+Formato (.riskbundle):
+    MAGIC (8 bytes) | versão do formato (uint32) | tamanho do cabeçalho (uint64)
+    cabeçalho JSON (metadados, colunas selecionadas, índices, seções)
+    seções pickle alinhadas a 64 bytes, cada uma com SHA-256 no cabeçalho
+
+O arquivo é aberto com mmap e cada seção é desserializada direto da memória
+mapeada; o cabeçalho guarda o checksum de cada seção e um checksum do próprio
+conteúdo, verificados na carga. O bundle é registrado como artefato do modelo
+(`bundle.riskbundle` ao lado de `model.pkl` no mlruns).
+
+Run with:
+    python -m src.models.bundle                       # versão Production
+    python -m src.models.bundle --versao 7 --threshold 0.42
+    python -m src.models.bundle --verificar data/bundles/lgb_prob_default_v7.riskbundle
+"""
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import pickle
+import shutil
+import struct
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.paths import data_path
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RISKBNDL"
+VERSAO_FORMATO = 1
+_PREFIXO = struct.Struct("<8sIQ")
+ALINHAMENTO = 64
+
+NOME_ARTEFATO = "bundle.riskbundle"
+THRESHOLD_PADRAO = 0.42
+
+
+class BundleInvalido(ValueError):
+    """Arquivo corrompido, adulterado ou de formato incompatível"""
+
+
+def caminho_bundle(model_name: str, version: int) -> Path:
+    return data_path(f"{model_name}_v{version}.riskbundle", "bundles")
+
+
+def _sha256(dados) -> str:
+    return hashlib.sha256(dados).hexdigest()
+
+
+def _versoes_bibliotecas() -> Dict[str, str]:
+    import lightgbm
+    import sklearn
+    return {"scikit-learn": sklearn.__version__, "lightgbm": lightgbm.__version__, "numpy": np.__version__}
+
+
+def criar_bundle(feature_store, modelo, caminho: Path, threshold: float = THRESHOLD_PADRAO) -> Path:
+    """
+    Grava o bundle de uma versão do modelo.
+
+    Args:
+        feature_store: FeatureStore carregada (preprocessor + selected_features)
+        modelo: ModelProducao da versão a empacotar
+        caminho: Destino do arquivo
+        threshold: Threshold de decisão distribuído junto com o modelo
+    """
+    nomes_transformados = list(feature_store.preprocessor.get_feature_names_out())
+    selecionadas = list(feature_store.select_features(pd.DataFrame(columns=nomes_transformados)).columns)
+
+    secoes = {
+        "preprocessor": pickle.dumps(feature_store.preprocessor, protocol=pickle.HIGHEST_PROTOCOL),
+        "modelo": pickle.dumps(modelo._modelo, protocol=pickle.HIGHEST_PROTOCOL),
+    }
+
+    metadados = {
+        "model_name": modelo.model_name,
+        "model_version": modelo.version,
+        "threshold": float(threshold),
+        "colunas_selecionadas": selecionadas,
+        "indices_selecionados": [nomes_transformados.index(c) for c in selecionadas],
+        "regras_limpeza": feature_store.regras_limpeza,
+        "criado_em": datetime.now(timezone.utc).isoformat(),
+        "bibliotecas": _versoes_bibliotecas(),
+    }
+
+    # Offsets relativos ao início da área de dados (logo após o cabeçalho alinhado)
+    indice, offset = {}, 0
+    for nome, dados in secoes.items():
+        indice[nome] = {"offset": offset, "tamanho": len(dados), "sha256": _sha256(dados)}
+        offset += -(-len(dados) // ALINHAMENTO) * ALINHAMENTO
+
+    cabecalho = {"metadados": metadados, "secoes": indice}
+    cabecalho["sha256"] = _sha256(json.dumps(cabecalho, sort_keys=True).encode())
+    cabecalho_bytes = json.dumps(cabecalho, sort_keys=True).encode()
+    inicio_dados = -(-(_PREFIXO.size + len(cabecalho_bytes)) // ALINHAMENTO) * ALINHAMENTO
+
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_suffix(caminho.suffix + ".tmp")
+    with open(temporario, "wb") as f:
+        f.write(_PREFIXO.pack(MAGIC, VERSAO_FORMATO, len(cabecalho_bytes)))
+        f.write(cabecalho_bytes)
+        for nome, dados in secoes.items():
+            f.seek(inicio_dados + indice[nome]["offset"])
+            f.write(dados)
+    # Troca atômica: leitores nunca veem um bundle parcial
+    temporario.replace(caminho)
+
+    logger.info(f"Bundle gravado em {caminho} ({caminho.stat().st_size / 1024:.0f} KB)")
+    return caminho
+
+
+class BundleInferencia:
+    """
+    Artefatos de inferência lidos de um único arquivo.
+
+    Atributos: preprocessor, modelo (LGBMClassifier), colunas_selecionadas,
+    indices_selecionados, threshold e metadados.
+    """
+
+    def __init__(self, caminho: Path, verificar: bool = True):
+        self.caminho = Path(caminho)
+        with open(self.caminho, "rb") as f:
+            memoria = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            with memoryview(memoria) as visao:
+                magic, versao, tamanho_cabecalho = _PREFIXO.unpack_from(visao, 0)
+                if magic != MAGIC:
+                    raise BundleInvalido(f"{self.caminho} não é um bundle de inferência")
+                if versao != VERSAO_FORMATO:
+                    raise BundleInvalido(f"Formato de bundle {versao} não suportado (esperado {VERSAO_FORMATO})")
+
+                fim_cabecalho = _PREFIXO.size + tamanho_cabecalho
+                cabecalho = json.loads(bytes(visao[_PREFIXO.size:fim_cabecalho]))
+                inicio_dados = -(-fim_cabecalho // ALINHAMENTO) * ALINHAMENTO
+
+                esperado = cabecalho.pop("sha256", None)
+                if verificar and esperado != _sha256(json.dumps(cabecalho, sort_keys=True).encode()):
+                    raise BundleInvalido(f"Checksum do cabeçalho não confere em {self.caminho}")
+
+                objetos = {}
+                for nome, secao in cabecalho["secoes"].items():
+                    inicio = inicio_dados + secao["offset"]
+                    with visao[inicio:inicio + secao["tamanho"]] as dados:
+                        if verificar and _sha256(dados) != secao["sha256"]:
+                            raise BundleInvalido(f"Checksum da seção '{nome}' não confere em {self.caminho}")
+                        # pickle lê direto da memória mapeada (sem cópia intermediária do arquivo)
+                        objetos[nome] = pickle.loads(dados)
+        finally:
+            memoria.close()
+
+        self.metadados: Dict[str, Any] = cabecalho["metadados"]
+        self.preprocessor = objetos["preprocessor"]
+        self.modelo = objetos["modelo"]
+        self.colunas_selecionadas: List[str] = self.metadados["colunas_selecionadas"]
+        self.indices_selecionados = np.asarray(self.metadados["indices_selecionados"])
+        self.threshold: float = self.metadados["threshold"]
+        self.model_name: str = self.metadados["model_name"]
+        self.version: int = self.metadados["model_version"]
+
+    def transform(self, df_raw: pd.DataFrame) -> pd.DataFrame:
+        """Esquema bruto + limpeza, pré-processamento e seleção por índice (sem casar nomes de colunas)"""
+        from src.features.raw_schema import aplicar_limpeza, derivar_colunas
+
+        df_raw = aplicar_limpeza(derivar_colunas(df_raw), self.metadados.get("regras_limpeza"))
+        X_full = self.preprocessor.transform(df_raw)
+        return pd.DataFrame(
+            X_full[:, self.indices_selecionados], columns=self.colunas_selecionadas, index=df_raw.index
+        )
+
+
+def registrar_bundle(caminho: Path, model_name: str, version: int) -> Path:
+    """Copia o bundle para os artefatos da versão no registry (ao lado de model.pkl)"""
+    from src.models.loader_model import localizar_artefatos
+
+    destino = localizar_artefatos(model_name, version) / NOME_ARTEFATO
+    temporario = destino.with_suffix(".tmp")
+    shutil.copyfile(caminho, temporario)
+    temporario.replace(destino)
+    logger.info(f"Bundle registrado como artefato: {destino}")
+    return destino
+
+
+def localizar_bundle(model_name: str, version: Optional[int] = None) -> Path:
+    """Bundle registrado de uma versão (padrão: alias Production)"""
+    from src.models.loader_model import localizar_artefatos, resolve_model_version
+
+    version = resolve_model_version(model_name, version)
+    caminho = localizar_artefatos(model_name, version) / NOME_ARTEFATO
+    if not caminho.exists():
+        raise FileNotFoundError(
+            f"Bundle não registrado para {model_name} v{version}. "
+            f"Gere com: python -m src.models.bundle --modelo {model_name} --versao {version}"
+        )
+    return caminho
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modelo", default="lgb_prob_default")
+    parser.add_argument("--versao", type=int, default=None, help="Padrão: alias Production")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD_PADRAO)
+    parser.add_argument("--saida", type=Path, default=None, help="Padrão: data/bundles/<modelo>_v<versao>.riskbundle")
+    parser.add_argument("--sem-registro", action="store_true", help="Não copia o bundle para o mlruns")
+    parser.add_argument("--verificar", type=Path, default=None, help="Apenas valida um bundle existente")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    if args.verificar:
+        inicio = time.perf_counter()
+        bundle = BundleInferencia(args.verificar)
+        print(f"OK: {bundle.model_name} v{bundle.version} | threshold {bundle.threshold} | "
+              f"{len(bundle.colunas_selecionadas)} features | carga em {time.perf_counter() - inicio:.3f}s")
+        return
+
+    from src.features.feature_store import FeatureStore
+    from src.models.predictor import ModelProducao
+
+    feature_store = FeatureStore.load()
+    modelo = ModelProducao(args.modelo, version=args.versao)
+    caminho = criar_bundle(
+        feature_store, modelo, args.saida or caminho_bundle(modelo.model_name, modelo.version), args.threshold
+    )
+    print(f"Bundle gravado: {caminho}")
+    if not args.sem_registro:
+        print(f"Registrado em: {registrar_bundle(caminho, modelo.model_name, modelo.version)}")
+
+
+if __name__ == "__main__":
+    main()
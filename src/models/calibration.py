@@ -0,0 +1,488 @@
+"""Calibração incremental das probabilidades do modelo a partir de outcomes rotulados.
+
+A camada é aplicada depois de `ModelProducao.predict_proba` e não toca no
+LightGBM: atualizar a calibração nunca exige retreino nem recarga do modelo.
+
+- Platt: p' = sigmoid(a·logit(p) + b), ajustado por Newton online (matriz 2x2
+  acumulada), O(1) por observação
+- Isotônica: contagens por bin de logit(p) (O(1) por observação); o mapeamento
+  monótono é obtido por PAV sobre os bins (O(bins)) quando é usado
+- Esquecimento exponencial opcional, para acompanhar a carteira recente
+- Avaliação prequencial: cada lote é pontuado pela calibração vigente antes de
+  atualizá-la (log loss e Brier bruto × calibrado, sem vazamento)
+
+O estado dos dois métodos é mantido junto; `metodo` escolhe o aplicado. Cada
+atualização grava um snapshot versionado (data/calibration/<modelo>_v<versao>/)
+e, opcionalmente, o ativa trocando o ponteiro `ativa` de forma atômica. A API
+verifica o ponteiro periodicamente e troca a calibração em memória.
+
+Run with:
+    python -m src.models.calibration --arquivo data/interim/dados_novos.csv --coluna-rotulo loan_status
+    python -m src.models.calibration --inicial               # bootstrap com X_test / y_test
+    python -m src.models.calibration --listar
+    python -m src.models.calibration --ativar 3              # rollback para o snapshot 3
+"""
+import argparse
+import fcntl
+import json
+import logging
+import math
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.paths import data_path
+
+logger = logging.getLogger(__name__)
+
+METODOS = ("platt", "isotonico")
+METODO_PADRAO = "isotonico"
+
+# Probabilidades são limitadas a [EPS, 1 - EPS] antes do logit
+EPS = 1e-6
+N_BINS_ISOTONICO = 200
+LOGIT_MAX = 12.0
+# Observações pontuadas pela calibração vigente antes de cada atualização (métricas prequenciais)
+BLOCO_PREQUENCIAL = 1000
+
+ARQUIVO_ATIVA = "ativa"
+_PADRAO_SNAPSHOT = re.compile(r"calibracao_(\d+)\.json$")
+SNAPSHOTS_MANTIDOS = 50
+
+
+def _logit(p: np.ndarray) -> np.ndarray:
+    p = np.clip(np.asarray(p, dtype=float), EPS, 1 - EPS)
+    return np.log(p / (1 - p))
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def _pav(medias: np.ndarray, pesos: np.ndarray) -> np.ndarray:
+    """Regressão isotônica (pool adjacent violators) ponderada, O(n)"""
+    valores: List[float] = []
+    massas: List[float] = []
+    tamanhos: List[int] = []
+    for m, w in zip(medias, pesos):
+        valores.append(float(m))
+        massas.append(float(w))
+        tamanhos.append(1)
+        while len(valores) > 1 and valores[-2] > valores[-1]:
+            w_total = massas[-2] + massas[-1]
+            valores[-2] = (valores[-2] * massas[-2] + valores[-1] * massas[-1]) / w_total
+            massas[-2] = w_total
+            tamanhos[-2] += tamanhos[-1]
+            del valores[-1], massas[-1], tamanhos[-1]
+    return np.repeat(valores, tamanhos)
+
+
+class CalibradorPlatt:
+    """
+    Regressão logística de 1 variável sobre logit(p), por Newton online.
+
+    Args:
+        esquecimento: Fator por observação aplicado à curvatura acumulada (1.0 = sem esquecimento)
+        prior: Peso inicial da curvatura (regulariza a = 1, b = 0, isto é, identidade)
+    """
+
+    def __init__(self, esquecimento: float = 1.0, prior: float = 10.0):
+        self.esquecimento = esquecimento
+        self.a, self.b = 1.0, 0.0
+        # Curvatura acumulada [[h_aa, h_ab], [h_ab, h_bb]]
+        self.h_aa, self.h_ab, self.h_bb = prior, 0.0, prior
+
+    def atualizar(self, prob: np.ndarray, y: np.ndarray) -> None:
+        for z, alvo in zip(_logit(prob).tolist(), np.asarray(y, dtype=float).tolist()):
+            q = 1.0 / (1.0 + math.exp(-(self.a * z + self.b)))
+            w = q * (1.0 - q)
+            self.h_aa = self.esquecimento * self.h_aa + w * z * z
+            self.h_ab = self.esquecimento * self.h_ab + w * z
+            self.h_bb = self.esquecimento * self.h_bb + w
+            erro = q - alvo
+            det = self.h_aa * self.h_bb - self.h_ab * self.h_ab
+            if det <= 0:
+                continue
+            # θ -= H⁻¹ g, com g = erro · (z, 1)
+            self.a -= erro * (self.h_bb * z - self.h_ab) / det
+            self.b -= erro * (self.h_aa - self.h_ab * z) / det
+
+    @property
+    def _inclinacao(self) -> float:
+        # Inclinação positiva garante um mapeamento monótono (inversível)
+        return max(self.a, 1e-3)
+
+    def aplicar(self, prob: np.ndarray) -> np.ndarray:
+        return _sigmoid(self._inclinacao * _logit(prob) + self.b)
+
+    def inverter(self, prob_calibrada: np.ndarray) -> np.ndarray:
+        """Probabilidade bruta cuja calibrada é `prob_calibrada`"""
+        return _sigmoid((_logit(prob_calibrada) - self.b) / self._inclinacao)
+
+    def estado(self) -> Dict[str, Any]:
+        return {"esquecimento": self.esquecimento, "a": self.a, "b": self.b,
+                "h": [self.h_aa, self.h_ab, self.h_bb]}
+
+    @classmethod
+    def de_estado(cls, estado: Dict[str, Any]) -> "CalibradorPlatt":
+        calibrador = cls(esquecimento=estado["esquecimento"])
+        calibrador.a, calibrador.b = estado["a"], estado["b"]
+        calibrador.h_aa, calibrador.h_ab, calibrador.h_bb = estado["h"]
+        return calibrador
+
+
+class CalibradorIsotonico:
+    """
+    Isotônica sobre bins uniformes de logit(p) em [-LOGIT_MAX, LOGIT_MAX].
+
+    Args:
+        n_bins: Número de bins
+        esquecimento: Fator por observação aplicado às contagens (uma vez por bloco)
+        prior: Pseudo-contagem por bin puxando a média do bin para o próprio centro
+            (identidade onde ainda não há dados)
+    """
+
+    def __init__(self, n_bins: int = N_BINS_ISOTONICO, esquecimento: float = 1.0, prior: float = 1.0):
+        self.n_bins = n_bins
+        self.esquecimento = esquecimento
+        self.prior = prior
+        self.contagens = np.zeros(n_bins)
+        self.positivos = np.zeros(n_bins)
+        self._bordas = np.linspace(-LOGIT_MAX, LOGIT_MAX, n_bins + 1)
+        self._centros = _sigmoid((self._bordas[:-1] + self._bordas[1:]) / 2)
+        self._mapa: Optional[np.ndarray] = None
+
+    def _bins(self, prob: np.ndarray) -> np.ndarray:
+        return np.clip(np.searchsorted(self._bordas, _logit(prob), side="right") - 1, 0, self.n_bins - 1)
+
+    def atualizar(self, prob: np.ndarray, y: np.ndarray) -> None:
+        bins = self._bins(prob)
+        if self.esquecimento < 1.0:
+            fator = self.esquecimento ** len(bins)
+            self.contagens *= fator
+            self.positivos *= fator
+        self.contagens += np.bincount(bins, minlength=self.n_bins)
+        self.positivos += np.bincount(bins, weights=np.asarray(y, dtype=float), minlength=self.n_bins)
+        self._mapa = None
+
+    @property
+    def mapa(self) -> np.ndarray:
+        """Probabilidade calibrada no centro de cada bin (não decrescente)"""
+        if self._mapa is None:
+            pesos = self.contagens + self.prior
+            medias = (self.positivos + self.prior * self._centros) / pesos
+            self._mapa = _pav(medias, pesos)
+        return self._mapa
+
+    def aplicar(self, prob: np.ndarray) -> np.ndarray:
+        return np.interp(_logit(prob), _logit(self._centros), self.mapa)
+
+    def inverter(self, prob_calibrada: np.ndarray) -> np.ndarray:
+        """Menor probabilidade bruta cuja calibrada atinge `prob_calibrada`"""
+        alvo = np.atleast_1d(np.asarray(prob_calibrada, dtype=float))
+        mapa, x = self.mapa, _logit(self._centros)
+        i = np.clip(np.searchsorted(mapa, alvo, side="left"), 1, self.n_bins - 1)
+        y0, y1 = mapa[i - 1], mapa[i]
+        fracao = np.where(y1 > y0, (alvo - y0) / np.where(y1 > y0, y1 - y0, 1.0), 1.0)
+        z = x[i - 1] + np.clip(fracao, 0.0, 1.0) * (x[i] - x[i - 1])
+        z = np.where(alvo <= mapa[0], -np.inf, np.where(alvo > mapa[-1], np.inf, z))
+        return _sigmoid(z)
+
+    def estado(self) -> Dict[str, Any]:
+        return {"n_bins": self.n_bins, "esquecimento": self.esquecimento, "prior": self.prior,
+                "contagens": self.contagens.tolist(), "positivos": self.positivos.tolist()}
+
+    @classmethod
+    def de_estado(cls, estado: Dict[str, Any]) -> "CalibradorIsotonico":
+        calibrador = cls(estado["n_bins"], estado["esquecimento"], estado["prior"])
+        calibrador.contagens = np.asarray(estado["contagens"], dtype=float)
+        calibrador.positivos = np.asarray(estado["positivos"], dtype=float)
+        calibrador.mapa  # calculado já na carga: o objeto servido não muda depois
+        return calibrador
+
+
+def _log_loss_soma(prob: np.ndarray, y: np.ndarray) -> float:
+    p = np.clip(prob, EPS, 1 - EPS)
+    return float(-(y * np.log(p) + (1 - y) * np.log(1 - p)).sum())
+
+
+class CalibradorOnline:
+    """
+    Estado completo da calibração de uma versão do modelo: Platt e isotônica
+    atualizados juntos, método aplicado e métricas prequenciais acumuladas.
+    """
+
+    def __init__(self, metodo: str = METODO_PADRAO, esquecimento: float = 1.0):
+        if metodo not in METODOS:
+            raise ValueError(f"Método de calibração '{metodo}' inválido. Opções: {list(METODOS)}")
+        self.metodo = metodo
+        self.platt = CalibradorPlatt(esquecimento=esquecimento)
+        self.isotonico = CalibradorIsotonico(esquecimento=esquecimento)
+        self.n_observacoes = 0
+        # Somas prequenciais: {"bruto"|"platt"|"isotonico": {"log_loss": ..., "brier": ...}}
+        self.metricas = {nome: {"log_loss": 0.0, "brier": 0.0} for nome in ("bruto",) + METODOS}
+
+    @property
+    def ativo(self):
+        return self.platt if self.metodo == "platt" else self.isotonico
+
+    def aplicar(self, prob: np.ndarray) -> np.ndarray:
+        return self.ativo.aplicar(prob)
+
+    def inverter(self, prob_calibrada: float) -> float:
+        return float(np.asarray(self.ativo.inverter(prob_calibrada)).ravel()[0])
+
+    def atualizar(self, prob_bruta: np.ndarray, y: np.ndarray) -> None:
+        """
+        Em blocos de BLOCO_PREQUENCIAL observações: avalia o bloco com a
+        calibração vigente e então a atualiza com ele.
+        """
+        prob_bruta = np.asarray(prob_bruta, dtype=float)
+        y = np.asarray(y, dtype=float)
+        for inicio in range(0, len(y), BLOCO_PREQUENCIAL):
+            p_bloco, y_bloco = prob_bruta[inicio:inicio + BLOCO_PREQUENCIAL], y[inicio:inicio + BLOCO_PREQUENCIAL]
+            for nome, prob in (("bruto", p_bloco), ("platt", self.platt.aplicar(p_bloco)),
+                               ("isotonico", self.isotonico.aplicar(p_bloco))):
+                self.metricas[nome]["log_loss"] += _log_loss_soma(prob, y_bloco)
+                self.metricas[nome]["brier"] += float(((prob - y_bloco) ** 2).sum())
+
+            self.platt.atualizar(p_bloco, y_bloco)
+            self.isotonico.atualizar(p_bloco, y_bloco)
+            self.n_observacoes += len(y_bloco)
+
+    def resumo_metricas(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Médias prequenciais de log loss e Brier por método"""
+        n = self.n_observacoes
+        return {
+            nome: {k: round(v / n, 6) if n else None for k, v in soma.items()}
+            for nome, soma in self.metricas.items()
+        }
+
+    def estado(self) -> Dict[str, Any]:
+        return {
+            "metodo": self.metodo,
+            "n_observacoes": self.n_observacoes,
+            "metricas": self.metricas,
+            "platt": self.platt.estado(),
+            "isotonico": self.isotonico.estado(),
+        }
+
+    @classmethod
+    def de_estado(cls, estado: Dict[str, Any]) -> "CalibradorOnline":
+        calibrador = cls(estado["metodo"])
+        calibrador.n_observacoes = estado["n_observacoes"]
+        calibrador.metricas = estado["metricas"]
+        calibrador.platt = CalibradorPlatt.de_estado(estado["platt"])
+        calibrador.isotonico = CalibradorIsotonico.de_estado(estado["isotonico"])
+        return calibrador
+
+
+class RepositorioCalibracao:
+    """
+    Snapshots versionados da calibração de uma versão do modelo.
+
+    data/calibration/<modelo>_v<versao>/calibracao_<N>.json + ponteiro `ativa`.
+    Escritas usam arquivo temporário + rename; atualizações concorrentes (vários
+    processos) são serializadas por flock.
+    """
+
+    def __init__(self, model_name: str, version: int, diretorio: Optional[Path] = None):
+        self.model_name = model_name
+        self.version = int(version)
+        base = Path(diretorio) if diretorio else Path(
+            os.environ.get("CALIBRATION_DIR") or data_path("", "calibration")
+        )
+        self.diretorio = base / f"{model_name}_v{self.version}"
+
+    def _arquivo(self, versao: int) -> Path:
+        return self.diretorio / f"calibracao_{versao:04d}.json"
+
+    @contextmanager
+    def bloqueio(self) -> Iterator[None]:
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        with open(self.diretorio / ".lock", "w") as trava:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(trava, fcntl.LOCK_UN)
+
+    def versoes(self) -> List[int]:
+        if not self.diretorio.exists():
+            return []
+        return sorted(
+            int(m.group(1)) for m in (_PADRAO_SNAPSHOT.match(p.name) for p in self.diretorio.iterdir()) if m
+        )
+
+    def versao_ativa(self) -> Optional[int]:
+        try:
+            return int((self.diretorio / ARQUIVO_ATIVA).read_text().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def carregar(self, versao: Optional[int] = None) -> Tuple[CalibradorOnline, Dict[str, Any]]:
+        """Snapshot `versao` (padrão: o ativo). Retorna (calibrador, metadados)"""
+        versao = self.versao_ativa() if versao is None else versao
+        if versao is None:
+            raise FileNotFoundError(f"Nenhuma calibração ativa para {self.model_name} v{self.version}")
+        with open(self._arquivo(versao), encoding="utf-8") as f:
+            dados = json.load(f)
+        return CalibradorOnline.de_estado(dados.pop("estado")), dados
+
+    def ultimo(self) -> Optional[CalibradorOnline]:
+        """Estado mais recente (ativo ou não): base da próxima atualização incremental"""
+        versoes = self.versoes()
+        return self.carregar(versoes[-1])[0] if versoes else None
+
+    def salvar(self, calibrador: CalibradorOnline, ativar: bool = True, origem: str = "") -> int:
+        """Grava um novo snapshot (e ativa, se pedido); retorna a versão"""
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        versoes = self.versoes()
+        versao = (versoes[-1] if versoes else 0) + 1
+        dados = {
+            "versao": versao,
+            "model_name": self.model_name,
+            "model_version": self.version,
+            "metodo": calibrador.metodo,
+            "n_observacoes": calibrador.n_observacoes,
+            "metricas_prequenciais": calibrador.resumo_metricas(),
+            "origem": origem,
+            "criado_em": datetime.now(timezone.utc).isoformat(),
+            "estado": calibrador.estado(),
+        }
+        destino = self._arquivo(versao)
+        temporario = destino.with_suffix(".tmp")
+        temporario.write_text(json.dumps(dados), encoding="utf-8")
+        temporario.replace(destino)
+        if ativar:
+            self.ativar(versao)
+        self._podar()
+        logger.info(f"Calibração {self.model_name} v{self.version}: snapshot {versao} gravado"
+                    f"{' e ativado' if ativar else ''} ({calibrador.n_observacoes} observações)")
+        return versao
+
+    def ativar(self, versao: int) -> None:
+        """Troca atômica do ponteiro para o snapshot `versao` (também serve de rollback)"""
+        if not self._arquivo(versao).exists():
+            raise FileNotFoundError(f"Snapshot de calibração {versao} não existe em {self.diretorio}")
+        temporario = self.diretorio / f"{ARQUIVO_ATIVA}.tmp"
+        temporario.write_text(str(versao))
+        temporario.replace(self.diretorio / ARQUIVO_ATIVA)
+
+    def _podar(self) -> None:
+        """Mantém os últimos SNAPSHOTS_MANTIDOS snapshots (o ativo nunca é removido)"""
+        ativa = self.versao_ativa()
+        for versao in self.versoes()[:-SNAPSHOTS_MANTIDOS]:
+            if versao != ativa:
+                self._arquivo(versao).unlink(missing_ok=True)
+
+    def listar(self) -> List[Dict[str, Any]]:
+        ativa = self.versao_ativa()
+        snapshots = []
+        for versao in self.versoes():
+            _, dados = self.carregar(versao)
+            snapshots.append({**dados, "ativa": versao == ativa})
+        return snapshots
+
+    def atualizar(
+        self,
+        prob_bruta: np.ndarray,
+        y: np.ndarray,
+        metodo: Optional[str] = None,
+        ativar: bool = True,
+        esquecimento: float = 1.0,
+        origem: str = "",
+    ) -> Tuple[int, CalibradorOnline]:
+        """
+        Atualiza incrementalmente a partir do último snapshot e grava o próximo.
+
+        Args:
+            prob_bruta: Probabilidades do modelo SEM calibração
+            y: Outcomes observados (1 = inadimplência)
+            metodo: Troca o método aplicado (None mantém o do último snapshot)
+            ativar: Se False, o snapshot acumula dados mas não entra em produção
+            esquecimento: Usado apenas ao criar o primeiro estado
+        """
+        with self.bloqueio():
+            if metodo is not None and metodo not in METODOS:
+                raise ValueError(f"Método de calibração '{metodo}' inválido. Opções: {list(METODOS)}")
+            calibrador = self.ultimo() or CalibradorOnline(metodo or METODO_PADRAO, esquecimento)
+            calibrador.metodo = metodo or calibrador.metodo
+            calibrador.atualizar(prob_bruta, y)
+            versao = self.salvar(calibrador, ativar=ativar, origem=origem)
+        return versao, calibrador
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modelo", default="lgb_prob_default")
+    parser.add_argument("--versao", type=int, default=None, help="Versão do modelo (padrão: alias Production)")
+    parser.add_argument("--arquivo", type=Path, default=None, help="Outcomes: CSV/Parquet/Feather com features brutas e rótulo")
+    parser.add_argument("--coluna-rotulo", default="loan_status")
+    parser.add_argument("--inicial", action="store_true", help="Atualiza com X_test / y_test (calibração original)")
+    parser.add_argument("--metodo", choices=METODOS, default=None)
+    parser.add_argument("--esquecimento", type=float, default=1.0)
+    parser.add_argument("--sem-ativar", action="store_true", help="Grava o snapshot sem ativá-lo")
+    parser.add_argument("--listar", action="store_true")
+    parser.add_argument("--ativar", type=int, default=None, help="Ativa um snapshot existente (rollback)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    from src.models.loader_model import resolve_model_version
+
+    versao_modelo = resolve_model_version(args.modelo, args.versao)
+    repositorio = RepositorioCalibracao(args.modelo, versao_modelo)
+
+    if args.listar:
+        for s in repositorio.listar():
+            print(f"{'*' if s['ativa'] else ' '} {s['versao']:>4}  {s['metodo']:<9} {s['n_observacoes']:>8} obs  "
+                  f"{s['criado_em']}  {s['metricas_prequenciais']}")
+        return
+    if args.ativar is not None:
+        repositorio.ativar(args.ativar)
+        print(f"Snapshot {args.ativar} ativado para {args.modelo} v{versao_modelo}")
+        return
+
+    from src.features.feature_store import FeatureStore
+    from src.models.predictor import ModelProducao
+
+    modelo = ModelProducao(args.modelo, version=versao_modelo)
+    if args.inicial:
+        from src.data.datasets import carregar_dataset
+        feature_store = FeatureStore.load()
+        X = carregar_dataset("X_test", colunas=feature_store.selected_features)
+        prob = modelo.predict_proba(X, calibrar=False)[:, 1]
+        y = np.asarray(carregar_dataset("y_test")).ravel()
+        origem = "X_test/y_test"
+    elif args.arquivo is not None:
+        import pandas as pd
+        from src.features.validation import validar_lote
+        from src.models.portfolio import iterar_chunks
+
+        feature_store = FeatureStore.load()
+        probs, rotulos = [], []
+        for chunk in iterar_chunks(args.arquivo):
+            validas = validar_lote(feature_store, chunk).validas & chunk[args.coluna_rotulo].notna().to_numpy()
+            _, proba = modelo.pontuar(chunk[validas], feature_store, calibrar=False)
+            probs.append(proba[:, 1])
+            rotulos.append(pd.to_numeric(chunk.loc[validas, args.coluna_rotulo]).to_numpy())
+        prob, y = np.concatenate(probs), np.concatenate(rotulos)
+        origem = str(args.arquivo)
+    else:
+        parser.error("Informe --arquivo, --inicial, --listar ou --ativar")
+
+    versao, calibrador = repositorio.atualizar(
+        prob, y, args.metodo, ativar=not args.sem_ativar, esquecimento=args.esquecimento, origem=origem
+    )
+    print(f"Snapshot {versao} ({calibrador.metodo}, {calibrador.n_observacoes} observações acumuladas)")
+    print(json.dumps(calibrador.resumo_metricas(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
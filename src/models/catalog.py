@@ -0,0 +1,498 @@
+"""Catálogo indexado do file store do MLflow (experiments/mlruns) em SQLite, com exportação Parquet.
+
+O file store guarda um arquivo por param, métrica e tag de cada run; comparar
+runs por ele significa abrir milhares de arquivos. O catálogo copia runs,
+params, métricas (último valor), tags e versões do registry para um único
+arquivo SQLite e responde consultas sem MLflow nem servidor.
+
+A atualização é incremental: cada run (e cada modelo do registry) tem uma
+assinatura com o maior mtime e o número dos seus arquivos; só o que mudou é
+relido, e runs removidos do file store saem do catálogo. Um stat por arquivo
+continua necessário, mas nenhuma leitura de conteúdo.
+
+Run with:
+    python -m src.models.catalog                                    # atualiza o catálogo
+    python -m src.models.catalog --top best_ks_score -k 5
+    python -m src.models.catalog --top test_roc_auc --param max_bin=477 --param "num_leaves>=31"
+    python -m src.models.catalog --diff 6 7 --modelo lgb_prob_default
+    python -m src.models.catalog --versoes
+    python -m src.models.catalog --parquet data/catalog/parquet      # runs.parquet e versoes.parquet
+"""
+import argparse
+import logging
+import os
+import re
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import yaml
+
+from src.utils.paths import EXPERIMENTS_DIR, data_path
+
+logger = logging.getLogger(__name__)
+
+MLRUNS_PADRAO = EXPERIMENTS_DIR / "mlruns"
+SUBPASTAS_RUN = ("params", "metrics", "tags")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS experimentos (
+    experiment_id TEXT PRIMARY KEY,
+    nome TEXT,
+    lifecycle_stage TEXT,
+    criado_em INTEGER
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    experiment_id TEXT NOT NULL,
+    run_name TEXT,
+    status INTEGER,
+    lifecycle_stage TEXT,
+    user_id TEXT,
+    inicio INTEGER,
+    fim INTEGER,
+    assinatura TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS params (
+    run_id TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    valor TEXT,
+    PRIMARY KEY (run_id, chave)
+);
+CREATE TABLE IF NOT EXISTS metricas (
+    run_id TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    valor REAL,
+    ts INTEGER,
+    step INTEGER,
+    pontos INTEGER,
+    PRIMARY KEY (run_id, chave)
+);
+CREATE TABLE IF NOT EXISTS tags (
+    run_id TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    valor TEXT,
+    PRIMARY KEY (run_id, chave)
+);
+CREATE TABLE IF NOT EXISTS modelos (
+    model_name TEXT PRIMARY KEY,
+    assinatura TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versoes (
+    model_name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    run_id TEXT,
+    model_id TEXT,
+    status TEXT,
+    descricao TEXT,
+    criado_em INTEGER,
+    aliases TEXT,
+    PRIMARY KEY (model_name, version)
+);
+CREATE INDEX IF NOT EXISTS idx_metricas_chave ON metricas (chave, valor);
+CREATE INDEX IF NOT EXISTS idx_params_chave ON params (chave, valor);
+CREATE INDEX IF NOT EXISTS idx_versoes_run ON versoes (run_id);
+"""
+
+# chave, operador, valor: "max_bin=477", "num_leaves>=31", "boosting_type!=dart"
+_FILTRO = re.compile(r"^\s*([\w.\-/]+)\s*(>=|<=|!=|=|>|<)\s*(.*?)\s*$")
+
+# Loader em C quando disponível: o meta.yaml de cada run é a maior parte do custo de leitura
+_CarregadorYaml = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _ler_yaml(caminho: Path) -> Dict[str, Any]:
+    with open(caminho) as f:
+        return yaml.load(f, Loader=_CarregadorYaml) or {}
+
+
+def _assinatura(arquivos: Iterable[os.DirEntry]) -> str:
+    """Maior mtime (ns) e número de arquivos: muda com inclusão, alteração ou remoção"""
+    maior, n = 0, 0
+    for entrada in arquivos:
+        maior = max(maior, entrada.stat().st_mtime_ns)
+        n += 1
+    return f"{maior}:{n}"
+
+
+def _arquivos(pasta: Path) -> List[os.DirEntry]:
+    try:
+        with os.scandir(pasta) as it:
+            return [e for e in it if e.is_file()]
+    except FileNotFoundError:
+        return []
+
+
+def _entradas_run(pasta_run: Path) -> List[os.DirEntry]:
+    entradas = [e for e in _arquivos(pasta_run) if e.name == "meta.yaml"]
+    for sub in SUBPASTAS_RUN:
+        entradas.extend(_arquivos(pasta_run / sub))
+    return entradas
+
+
+def _ler_metrica(caminho: str) -> Optional[Tuple[float, int, int, int]]:
+    """
+    Último valor de uma métrica: linhas "<timestamp> <valor> <step>"; vale o
+    maior (step, timestamp), como no MLflow. Retorna (valor, ts, step, pontos).
+    """
+    melhor, pontos = None, 0
+    with open(caminho) as f:
+        for linha in f:
+            partes = linha.split()
+            if len(partes) < 2:
+                continue
+            ts, valor = int(partes[0]), float(partes[1])
+            step = int(partes[2]) if len(partes) > 2 else 0
+            pontos += 1
+            if melhor is None or (step, ts) >= (melhor[2], melhor[1]):
+                melhor = (valor, ts, step)
+    return (*melhor, pontos) if melhor else None
+
+
+def _ler_texto(caminho: str) -> str:
+    with open(caminho, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+class CatalogoExperimentos:
+    """
+    Catálogo SQLite do file store. `atualizar()` sincroniza com o mlruns;
+    as consultas (top, runs, diff_versoes, versoes) só leem o SQLite.
+    """
+
+    def __init__(self, caminho: Optional[Path] = None, mlruns: Optional[Path] = None):
+        self.caminho = Path(caminho) if caminho else data_path("mlruns.sqlite", "catalog")
+        self.mlruns = Path(mlruns) if mlruns else MLRUNS_PADRAO
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._conexao = sqlite3.connect(self.caminho)
+        self._conexao.executescript(_SCHEMA)
+
+    def fechar(self) -> None:
+        self._conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    # ------------------------------------------------------------------ atualização
+
+    def atualizar(self) -> Dict[str, int]:
+        """
+        Relê apenas runs e modelos do registry cuja assinatura mudou e remove os
+        que não existem mais. Tudo numa transação: consultas concorrentes veem o
+        catálogo anterior ou o novo.
+        """
+        if not self.mlruns.is_dir():
+            raise FileNotFoundError(f"Diretório mlruns não encontrado em: {self.mlruns}")
+
+        estatisticas = {"runs_lidos": 0, "runs_inalterados": 0, "runs_removidos": 0,
+                        "modelos_lidos": 0, "modelos_inalterados": 0}
+        conexao = self._conexao
+        assinaturas_runs = dict(conexao.execute("SELECT run_id, assinatura FROM runs"))
+        assinaturas_modelos = dict(conexao.execute("SELECT model_name, assinatura FROM modelos"))
+
+        with conexao:
+            vistos = set()
+            for pasta_exp in sorted(p for p in self.mlruns.iterdir() if p.is_dir() and p.name.isdigit()):
+                if (pasta_exp / "meta.yaml").exists():
+                    meta = _ler_yaml(pasta_exp / "meta.yaml")
+                    conexao.execute(
+                        "INSERT OR REPLACE INTO experimentos VALUES (?, ?, ?, ?)",
+                        (pasta_exp.name, meta.get("name"), meta.get("lifecycle_stage"), meta.get("creation_time")),
+                    )
+                with os.scandir(pasta_exp) as it:
+                    pastas_run = [Path(e.path) for e in it if e.is_dir() and e.name != "models"]
+                for pasta_run in pastas_run:
+                    entradas = _entradas_run(pasta_run)
+                    if not any(e.name == "meta.yaml" for e in entradas):
+                        continue
+                    vistos.add(pasta_run.name)
+                    assinatura = _assinatura(entradas)
+                    if assinaturas_runs.get(pasta_run.name) == assinatura:
+                        estatisticas["runs_inalterados"] += 1
+                        continue
+                    self._indexar_run(pasta_exp.name, pasta_run, entradas, assinatura)
+                    estatisticas["runs_lidos"] += 1
+
+            removidos = [(run_id,) for run_id in assinaturas_runs if run_id not in vistos]
+            for tabela in ("runs", "params", "metricas", "tags"):
+                conexao.executemany(f"DELETE FROM {tabela} WHERE run_id = ?", removidos)
+            estatisticas["runs_removidos"] = len(removidos)
+
+            raiz_registry = self.mlruns / "models"
+            modelos_vistos = set()
+            if raiz_registry.is_dir():
+                for pasta_modelo in sorted(p for p in raiz_registry.iterdir() if p.is_dir()):
+                    modelos_vistos.add(pasta_modelo.name)
+                    entradas = _arquivos(pasta_modelo) + _arquivos(pasta_modelo / "aliases")
+                    for pasta_versao in pasta_modelo.glob("version-*"):
+                        entradas.extend(_arquivos(pasta_versao))
+                    assinatura = _assinatura(entradas)
+                    if assinaturas_modelos.get(pasta_modelo.name) == assinatura:
+                        estatisticas["modelos_inalterados"] += 1
+                        continue
+                    self._indexar_modelo(pasta_modelo, assinatura)
+                    estatisticas["modelos_lidos"] += 1
+            for model_name in set(assinaturas_modelos) - modelos_vistos:
+                conexao.execute("DELETE FROM modelos WHERE model_name = ?", (model_name,))
+                conexao.execute("DELETE FROM versoes WHERE model_name = ?", (model_name,))
+
+        logger.info(f"Catálogo {self.caminho} atualizado: {estatisticas}")
+        return estatisticas
+
+    def _indexar_run(self, experiment_id: str, pasta_run: Path, entradas: List[os.DirEntry], assinatura: str) -> None:
+        conexao = self._conexao
+        run_id = pasta_run.name
+        meta = _ler_yaml(pasta_run / "meta.yaml")
+        conexao.execute(
+            "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, experiment_id, meta.get("run_name"), meta.get("status"), meta.get("lifecycle_stage"),
+             meta.get("user_id"), meta.get("start_time"), meta.get("end_time"), assinatura),
+        )
+        for tabela in ("params", "metricas", "tags"):
+            conexao.execute(f"DELETE FROM {tabela} WHERE run_id = ?", (run_id,))
+
+        params, metricas, tags = [], [], []
+        for entrada in entradas:
+            subpasta = Path(entrada.path).parent.name
+            if entrada.name == "meta.yaml" and subpasta == run_id:
+                continue
+            if subpasta == "params":
+                params.append((run_id, entrada.name, _ler_texto(entrada.path)))
+            elif subpasta == "tags":
+                tags.append((run_id, entrada.name, _ler_texto(entrada.path)))
+            elif subpasta == "metrics":
+                ultimo = _ler_metrica(entrada.path)
+                if ultimo is not None:
+                    metricas.append((run_id, entrada.name, *ultimo))
+        conexao.executemany("INSERT INTO params VALUES (?, ?, ?)", params)
+        conexao.executemany("INSERT INTO metricas VALUES (?, ?, ?, ?, ?, ?)", metricas)
+        conexao.executemany("INSERT INTO tags VALUES (?, ?, ?)", tags)
+
+    def _indexar_modelo(self, pasta_modelo: Path, assinatura: str) -> None:
+        conexao = self._conexao
+        model_name = pasta_modelo.name
+        aliases: Dict[int, List[str]] = {}
+        for arquivo in _arquivos(pasta_modelo / "aliases"):
+            aliases.setdefault(int(_ler_texto(arquivo.path).strip()), []).append(arquivo.name)
+
+        linhas = []
+        for pasta_versao in pasta_modelo.glob("version-*"):
+            if not (pasta_versao / "meta.yaml").exists():
+                continue
+            meta = _ler_yaml(pasta_versao / "meta.yaml")
+            version = int(meta.get("version") or pasta_versao.name.split("-", 1)[1])
+            linhas.append((
+                model_name, version, meta.get("run_id"), meta.get("model_id"), meta.get("status"),
+                meta.get("description"), meta.get("creation_timestamp"), ",".join(sorted(aliases.get(version, []))),
+            ))
+        conexao.execute("DELETE FROM versoes WHERE model_name = ?", (model_name,))
+        conexao.executemany("INSERT INTO versoes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", linhas)
+        conexao.execute("INSERT OR REPLACE INTO modelos VALUES (?, ?)", (model_name, assinatura))
+
+    # ------------------------------------------------------------------ consultas
+
+    def _consultar(self, sql: str, parametros: Sequence[Any] = ()) -> pd.DataFrame:
+        return pd.read_sql_query(sql, self._conexao, params=list(parametros))
+
+    @staticmethod
+    def _condicoes_params(filtros: Sequence[str]) -> Tuple[List[str], List[Any]]:
+        """
+        Filtros "chave<op>valor" viram subconsultas EXISTS sobre params. Valores
+        numéricos comparam como número; texto só aceita = e !=.
+        """
+        condicoes, parametros = [], []
+        for filtro in filtros:
+            casamento = _FILTRO.match(filtro)
+            if not casamento:
+                raise ValueError(f"Filtro de param inválido: '{filtro}' (esperado chave<op>valor, op em = != > >= < <=)")
+            chave, operador, valor = casamento.groups()
+            try:
+                alvo: Any = float(valor)
+                coluna = "CAST(p.valor AS REAL)"
+            except ValueError:
+                if operador not in ("=", "!="):
+                    raise ValueError(f"Filtro de param inválido: '{filtro}' (comparação {operador} exige valor numérico)")
+                alvo, coluna = valor, "p.valor"
+            condicoes.append(
+                f"EXISTS (SELECT 1 FROM params p WHERE p.run_id = r.run_id AND p.chave = ? AND {coluna} {operador} ?)"
+            )
+            parametros.extend([chave, alvo])
+        return condicoes, parametros
+
+    def top(
+        self,
+        metrica: str,
+        k: int = 10,
+        maior: bool = True,
+        filtros: Sequence[str] = (),
+        experimento: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        k runs com melhor valor de `metrica` (maior=False para métricas de erro),
+        opcionalmente filtrados por params e por experimento (id ou nome).
+        Inclui as versões do registry geradas por cada run.
+        """
+        condicoes, parametros = self._condicoes_params(filtros)
+        condicoes.insert(0, "m.chave = ?")
+        parametros.insert(0, metrica)
+        if experimento is not None:
+            condicoes.append("(e.experiment_id = ? OR e.nome = ?)")
+            parametros.extend([experimento, experimento])
+        sql = f"""
+            SELECT r.run_id, r.run_name, e.nome AS experimento, m.valor AS {_identificador(metrica)},
+                   (SELECT GROUP_CONCAT(v.model_name || ' v' || v.version, ', ')
+                      FROM versoes v WHERE v.run_id = r.run_id) AS versoes,
+                   r.inicio
+              FROM metricas m
+              JOIN runs r ON r.run_id = m.run_id
+              LEFT JOIN experimentos e ON e.experiment_id = r.experiment_id
+             WHERE {' AND '.join(condicoes)}
+             ORDER BY m.valor {'DESC' if maior else 'ASC'}
+             LIMIT ?
+        """
+        resultado = self._consultar(sql, parametros + [k])
+        resultado["inicio"] = pd.to_datetime(resultado["inicio"], unit="ms")
+        return resultado
+
+    def runs(self, filtros: Sequence[str] = (), experimento: Optional[str] = None) -> pd.DataFrame:
+        """
+        Uma linha por run, com colunas params.<chave>, metrics.<chave> e
+        tags.<chave> (formato do mlflow.search_runs)
+        """
+        condicoes, parametros = self._condicoes_params(filtros)
+        if experimento is not None:
+            condicoes.append("(r.experiment_id = ? OR e.nome = ?)")
+            parametros.extend([experimento, experimento])
+        onde = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        base = self._consultar(
+            f"""SELECT r.run_id, r.experiment_id, e.nome AS experimento, r.run_name, r.status, r.user_id,
+                       r.inicio, r.fim
+                  FROM runs r LEFT JOIN experimentos e ON e.experiment_id = r.experiment_id
+                {onde} ORDER BY r.inicio""",
+            parametros,
+        )
+        if base.empty:
+            return base
+
+        ids = base["run_id"].tolist()
+        marcadores = ",".join("?" * len(ids))
+        for tabela, prefixo in (("params", "params"), ("metricas", "metrics"), ("tags", "tags")):
+            longo = self._consultar(f"SELECT run_id, chave, valor FROM {tabela} WHERE run_id IN ({marcadores})", ids)
+            if longo.empty:
+                continue
+            largo = longo.pivot(index="run_id", columns="chave", values="valor").add_prefix(f"{prefixo}.")
+            base = base.merge(largo, left_on="run_id", right_index=True, how="left")
+        for coluna in ("inicio", "fim"):
+            base[coluna] = pd.to_datetime(base[coluna], unit="ms")
+        return base
+
+    def versoes(self, model_name: Optional[str] = None) -> pd.DataFrame:
+        """Versões do registry com aliases e run de origem"""
+        onde, parametros = ("WHERE v.model_name = ?", [model_name]) if model_name else ("", [])
+        resultado = self._consultar(
+            f"""SELECT v.model_name, v.version, v.aliases, v.run_id, r.run_name, v.model_id, v.status,
+                       v.descricao, v.criado_em
+                  FROM versoes v LEFT JOIN runs r ON r.run_id = v.run_id
+                {onde} ORDER BY v.model_name, v.version""",
+            parametros,
+        )
+        resultado["criado_em"] = pd.to_datetime(resultado["criado_em"], unit="ms")
+        return resultado
+
+    def diff_versoes(self, model_name: str, versao_a: int, versao_b: int, todas: bool = False) -> pd.DataFrame:
+        """
+        Params, métricas e tags dos runs de duas versões lado a lado; só as
+        diferenças, a não ser com todas=True. Ausente em um dos lados = None.
+        """
+        runs = {}
+        for versao in (versao_a, versao_b):
+            linha = self._conexao.execute(
+                "SELECT run_id FROM versoes WHERE model_name = ? AND version = ?", (model_name, versao)
+            ).fetchone()
+            if linha is None:
+                raise KeyError(f"Versão {versao} de '{model_name}' não está no catálogo")
+            runs[versao] = linha[0]
+
+        partes = []
+        for tabela, tipo in (("params", "param"), ("metricas", "metric"), ("tags", "tag")):
+            lados = [
+                self._consultar(f"SELECT chave, valor FROM {tabela} WHERE run_id = ?", [runs[v]]).set_index("chave")["valor"]
+                for v in (versao_a, versao_b)
+            ]
+            tabela_diff = pd.concat(lados, axis=1, keys=[f"v{versao_a}", f"v{versao_b}"])
+            tabela_diff = tabela_diff.astype(object).where(tabela_diff.notna(), None)
+            tabela_diff.insert(0, "tipo", tipo)
+            partes.append(tabela_diff)
+
+        diff = pd.concat(partes).rename_axis("chave").reset_index()
+        if not todas:
+            diff = diff[diff[f"v{versao_a}"] != diff[f"v{versao_b}"]]
+        return diff.reset_index(drop=True)
+
+    def exportar_parquet(self, diretorio: Path) -> Dict[str, Path]:
+        """runs.parquet (formato largo de runs()) e versoes.parquet, para pandas/DuckDB/Spark"""
+        diretorio = Path(diretorio)
+        diretorio.mkdir(parents=True, exist_ok=True)
+        arquivos = {"runs": diretorio / "runs.parquet", "versoes": diretorio / "versoes.parquet"}
+        runs = self.runs()
+        # Params e tags são texto no file store; colunas mistas quebrariam o schema Parquet
+        for coluna in runs.columns:
+            if coluna.startswith(("params.", "tags.")):
+                runs[coluna] = runs[coluna].astype("string")
+        runs.to_parquet(arquivos["runs"], index=False)
+        self.versoes().to_parquet(arquivos["versoes"], index=False)
+        return arquivos
+
+
+def _identificador(nome: str) -> str:
+    """Nome de métrica como alias de coluna SQL"""
+    return '"' + nome.replace('"', '""') + '"'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--catalogo", type=Path, default=None, help="Arquivo SQLite (padrão: data/catalog/mlruns.sqlite)")
+    parser.add_argument("--mlruns", type=Path, default=None, help=f"File store (padrão: {MLRUNS_PADRAO})")
+    parser.add_argument("--sem-atualizar", action="store_true", help="Consulta o catálogo sem sincronizar antes")
+    parser.add_argument("--top", metavar="METRICA", default=None, help="Melhores runs pela métrica")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--menor", action="store_true", help="Ordena do menor para o maior (métricas de erro)")
+    parser.add_argument("--param", action="append", default=[], help="Filtro chave<op>valor (repetível)")
+    parser.add_argument("--experimento", default=None, help="Id ou nome do experimento")
+    parser.add_argument("--diff", nargs=2, type=int, metavar=("VERSAO_A", "VERSAO_B"), default=None)
+    parser.add_argument("--modelo", default="lgb_prob_default", help="Modelo do registry usado por --diff/--versoes")
+    parser.add_argument("--todas", action="store_true", help="No --diff, mostra também o que é igual")
+    parser.add_argument("--versoes", action="store_true")
+    parser.add_argument("--parquet", type=Path, default=None, help="Exporta runs.parquet e versoes.parquet")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_columns", 20)
+    pd.set_option("display.max_colwidth", 60)
+
+    with CatalogoExperimentos(args.catalogo, args.mlruns) as catalogo:
+        if not args.sem_atualizar:
+            estatisticas = catalogo.atualizar()
+            print(f"Catálogo {catalogo.caminho}: {estatisticas}")
+
+        if args.top:
+            print(catalogo.top(args.top, args.k, maior=not args.menor, filtros=args.param,
+                               experimento=args.experimento).to_string(index=False))
+        elif args.param or args.experimento:
+            print(catalogo.runs(args.param, args.experimento).to_string(index=False))
+        if args.diff:
+            print(catalogo.diff_versoes(args.modelo, *args.diff, todas=args.todas).to_string(index=False))
+        if args.versoes:
+            print(catalogo.versoes(args.modelo).to_string(index=False))
+        if args.parquet:
+            for nome, caminho in catalogo.exportar_parquet(args.parquet).items():
+                print(f"{nome}: {caminho}")
+
+
+if __name__ == "__main__":
+    main()
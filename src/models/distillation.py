@@ -0,0 +1,340 @@
+"""Destilação do modelo de produção em um aluno pequeno e modo escalonado de inferência.
+
+O aluno é um LGBMClassifier com no máximo 100 árvores treinado para imitar a
+probabilidade bruta (sem calibração) do professor (modelo Production) sobre o
+X_train. O alvo suave entra como duas cópias de cada linha, com rótulos 1 e 0
+e pesos p e 1 - p: a logloss ponderada é a entropia cruzada contra p, e o
+resultado continua um classificador comum (predict_proba, bundle, early exit).
+O conjunto de transferência inclui cópias do X_train com parte das colunas
+trocadas entre linhas, rotuladas pelo professor.
+
+No modo escalonado (ModeloEscalonado) o aluno pontua tudo e só as linhas com
+probabilidade a menos de `margem` do threshold são repontuadas pelo professor.
+A margem registrada é a menor que atinge a concordância alvo com o professor
+numa parte do X_train separada do treino do aluno.
+
+Run with:
+    python -m src.models.distillation                  # treina, avalia no X_test e registra (alias Student)
+    python -m src.models.distillation --sem-registro   # só o relatório
+"""
+import argparse
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+THRESHOLD_PADRAO = 0.42
+ALIAS_ALUNO = "Student"
+N_ARVORES_ALUNO = 100
+FOLHAS_ALUNO = 63
+TAXA_APRENDIZADO_ALUNO = 0.15
+COPIAS_AUMENTADAS = 2
+PROB_TROCA_AUMENTO = 0.3
+FRACAO_VALIDACAO = 0.2
+CONCORDANCIA_ALVO = 0.995
+MARGEM_PADRAO = 0.1
+MARGENS_RELATORIO = [0.02, 0.05, 0.1, 0.15, 0.2]
+
+
+def aumentar_dados(X: pd.DataFrame, copias: int, prob_troca: float, seed: int = 42) -> pd.DataFrame:
+    """X seguido de `copias` versões em que cada valor é trocado, com probabilidade `prob_troca`, pelo de outra linha"""
+    rng = np.random.default_rng(seed)
+    valores = X.to_numpy()
+    partes = [X.reset_index(drop=True)]
+    for _ in range(copias):
+        doadoras = valores[rng.integers(0, len(valores), len(valores))]
+        trocar = rng.uniform(size=valores.shape) < prob_troca
+        partes.append(pd.DataFrame(np.where(trocar, doadoras, valores), columns=X.columns))
+    return pd.concat(partes, ignore_index=True)
+
+
+def treinar_aluno(
+    X: pd.DataFrame,
+    prob_professor: np.ndarray,
+    n_arvores: int = N_ARVORES_ALUNO,
+    num_leaves: int = FOLHAS_ALUNO,
+    learning_rate: float = TAXA_APRENDIZADO_ALUNO,
+    max_bin: int = 255,
+    seed: int = 42,
+):
+    """LGBMClassifier ajustado à probabilidade do professor (entropia cruzada com alvo suave)"""
+    import lightgbm as lgb
+
+    aluno = lgb.LGBMClassifier(
+        n_estimators=n_arvores,
+        num_leaves=num_leaves,
+        learning_rate=learning_rate,
+        max_bin=max_bin,
+        min_child_samples=10,
+        random_state=seed,
+        verbose=-1,
+    )
+    duplicado = pd.concat([X, X], ignore_index=True)
+    rotulos = np.r_[np.ones(len(X)), np.zeros(len(X))]
+    pesos = np.r_[prob_professor, 1 - prob_professor]
+    aluno.fit(duplicado, rotulos, sample_weight=pesos)
+    return aluno
+
+
+def concordancia(p_aluno: np.ndarray, p_professor: np.ndarray, threshold: float) -> float:
+    """Fração de linhas com a mesma classe no threshold"""
+    return float(np.mean((p_aluno >= threshold) == (p_professor >= threshold)))
+
+
+def escalonar(p_aluno: np.ndarray, p_professor: np.ndarray, threshold: float, margem: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Simula o modo escalonado: probabilidade final e máscara das linhas enviadas ao professor"""
+    escaladas = np.abs(p_aluno - threshold) < margem
+    return np.where(escaladas, p_professor, p_aluno), escaladas
+
+
+def margem_para_concordancia(p_aluno: np.ndarray, p_professor: np.ndarray, threshold: float, alvo: float) -> float:
+    """
+    Menor margem cujo escalonamento deixa no máximo (1 - alvo) das linhas com
+    classe diferente da do professor. Discordâncias a distância d do threshold
+    só são corrigidas com margem > d.
+    """
+    distancias = np.sort(np.abs(p_aluno - threshold)[(p_aluno >= threshold) != (p_professor >= threshold)])
+    toleradas = int(np.floor((1 - alvo) * len(p_aluno) + 1e-9))
+    if len(distancias) <= toleradas:
+        return 0.0
+    return float(distancias[len(distancias) - toleradas - 1]) + 1e-6
+
+
+def avaliar(
+    p_aluno: np.ndarray,
+    p_professor: np.ndarray,
+    threshold: float,
+    y: Optional[np.ndarray] = None,
+    margens=MARGENS_RELATORIO,
+) -> Dict[str, Any]:
+    """Concordância, erro médio contra o professor, métricas contra o rótulo e efeito de cada margem"""
+    relatorio: Dict[str, Any] = {
+        "linhas": len(p_aluno),
+        "concordancia": concordancia(p_aluno, p_professor, threshold),
+        "mae_probabilidade": float(np.mean(np.abs(p_aluno - p_professor))),
+    }
+    if y is not None:
+        from sklearn.metrics import average_precision_score, roc_auc_score, roc_curve
+
+        for nome, p in (("aluno", p_aluno), ("professor", p_professor)):
+            fpr, tpr, _ = roc_curve(y, p)
+            relatorio[f"roc_auc_{nome}"] = float(roc_auc_score(y, p))
+            relatorio[f"pr_auc_{nome}"] = float(average_precision_score(y, p))
+            relatorio[f"ks_{nome}"] = float(np.max(tpr - fpr))
+
+    relatorio["escalonamento"] = []
+    for margem in margens:
+        p_final, escaladas = escalonar(p_aluno, p_professor, threshold, margem)
+        relatorio["escalonamento"].append({
+            "margem": margem,
+            "fracao_escalada": float(escaladas.mean()),
+            "concordancia": concordancia(p_final, p_professor, threshold),
+        })
+    return relatorio
+
+
+def margem_registrada(model_name: str, version: int) -> float:
+    """Margem de escalonamento gravada nas métricas do run do aluno (padrão MARGEM_PADRAO)"""
+    from src.models.loader_model import metricas_offline
+
+    return float(metricas_offline(model_name, version).get("margem_escalonamento", MARGEM_PADRAO))
+
+
+class ModeloEscalonado:
+    """
+    Aluno primeiro, professor só perto do threshold. Mesma interface usada pela
+    API para ModelProducao (predict_proba, pontuar, classificar); nome, versão
+    e calibração são os do professor.
+
+    A faixa de escalonamento é centrada no `threshold` configurado (o da
+    destilação): requisições com outro threshold recebem a probabilidade do
+    aluno fora da faixa.
+    """
+
+    def __init__(self, professor, aluno, threshold: float = THRESHOLD_PADRAO, margem: float = MARGEM_PADRAO):
+        self.professor = professor
+        self.aluno = aluno
+        self.threshold = threshold
+        self.margem = margem
+        self.model_name = professor.model_name
+        self.version = professor.version
+        self.backend = professor.backend
+        self.early_exit = None
+        self._lock = threading.Lock()
+        self.linhas = 0
+        self.escaladas = 0
+
+    @property
+    def calibracao(self):
+        return self.professor.calibracao
+
+    @property
+    def versao_calibracao(self) -> Optional[int]:
+        return self.professor.versao_calibracao
+
+    def definir_calibracao(self, calibracao, versao: Optional[int] = None) -> None:
+        # O aluno imita a saída bruta do professor: a calibração do professor vale para os dois
+        self.professor.definir_calibracao(calibracao, versao)
+
+    def predict_proba(self, X: pd.DataFrame, calibrar: bool = True) -> np.ndarray:
+        """
+        Probabilidades do aluno, com as linhas perto do threshold repontuadas
+        pelo professor. calibrar=False (saída bruta, usada para ajustar a
+        calibração) vem sempre do professor.
+        """
+        if not calibrar:
+            return self.professor.predict_proba(X, calibrar=False)
+
+        prob = self.aluno.predict_proba(X, calibrar=False)[:, 1]
+        calibracao = self.professor.calibracao
+        # Threshold levado para a escala bruta, onde o aluno foi treinado
+        limiar = calibracao.inverter(self.threshold) if calibracao is not None else self.threshold
+        proximas = np.flatnonzero(np.abs(prob - limiar) < self.margem)
+        if calibracao is not None:
+            prob = calibracao.aplicar(prob)
+        if len(proximas):
+            prob[proximas] = self.professor.predict_proba(X.iloc[proximas])[:, 1]
+
+        with self._lock:
+            self.linhas += len(prob)
+            self.escaladas += len(proximas)
+        return np.column_stack([1 - prob, prob])
+
+    def pontuar(self, df_raw: pd.DataFrame, feature_store, calibrar: bool = True) -> Tuple[pd.DataFrame, np.ndarray]:
+        if not calibrar:
+            return self.professor.pontuar(df_raw, feature_store, calibrar=False)
+        X_final = feature_store.transform(df_raw)
+        return X_final, self.predict_proba(X_final)
+
+    def classificar(self, X: pd.DataFrame, threshold: float) -> np.ndarray:
+        return (self.predict_proba(X)[:, 1] >= threshold).astype(int)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {
+            "aluno": {"model_name": self.aluno.model_name, "version": self.aluno.version},
+            "threshold": self.threshold,
+            "margem": self.margem,
+            "linhas": self.linhas,
+            "escaladas": self.escaladas,
+            "fracao_escalada": round(self.escaladas / self.linhas, 4) if self.linhas else None,
+        }
+
+
+def _latencia_ms(modelo, X: pd.DataFrame, n_linhas: int = 200) -> Dict[str, float]:
+    """Tempo por linha isolada e por 1000 linhas em lote"""
+    inicio = time.perf_counter()
+    for i in range(n_linhas):
+        modelo.predict_proba(X.iloc[i:i + 1])
+    por_linha = (time.perf_counter() - inicio) / n_linhas * 1000
+    inicio = time.perf_counter()
+    modelo.predict_proba(X)
+    por_mil = (time.perf_counter() - inicio) / len(X) * 1e6
+    return {"linha_ms": round(por_linha, 3), "lote_ms_por_mil": round(por_mil, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modelo", default="lgb_prob_default")
+    parser.add_argument("--versao", type=int, default=None, help="Professor (padrão: alias Production)")
+    parser.add_argument("--arvores", type=int, default=N_ARVORES_ALUNO)
+    parser.add_argument("--folhas", type=int, default=FOLHAS_ALUNO)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD_PADRAO)
+    parser.add_argument("--concordancia-alvo", type=float, default=CONCORDANCIA_ALVO,
+                        help="Concordância do modo escalonado usada para escolher a margem")
+    parser.add_argument("--alias", default=ALIAS_ALUNO)
+    parser.add_argument("--sem-registro", action="store_true", help="Não registra o aluno no mlruns")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    from src.data.datasets import carregar_dataset
+    from src.models.loader_model import registrar_versao
+    from src.models.predictor import ModelProducao
+
+    professor = ModelProducao(args.modelo, version=args.versao)
+    colunas = professor._modelo.booster_.feature_name()
+    X = carregar_dataset("X_train", colunas=colunas)
+    X_teste = carregar_dataset("X_test", colunas=colunas)
+    y_teste = carregar_dataset("y_test").to_numpy()
+
+    # Parte do X_train fica fora do treino do aluno para escolher a margem
+    validacao = np.random.default_rng(42).uniform(size=len(X)) < FRACAO_VALIDACAO
+    X_treino, X_validacao = X[~validacao], X[validacao]
+
+    inicio = time.perf_counter()
+    transferencia = aumentar_dados(X_treino, COPIAS_AUMENTADAS, PROB_TROCA_AUMENTO)
+    p_transferencia = professor.predict_proba(transferencia, calibrar=False)[:, 1]
+    max_bin = professor._modelo.get_params().get("max_bin") or 255
+    aluno = treinar_aluno(transferencia, p_transferencia, args.arvores, args.folhas, max_bin=max_bin)
+    tempo_treino = time.perf_counter() - inicio
+
+    p_val_aluno = aluno.predict_proba(X_validacao)[:, 1]
+    p_val_professor = professor.predict_proba(X_validacao, calibrar=False)[:, 1]
+    margem = margem_para_concordancia(p_val_aluno, p_val_professor, args.threshold, args.concordancia_alvo)
+
+    p_aluno = aluno.predict_proba(X_teste)[:, 1]
+    p_professor = professor.predict_proba(X_teste, calibrar=False)[:, 1]
+    relatorio = avaliar(p_aluno, p_professor, args.threshold, y_teste, sorted(set(MARGENS_RELATORIO + [round(margem, 4)])))
+    p_final, escaladas = escalonar(p_aluno, p_professor, args.threshold, margem)
+
+    print(f"Professor: {professor.model_name} v{professor.version} ({professor._modelo.booster_.num_trees()} árvores)")
+    print(f"Aluno: {aluno.booster_.num_trees()} árvores, {args.folhas} folhas | treino em {tempo_treino:.1f}s "
+          f"({len(transferencia)} linhas de transferência)")
+    print(f"X_test ({relatorio['linhas']} linhas), threshold {args.threshold}:")
+    print(f"  concordância aluno x professor: {relatorio['concordancia']:.4f} | "
+          f"MAE da probabilidade: {relatorio['mae_probabilidade']:.4f}")
+    print(f"  ROC-AUC aluno {relatorio['roc_auc_aluno']:.4f} x professor {relatorio['roc_auc_professor']:.4f} | "
+          f"KS aluno {relatorio['ks_aluno']:.4f} x professor {relatorio['ks_professor']:.4f}")
+    print("  margem   escaladas   concordância")
+    for linha in relatorio["escalonamento"]:
+        print(f"  {linha['margem']:<8.4f} {linha['fracao_escalada']:>9.1%}   {linha['concordancia']:.4f}")
+    print(f"Margem para concordância {args.concordancia_alvo} (validação): {margem:.4f}")
+
+    latencia_professor = _latencia_ms(professor, X_teste)
+    latencia_aluno = _latencia_ms(aluno, X_teste)
+    print(f"Latência professor: {latencia_professor} | aluno: {latencia_aluno}")
+
+    if args.sem_registro:
+        return
+
+    import yaml
+    from src.models.loader_model import MLRUNS_BASE
+
+    with open(MLRUNS_BASE / "models" / professor.model_name / f"version-{professor.version}" / "meta.yaml") as f:
+        run_professor = yaml.safe_load(f)["run_id"]
+
+    versao = registrar_versao(
+        professor.model_name,
+        aluno,
+        run_id_origem=run_professor,
+        run_name=f"Destilacao_v{professor.version}",
+        params={
+            "n_estimators": args.arvores, "num_leaves": args.folhas, "learning_rate": TAXA_APRENDIZADO_ALUNO,
+            "max_bin": max_bin, "copias_aumentadas": COPIAS_AUMENTADAS, "prob_troca_aumento": PROB_TROCA_AUMENTO,
+            "professor_versao": professor.version, "threshold": args.threshold,
+            "concordancia_alvo": args.concordancia_alvo,
+        },
+        metricas={
+            "concordancia_teste": relatorio["concordancia"],
+            "concordancia_escalonada_teste": concordancia(p_final, p_professor, args.threshold),
+            "fracao_escalada_teste": float(escaladas.mean()),
+            "margem_escalonamento": margem,
+            "mae_professor_teste": relatorio["mae_probabilidade"],
+            "test_roc_auc": relatorio["roc_auc_aluno"],
+            "test_pr_auc": relatorio["pr_auc_aluno"],
+            "best_ks_score": relatorio["ks_aluno"],
+        },
+        tags={"model_type": "student", "professor": f"{professor.model_name} v{professor.version}",
+              "descricao": f"Aluno destilado de {professor.model_name} v{professor.version}"},
+        alias=args.alias,
+    )
+    print(f"Aluno registrado como {professor.model_name} v{versao} (alias {args.alias})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Inferência com saída antecipada (early exit) para o ensemble LightGBM binário.
+
+As árvores são avaliadas em estágios. Após cada estágio, a classificação de
+uma linha é decidida quando o score bruto parcial somado ao limite inferior
+(ou superior) da contribuição das árvores restantes já não pode cruzar o
+threshold. Os limites são exatos sobre as folhas alcançáveis, então a
+classificação é sempre idêntica à do modelo completo.
+
+Para apertar os limites, o espaço das features mais usadas em splits é
+particionado em caixas (bins definidos pelos próprios thresholds do modelo):
+em cada árvore, o mínimo/máximo é tomado apenas sobre as folhas alcançáveis
+a partir da caixa da linha.
+
+Run with:
+    python -m src.models.early_exit
+    python -m src.models.early_exit --threshold 0.42 --estagio 50
+"""
+import argparse
+import logging
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_ESTAGIO_PADRAO = 50
+N_FEATURES_CAIXA_PADRAO = 2
+N_BINS_CAIXA_PADRAO = 16
+
+# Folga no espaço logit contra diferenças de arredondamento entre soma por estágios e soma completa
+MARGEM_NUMERICA = 1e-9
+
+
+def _logit(p: float) -> float:
+    return float(np.log(p / (1.0 - p)))
+
+
+class ClassificadorEarlyExit:
+    """
+    Classificação por estágios com garantia de resultado idêntico ao modelo completo.
+
+    Args:
+        modelo: LGBMClassifier treinado (objective binary)
+        tamanho_estagio: Árvores avaliadas entre duas verificações de saída
+        n_features_caixa: Quantas features (as mais usadas em splits) particionam o espaço
+        n_bins_caixa: Bins por feature da partição
+    """
+
+    def __init__(
+        self,
+        modelo,
+        tamanho_estagio: int = TAMANHO_ESTAGIO_PADRAO,
+        n_features_caixa: int = N_FEATURES_CAIXA_PADRAO,
+        n_bins_caixa: int = N_BINS_CAIXA_PADRAO,
+    ):
+        self.modelo = modelo
+        self.booster = modelo.booster_
+        self.tamanho_estagio = tamanho_estagio
+
+        dump = self.booster.dump_model()
+        if dump.get("num_tree_per_iteration", 1) != 1 or not str(dump.get("objective", "")).startswith("binary"):
+            raise ValueError("Early exit suportado apenas para modelos LightGBM binários")
+
+        # Respeita a mesma quantidade de árvores usada pelo predict_proba do modelo
+        melhor = getattr(modelo, "best_iteration_", None) or 0
+        self.n_arvores = melhor if melhor > 0 else self.booster.num_trees()
+        self.feature_names = self.booster.feature_name()
+        arvores = [t["tree_structure"] for t in dump["tree_info"][: self.n_arvores]]
+
+        self._features_caixa, self._bordas = self._definir_caixas(arvores, n_features_caixa, n_bins_caixa)
+        self._formato_caixas = tuple(len(b) + 1 for b in self._bordas)
+        self._limites_min, self._limites_max = self._calcular_limites(arvores)
+
+        # Estatísticas acumuladas das chamadas a classificar()
+        self.linhas_avaliadas = 0
+        self.arvores_avaliadas = 0
+
+    # ------------------------------------------------------------------
+    # Pré-computação dos limites
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _definir_caixas(arvores, n_features: int, n_bins: int) -> Tuple[List[int], List[np.ndarray]]:
+        """Escolhe as features mais usadas e define bordas pelos quantis de seus thresholds"""
+        thresholds: Dict[int, List[float]] = {}
+
+        def visitar(no):
+            if "leaf_value" in no:
+                return
+            if no.get("decision_type") == "<=":
+                thresholds.setdefault(no["split_feature"], []).append(no["threshold"])
+            visitar(no["left_child"])
+            visitar(no["right_child"])
+
+        for arvore in arvores:
+            visitar(arvore)
+
+        contagem = Counter({f: len(t) for f, t in thresholds.items()})
+        features = [f for f, _ in contagem.most_common(n_features)]
+        bordas = [
+            np.unique(np.quantile(thresholds[f], np.linspace(0, 1, n_bins + 1)[1:-1]))
+            for f in features
+        ]
+        return features, bordas
+
+    def _intervalos_caixas(self) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """Para cada feature da partição: limites [lo, hi) de cada caixa (vetorizado sobre caixas)"""
+        indices = np.indices(self._formato_caixas).reshape(len(self._formato_caixas), -1)
+        intervalos = {}
+        for eixo, (feature, bordas) in enumerate(zip(self._features_caixa, self._bordas)):
+            extremos = np.concatenate([[-np.inf], bordas, [np.inf]])
+            intervalos[feature] = (extremos[indices[eixo]], extremos[indices[eixo] + 1])
+        return intervalos
+
+    def _calcular_limites(self, arvores) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Soma, do fim para o início, do mínimo/máximo de folha alcançável por caixa.
+        Retorna matrizes [caixa, i] com os limites da contribuição das árvores i..fim.
+        """
+        n_caixas = int(np.prod(self._formato_caixas))
+        intervalos = self._intervalos_caixas()
+        minimos = np.empty((n_caixas, len(arvores)))
+        maximos = np.empty((n_caixas, len(arvores)))
+
+        for t, arvore in enumerate(arvores):
+            menor = np.full(n_caixas, np.inf)
+            maior = np.full(n_caixas, -np.inf)
+            pilha = [(arvore, np.ones(n_caixas, dtype=bool))]
+            while pilha:
+                no, ativas = pilha.pop()
+                if "leaf_value" in no:
+                    menor[ativas] = np.minimum(menor[ativas], no["leaf_value"])
+                    maior[ativas] = np.maximum(maior[ativas], no["leaf_value"])
+                    continue
+
+                esquerda = direita = ativas
+                feature = no["split_feature"]
+                if no.get("decision_type") == "<=" and feature in intervalos:
+                    lo, hi = intervalos[feature]
+                    esquerda = ativas & (lo <= no["threshold"])
+                    direita = ativas & (hi > no["threshold"])
+                    if no.get("missing_type") == "Zero":
+                        # Zero é tratado como ausente: a caixa que contém 0 alcança os dois lados
+                        contem_zero = (lo <= 0) & (hi > 0)
+                        esquerda = esquerda | (ativas & contem_zero)
+                        direita = direita | (ativas & contem_zero)
+
+                if esquerda.any():
+                    pilha.append((no["left_child"], esquerda))
+                if direita.any():
+                    pilha.append((no["right_child"], direita))
+
+            minimos[:, t] = menor
+            maximos[:, t] = maior
+
+        zeros = np.zeros((n_caixas, 1))
+        limites_min = np.concatenate([np.cumsum(minimos[:, ::-1], axis=1)[:, ::-1], zeros], axis=1)
+        limites_max = np.concatenate([np.cumsum(maximos[:, ::-1], axis=1)[:, ::-1], zeros], axis=1)
+        return limites_min, limites_max
+
+    def _caixas(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Caixa de cada linha; linhas com NaN nas features da partição usam os limites globais"""
+        if not self._features_caixa:
+            return np.zeros(len(X), dtype=np.int64), np.zeros(len(X), dtype=bool)
+
+        colunas = X[:, self._features_caixa]
+        com_ausente = np.isnan(colunas).any(axis=1)
+        posicoes = [
+            np.searchsorted(bordas, colunas[:, j], side="right")
+            for j, bordas in enumerate(self._bordas)
+        ]
+        caixas = np.ravel_multi_index(posicoes, self._formato_caixas, mode="clip")
+        return caixas, com_ausente
+
+    # ------------------------------------------------------------------
+    # Inferência
+    # ------------------------------------------------------------------
+
+    def classificar(self, X: pd.DataFrame, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Classifica (1 se probabilidade >= threshold) avaliando o mínimo de árvores necessário.
+
+        Returns:
+            (classes, arvores_avaliadas_por_linha)
+        """
+        X = X[self.feature_names]
+        valores = X.to_numpy(dtype=float)
+        n = len(valores)
+        corte = _logit(threshold)
+
+        caixas, com_ausente = self._caixas(valores)
+        limites_min = self._limites_min[caixas]
+        limites_max = self._limites_max[caixas]
+        if com_ausente.any():
+            # Sem caixa definida: limite conservador (pior caso sobre todas as caixas)
+            limites_min[com_ausente] = self._limites_min.min(axis=0)
+            limites_max[com_ausente] = self._limites_max.max(axis=0)
+
+        classes = np.zeros(n, dtype=np.int64)
+        arvores = np.full(n, self.n_arvores, dtype=np.int64)
+        parcial = np.zeros(n)
+        pendentes = np.arange(n)
+
+        for inicio in range(0, self.n_arvores, self.tamanho_estagio):
+            if len(pendentes) == 0:
+                break
+            fim = min(inicio + self.tamanho_estagio, self.n_arvores)
+            parcial[pendentes] += self.booster.predict(
+                valores[pendentes], raw_score=True, start_iteration=inicio, num_iteration=fim - inicio
+            )
+            if fim == self.n_arvores:
+                break
+
+            minimo = parcial[pendentes] + limites_min[pendentes, fim]
+            maximo = parcial[pendentes] + limites_max[pendentes, fim]
+            positivos = minimo > corte + MARGEM_NUMERICA
+            negativos = maximo < corte - MARGEM_NUMERICA
+            decididos = positivos | negativos
+
+            classes[pendentes[positivos]] = 1
+            arvores[pendentes[decididos]] = fim
+            pendentes = pendentes[~decididos]
+
+        if len(pendentes):
+            # Linhas que avaliaram todas as árvores: o score completo já está em `parcial`;
+            # apenas empates numéricos com o threshold são reavaliados pelo próprio modelo
+            classes[pendentes] = (parcial[pendentes] >= corte).astype(np.int64)
+            empate = pendentes[np.abs(parcial[pendentes] - corte) <= MARGEM_NUMERICA]
+            if len(empate):
+                prob = self.modelo.predict_proba(X.iloc[empate])[:, 1]
+                classes[empate] = (prob >= threshold).astype(np.int64)
+
+        self.linhas_avaliadas += n
+        self.arvores_avaliadas += int(arvores.sum())
+        return classes, arvores
+
+    @property
+    def media_arvores(self) -> Optional[float]:
+        """Média de árvores avaliadas por linha desde a criação"""
+        if self.linhas_avaliadas == 0:
+            return None
+        return self.arvores_avaliadas / self.linhas_avaliadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threshold", type=float, default=0.42)
+    parser.add_argument("--estagio", type=int, default=TAMANHO_ESTAGIO_PADRAO)
+    parser.add_argument("--dataset", default="X_test")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    from src.data.datasets import carregar_dataset
+    from src.models.predictor import ModelProducao
+
+    modelo = ModelProducao(early_exit=True, tamanho_estagio=args.estagio)
+    X = carregar_dataset(args.dataset, colunas=modelo.early_exit.feature_names)
+
+    inicio = time.perf_counter()
+    completo = (modelo.predict_proba(X)[:, 1] >= args.threshold).astype(int)
+    tempo_completo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    classes = modelo.classificar(X, args.threshold)
+    tempo_early = time.perf_counter() - inicio
+
+    print(f"Linhas: {len(X)} | árvores no modelo: {modelo.early_exit.n_arvores}")
+    print(f"Média de árvores avaliadas: {modelo.early_exit.media_arvores:.1f}")
+    print(f"Classificações idênticas: {bool((classes == completo).all())}")
+    print(f"Tempo completo: {tempo_completo * 1000:.1f} ms | early exit: {tempo_early * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
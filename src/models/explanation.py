@@ -0,0 +1,346 @@
+"""Explicação global do modelo: contribuições exatas (TreeSHAP) de todo o treino/teste em Parquet.
+
+O `shap_summary_plot.png` registrado no MLflow vem de `shap.TreeExplainer` sobre
+`X_train_selecionado.sample(100)`: pouco para importância global e nada para
+segmentos. Este job calcula as contribuições exatas de cada feature, para todas
+as linhas, com o `pred_contrib` do próprio LightGBM (o mesmo TreeSHAP, sem
+depender do pacote shap):
+
+- As linhas são divididas em chunks e pontuadas por um pool de processos. Cada
+  worker recria o booster uma vez e lê as features de um .npy por memory map;
+  o resultado vai direto para uma matriz .npy compartilhada (faixas de linhas
+  disjuntas, sem lock). O tempo cai com o número de núcleos
+- A matriz vira um Parquet colunar (data/explanations/<modelo>_v<versao>/):
+  dataset, linha, rótulo, margem (log-odds), x.<feature>, phi.<feature> e
+  phi.bias. Para cada linha, phi.bias + soma dos phi = margem
+- Os resumos leem só as colunas necessárias do Parquet: importância global
+  (média de |phi|), importância por segmento (rótulo, decil de score ou faixas
+  de uma feature) e dependência (phi médio e quantis por faixa de valor)
+
+Run with:
+    python -m src.models.explanation                                # X_train e X_test, modelo Production
+    python -m src.models.explanation --datasets X_test --processos 4 --chunk 5000
+    python -m src.models.explanation --so-resumo                    # refaz os resumos do Parquet existente
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.utils.paths import data_path
+
+logger = logging.getLogger(__name__)
+
+CHUNK_PADRAO = 2000
+N_FAIXAS_PADRAO = 10
+PREFIXO_VALOR = "x."
+PREFIXO_CONTRIBUICAO = "phi."
+COLUNA_BIAS = "phi.bias"
+ARQUIVO_CONTRIBUICOES = "contribuicoes.parquet"
+
+
+def diretorio_explicacao(model_name: str, version: int) -> Path:
+    return data_path("", f"explanations/{model_name}_v{version}")
+
+
+# Booster e matrizes abertos uma vez por processo do pool (initializer)
+_estado_worker: Dict[str, object] = {}
+
+
+def _inicializar_worker(modelo_str: str, caminho_X: str, caminho_saida: str, threads: int) -> None:
+    import lightgbm as lgb
+
+    _estado_worker["booster"] = lgb.Booster(model_str=modelo_str)
+    _estado_worker["X"] = np.load(caminho_X, mmap_mode="r")
+    _estado_worker["saida"] = np.load(caminho_saida, mmap_mode="r+")
+    _estado_worker["threads"] = threads
+
+
+def _contribuir_chunk(inicio: int, fim: int) -> float:
+    """Escreve as contribuições das linhas [inicio, fim) na matriz compartilhada; retorna o tempo gasto"""
+    comeco = time.perf_counter()
+    saida = _estado_worker["saida"]
+    saida[inicio:fim] = _estado_worker["booster"].predict(
+        np.asarray(_estado_worker["X"][inicio:fim]), pred_contrib=True, num_threads=_estado_worker["threads"]
+    )
+    saida.flush()
+    return time.perf_counter() - comeco
+
+
+def calcular_contribuicoes(
+    booster,
+    X: np.ndarray,
+    processos: int = 1,
+    chunk: int = CHUNK_PADRAO,
+    threads_por_processo: int = 1,
+) -> np.ndarray:
+    """
+    Contribuições (n_linhas, n_features + 1) em log-odds, a última coluna é o
+    bias. Com processos > 1 os chunks são distribuídos por um pool; o
+    resultado é idêntico ao de um único `booster.predict(X, pred_contrib=True)`.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    faixas = [(i, min(i + chunk, len(X))) for i in range(0, len(X), chunk)]
+
+    if processos <= 1:
+        return np.vstack([
+            booster.predict(X[inicio:fim], pred_contrib=True, num_threads=threads_por_processo)
+            for inicio, fim in faixas
+        ]) if faixas else np.empty((0, X.shape[1] + 1))
+
+    with tempfile.TemporaryDirectory(prefix="contrib_") as tmp:
+        caminho_X = os.path.join(tmp, "X.npy")
+        caminho_saida = os.path.join(tmp, "contribuicoes.npy")
+        np.save(caminho_X, X)
+        saida = np.lib.format.open_memmap(caminho_saida, mode="w+", dtype=np.float64, shape=(len(X), X.shape[1] + 1))
+        del saida
+
+        inicio_total = time.perf_counter()
+        with ProcessPoolExecutor(
+            processos,
+            initializer=_inicializar_worker,
+            initargs=(booster.model_to_string(), caminho_X, caminho_saida, threads_por_processo),
+        ) as executor:
+            tempos = list(executor.map(_contribuir_chunk, *zip(*faixas)))
+        logger.info(
+            f"{len(X)} linhas em {len(faixas)} chunks, {processos} processos: "
+            f"{time.perf_counter() - inicio_total:.1f}s de parede, {sum(tempos):.1f}s somando os chunks"
+        )
+        return np.array(np.load(caminho_saida, mmap_mode="r"))
+
+
+def gravar_contribuicoes(
+    destino: Path,
+    partes: Dict[str, Dict[str, np.ndarray]],
+    colunas: Sequence[str],
+    linhas_por_grupo: int = 50_000,
+) -> Path:
+    """
+    Parquet com uma linha por observação. `partes`: {dataset: {"X", "phi", "y"}}.
+    Escrito em row groups, sem montar uma tabela única em memória.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_suffix(".parquet.tmp")
+    escritor = None
+    try:
+        for dataset, parte in partes.items():
+            X, phi, y = parte["X"], parte["phi"], parte.get("y")
+            for inicio in range(0, len(X), linhas_por_grupo):
+                fim = min(inicio + linhas_por_grupo, len(X))
+                colunas_arrow = {
+                    "dataset": pa.array([dataset] * (fim - inicio)).dictionary_encode(),
+                    "linha": pa.array(np.arange(inicio, fim, dtype=np.int64)),
+                    "y": pa.array(np.asarray(y[inicio:fim], dtype=np.int8) if y is not None else np.full(fim - inicio, -1, np.int8)),
+                    "margem": pa.array(phi[inicio:fim].sum(axis=1)),
+                }
+                for j, coluna in enumerate(colunas):
+                    colunas_arrow[f"{PREFIXO_VALOR}{coluna}"] = pa.array(np.asarray(X[inicio:fim, j], dtype=np.float64))
+                for j, coluna in enumerate(colunas):
+                    colunas_arrow[f"{PREFIXO_CONTRIBUICAO}{coluna}"] = pa.array(phi[inicio:fim, j])
+                colunas_arrow[COLUNA_BIAS] = pa.array(phi[inicio:fim, -1])
+                tabela = pa.table(colunas_arrow)
+                if escritor is None:
+                    escritor = pq.ParquetWriter(temporario, tabela.schema)
+                escritor.write_table(tabela)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    os.replace(temporario, destino)
+    return destino
+
+
+class ArmazemContribuicoes:
+    """Leitura do Parquet de contribuições e resumos globais, por segmento e de dependência"""
+
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        import pyarrow.parquet as pq
+        nomes = pq.read_schema(self.caminho).names
+        self.features: List[str] = [n[len(PREFIXO_CONTRIBUICAO):] for n in nomes
+                                    if n.startswith(PREFIXO_CONTRIBUICAO) and n != COLUNA_BIAS]
+
+    def ler(self, colunas: Sequence[str], dataset: Optional[str] = None) -> pd.DataFrame:
+        """Só as colunas pedidas (projeção no Parquet), opcionalmente de um dataset"""
+        filtros = [("dataset", "==", dataset)] if dataset else None
+        return pd.read_parquet(self.caminho, columns=list(colunas), filters=filtros)
+
+    def _phi(self, dataset: Optional[str], extras: Sequence[str] = ()) -> pd.DataFrame:
+        return self.ler([f"{PREFIXO_CONTRIBUICAO}{f}" for f in self.features] + list(extras), dataset)
+
+    def importancia_global(self, dataset: Optional[str] = None) -> pd.DataFrame:
+        """Média de |phi| (importância), phi médio (direção), desvio e participação de cada feature"""
+        phi = self._phi(dataset)
+        phi.columns = self.features
+        absoluto = phi.abs()
+        tabela = pd.DataFrame({
+            "media_abs": absoluto.mean(),
+            "media": phi.mean(),
+            "desvio": phi.std(),
+            "p95_abs": absoluto.quantile(0.95),
+        })
+        tabela["participacao"] = tabela["media_abs"] / tabela["media_abs"].sum()
+        return tabela.sort_values("media_abs", ascending=False).rename_axis("feature")
+
+    def segmentos(self, por: str, dataset: Optional[str] = None, n_faixas: int = N_FAIXAS_PADRAO) -> pd.Series:
+        """
+        Rótulo de segmento de cada linha: "y" (classe real), "decil_score"
+        (faixas da margem) ou uma feature (faixas de quantis do valor).
+        """
+        if por == "y":
+            return self.ler(["y"], dataset)["y"]
+        coluna = "margem" if por == "decil_score" else f"{PREFIXO_VALOR}{por}"
+        if por != "decil_score" and por not in self.features:
+            raise ValueError(f"Segmento '{por}' inválido. Opções: y, decil_score ou uma feature {self.features}")
+        valores = self.ler([coluna], dataset)[coluna]
+        if valores.nunique() <= n_faixas:
+            return valores
+        return pd.qcut(valores, n_faixas, duplicates="drop")
+
+    def importancia_por_segmento(self, por: str, dataset: Optional[str] = None, n_faixas: int = N_FAIXAS_PADRAO) -> pd.DataFrame:
+        """Média de |phi| por feature (colunas) em cada segmento (linhas), com o tamanho do segmento"""
+        phi = self._phi(dataset).abs()
+        phi.columns = self.features
+        segmento = self.segmentos(por, dataset, n_faixas)
+        tabela = phi.groupby(segmento.to_numpy(), observed=True).mean()
+        tabela.insert(0, "linhas", segmento.value_counts(sort=False).reindex(tabela.index).to_numpy())
+        return tabela.rename_axis(por)
+
+    def dependencia(self, feature: str, dataset: Optional[str] = None, n_faixas: int = 20) -> pd.DataFrame:
+        """Por faixa de valor da feature: linhas, valor médio, phi médio e quantis 10/90 do phi"""
+        if feature not in self.features:
+            raise ValueError(f"Feature '{feature}' não está no armazém: {self.features}")
+        dados = self.ler([f"{PREFIXO_VALOR}{feature}", f"{PREFIXO_CONTRIBUICAO}{feature}"], dataset)
+        dados.columns = ["valor", "phi"]
+        faixa = dados["valor"] if dados["valor"].nunique() <= n_faixas else pd.qcut(dados["valor"], n_faixas, duplicates="drop")
+        agrupado = dados.groupby(faixa.to_numpy(), observed=True)
+        return pd.DataFrame({
+            "linhas": agrupado.size(),
+            "valor_medio": agrupado["valor"].mean(),
+            "phi_medio": agrupado["phi"].mean(),
+            "phi_p10": agrupado["phi"].quantile(0.1),
+            "phi_p90": agrupado["phi"].quantile(0.9),
+        }).rename_axis("faixa")
+
+    def resumo(self, dataset: Optional[str] = None, top_dependencia: int = 3) -> Dict[str, object]:
+        """Resumo serializável: global, segmentos por classe e decil de score, dependência das principais features"""
+        def registros(tabela: pd.DataFrame) -> List[Dict[str, object]]:
+            tabela = tabela.set_axis(tabela.index.astype(str)).reset_index()
+            return json.loads(tabela.round(6).to_json(orient="records"))
+
+        global_ = self.importancia_global(dataset)
+        return {
+            "dataset": dataset or "todos",
+            "global": registros(global_),
+            "por_classe": registros(self.importancia_por_segmento("y", dataset)),
+            "por_decil_score": registros(self.importancia_por_segmento("decil_score", dataset)),
+            "dependencia": {f: registros(self.dependencia(f, dataset)) for f in global_.index[:top_dependencia]},
+        }
+
+
+def explicar(
+    model_name: str = "lgb_prob_default",
+    version: Optional[int] = None,
+    datasets: Sequence[str] = ("X_train", "X_test"),
+    processos: int = 1,
+    chunk: int = CHUNK_PADRAO,
+    destino: Optional[Path] = None,
+) -> Path:
+    """Calcula e grava as contribuições dos datasets processados para a versão do modelo"""
+    from src.data.datasets import carregar_dataset
+    from src.models.loader_model import load_production_model, resolve_model_version
+
+    version = resolve_model_version(model_name, version)
+    booster = load_production_model(model_name, version).booster_
+    colunas = booster.feature_name()
+    destino = Path(destino) if destino else diretorio_explicacao(model_name, version)
+
+    partes, tempos, erros = {}, {}, {}
+    for nome in datasets:
+        X = carregar_dataset(nome, colunas=colunas).to_numpy(dtype=np.float64)
+        nome_y = nome.replace("X_", "y_", 1)
+        try:
+            y = np.asarray(carregar_dataset(nome_y)).ravel()
+        except FileNotFoundError:
+            y = None
+        inicio = time.perf_counter()
+        phi = calcular_contribuicoes(booster, X, processos=processos, chunk=chunk)
+        tempos[nome] = time.perf_counter() - inicio
+
+        # Conferência: bias + contribuições = margem do modelo (amostra)
+        amostra = slice(0, min(len(X), 1000))
+        erro = float(np.max(np.abs(phi[amostra].sum(axis=1) - booster.predict(X[amostra], raw_score=True)), initial=0.0))
+        if erro > 1e-6:
+            raise RuntimeError(f"Contribuições de {nome} não somam a margem do modelo (erro máximo {erro:.2e})")
+        partes[nome], erros[nome] = {"X": X, "phi": phi, "y": y}, erro
+        logger.info(f"{nome}: {len(X)} linhas em {tempos[nome]:.1f}s")
+
+    caminho = gravar_contribuicoes(destino / ARQUIVO_CONTRIBUICOES, partes, colunas)
+    with open(destino / "meta.json", "w") as f:
+        json.dump({
+            "model_name": model_name, "version": version, "colunas": colunas, "num_arvores": booster.num_trees(),
+            "linhas": {nome: len(p["X"]) for nome, p in partes.items()}, "processos": processos, "chunk": chunk,
+            "tempo_s": {nome: round(t, 2) for nome, t in tempos.items()}, "erro_aditividade": erros,
+            "criado_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }, f, indent=2)
+    return caminho
+
+
+def gravar_resumos(caminho: Path) -> Path:
+    """resumo.json ao lado do Parquet: todos os datasets juntos e cada um separado"""
+    armazem = ArmazemContribuicoes(caminho)
+    datasets = sorted(armazem.ler(["dataset"])["dataset"].astype(str).unique())
+    resumos = {"todos": armazem.resumo()}
+    resumos.update({nome: armazem.resumo(nome) for nome in datasets})
+    arquivo = caminho.parent / "resumo.json"
+    with open(arquivo, "w") as f:
+        json.dump(resumos, f, indent=2, ensure_ascii=False)
+    return arquivo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modelo", default="lgb_prob_default")
+    parser.add_argument("--versao", type=int, default=None, help="Versão do modelo (padrão: alias Production)")
+    parser.add_argument("--datasets", nargs="+", default=["X_train", "X_test"])
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk", type=int, default=CHUNK_PADRAO, help="Linhas por tarefa do pool")
+    parser.add_argument("--so-resumo", action="store_true", help="Só refaz os resumos a partir do Parquet existente")
+    parser.add_argument("--segmento", default=None, help="Mostra a importância por segmento (y, decil_score ou feature)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    for nome in ("src.models.loader_model", "src.data.datasets"):
+        logging.getLogger(nome).setLevel(logging.WARNING)
+
+    from src.models.loader_model import resolve_model_version
+
+    versao = resolve_model_version(args.modelo, args.versao)
+    caminho = diretorio_explicacao(args.modelo, versao) / ARQUIVO_CONTRIBUICOES
+    if not args.so_resumo:
+        inicio = time.perf_counter()
+        caminho = explicar(args.modelo, versao, args.datasets, args.processos, args.chunk)
+        print(f"Contribuições gravadas em {caminho} ({time.perf_counter() - inicio:.1f}s)")
+    print(f"Resumos em {gravar_resumos(caminho)}")
+
+    armazem = ArmazemContribuicoes(caminho)
+    pd.set_option("display.width", 200)
+    print("\nImportância global (média de |phi| em log-odds):")
+    print(armazem.importancia_global().round(4).to_string())
+    if args.segmento:
+        print(f"\nImportância por segmento ({args.segmento}):")
+        print(armazem.importancia_por_segmento(args.segmento).round(4).to_string())
+
+
+if __name__ == "__main__":
+    main()
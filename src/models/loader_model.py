@@ -1,13 +1,59 @@
-import pickle
-import pandas as pd
-import numpy as np
 import os
+import pickle
 import logging
 import traceback
 from pathlib import Path
+from typing import Dict
 
 logger = logging.getLogger(__name__)
 
+# Registry do MLflow montado no container da API
+MLRUNS_BASE = Path("/app/experiments/mlruns")
+
+def resolve_model_version(model_name: str = "lgb_prob_default", version: int = None, alias: str = "Production") -> int:
+    """
+    Resolve a versão do modelo a ser carregada.
+    Se a versão não for especificada, lê do alias (padrão: Production) do registry.
+    """
+    if version is not None:
+        logger.info(f"Usando versão especificada: {version}")
+        return int(version)
+
+    alias_file = MLRUNS_BASE / "models" / model_name / "aliases" / alias
+    logger.info(f"Lendo versão do alias {alias} em: {alias_file}")
+
+    if alias_file.exists():
+        version = int(alias_file.read_text().strip())
+        logger.info(f"Alias {alias} aponta para versão: {version}")
+    elif alias == "Production":
+        # Fallback para versão 4 se o alias não existir
+        logger.warning(f"Alias Production não encontrado, usando versão 4 como padrão")
+        version = 4
+    else:
+        raise FileNotFoundError(f"Alias '{alias}' não encontrado para o modelo '{model_name}': {alias_file}")
+
+    return version
+
+def listar_modelos() -> Dict[str, dict]:
+    """Modelos do registry com as versões registradas e os aliases de cada um"""
+    modelos = {}
+    raiz = MLRUNS_BASE / "models"
+    if not raiz.exists():
+        return modelos
+
+    for pasta in sorted(p for p in raiz.iterdir() if p.is_dir()):
+        versoes = sorted(
+            int(v.name.split("-", 1)[1]) for v in pasta.glob("version-*") if v.name.split("-", 1)[1].isdigit()
+        )
+        pasta_aliases = pasta / "aliases"
+        aliases = {
+            a.name: int(a.read_text().strip())
+            for a in sorted(pasta_aliases.iterdir())
+        } if pasta_aliases.exists() else {}
+        modelos[pasta.name] = {"versoes": versoes, "aliases": aliases}
+
+    return modelos
+
 def load_production_model(model_name: str = "lgb_prob_default", version: int = None):
     """
     Carrega o modelo diretamente dos arquivos, sem usar MLflow.
@@ -19,8 +65,39 @@ def load_production_model(model_name: str = "lgb_prob_default", version: int = N
     logger.info(f"Iniciando carregamento do modelo '{model_name}'")
     logger.info("=" * 80)
 
+    version = resolve_model_version(model_name, version)
+    model_path = localizar_artefatos(model_name, version) / "model.pkl"
+    logger.info(f"Arquivo do modelo encontrado em: {model_path}")
+
+    try:
+        # Carregar o modelo diretamente usando pickle
+        with open(model_path, 'rb') as f:
+            modelo = pickle.load(f)
+
+        logger.info(f"Modelo carregado com sucesso")
+        logger.info(f"Tipo do modelo: {type(modelo)}")
+
+        # Verificar se o modelo tem o método predict_proba
+        if hasattr(modelo, 'predict_proba'):
+            logger.info("Modelo possui método predict_proba")
+        else:
+            logger.warning("Modelo não possui método predict_proba")
+
+        return modelo
+
+    except Exception as e:
+        logger.error(f"Erro ao carregar modelo de {model_path}: {e}")
+        logger.error(traceback.format_exc())
+        raise
+
+
+def localizar_artefatos(model_name: str, version: int) -> Path:
+    """
+    Diretório de artefatos (model.pkl, bundle.riskbundle, ...) de uma versão registrada.
+    Resolve o model_id pelo meta.yaml da versão e o procura nos experimentos.
+    """
     # Caminho base dos experimentos
-    base_path = Path("/app/experiments/mlruns")
+    base_path = MLRUNS_BASE
 
     # Verificar se o caminho existe
     if not base_path.exists():
@@ -30,21 +107,6 @@ def load_production_model(model_name: str = "lgb_prob_default", version: int = N
 
     logger.info(f"Buscando modelo em: {base_path}")
 
-    # Se a versão não foi especificada, ler do alias Production
-    if version is None:
-        alias_file = base_path / "models" / model_name / "aliases" / "Production"
-        logger.info(f"Lendo versão do alias Production em: {alias_file}")
-
-        if alias_file.exists():
-            version = int(alias_file.read_text().strip())
-            logger.info(f"Alias Production aponta para versão: {version}")
-        else:
-            # Fallback para versão 4 se o alias não existir
-            logger.warning(f"Alias Production não encontrado, usando versão 4 como padrão")
-            version = 4
-    else:
-        logger.info(f"Usando versão especificada: {version}")
-
     # Ler meta.yaml da versão para obter model_id
     version_meta_file = base_path / "models" / model_name / f"version-{version}" / "meta.yaml"
     logger.info(f"Verificando meta.yaml em: {version_meta_file}")
@@ -70,31 +132,11 @@ def load_production_model(model_name: str = "lgb_prob_default", version: int = N
     logger.info(f"Diretórios de experimentos encontrados: {[d.name for d in experiment_dirs]}")
 
     for exp_dir in experiment_dirs:
-        model_path = exp_dir / "models" / model_id / "artifacts" / "model.pkl"
-        logger.info(f"Verificando: {model_path}")
-
-        if model_path.exists():
-            logger.info(f"Arquivo do modelo encontrado em: {model_path}")
-            try:
-                # Carregar o modelo diretamente usando pickle
-                with open(model_path, 'rb') as f:
-                    modelo = pickle.load(f)
+        artifacts_dir = exp_dir / "models" / model_id / "artifacts"
+        logger.info(f"Verificando: {artifacts_dir / 'model.pkl'}")
 
-                logger.info(f"Modelo carregado com sucesso")
-                logger.info(f"Tipo do modelo: {type(modelo)}")
-
-                # Verificar se o modelo tem o método predict_proba
-                if hasattr(modelo, 'predict_proba'):
-                    logger.info("Modelo possui método predict_proba")
-                else:
-                    logger.warning("Modelo não possui método predict_proba")
-
-                return modelo
-
-            except Exception as e:
-                logger.error(f"Erro ao carregar modelo de {model_path}: {e}")
-                logger.error(traceback.format_exc())
-                raise
+        if (artifacts_dir / "model.pkl").exists():
+            return artifacts_dir
 
     raise FileNotFoundError(
         f"Modelo não encontrado. Model ID: {model_id}, "
@@ -102,3 +144,192 @@ def load_production_model(model_name: str = "lgb_prob_default", version: int = N
         f"Experiment dirs: {[d.name for d in experiment_dirs]}, "
         f"Base path: {base_path}"
     )
+
+
+def metricas_offline(model_name: str, version: int) -> Dict[str, float]:
+    """
+    Métricas de teste registradas no run de treino da versão
+    (mlruns/<experimento>/<run_id>/metrics/<nome>, último valor de cada arquivo).
+    """
+    version_meta_file = MLRUNS_BASE / "models" / model_name / f"version-{version}" / "meta.yaml"
+    if not version_meta_file.exists():
+        raise FileNotFoundError(f"Meta.yaml não encontrado para versão {version}: {version_meta_file}")
+
+    import yaml
+    with open(version_meta_file, 'r') as f:
+        run_id = yaml.safe_load(f).get('run_id')
+    if not run_id:
+        return {}
+
+    for exp_dir in (d for d in MLRUNS_BASE.iterdir() if d.is_dir() and d.name.isdigit()):
+        metrics_dir = exp_dir / run_id / "metrics"
+        if metrics_dir.is_dir():
+            # Cada linha: "<timestamp> <valor> <step>"
+            return {
+                arquivo.name: float(arquivo.read_text().split()[-2])
+                for arquivo in sorted(metrics_dir.iterdir())
+                if arquivo.is_file() and arquivo.read_text().strip()
+            }
+
+    return {}
+
+
+def _gravar_yaml(caminho: Path, conteudo: dict) -> None:
+    import yaml
+
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    with open(caminho, "w") as f:
+        yaml.safe_dump(conteudo, f, sort_keys=True)
+
+
+def _gravar_valores(pasta: Path, valores: Dict[str, object], agora: int, metrica: bool = False) -> None:
+    pasta.mkdir(parents=True, exist_ok=True)
+    for nome, valor in valores.items():
+        # Métricas: "<timestamp> <valor> <step>", como o file store do MLflow
+        (pasta / nome).write_text(f"{agora} {float(valor)} 0\n" if metrica else str(valor))
+
+
+def _pasta_experimento(nome: str, base: Path = MLRUNS_BASE) -> Path:
+    """Pasta do experimento `nome` no file store `base`; criada (id numérico novo) se não existir"""
+    import time
+
+    import yaml
+
+    base.mkdir(parents=True, exist_ok=True)
+    for pasta in (d for d in base.iterdir() if d.is_dir() and d.name.isdigit()):
+        if (pasta / "meta.yaml").exists():
+            with open(pasta / "meta.yaml") as f:
+                if (yaml.safe_load(f) or {}).get("name") == nome:
+                    return pasta
+
+    agora = int(time.time() * 1000)
+    pasta = base / str(agora * 1000 + os.getpid() % 1000)
+    _gravar_yaml(pasta / "meta.yaml", {
+        "artifact_location": pasta.as_uri(), "creation_time": agora, "experiment_id": pasta.name,
+        "last_update_time": agora, "lifecycle_stage": "active", "name": nome,
+    })
+    return pasta
+
+
+def _gravar_run(pasta_experimento: Path, run_name: str, params, metricas, tags, agora: int) -> str:
+    import uuid
+
+    run_id = uuid.uuid4().hex
+    pasta_run = pasta_experimento / run_id
+    _gravar_yaml(pasta_run / "meta.yaml", {
+        "artifact_uri": (pasta_run / "artifacts").as_uri(), "end_time": agora, "entry_point_name": "",
+        "experiment_id": pasta_experimento.name, "lifecycle_stage": "active", "run_id": run_id, "run_name": run_name,
+        "source_name": "", "source_type": 4, "source_version": "", "start_time": agora, "status": 3,
+        "tags": [], "user_id": "riskml",
+    })
+    _gravar_valores(pasta_run / "params", params, agora)
+    _gravar_valores(pasta_run / "metrics", metricas, agora, metrica=True)
+    _gravar_valores(pasta_run / "tags", {"mlflow.runName": run_name, **tags}, agora)
+    return run_id
+
+
+def registrar_run(
+    experimento: str,
+    run_name: str,
+    params: Dict[str, object],
+    metricas: Dict[str, float],
+    tags: Dict[str, str] = None,
+    base: Path = MLRUNS_BASE,
+) -> str:
+    """
+    Grava um run (params, métricas e tags) no experimento `experimento` (nome)
+    no layout do file store do MLflow, sem depender do mlflow.
+
+    Args:
+        base: Raiz do file store (padrão MLRUNS_BASE)
+
+    Returns:
+        run_id criado
+    """
+    import time
+
+    run_id = _gravar_run(_pasta_experimento(experimento, Path(base)), run_name, params, metricas, tags or {}, int(time.time() * 1000))
+    logger.info(f"Run {run_name} ({run_id}) registrado em {experimento}")
+    return run_id
+
+
+def registrar_versao(
+    model_name: str,
+    modelo,
+    run_id_origem: str,
+    run_name: str,
+    params: Dict[str, object],
+    metricas: Dict[str, float],
+    tags: Dict[str, str],
+    alias: str = None,
+) -> int:
+    """
+    Registra `modelo` como nova versão de `model_name` no layout do file store do
+    MLflow (sem depender do mlflow): run no experimento do run de origem, com
+    params/métricas/tags, modelo logado (artifacts/model.pkl) e version-N no
+    registry. `alias`, se informado, passa a apontar para a nova versão.
+
+    Returns:
+        Número da versão criada
+    """
+    import time
+    import uuid
+
+    import yaml
+
+    experimento = next(
+        (d for d in MLRUNS_BASE.iterdir() if d.is_dir() and d.name.isdigit() and (d / run_id_origem).is_dir()), None
+    )
+    if experimento is None:
+        raise FileNotFoundError(f"Run de origem {run_id_origem} não encontrado em {MLRUNS_BASE}")
+
+    registro = MLRUNS_BASE / "models" / model_name
+    versoes = [int(v.name.split("-", 1)[1]) for v in registro.glob("version-*") if v.name.split("-", 1)[1].isdigit()]
+    version = max(versoes, default=0) + 1
+    agora = int(time.time() * 1000)
+    model_id = f"m-{uuid.uuid4().hex}"
+
+    # Run
+    run_id = _gravar_run(experimento, run_name, params, metricas, {"run_origem": run_id_origem, **tags}, agora)
+    (experimento / run_id / "outputs" / model_id).mkdir(parents=True, exist_ok=True)
+
+    # Modelo logado
+    pasta_modelo = experimento / "models" / model_id
+    artefatos = pasta_modelo / "artifacts"
+    artefatos.mkdir(parents=True, exist_ok=True)
+    with open(artefatos / "model.pkl", "wb") as f:
+        pickle.dump(modelo, f)
+    _gravar_yaml(artefatos / "MLmodel", {
+        "artifact_path": artefatos.as_uri(), "model_id": model_id, "model_uuid": model_id, "run_id": run_id,
+        "flavors": {"lightgbm": {"data": "model.pkl", "model_class": f"{type(modelo).__module__}.{type(modelo).__name__}"}},
+    })
+    _gravar_yaml(pasta_modelo / "meta.yaml", {
+        "artifact_location": artefatos.as_uri(), "creation_timestamp": agora, "experiment_id": experimento.name,
+        "last_updated_timestamp": agora, "model_id": model_id, "model_type": None, "name": run_name,
+        "source_run_id": run_id, "status": 2, "status_message": None,
+    })
+    _gravar_valores(pasta_modelo / "params", params, agora)
+    _gravar_valores(pasta_modelo / "metrics", metricas, agora, metrica=True)
+
+    # Versão no registry
+    _gravar_yaml(registro / f"version-{version}" / "meta.yaml", {
+        "aliases": [], "creation_timestamp": agora, "current_stage": "None", "deployment_job_state": None,
+        "description": tags.get("descricao"), "last_updated_timestamp": agora, "metrics": None,
+        "model_id": model_id, "name": model_name, "params": None, "run_id": run_id, "run_link": None,
+        "source": f"models:/{model_id}", "status": "READY", "status_message": None,
+        "storage_location": artefatos.as_uri(), "user_id": None, "version": version,
+    })
+
+    if alias:
+        (registro / "aliases").mkdir(exist_ok=True)
+        (registro / "aliases" / alias).write_text(str(version))
+        meta_registro = registro / "meta.yaml"
+        if meta_registro.exists():
+            with open(meta_registro) as f:
+                meta = yaml.safe_load(f) or {}
+            meta["aliases"] = {**(meta.get("aliases") or {}), alias: str(version)}
+            meta["last_updated_timestamp"] = agora
+            _gravar_yaml(meta_registro, meta)
+
+    logger.info(f"{model_name} v{version} registrado (run {run_id}, modelo {model_id})" + (f", alias {alias}" if alias else ""))
+    return version
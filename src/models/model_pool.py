@@ -0,0 +1,183 @@
+"""
+Pool de modelos residentes para servir várias versões do registry.
+
+- Modelos ficam em memória até o orçamento (bytes) ser excedido; então os
+  menos usados recentemente (LRU) são descarregados
+- Cargas concorrentes da mesma versão são deduplicadas: apenas a primeira
+  thread carrega, as demais aguardam o mesmo resultado
+- Cada carga registra tempo e memória (delta de RSS do processo; quando o
+  alocador reaproveita memória liberada e o delta é nulo, usa o tamanho
+  serializado do modelo como estimativa)
+"""
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.models.loader_model import resolve_model_version
+
+logger = logging.getLogger(__name__)
+
+Chave = Tuple[str, int]
+
+_MB = 1024 * 1024
+
+
+def _rss_bytes() -> int:
+    """RSS atual do processo (Linux); 0 quando indisponível"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _tamanho_serializado(modelo: Any) -> int:
+    alvo = getattr(modelo, "_modelo", modelo)
+    try:
+        return len(pickle.dumps(alvo, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+class _Entrada:
+    """Modelo residente e suas métricas de carga/uso"""
+
+    def __init__(self, modelo: Any, memoria_bytes: int, tempo_carga_s: float):
+        self.modelo = modelo
+        self.memoria_bytes = memoria_bytes
+        self.tempo_carga_s = tempo_carga_s
+        self.carregado_em = self.ultimo_uso = time.time()
+        self.usos = 1
+
+
+class _CargaEmAndamento:
+    """Ponto de encontro das threads que pediram a mesma versão durante a carga"""
+
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.modelo: Any = None
+        self.erro: Optional[BaseException] = None
+
+
+class PoolModelos:
+    """
+    Args:
+        orcamento_bytes: Memória máxima somada dos modelos residentes
+        carregar: Função (model_name, version) -> modelo; padrão ModelProducao
+    """
+
+    def __init__(self, orcamento_bytes: int, carregar: Optional[Callable[[str, int], Any]] = None):
+        self.orcamento_bytes = orcamento_bytes
+        self._carregar = carregar or self._carregar_model_producao
+        self._residentes: "OrderedDict[Chave, _Entrada]" = OrderedDict()
+        self._carregando: Dict[Chave, _CargaEmAndamento] = {}
+        self._lock = threading.Lock()
+        # Cargas serializadas: o delta de RSS só é atribuível com uma carga por vez
+        self._lock_carga = threading.Lock()
+        self.despejos = 0
+
+    @staticmethod
+    def _carregar_model_producao(model_name: str, version: int):
+        from src.models.predictor import ModelProducao
+        return ModelProducao(model_name, version=version)
+
+    def resolver(self, model_name: str, version: Optional[int] = None, alias: Optional[str] = None) -> Chave:
+        """Chave (nome, versão); sem versão, lê o alias (padrão: Production)"""
+        return model_name, resolve_model_version(model_name, version, alias or "Production")
+
+    def obter(self, model_name: str, version: Optional[int] = None, alias: Optional[str] = None):
+        """Retorna o modelo residente ou o carrega (uma única carga por versão)"""
+        chave = self.resolver(model_name, version, alias)
+
+        with self._lock:
+            entrada = self._residentes.get(chave)
+            if entrada is not None:
+                self._residentes.move_to_end(chave)
+                entrada.ultimo_uso = time.time()
+                entrada.usos += 1
+                return entrada.modelo
+
+            carga = self._carregando.get(chave)
+            dono = carga is None
+            if dono:
+                carga = self._carregando[chave] = _CargaEmAndamento()
+
+        if not dono:
+            carga.pronto.wait()
+            if carga.erro is not None:
+                raise carga.erro
+            return carga.modelo
+
+        try:
+            carga.modelo = self._carregar_e_registrar(chave)
+            return carga.modelo
+        except BaseException as e:
+            carga.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._carregando[chave]
+            carga.pronto.set()
+
+    def _carregar_e_registrar(self, chave: Chave):
+        with self._lock_carga:
+            rss_antes = _rss_bytes()
+            inicio = time.perf_counter()
+            modelo = self._carregar(*chave)
+            tempo = time.perf_counter() - inicio
+            memoria = _rss_bytes() - rss_antes
+
+        if memoria <= 0:
+            memoria = _tamanho_serializado(modelo)
+
+        logger.info(f"Modelo {chave[0]} v{chave[1]} carregado em {tempo:.2f}s ({memoria / _MB:.1f} MB)")
+
+        with self._lock:
+            self._residentes[chave] = _Entrada(modelo, memoria, tempo)
+            self._despejar(manter=chave)
+        return modelo
+
+    def _despejar(self, manter: Chave) -> None:
+        """Remove LRU até caber no orçamento; o modelo recém-carregado nunca sai"""
+        while self.memoria_bytes > self.orcamento_bytes:
+            chave = next((c for c in self._residentes if c != manter), None)
+            if chave is None:
+                break
+            entrada = self._residentes.pop(chave)
+            self.despejos += 1
+            logger.info(f"Modelo {chave[0]} v{chave[1]} descarregado (LRU, {entrada.memoria_bytes / _MB:.1f} MB)")
+
+    def descarregar(self, model_name: str, version: int) -> bool:
+        with self._lock:
+            return self._residentes.pop((model_name, int(version)), None) is not None
+
+    @property
+    def memoria_bytes(self) -> int:
+        return sum(e.memoria_bytes for e in self._residentes.values())
+
+    def estado(self) -> Dict[str, Any]:
+        """Modelos residentes (do mais antigo ao mais recente no LRU) com tempo de carga e memória"""
+        with self._lock:
+            residentes: List[Dict[str, Any]] = [
+                {
+                    "model_name": nome,
+                    "version": versao,
+                    "memoria_mb": round(e.memoria_bytes / _MB, 2),
+                    "tempo_carga_s": round(e.tempo_carga_s, 3),
+                    "carregado_em": e.carregado_em,
+                    "ultimo_uso": e.ultimo_uso,
+                    "usos": e.usos,
+                }
+                for (nome, versao), e in self._residentes.items()
+            ]
+            return {
+                "orcamento_mb": round(self.orcamento_bytes / _MB, 2),
+                "memoria_mb": round(self.memoria_bytes / _MB, 2),
+                "despejos": self.despejos,
+                "carregando": [f"{n} v{v}" for n, v in self._carregando],
+                "residentes": residentes,
+            }
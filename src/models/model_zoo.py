@@ -0,0 +1,410 @@
+"""Benchmark paralelo das famílias de modelos do notebook 4 com folds de CV compartilhados.
+
+O laço `avalia_modelo` do notebook 4-Modelagem treina RandomForest, XGBoost,
+LightGBM, KNN, LogisticRegression e MLP um após o outro, cada um com seu
+`cross_val_score` de 6 folds sobre os mesmos dados. Aqui:
+
+- Os folds estratificados (mesmo StratifiedKFold do notebook) e os dados já
+  transformados, com as features selecionadas, são gravados uma única vez em
+  .npy (data/cv_folds/<chave>/). A chave muda quando os datasets processados,
+  as colunas, o número de folds ou a seed mudam
+- Cada (modelo, fold) e o treino final (X_train -> X_test) é uma tarefa de um
+  pool de processos. Os workers abrem os .npy com memory map: os dados não são
+  copiados para cada processo nem serializados por tarefa
+- Cada família tem um orçamento de threads (n_jobs do estimador e BLAS via
+  threadpoolctl). Com P processos o uso de CPU fica em até P x maior orçamento
+- Os resultados vão para o MLflow como no notebook (um run por modelo no
+  experimento Classification_default_experiment). Sem mlflow instalado, o run
+  é gravado no mesmo layout por loader_model.registrar_run
+- A tabela final traz PR-AUC e KS (CV e teste) com os tempos de fit e predict
+
+Run with:
+    python -m src.models.model_zoo                                      # todos os candidatos, registra os runs
+    python -m src.models.model_zoo --modelos LightGBM RandomForest --processos 4 --threads RandomForest=2
+    python -m src.models.model_zoo --sem-registro --saida data/interim/model_zoo.csv
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils.paths import data_path, experiments_path, resolve_processed_path
+
+logger = logging.getLogger(__name__)
+
+N_FOLDS = 6
+SEED = 42
+THRESHOLD_METRICAS = 0.5  # model.predict() do notebook
+EXPERIMENTO_PADRAO = "Classification_default_experiment"
+FOLD_TESTE = -1  # tarefa de treino em todo o X_train e avaliação no X_test
+
+
+def _random_forest():
+    from sklearn.ensemble import RandomForestClassifier
+    return RandomForestClassifier(n_estimators=300, max_depth=None, min_samples_split=2, min_samples_leaf=1,
+                                  max_features="sqrt", random_state=SEED, n_jobs=1)
+
+
+def _xgboost():
+    from xgboost import XGBClassifier
+    return XGBClassifier(n_estimators=300, max_depth=8, learning_rate=0.1, subsample=1.0, colsample_bytree=1.0,
+                         eval_metric="auc", random_state=SEED, n_jobs=1)
+
+
+def _lightgbm():
+    from lightgbm import LGBMClassifier
+    return LGBMClassifier(n_estimators=300, max_depth=8, learning_rate=0.1, subsample=1.0, colsample_bytree=1.0,
+                          random_state=SEED, n_jobs=1, verbose=-1)
+
+
+def _knn():
+    from sklearn.neighbors import KNeighborsClassifier
+    return KNeighborsClassifier(n_neighbors=5, weights="uniform", metric="minkowski", n_jobs=1)
+
+
+def _logistic_regression():
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(penalty="l2", C=1.0, solver="liblinear", max_iter=200, random_state=SEED)
+
+
+def _mlp():
+    from sklearn.neural_network import MLPClassifier
+    return MLPClassifier(hidden_layer_sizes=(30,), activation="relu", solver="adam", learning_rate_init=0.01,
+                         max_iter=200, early_stopping=True, n_iter_no_change=10, random_state=SEED, verbose=False)
+
+
+# Candidatos do notebook, do mais caro para o mais barato: as tarefas longas
+# entram primeiro no pool e as curtas preenchem o final
+CANDIDATOS: Dict[str, Callable[[], Any]] = {
+    "RandomForest": _random_forest,
+    "XGBoost": _xgboost,
+    "MLP": _mlp,
+    "LightGBM": _lightgbm,
+    "KNN": _knn,
+    "LogisticRegression": _logistic_regression,
+}
+
+# Threads por tarefa de cada família (sobrescrevível por --threads Nome=N)
+THREADS_PADRAO = {nome: 1 for nome in CANDIDATOS}
+
+
+def candidatos_disponiveis(nomes: Optional[Sequence[str]] = None) -> List[str]:
+    """Candidatos pedidos (padrão: todos) cujas bibliotecas estão instaladas"""
+    disponiveis = []
+    for nome in nomes or CANDIDATOS:
+        if nome not in CANDIDATOS:
+            raise ValueError(f"Modelo '{nome}' desconhecido. Opções: {list(CANDIDATOS)}")
+        try:
+            CANDIDATOS[nome]()
+        except ImportError as e:
+            logger.warning(f"{nome} ignorado: {e}")
+            continue
+        disponiveis.append(nome)
+    return disponiveis
+
+
+def metricas_classificacao(y: np.ndarray, prob: np.ndarray, threshold: float = THRESHOLD_METRICAS) -> Dict[str, float]:
+    """Métricas do avalia_modelo do notebook mais o KS"""
+    from sklearn.metrics import (accuracy_score, average_precision_score, confusion_matrix, f1_score,
+                                 precision_score, recall_score, roc_auc_score, roc_curve)
+
+    pred = (prob >= threshold).astype(int)
+    tn, fp, _, _ = confusion_matrix(y, pred, labels=[0, 1]).ravel()
+    fpr, tpr, _ = roc_curve(y, prob)
+    return {
+        "accuracy": float(accuracy_score(y, pred)),
+        "precision": float(precision_score(y, pred, zero_division=0)),
+        "recall": float(recall_score(y, pred)),
+        "f1": float(f1_score(y, pred)),
+        "roc_auc": float(roc_auc_score(y, prob)),
+        "pr_auc": float(average_precision_score(y, prob)),
+        "specificity": float(tn / (tn + fp)) if tn + fp else float("nan"),
+        "ks": float(np.max(tpr - fpr)),
+    }
+
+
+class FoldsCV:
+    """
+    Dados de treino/teste e folds estratificados materializados em .npy.
+    `particao(fold)` devolve os arrays do fold a partir dos memory maps.
+    """
+
+    ARQUIVOS = ("X_train", "y_train", "X_test", "y_test", "folds")
+
+    def __init__(self, diretorio: Path):
+        self.diretorio = Path(diretorio)
+        with open(self.diretorio / "meta.json") as f:
+            self.meta = json.load(f)
+        self.colunas: List[str] = self.meta["colunas"]
+        self.n_folds: int = self.meta["n_folds"]
+        self._arrays = {nome: np.load(self.diretorio / f"{nome}.npy", mmap_mode="r") for nome in self.ARQUIVOS}
+
+    @classmethod
+    def materializar(
+        cls,
+        colunas: Optional[Sequence[str]] = None,
+        n_folds: int = N_FOLDS,
+        seed: int = SEED,
+        raiz: Optional[Path] = None,
+    ) -> "FoldsCV":
+        """
+        Reaproveita os folds em cache ou os cria. `colunas` padrão: features
+        selecionadas da FeatureStore (X_train_selecionado do notebook).
+        """
+        from sklearn.model_selection import StratifiedKFold
+
+        from src.data.datasets import carregar_dataset
+
+        if colunas is None:
+            from src.features.feature_store import FeatureStore
+            colunas = FeatureStore.load().selected_features
+        colunas = list(colunas)
+
+        origens = []
+        for nome in ("X_train", "y_train", "X_test", "y_test"):
+            caminho = resolve_processed_path(nome)
+            st = caminho.stat()
+            origens.append([caminho.name, st.st_size, st.st_mtime_ns])
+        descricao = {"origens": origens, "colunas": colunas, "n_folds": n_folds, "seed": seed}
+        chave = hashlib.sha1(json.dumps(descricao).encode()).hexdigest()[:16]
+        raiz = Path(raiz) if raiz else data_path("", "cv_folds")
+        destino = raiz / chave
+        if (destino / "meta.json").exists():
+            logger.info(f"Folds em cache: {destino}")
+            return cls(destino)
+
+        X = carregar_dataset("X_train", colunas=colunas)
+        y = np.asarray(carregar_dataset("y_train")).ravel().astype(np.int8)
+        X_teste = carregar_dataset("X_test", colunas=colunas)
+        y_teste = np.asarray(carregar_dataset("y_test")).ravel().astype(np.int8)
+
+        folds = np.empty(len(y), dtype=np.int8)
+        for i, (_, indices_validacao) in enumerate(StratifiedKFold(n_folds, shuffle=True, random_state=seed).split(X, y)):
+            folds[indices_validacao] = i
+
+        # Escrita em pasta temporária e rename: workers nunca veem um cache pela metade
+        temporario = raiz / f".{chave}.{os.getpid()}"
+        temporario.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "X_train": np.ascontiguousarray(X.to_numpy(dtype=np.float64)), "y_train": y,
+            "X_test": np.ascontiguousarray(X_teste.to_numpy(dtype=np.float64)), "y_test": y_teste, "folds": folds,
+        }
+        for nome, array in arrays.items():
+            np.save(temporario / f"{nome}.npy", array)
+        with open(temporario / "meta.json", "w") as f:
+            json.dump({**descricao, "chave": chave, "linhas_treino": len(y), "linhas_teste": len(y_teste)}, f, indent=2)
+        try:
+            temporario.rename(destino)
+        except OSError:
+            # Outro processo materializou a mesma chave antes
+            shutil.rmtree(temporario, ignore_errors=True)
+        logger.info(f"Folds materializados em {destino}")
+        return cls(destino)
+
+    def particao(self, fold: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(X_treino, y_treino, X_avaliacao, y_avaliacao) do fold; FOLD_TESTE = X_train inteiro e X_test"""
+        X, y = self._arrays["X_train"], self._arrays["y_train"]
+        if fold == FOLD_TESTE:
+            return X, y, self._arrays["X_test"], self._arrays["y_test"]
+        no_fold = self._arrays["folds"] == fold
+        return X[~no_fold], y[~no_fold], X[no_fold], y[no_fold]
+
+
+# Folds abertos uma vez por processo do pool (initializer)
+_folds_processo: Optional[FoldsCV] = None
+
+
+def _inicializar_worker(diretorio: str) -> None:
+    global _folds_processo
+    _folds_processo = FoldsCV(Path(diretorio))
+
+
+def avaliar_tarefa(nome: str, fold: int, threads: int = 1, com_modelo: bool = False,
+                   folds: Optional[FoldsCV] = None) -> Dict[str, Any]:
+    """Treina `nome` no fold e mede fit/predict; com_modelo devolve o estimador treinado"""
+    from threadpoolctl import threadpool_limits
+
+    folds = folds or _folds_processo
+    X_treino, y_treino, X_avaliacao, y_avaliacao = folds.particao(fold)
+
+    modelo = CANDIDATOS[nome]()
+    if "n_jobs" in modelo.get_params():
+        modelo.set_params(n_jobs=threads)
+    with threadpool_limits(limits=threads):
+        inicio = time.perf_counter()
+        modelo.fit(X_treino, y_treino)
+        fit_s = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        prob = modelo.predict_proba(X_avaliacao)[:, 1]
+        predict_s = time.perf_counter() - inicio
+
+    resultado = {
+        "modelo": nome, "fold": fold, "threads": threads, "pid": os.getpid(),
+        "fit_s": fit_s, "predict_s": predict_s, "linhas_predict": len(prob),
+        **metricas_classificacao(np.asarray(y_avaliacao), prob),
+    }
+    if com_modelo:
+        resultado["estimador"] = modelo
+    return resultado
+
+
+def executar(
+    folds: FoldsCV,
+    modelos: Sequence[str],
+    processos: int = 1,
+    threads: Optional[Dict[str, int]] = None,
+    com_modelo: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Todas as tarefas (n_folds por modelo mais o treino final). processos=1 roda
+    no processo atual, na mesma ordem do notebook.
+    """
+    threads = {**THREADS_PADRAO, **(threads or {})}
+    tarefas = [(nome, fold) for nome in modelos for fold in [*range(folds.n_folds), FOLD_TESTE]]
+
+    if processos <= 1:
+        return [avaliar_tarefa(nome, fold, threads[nome], com_modelo and fold == FOLD_TESTE, folds)
+                for nome, fold in tarefas]
+
+    resultados = []
+    with ProcessPoolExecutor(processos, initializer=_inicializar_worker, initargs=(str(folds.diretorio),)) as executor:
+        futuros = {
+            executor.submit(avaliar_tarefa, nome, fold, threads[nome], com_modelo and fold == FOLD_TESTE): (nome, fold)
+            for nome, fold in tarefas
+        }
+        for futuro in as_completed(futuros):
+            resultados.append(futuro.result())
+            logger.info(f"{futuros[futuro][0]} fold {futuros[futuro][1]} concluído")
+    return resultados
+
+
+def tabela_comparativa(resultados: Sequence[Dict[str, Any]]) -> pd.DataFrame:
+    """Uma linha por modelo: PR-AUC/KS na CV (média, desvio) e no teste, tempos de fit e predict"""
+    df = pd.DataFrame([{k: v for k, v in r.items() if k != "estimador"} for r in resultados])
+    cv, teste = df[df["fold"] != FOLD_TESTE], df[df["fold"] == FOLD_TESTE].set_index("modelo")
+    tabela = cv.groupby("modelo").agg(
+        cv_pr_auc=("pr_auc", "mean"), cv_pr_auc_std=("pr_auc", "std"), cv_ks=("ks", "mean"),
+        cv_roc_auc=("roc_auc", "mean"), fit_s_fold=("fit_s", "mean"),
+    )
+    tabela["pr_auc_teste"] = teste["pr_auc"]
+    tabela["ks_teste"] = teste["ks"]
+    tabela["roc_auc_teste"] = teste["roc_auc"]
+    tabela["fit_s"] = teste["fit_s"]
+    tabela["predict_ms_por_mil"] = teste["predict_s"] / teste["linhas_predict"] * 1e6
+    tabela["threads"] = teste["threads"]
+    return tabela.sort_values("cv_pr_auc", ascending=False)
+
+
+def registrar_resultados(
+    resultados: Sequence[Dict[str, Any]],
+    experimento: str = EXPERIMENTO_PADRAO,
+) -> Dict[str, str]:
+    """
+    Um run por modelo, como o laço do notebook: métricas de CV e de teste,
+    tempos e parâmetros do estimador (e o modelo, se o mlflow estiver
+    instalado). Retorna {modelo: run_id}.
+    """
+    tabela = tabela_comparativa(resultados)
+    finais = {r["modelo"]: r for r in resultados if r["fold"] == FOLD_TESTE}
+    # Mesmo file store com e sem mlflow
+    mlruns = experiments_path("mlruns").resolve()
+
+    try:
+        import mlflow
+        import mlflow.sklearn
+        mlflow.set_tracking_uri(mlruns.as_uri())
+        mlflow.set_experiment(experimento)
+    except ImportError:
+        mlflow = None
+        logger.warning("mlflow não instalado: runs gravados no file store por loader_model.registrar_run")
+
+    run_ids = {}
+    for nome, linha in tabela.iterrows():
+        final = finais[nome]
+        params = {k: v for k, v in CANDIDATOS[nome]().get_params().items() if isinstance(v, (int, float, str, bool))}
+        n_folds = sum(1 for r in resultados if r["modelo"] == nome and r["fold"] != FOLD_TESTE)
+        params.update({"n_jobs": final["threads"], "cv_n_folds": n_folds})
+        metricas = {
+            "cv_pr_auc_mean": linha["cv_pr_auc"], "cv_pr_auc_std": linha["cv_pr_auc_std"],
+            "cv_ks_mean": linha["cv_ks"], "cv_roc_auc_mean": linha["cv_roc_auc"],
+            "fit_s": linha["fit_s"], "cv_fit_s_mean": linha["fit_s_fold"],
+            "predict_ms_por_mil": linha["predict_ms_por_mil"],
+            **{m: final[m] for m in ("accuracy", "precision", "recall", "f1", "roc_auc", "pr_auc", "specificity", "ks")},
+        }
+        tags = {"origem": "src.models.model_zoo"}
+
+        if mlflow is not None:
+            with mlflow.start_run(run_name=nome) as run:
+                mlflow.log_params(params)
+                mlflow.log_metrics(metricas)
+                mlflow.set_tags(tags)
+                if "estimador" in final:
+                    mlflow.sklearn.log_model(final["estimador"], name="model")
+                run_ids[nome] = run.info.run_id
+        else:
+            from src.models.loader_model import registrar_run
+            run_ids[nome] = registrar_run(experimento, nome, params, metricas, tags, base=mlruns)
+    return run_ids
+
+
+def _threads_por_modelo(valores: Sequence[str]) -> Dict[str, int]:
+    threads = {}
+    for valor in valores:
+        nome, _, n = valor.partition("=")
+        if nome not in CANDIDATOS or not n.isdigit() or int(n) < 1:
+            raise argparse.ArgumentTypeError(f"--threads espera Nome=N com Nome em {list(CANDIDATOS)}: '{valor}'")
+        threads[nome] = int(n)
+    return threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modelos", nargs="+", default=None, help=f"Subconjunto de {list(CANDIDATOS)}")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", nargs="+", default=[], help="Orçamento por família: Nome=N (padrão 1)")
+    parser.add_argument("--folds", type=int, default=N_FOLDS)
+    parser.add_argument("--experimento", default=EXPERIMENTO_PADRAO)
+    parser.add_argument("--sem-registro", action="store_true", help="Não registra os runs no MLflow")
+    parser.add_argument("--saida", type=Path, default=None, help="Grava a tabela comparativa em CSV")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    modelos = candidatos_disponiveis(args.modelos)
+    threads = _threads_por_modelo(args.threads)
+
+    inicio = time.perf_counter()
+    folds = FoldsCV.materializar(n_folds=args.folds)
+    preparo_s = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultados = executar(folds, modelos, args.processos, threads, com_modelo=not args.sem_registro)
+    total_s = time.perf_counter() - inicio
+
+    tabela = tabela_comparativa(resultados)
+    soma_tarefas = sum(r["fit_s"] + r["predict_s"] for r in resultados)
+    pd.set_option("display.width", 200)
+    print(tabela.round(4).to_string())
+    print(f"\nFolds: {folds.diretorio} ({preparo_s:.2f}s) | {len(resultados)} tarefas em {args.processos} processo(s): "
+          f"{total_s:.1f}s de parede, {soma_tarefas:.1f}s somando fit+predict")
+
+    if args.saida:
+        args.saida.parent.mkdir(parents=True, exist_ok=True)
+        tabela.to_csv(args.saida)
+        print(f"Tabela gravada em {args.saida}")
+    if not args.sem_registro:
+        for nome, run_id in registrar_resultados(resultados, args.experimento).items():
+            print(f"{nome}: run {run_id}")
+
+
+if __name__ == "__main__":
+    main()
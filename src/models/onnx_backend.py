@@ -0,0 +1,258 @@
+"""Backend ONNX: preprocessor + seleção de features + LightGBM em um único grafo.
+
+A exportação converte o `preprocessor.pkl` (skl2onnx), a seleção de colunas
+(Gather) e o LGBMClassifier (onnxmltools) e os concatena em um grafo cujas
+entradas são as colunas brutas de COLUNAS_ENTRADA. O grafo devolve as
+probabilidades e também as features selecionadas, usadas pelo monitor de drift.
+
+Run with:
+    python -m src.models.onnx_backend                  # exporta, verifica paridade e compara latência
+    python -m src.models.onnx_backend --sem-benchmark
+"""
+import argparse
+import copy
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.features.feature_store import COLUNAS_ENTRADA, FeatureStore
+from src.utils.paths import data_path
+
+logger = logging.getLogger(__name__)
+
+# ai.onnx.ml 3 é a versão do TreeEnsembleClassifier gerado pelo onnxmltools
+OPSET_ALVO = {"": 17, "ai.onnx.ml": 3}
+
+SAIDA_FEATURES = "features_selecionadas"
+SAIDA_PROBABILIDADES = "clf_probabilities"
+
+# Tolerância de paridade: o grafo ONNX calcula em float32
+TOLERANCIA_PARIDADE = 1e-5
+
+
+def caminho_onnx(model_name: str, version: int) -> Path:
+    """Arquivo do grafo exportado para uma versão do modelo"""
+    return data_path(f"{model_name}_v{version}.onnx", "onnx")
+
+
+def _unificar_opsets(*modelos) -> None:
+    """
+    merge_models exige a mesma versão de opset por domínio: usa a maior entre os grafos.
+    O IR fica no menor (o de helper.make_model pode ser mais novo que o onnxruntime suporta).
+    """
+    from onnx import helper
+
+    maximo: Dict[str, int] = {}
+    for modelo in modelos:
+        for opset in modelo.opset_import:
+            maximo[opset.domain] = max(maximo.get(opset.domain, 0), opset.version)
+    ir_version = min(modelo.ir_version for modelo in modelos)
+    for modelo in modelos:
+        del modelo.opset_import[:]
+        modelo.opset_import.extend(helper.make_opsetid(d, v) for d, v in maximo.items())
+        modelo.ir_version = ir_version
+
+
+def _grafo_selecao(n_entrada: int, indices: np.ndarray):
+    """Grafo mínimo que projeta as colunas selecionadas (equivale a select_features)"""
+    from onnx import TensorProto, helper, numpy_helper
+
+    grafo = helper.make_graph(
+        [helper.make_node("Gather", ["sel_entrada", "sel_indices"], [SAIDA_FEATURES], axis=1)],
+        "selecao_features",
+        [helper.make_tensor_value_info("sel_entrada", TensorProto.FLOAT, [None, n_entrada])],
+        [helper.make_tensor_value_info(SAIDA_FEATURES, TensorProto.FLOAT, [None, len(indices)])],
+        [numpy_helper.from_array(indices.astype(np.int64), "sel_indices")],
+    )
+    return helper.make_model(grafo, opset_imports=[helper.make_opsetid("", OPSET_ALVO[""])])
+
+
+def exportar_onnx(feature_store: FeatureStore, modelo, caminho: Path) -> Path:
+    """
+    Converte preprocessor, seleção e classificador em um único arquivo ONNX.
+
+    Args:
+        feature_store: FeatureStore carregada (preprocessor + selected_features)
+        modelo: ModelProducao (backend LightGBM) da versão a exportar
+        caminho: Destino do .onnx
+    """
+    try:
+        import onnx
+        from lightgbm import LGBMClassifier
+        from onnx import compose
+        from onnxmltools.convert.lightgbm.operator_converters.LightGbm import convert_lightgbm
+        from skl2onnx import convert_sklearn, update_registered_converter
+        from skl2onnx.common.data_types import FloatTensorType, StringTensorType
+        from skl2onnx.common.shape_calculator import calculate_linear_classifier_output_shapes
+    except ImportError as e:
+        raise ImportError(f"Exportação ONNX requer skl2onnx e onnxmltools (pip install .[train]): {e}")
+
+    update_registered_converter(
+        LGBMClassifier, "LightGbmLGBMClassifier", calculate_linear_classifier_output_shapes,
+        convert_lightgbm, options={"nocl": [True, False], "zipmap": [True, False, "columns"]},
+    )
+
+    # O conversor do SimpleImputer só aceita strings como valor ausente:
+    # em uma cópia, NaN categórico passa a ser "" (ver BackendOnnx.entradas)
+    preprocessor = copy.deepcopy(feature_store.preprocessor)
+    for nome, transformador, _ in preprocessor.transformers_:
+        if nome == "cat":
+            transformador.named_steps["imputer"].missing_values = ""
+
+    colunas_num = dict((n, c) for n, _, c in preprocessor.transformers_)["num"]
+    tipos_entrada = [
+        (c, FloatTensorType([None, 1]) if c in colunas_num else StringTensorType([None, 1]))
+        for c in COLUNAS_ENTRADA
+    ]
+    grafo_pre = convert_sklearn(preprocessor, initial_types=tipos_entrada, target_opset=OPSET_ALVO)
+
+    nomes_transformados = list(feature_store.preprocessor.get_feature_names_out())
+    selecionadas = list(feature_store.select_features(pd.DataFrame(columns=nomes_transformados)).columns)
+    indices = np.array([nomes_transformados.index(c) for c in selecionadas])
+    grafo_sel = _grafo_selecao(len(nomes_transformados), indices)
+
+    classificador = modelo._modelo
+    grafo_clf = convert_sklearn(
+        classificador,
+        initial_types=[("features", FloatTensorType([None, len(selecionadas)]))],
+        options={id(classificador): {"zipmap": False}},
+        target_opset=OPSET_ALVO,
+    )
+    grafo_clf = compose.add_prefix(grafo_clf, "clf_")
+
+    _unificar_opsets(grafo_pre, grafo_sel, grafo_clf)
+    grafo = compose.merge_models(grafo_pre, grafo_sel, io_map=[(grafo_pre.graph.output[0].name, "sel_entrada")])
+    grafo = compose.merge_models(
+        grafo, grafo_clf,
+        io_map=[(SAIDA_FEATURES, "clf_features")],
+        outputs=[SAIDA_FEATURES, SAIDA_PROBABILIDADES],
+    )
+    onnx.helper.set_model_props(grafo, {
+        "model_name": modelo.model_name,
+        "model_version": str(modelo.version),
+        "features": ",".join(selecionadas),
+    })
+    onnx.checker.check_model(grafo)
+
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    onnx.save(grafo, str(caminho))
+    logger.info(f"Grafo ONNX exportado em {caminho} ({caminho.stat().st_size / 1024:.0f} KB)")
+    return caminho
+
+
+class BackendOnnx:
+    """
+    Executa o grafo exportado com onnxruntime (CPU).
+
+    Uma chamada substitui FeatureStore.transform + LGBMClassifier.predict_proba.
+    Categorias fora do vocabulário do encoder não são rejeitadas pelo grafo:
+    valide antes com FeatureStore.mascara_categorias_validas.
+    """
+
+    def __init__(self, caminho: Path, num_threads: Optional[int] = None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(f"Backend ONNX requer onnxruntime (pip install .[onnx]): {e}")
+
+        opcoes = ort.SessionOptions()
+        if num_threads is not None:
+            opcoes.intra_op_num_threads = num_threads
+            opcoes.inter_op_num_threads = 1
+        self.caminho = Path(caminho)
+        self._sessao = ort.InferenceSession(str(self.caminho), opcoes, providers=["CPUExecutionProvider"])
+
+        tipos = {e.name: e.type for e in self._sessao.get_inputs()}
+        self._colunas_num = [c for c in COLUNAS_ENTRADA if tipos[c] == "tensor(float)"]
+        self._colunas_cat = [c for c in COLUNAS_ENTRADA if tipos[c] == "tensor(string)"]
+        self.metadados = self._sessao.get_modelmeta().custom_metadata_map
+        self.feature_names = self.metadados["features"].split(",")
+
+    def entradas(self, df_raw: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Uma matriz (n, 1) por coluna bruta; NaN categórico vira "" (valor ausente do grafo)"""
+        # Uma conversão por grupo de colunas; as fatias (n, 1) são views sem cópia
+        numericas = df_raw[self._colunas_num].to_numpy(np.float32)
+        categoricas = df_raw[self._colunas_cat].to_numpy(object)
+        categoricas[pd.isna(categoricas)] = ""
+        categoricas = categoricas.astype(str)
+
+        entradas = {c: numericas[:, i:i + 1] for i, c in enumerate(self._colunas_num)}
+        entradas.update({c: categoricas[:, i:i + 1] for i, c in enumerate(self._colunas_cat)})
+        return entradas
+
+    def executar(self, df_raw: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray]:
+        """Retorna (features selecionadas, probabilidades (n, 2)) em uma chamada ao grafo"""
+        X, proba = self._sessao.run([SAIDA_FEATURES, SAIDA_PROBABILIDADES], self.entradas(df_raw))
+        return pd.DataFrame(X, columns=self.feature_names, index=df_raw.index), proba
+
+
+def verificar_paridade(feature_store: FeatureStore, modelo, backend: BackendOnnx, df_raw: pd.DataFrame) -> float:
+    """Maior diferença absoluta de probabilidade entre o grafo ONNX e o caminho pandas → sklearn → LightGBM"""
+    referencia = modelo.predict_proba(feature_store.transform(df_raw))[:, 1]
+    _, proba = backend.executar(df_raw)
+    return float(np.abs(proba[:, 1] - referencia).max())
+
+
+def _medir(funcao, repeticoes: int) -> float:
+    funcao()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def comparar_latencia(feature_store: FeatureStore, modelo, backend: BackendOnnx, df_raw: pd.DataFrame) -> pd.DataFrame:
+    """Latência por chamada e vazão dos dois backends nos lotes de 1 e 10 mil linhas"""
+    linhas = []
+    for tamanho, repeticoes in ((1, 200), (10_000, 5)):
+        lote = df_raw.sample(tamanho, replace=tamanho > len(df_raw), random_state=0)
+        for nome, funcao in (
+            ("lightgbm", lambda: modelo.predict_proba(feature_store.transform(lote))),
+            ("onnx", lambda: backend.executar(lote)),
+        ):
+            segundos = _medir(funcao, repeticoes)
+            linhas.append({
+                "lote": tamanho,
+                "backend": nome,
+                "latencia_ms": segundos * 1000,
+                "linhas_por_s": tamanho / segundos,
+            })
+    return pd.DataFrame(linhas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modelo", default="lgb_prob_default")
+    parser.add_argument("--versao", type=int, default=None, help="Padrão: alias Production")
+    parser.add_argument("--saida", type=Path, default=None, help="Padrão: data/onnx/<modelo>_v<versao>.onnx")
+    parser.add_argument("--sem-benchmark", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    from src.data.datasets import carregar_teste_bruto
+    from src.models.predictor import ModelProducao
+
+    feature_store = FeatureStore.load()
+    modelo = ModelProducao(args.modelo, version=args.versao)
+    caminho = exportar_onnx(feature_store, modelo, args.saida or caminho_onnx(modelo.model_name, modelo.version))
+    print(f"Exportado: {caminho}")
+
+    backend = BackendOnnx(caminho)
+    teste = carregar_teste_bruto()[COLUNAS_ENTRADA]
+    diferenca = verificar_paridade(feature_store, modelo, backend, teste)
+    print(f"Paridade no X_test ({len(teste)} linhas): diferença máxima {diferenca:.2e}")
+    if diferenca > TOLERANCIA_PARIDADE:
+        raise SystemExit(f"Paridade acima da tolerância ({TOLERANCIA_PARIDADE})")
+
+    if not args.sem_benchmark:
+        print(comparar_latencia(feature_store, modelo, backend, teste).to_string(index=False, float_format="%.2f"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Agregação de risco da carteira: perda esperada e exposição por grupo.
+
+A carteira é processada em chunks pelo FeatureStore + ModelProducao e cada
+chunk é reduzido a contagens e somas por grupo (np.bincount); nenhuma saída
+por linha é mantida, então a memória não cresce com o tamanho da carteira.
+
+Run with:
+    python -m src.models.portfolio data/interim/dados_novos.csv
+    python -m src.models.portfolio data/raw/credit_risk_dataset.csv      # esquema bruto (person_age)
+    python -m src.models.portfolio carteira.parquet --chunk-size 200000 --saida resumo.json
+"""
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.features.raw_schema import derivar_colunas
+
+logger = logging.getLogger(__name__)
+
+# Faixas de nível de risco (mesmas da API e da interface)
+RISCO_BAIXO_MAX = 0.30
+RISCO_MEDIO_MAX = 0.60
+NIVEIS_RISCO = ["Baixo", "Médio", "Alto"]
+
+# Categorias agregadas; valores fora da lista caem em OUTROS
+GRUPOS_CATEGORICOS = {
+    "loan_grade": ["A", "B", "C", "D", "E", "F", "G"],
+    "loan_intent": ["DEBTCONSOLIDATION", "EDUCATION", "HOMEIMPROVEMENT", "MEDICAL", "PERSONAL", "VENTURE"],
+}
+CATEGORIA_OUTROS = "OUTROS"
+
+N_BINS_PADRAO = 20
+CHUNK_SIZE_PADRAO = 100_000
+
+
+class AgregadorCarteira:
+    """
+    Acumula, por grupo, quantidade de contratos, exposição (soma de `loan_amnt`),
+    perda esperada (soma de probabilidade × `loan_amnt`), soma das probabilidades,
+    contratos acima do threshold e histograma das probabilidades. Linhas com
+    categorias desconhecidas pelo preprocessor são contadas em `n_rejeitados`.
+    """
+
+    def __init__(self, threshold: float = 0.42, n_bins: int = N_BINS_PADRAO):
+        self.threshold = threshold
+        self.n_bins = n_bins
+        self.n_total = 0
+        self.n_rejeitados = 0
+        # grupo -> (categorias, matriz de somas [categoria, métrica], histogramas [categoria, bin])
+        self._categorias = {"nivel_risco": NIVEIS_RISCO}
+        self._categorias.update({g: c + [CATEGORIA_OUTROS] for g, c in GRUPOS_CATEGORICOS.items()})
+        self._somas = {g: np.zeros((len(c), 5)) for g, c in self._categorias.items()}
+        self._histogramas = {g: np.zeros((len(c), n_bins), dtype=np.int64) for g, c in self._categorias.items()}
+
+    def _codigos(self, grupo: str, valores) -> np.ndarray:
+        categorias = self._categorias[grupo]
+        codigos = pd.Categorical(valores, categories=categorias[:-1]).codes.astype(np.int64)
+        codigos[codigos < 0] = len(categorias) - 1
+        return codigos
+
+    def atualizar(self, prob: np.ndarray, loan_amnt: np.ndarray, categoricas: Dict[str, Any]) -> None:
+        """
+        Reduz um chunk às somas por grupo.
+
+        Args:
+            prob: Probabilidades de inadimplência do chunk
+            loan_amnt: Valores dos empréstimos (NaN conta como exposição zero)
+            categoricas: {grupo: valores} para cada grupo de GRUPOS_CATEGORICOS
+        """
+        prob = np.asarray(prob, dtype=float)
+        exposicao = np.nan_to_num(np.asarray(loan_amnt, dtype=float))
+        metricas = np.column_stack([
+            np.ones_like(prob), exposicao, prob * exposicao, prob, (prob >= self.threshold).astype(float),
+        ])
+        bins = np.minimum((prob * self.n_bins).astype(np.int64), self.n_bins - 1)
+
+        codigos = {"nivel_risco": np.searchsorted([RISCO_BAIXO_MAX, RISCO_MEDIO_MAX], prob, side="left")}
+        codigos.update({g: self._codigos(g, categoricas[g]) for g in GRUPOS_CATEGORICOS})
+
+        for grupo, cod in codigos.items():
+            n_cat = len(self._categorias[grupo])
+            for j in range(metricas.shape[1]):
+                self._somas[grupo][:, j] += np.bincount(cod, weights=metricas[:, j], minlength=n_cat)
+            self._histogramas[grupo] += np.bincount(
+                cod * self.n_bins + bins, minlength=n_cat * self.n_bins
+            ).reshape(n_cat, self.n_bins)
+
+        self.n_total += len(prob)
+
+    def resumo(self) -> Dict[str, Any]:
+        """Resumo da carteira: totais e agregados por nível de risco, loan_grade e loan_intent"""
+        def _linha(somas, histograma=None):
+            n, exposicao, perda, soma_prob, acima = somas
+            linha = {
+                "quantidade": int(n),
+                "exposicao": round(float(exposicao), 2),
+                "perda_esperada": round(float(perda), 2),
+                "probabilidade_media": round(float(soma_prob / n), 4) if n else None,
+                "taxa_perda_esperada": round(float(perda / exposicao), 4) if exposicao else None,
+                "acima_threshold": int(acima),
+            }
+            if histograma is not None:
+                linha["histograma_probabilidade"] = histograma.tolist()
+            return linha
+
+        total = self._somas["nivel_risco"].sum(axis=0)
+        return {
+            "threshold": self.threshold,
+            "rejeitados": self.n_rejeitados,
+            "bordas_histograma": np.linspace(0, 1, self.n_bins + 1).round(4).tolist(),
+            "total": _linha(total),
+            "grupos": {
+                grupo: {
+                    cat: _linha(self._somas[grupo][i], self._histogramas[grupo][i])
+                    for i, cat in enumerate(categorias)
+                    if self._somas[grupo][i, 0] > 0
+                }
+                for grupo, categorias in self._categorias.items()
+            },
+        }
+
+
+def _normalizar_ausentes(df: pd.DataFrame) -> pd.DataFrame:
+    """None (Arrow/JSON) -> NaN: o SimpleImputer do preprocessor só reconhece NaN como ausente"""
+    return df.fillna(np.nan)
+
+
+def iterar_chunks(caminho: Path, chunk_size: int = CHUNK_SIZE_PADRAO) -> Iterator[pd.DataFrame]:
+    """Lê CSV, Parquet ou Feather em chunks de até `chunk_size` linhas"""
+    caminho = Path(caminho)
+    sufixo = caminho.suffix.lower()
+
+    if sufixo == ".csv":
+        yield from pd.read_csv(caminho, chunksize=chunk_size)
+    elif sufixo == ".parquet":
+        import pyarrow.parquet as pq
+        for lote in pq.ParquetFile(caminho).iter_batches(batch_size=chunk_size):
+            yield _normalizar_ausentes(lote.to_pandas())
+    elif sufixo == ".feather":
+        import pyarrow.dataset as ds
+        for lote in ds.dataset(caminho, format="ipc").to_batches(batch_size=chunk_size):
+            yield _normalizar_ausentes(lote.to_pandas())
+    else:
+        raise ValueError(f"Formato de carteira não suportado: {caminho.suffix}. Use .csv, .parquet ou .feather")
+
+
+def dividir_registros(registros: List[Dict[str, Any]], chunk_size: int = CHUNK_SIZE_PADRAO) -> Iterator[pd.DataFrame]:
+    """Divide uma lista de registros (payload da API) em chunks de DataFrame"""
+    for inicio in range(0, len(registros), chunk_size):
+        yield _normalizar_ausentes(pd.DataFrame(registros[inicio:inicio + chunk_size]))
+
+
+def avaliar_carteira(
+    chunks: Iterable[pd.DataFrame],
+    feature_store,
+    modelo,
+    threshold: float = 0.42,
+    n_bins: int = N_BINS_PADRAO,
+) -> Dict[str, Any]:
+    """
+    Pontua a carteira chunk a chunk e retorna o resumo agregado.
+
+    Args:
+        chunks: Iterável de DataFrames com dados brutos (schema de dados_novos.csv)
+        feature_store: FeatureStore carregada
+        modelo: ModelProducao (ou objeto com predict_proba)
+        threshold: Threshold de decisão para a contagem de contratos acima dele
+        n_bins: Número de bins dos histogramas de probabilidade
+    """
+    agregador = AgregadorCarteira(threshold=threshold, n_bins=n_bins)
+
+    for i, chunk in enumerate(chunks):
+        # Esquema bruto: deriva faixa_etaria/loan_percent_income (a exposição usa o loan_amnt original)
+        chunk = derivar_colunas(chunk)
+        # Linhas com categorias desconhecidas derrubariam o chunk inteiro no encoder
+        validas = feature_store.mascara_categorias_validas(chunk)
+        if not validas.all():
+            agregador.n_rejeitados += int((~validas).sum())
+            chunk = chunk[validas]
+        if chunk.empty:
+            continue
+
+        X_final = feature_store.transform(chunk)
+        prob = modelo.predict_proba(X_final)[:, 1]
+        agregador.atualizar(prob, chunk["loan_amnt"].to_numpy(), {g: chunk[g].to_numpy() for g in GRUPOS_CATEGORICOS})
+        logger.info(f"Carteira: chunk {i + 1} processado ({agregador.n_total} contratos acumulados)")
+
+    return agregador.resumo()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("arquivo", type=Path, help="Carteira em CSV, Parquet ou Feather")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE_PADRAO)
+    parser.add_argument("--threshold", type=float, default=0.42)
+    parser.add_argument("--saida", type=Path, default=None, help="Arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    from src.features.feature_store import FeatureStore
+    from src.models.predictor import ModelProducao
+
+    resumo = avaliar_carteira(
+        iterar_chunks(args.arquivo, args.chunk_size), FeatureStore.load(), ModelProducao(), args.threshold
+    )
+    texto = json.dumps(resumo, ensure_ascii=False, indent=2)
+    if args.saida:
+        args.saida.write_text(texto, encoding="utf-8")
+        print(f"Resumo salvo em {args.saida}")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
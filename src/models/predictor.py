@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
-from src.models.loader_model import load_production_model
+from typing import Optional, Tuple
+from src.models.loader_model import load_production_model, resolve_model_version
 
 class ModelProducao:
     """
@@ -12,14 +13,70 @@ class ModelProducao:
     - Redução de acoplamento com a implementação interna
     """
 
-    def __init__(self, model_name: str = "lgb_prob_default"):
-        self.model_name = model_name
-        # Carrega o modelo pronto para inferência
-        self._modelo = load_production_model(model_name)
+    def __init__(
+        self,
+        model_name: str = "lgb_prob_default",
+        version: Optional[int] = None,
+        backend: str = "lightgbm",
+        early_exit: bool = False,
+        tamanho_estagio: int = 50,
+        num_threads: Optional[int] = None,
+        bundle=None,
+    ):
+        if bundle is not None:
+            # Bundle de inferência (src.models.bundle): nome, versão e modelo do próprio arquivo
+            self.model_name = bundle.model_name
+            self.version = bundle.version
+            self._modelo = bundle.modelo
+        else:
+            self.model_name = model_name
+            # Versão resolvida uma única vez (alias Production) para rastreabilidade
+            self.version = resolve_model_version(model_name, version)
+            # Carrega o modelo pronto para inferência
+            self._modelo = load_production_model(model_name, self.version)
 
-    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        # Threads do LightGBM na predição (padrão do artefato: todos os núcleos)
+        if num_threads is not None:
+            self._modelo.set_params(n_jobs=num_threads)
+
+        # Modo opcional: classificação por estágios com saída antecipada
+        self.early_exit = None
+        if early_exit:
+            from src.models.early_exit import ClassificadorEarlyExit
+            self.early_exit = ClassificadorEarlyExit(self._modelo, tamanho_estagio=tamanho_estagio)
+
+        # Backend de pontuação de dados brutos: "lightgbm" (FeatureStore + modelo)
+        # ou "onnx" (grafo único exportado por src.models.onnx_backend)
+        if backend not in ("lightgbm", "onnx"):
+            raise ValueError(f"Backend '{backend}' inválido. Opções: lightgbm, onnx")
+        self.backend = backend
+        self._onnx = None
+        if backend == "onnx":
+            from src.models.onnx_backend import BackendOnnx, caminho_onnx
+            self._onnx = BackendOnnx(caminho_onnx(self.model_name, self.version), num_threads=num_threads)
+
+        # Calibração aplicada após o modelo (src.models.calibration); None = probabilidades brutas
+        self.calibracao = None
+        self.versao_calibracao: Optional[int] = None
+
+    def definir_calibracao(self, calibracao, versao: Optional[int] = None) -> None:
+        """
+        Troca a calibração em uso sem recarregar o modelo. A troca é uma única
+        atribuição de referência: chamadas em andamento terminam com a anterior.
+        """
+        self.calibracao, self.versao_calibracao = calibracao, versao
+
+    def _calibrar(self, proba: np.ndarray) -> np.ndarray:
+        calibracao = self.calibracao
+        if calibracao is None:
+            return proba
+        prob = calibracao.aplicar(proba[:, 1])
+        return np.column_stack([1 - prob, prob])
+
+    def predict_proba(self, X: pd.DataFrame, calibrar: bool = True) -> np.ndarray:
         """
-        Retorna probabilidades por classe (0 e 1).
+        Retorna probabilidades por classe (0 e 1), calibradas se houver calibração
+        definida (calibrar=False devolve a saída bruta do modelo).
         Saída: array de shape (n_samples, 2)
         """
         # O modelo LightGBM carregado diretamente tem predict_proba()
@@ -41,7 +98,33 @@ class ModelProducao:
                 f"Esperado: (n_samples, 2)"
             )
 
-        return proba
+        return self._calibrar(proba) if calibrar else proba
+
+    def pontuar(self, df_raw: pd.DataFrame, feature_store, calibrar: bool = True) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Pontua dados brutos (colunas de COLUNAS_ENTRADA ou o esquema bruto com person_age).
+        Retorna as features selecionadas (usadas no monitor de drift) e as
+        probabilidades (n_samples, 2). No backend ONNX tudo sai de uma chamada ao grafo.
+        """
+        if self._onnx is not None:
+            X_final, proba = self._onnx.executar(feature_store.preparar_entrada(df_raw))
+            return X_final, self._calibrar(proba) if calibrar else proba
+        X_final = feature_store.transform(df_raw)
+        return X_final, self.predict_proba(X_final, calibrar=calibrar)
+
+    def classificar(self, X: pd.DataFrame, threshold: float) -> np.ndarray:
+        """
+        Retorna a classe (1 se probabilidade >= threshold).
+        Com early_exit ativo, avalia apenas as árvores necessárias para decidir;
+        a probabilidade completa continua disponível via predict_proba().
+        """
+        if self.early_exit is not None:
+            calibracao = self.calibracao
+            # A calibração é monótona: o threshold vira um corte na probabilidade bruta
+            limiar = calibracao.inverter(threshold) if calibracao is not None else threshold
+            classes, _ = self.early_exit.classificar(X, min(max(limiar, 1e-12), 1 - 1e-12))
+            return classes
+        return (self.predict_proba(X)[:, 1] >= threshold).astype(int)
 
     def predict(self, X: pd.DataFrame) -> np.ndarray:
         """
@@ -0,0 +1,334 @@
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Prefixo e formato do nome dos arquivos. Arquivos fechados levam início e fim
+# no nome (audit_<inicio>_<fim>.sqlite), o arquivo ativo apenas o início;
+# assim a consulta descarta arquivos fora do intervalo sem abri-los
+PREFIXO_ARQUIVO = "audit_"
+FORMATO_DATA_ARQUIVO = "%Y%m%dT%H%M%S%f"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisoes (
+    prediction_id TEXT PRIMARY KEY,
+    ts REAL NOT NULL,
+    model_name TEXT,
+    model_version INTEGER,
+    threshold REAL,
+    probabilidade REAL,
+    classificacao TEXT,
+    entradas TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_decisoes_ts ON decisoes (ts);
+"""
+
+_COLUNAS = ("prediction_id", "ts", "model_name", "model_version", "threshold",
+            "probabilidade", "classificacao", "entradas")
+
+
+def novo_prediction_id() -> str:
+    """Identificador único de uma decisão (usado para juntar outcomes depois)"""
+    return uuid.uuid4().hex
+
+
+class AuditSink:
+    """
+    Registro assíncrono das decisões do modelo para fins regulatórios.
+
+    - O caminho de predição apenas anexa o lote a um deque (append atômico,
+      sem lock e sem I/O); serialização e escrita ocorrem na thread de fundo
+    - A escrita é feita em lotes, em uma transação por flush, em arquivos
+      SQLite rotacionados por tamanho e por tempo
+    - Perda máxima em caso de crash: o que foi recebido desde o último flush
+      (no máximo `intervalo_flush` segundos ou `max_pendentes` lotes)
+    - Falha de escrita: os lotes voltam para o início da fila e são regravados
+      no próximo flush. Com a escrita parada, a fila em memória é limitada a
+      `max_lotes_memoria` lotes; acima disso os lotes novos são descartados e
+      contados em `descartadas` (ver `estatisticas()`)
+    """
+
+    def __init__(
+        self,
+        diretorio: Path,
+        max_bytes: int = 64 * 1024 * 1024,
+        rotacao_segundos: float = 3600.0,
+        intervalo_flush: float = 1.0,
+        max_pendentes: int = 1000,
+        max_lotes_memoria: int = 100_000,
+    ):
+        self.diretorio = Path(diretorio)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.rotacao_segundos = rotacao_segundos
+        self.intervalo_flush = intervalo_flush
+        self.max_pendentes = max_pendentes
+        self.max_lotes_memoria = max_lotes_memoria
+
+        self._pendentes = deque()
+        self._lock_contadores = threading.Lock()
+        self.gravadas = 0
+        self.descartadas = 0
+        self.falhas_escrita = 0
+        self._descarte_logado_em = 0.0
+        self._lock_escrita = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+
+        self._conexao: Optional[sqlite3.Connection] = None
+        self._arquivo_atual: Optional[Path] = None
+        self._aberto_em = 0.0
+        self._ultimo_ts = 0.0
+
+        self._thread = threading.Thread(target=self._loop, name="audit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.fechar)
+
+    # ------------------------------------------------------------------
+    # Caminho de predição (não bloqueante)
+    # ------------------------------------------------------------------
+
+    def registrar(
+        self,
+        prediction_ids: Sequence[str],
+        entradas: Sequence[Dict[str, Any]],
+        probabilidades: np.ndarray,
+        classificacoes: Sequence[str],
+        threshold: float,
+        model_name: str,
+        model_version: Optional[int],
+    ) -> None:
+        """Enfileira um lote de decisões; a serialização acontece na thread de escrita"""
+        if len(self._pendentes) >= self.max_lotes_memoria:
+            self._descartar(len(prediction_ids))
+            return
+        self._pendentes.append(
+            (time.time(), prediction_ids, entradas, probabilidades, classificacoes,
+             threshold, model_name, model_version)
+        )
+        if len(self._pendentes) >= self.max_pendentes:
+            self._acordar.set()
+
+    def _descartar(self, n_decisoes: int) -> None:
+        """Fila em memória cheia (escrita parada): conta o descarte e avisa no máximo uma vez por minuto"""
+        with self._lock_contadores:
+            self.descartadas += n_decisoes
+            agora = time.monotonic()
+            if agora - self._descarte_logado_em < 60.0:
+                return
+            self._descarte_logado_em = agora
+        logger.error(
+            f"Auditoria: fila em memória cheia ({self.max_lotes_memoria} lotes); "
+            f"{self.descartadas} decisões descartadas até agora"
+        )
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Contadores do sink: decisões gravadas, descartadas, falhas de escrita e lotes pendentes"""
+        return {
+            "gravadas": self.gravadas,
+            "descartadas": self.descartadas,
+            "falhas_escrita": self.falhas_escrita,
+            "lotes_pendentes": len(self._pendentes),
+        }
+
+    # ------------------------------------------------------------------
+    # Thread de escrita
+    # ------------------------------------------------------------------
+
+    def _loop(self) -> None:
+        while not self._parar.is_set():
+            self._acordar.wait(self.intervalo_flush)
+            self._acordar.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Falha de disco não pode derrubar a thread; os lotes voltaram para
+                # a fila (flush já registrou o erro) e são regravados no próximo ciclo
+                pass
+
+    def _linhas(self, lote) -> Iterator[tuple]:
+        ts, ids, entradas, probs, classes, threshold, model_name, model_version = lote
+        for pid, entrada, prob, classe in zip(ids, entradas, probs, classes):
+            yield (pid, ts, model_name, model_version, float(threshold), float(prob),
+                   classe, json.dumps(entrada, default=str))
+
+    def _precisa_rotacionar(self) -> bool:
+        if self._conexao is None:
+            return True
+        if time.time() - self._aberto_em >= self.rotacao_segundos:
+            return True
+        return self._arquivo_atual.stat().st_size >= self.max_bytes
+
+    def _encerrar_arquivo(self) -> None:
+        """Fecha o arquivo ativo e acrescenta ao nome o instante da última decisão"""
+        if self._conexao is None:
+            return
+        self._conexao.close()
+        self._conexao = None
+
+        fim = datetime.fromtimestamp(self._ultimo_ts, timezone.utc).strftime(FORMATO_DATA_ARQUIVO)
+        self._arquivo_atual.rename(self._arquivo_atual.with_name(f"{self._arquivo_atual.stem}_{fim}.sqlite"))
+
+    def _rotacionar(self, primeiro_ts: float) -> None:
+        self._encerrar_arquivo()
+
+        # O nome usa o instante da decisão mais antiga do arquivo (e não o da abertura),
+        # garantindo que toda decisão do arquivo tenha ts >= início do nome
+        inicio = datetime.fromtimestamp(primeiro_ts, timezone.utc)
+        self._arquivo_atual = self.diretorio / f"{PREFIXO_ARQUIVO}{inicio.strftime(FORMATO_DATA_ARQUIVO)}.sqlite"
+        self._aberto_em = time.time()
+
+        self._conexao = sqlite3.connect(self._arquivo_atual, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.executescript(_SCHEMA)
+        logger.info(f"Novo arquivo de auditoria: {self._arquivo_atual}")
+
+    def flush(self) -> int:
+        """Grava tudo o que está pendente em uma única transação; retorna nº de decisões"""
+        if not self._pendentes:
+            return 0
+
+        # Lock apenas do lado da escrita: produtores continuam sem bloqueio
+        with self._lock_escrita:
+            lotes = []
+            while self._pendentes:
+                lotes.append(self._pendentes.popleft())
+
+            try:
+                if self._precisa_rotacionar():
+                    self._rotacionar(primeiro_ts=lotes[0][0])
+
+                linhas = [linha for lote in lotes for linha in self._linhas(lote)]
+                with self._conexao:
+                    self._conexao.executemany(
+                        f"INSERT OR REPLACE INTO decisoes VALUES ({', '.join('?' * len(_COLUNAS))})",
+                        linhas,
+                    )
+            except Exception as e:
+                # Devolve os lotes ao início da fila, na ordem original (INSERT OR
+                # REPLACE torna a regravação idempotente)
+                self._pendentes.extendleft(reversed(lotes))
+                self.falhas_escrita += 1
+                logger.error(
+                    f"Erro ao gravar auditoria ({sum(len(lote[1]) for lote in lotes)} decisões "
+                    f"devolvidas à fila, falha {self.falhas_escrita}): {e}"
+                )
+                raise
+            self._ultimo_ts = lotes[-1][0]
+            self.gravadas += len(linhas)
+
+        logger.debug(f"Auditoria: {len(linhas)} decisões gravadas em {self._arquivo_atual.name}")
+        return len(linhas)
+
+    def fechar(self) -> None:
+        """Interrompe a thread de escrita garantindo o flush final"""
+        if self._parar.is_set():
+            return
+        self._parar.set()
+        self._acordar.set()
+        self._thread.join(timeout=10)
+        try:
+            self.flush()
+        except Exception:
+            logger.error(f"Auditoria encerrada com {len(self._pendentes)} lotes não gravados")
+        with self._lock_escrita:
+            self._encerrar_arquivo()
+
+
+# ----------------------------------------------------------------------
+# Consulta
+# ----------------------------------------------------------------------
+
+def _intervalo_arquivo(caminho: Path) -> Tuple[float, float]:
+    """Início e fim (inf para o arquivo ativo) codificados no nome do arquivo"""
+    carimbos = caminho.stem[len(PREFIXO_ARQUIVO):].split("_")
+    inicio, fim = [
+        datetime.strptime(c, FORMATO_DATA_ARQUIVO).replace(tzinfo=timezone.utc).timestamp()
+        for c in carimbos
+    ] + [float("inf")] * (2 - len(carimbos))
+    return inicio, fim
+
+
+def arquivos_no_intervalo(diretorio: Path, inicio: float, fim: float) -> List[Path]:
+    """Seleciona, pelo nome, apenas os arquivos que podem conter decisões em [inicio, fim]"""
+    selecionados = []
+
+    for arquivo in sorted(Path(diretorio).glob(f"{PREFIXO_ARQUIVO}*.sqlite")):
+        inicio_arquivo, fim_arquivo = _intervalo_arquivo(arquivo)
+        # Tolerância de 1 µs: o nome guarda os instantes com resolução de microssegundos
+        if inicio_arquivo - 1e-6 <= fim and fim_arquivo + 1e-6 >= inicio:
+            selecionados.append(arquivo)
+
+    return selecionados
+
+
+def consultar_auditoria(
+    diretorio: Path,
+    inicio: Optional[datetime] = None,
+    fim: Optional[datetime] = None,
+) -> pd.DataFrame:
+    """
+    Consulta decisões auditadas por intervalo de tempo.
+    Arquivos fora do intervalo não são abertos; dentro deles a busca usa o índice em `ts`.
+    """
+    ts_inicio = inicio.timestamp() if inicio else 0.0
+    ts_fim = fim.timestamp() if fim else float("inf")
+
+    partes = []
+    for arquivo in arquivos_no_intervalo(diretorio, ts_inicio, ts_fim):
+        with sqlite3.connect(f"file:{arquivo}?mode=ro", uri=True) as conexao:
+            partes.append(pd.read_sql_query(
+                "SELECT * FROM decisoes WHERE ts BETWEEN ? AND ? ORDER BY ts",
+                conexao,
+                params=(ts_inicio, min(ts_fim, 1e18)),
+            ))
+
+    if not partes:
+        return pd.DataFrame(columns=list(_COLUNAS))
+
+    resultado = pd.concat(partes, ignore_index=True)
+    resultado["ts"] = pd.to_datetime(resultado["ts"], unit="s", utc=True)
+    return resultado
+
+
+def buscar_decisoes(diretorio: Path, prediction_ids: Sequence[str], tamanho_consulta: int = 500) -> pd.DataFrame:
+    """
+    Busca decisões auditadas pelo prediction_id (junção de outcomes).
+    Cada arquivo é consultado pela chave primária em lotes de `tamanho_consulta`
+    ids (limite de parâmetros do SQLite); ids já encontrados não são buscados
+    nos arquivos seguintes.
+    """
+    pendentes = list(dict.fromkeys(prediction_ids))
+    partes = []
+
+    # Mais recentes primeiro: outcomes costumam se referir a decisões recentes
+    for arquivo in sorted(Path(diretorio).glob(f"{PREFIXO_ARQUIVO}*.sqlite"), reverse=True):
+        if not pendentes:
+            break
+        with sqlite3.connect(f"file:{arquivo}?mode=ro", uri=True) as conexao:
+            for inicio in range(0, len(pendentes), tamanho_consulta):
+                lote = pendentes[inicio:inicio + tamanho_consulta]
+                partes.append(pd.read_sql_query(
+                    f"SELECT * FROM decisoes WHERE prediction_id IN ({', '.join('?' * len(lote))})",
+                    conexao,
+                    params=lote,
+                ))
+        encontrados = set().union(*(p["prediction_id"] for p in partes)) if partes else set()
+        pendentes = [pid for pid in pendentes if pid not in encontrados]
+
+    if not partes:
+        return pd.DataFrame(columns=list(_COLUNAS))
+    return pd.concat(partes, ignore_index=True)
@@ -0,0 +1,163 @@
+import logging
+import threading
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from src.data.datasets import carregar_dataset
+
+logger = logging.getLogger(__name__)
+
+# Número padrão de bins por feature (decis)
+N_BINS_PADRAO = 10
+
+# Piso aplicado às proporções no PSI para evitar log(0)
+EPS_PSI = 1e-4
+
+# Nome usado para o histograma do score do modelo
+COLUNA_SCORE = "score"
+
+
+def calcular_bordas(valores: np.ndarray, n_bins: int = N_BINS_PADRAO) -> np.ndarray:
+    """
+    Calcula as bordas internas dos bins a partir dos dados de treino.
+
+    - Variáveis discretas (ex.: categorias ordinais) com até `n_bins` valores
+      distintos ganham um bin por valor (bordas nos pontos médios)
+    - Variáveis contínuas usam quantis do treino (bins equiprováveis)
+    """
+    valores = valores[~np.isnan(valores)]
+    distintos = np.unique(valores)
+
+    if len(distintos) <= n_bins:
+        return (distintos[:-1] + distintos[1:]) / 2
+
+    quantis = np.quantile(valores, np.linspace(0, 1, n_bins + 1)[1:-1])
+    return np.unique(quantis)
+
+
+def psi(referencia: np.ndarray, atual: np.ndarray) -> float:
+    """Population Stability Index entre dois histogramas de mesmos bins"""
+    p_ref = np.clip(referencia / max(referencia.sum(), 1), EPS_PSI, None)
+    p_atual = np.clip(atual / max(atual.sum(), 1), EPS_PSI, None)
+    return float(np.sum((p_atual - p_ref) * np.log(p_atual / p_ref)))
+
+
+def ks_binado(referencia: np.ndarray, atual: np.ndarray) -> float:
+    """Estatística KS aproximada pelas distribuições acumuladas dos bins"""
+    cdf_ref = np.cumsum(referencia) / max(referencia.sum(), 1)
+    cdf_atual = np.cumsum(atual) / max(atual.sum(), 1)
+    return float(np.max(np.abs(cdf_ref - cdf_atual)))
+
+
+class MonitorDrift:
+    """
+    Monitor de drift com histogramas de bins fixos por feature e por decil de score.
+
+    - Bins definidos uma única vez a partir do treino (data/processed)
+    - Atualização incremental e vetorizada por lote: um único np.bincount
+      sobre todas as features, memória O(total de bins)
+    - PSI e KS calculados sob demanda contra a referência do treino
+    """
+
+    def __init__(self, colunas: Sequence[str], bordas: Sequence[np.ndarray]):
+        self.colunas = list(colunas)
+        self.n_bins = np.array([len(b) + 1 for b in bordas])
+
+        # Bordas empilhadas em matriz (colunas x max_bordas) completada com +inf,
+        # permitindo classificar todas as features em uma única comparação
+        self._bordas = np.full((len(bordas), max(len(b) for b in bordas)), np.inf)
+        for i, b in enumerate(bordas):
+            self._bordas[i, :len(b)] = b
+
+        # Deslocamento de cada feature no vetor plano de contagens
+        self._offsets = np.concatenate([[0], np.cumsum(self.n_bins)[:-1]])
+        self._total_bins = int(self.n_bins.sum())
+
+        self._referencia = np.zeros(self._total_bins, dtype=np.float64)
+        self._contagens = np.zeros(self._total_bins, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_treino(
+        cls,
+        features: Sequence[str],
+        scores_treino: Optional[np.ndarray] = None,
+        n_bins: int = N_BINS_PADRAO,
+    ) -> "MonitorDrift":
+        """
+        Constrói o monitor com bins e histogramas de referência do X_train.
+
+        Args:
+            features: Features (já transformadas) usadas pelo modelo, na ordem de inferência
+            scores_treino: Probabilidades do modelo no X_train para os decis de score
+            n_bins: Número de bins por feature contínua
+        """
+        logger.info(f"Construindo referência de drift a partir do X_train ({len(features)} features)")
+        X_ref = carregar_dataset("X_train", colunas=list(features)).to_numpy(dtype=np.float64)
+
+        colunas = list(features)
+        bordas = [calcular_bordas(X_ref[:, j], n_bins) for j in range(X_ref.shape[1])]
+
+        if scores_treino is not None:
+            colunas.append(COLUNA_SCORE)
+            bordas.append(calcular_bordas(np.asarray(scores_treino, dtype=np.float64), n_bins))
+            X_ref = np.column_stack([X_ref, scores_treino])
+
+        # A referência usa exatamente o mesmo binning do tráfego ao vivo
+        monitor = cls(colunas, bordas)
+        monitor._referencia = monitor._contar(X_ref).astype(np.float64)
+
+        logger.info(f"Monitor de drift pronto: {monitor._total_bins} bins no total")
+        return monitor
+
+    def _contar(self, X: np.ndarray) -> np.ndarray:
+        """Histograma plano (todas as features) de um lote"""
+        # bin = número de bordas <= valor, calculado para todas as features de uma vez
+        bins = (X[:, :, None] >= self._bordas[None, :, :]).sum(axis=2)
+        return np.bincount((bins + self._offsets).ravel(), minlength=self._total_bins)
+
+    def atualizar(self, X, scores: Optional[np.ndarray] = None) -> None:
+        """Acumula um lote de features transformadas (e scores, se monitorados)"""
+        X = np.asarray(X, dtype=np.float64)
+        if scores is not None and len(self.colunas) == X.shape[1] + 1:
+            X = np.column_stack([X, scores])
+
+        if X.shape[1] != len(self.colunas):
+            raise ValueError(
+                f"Lote com {X.shape[1]} colunas, monitor espera {len(self.colunas)}: {self.colunas}"
+            )
+
+        if X.shape[0] == 1:
+            # Caminho rápido do /predict: índices distintos por feature, sem bincount
+            indices = (X[0, :, None] >= self._bordas).sum(axis=1) + self._offsets
+            with self._lock:
+                self._contagens[indices] += 1
+            return
+
+        contagem = self._contar(X)
+        with self._lock:
+            self._contagens += contagem
+
+    def resetar(self) -> None:
+        with self._lock:
+            self._contagens[:] = 0
+
+    def relatorio(self) -> Dict:
+        """PSI e KS por feature (e por decil de score) contra a referência de treino"""
+        with self._lock:
+            contagens = self._contagens.copy()
+
+        features = {}
+        for nome, inicio, n in zip(self.colunas, self._offsets, self.n_bins):
+            atual = contagens[inicio:inicio + n]
+            referencia = self._referencia[inicio:inicio + n]
+            features[nome] = {
+                "psi": round(psi(referencia, atual), 6),
+                "ks": round(ks_binado(referencia, atual), 6),
+                "histograma_atual": atual.tolist(),
+                "histograma_referencia": referencia.astype(int).tolist(),
+            }
+
+        n_obs = int(contagens[:self.n_bins[0]].sum())
+        return {"n_observacoes": n_obs, "features": features}
@@ -0,0 +1,363 @@
+"""Métricas de performance em produção a partir de outcomes (loan_status) observados.
+
+O loan_status de cada proponente chega semanas ou meses depois da decisão.
+Os outcomes são recebidos em lotes, chaveados pelo prediction_id devolvido
+pela API, e juntados à auditoria (src.monitoring.audit) para recuperar a
+probabilidade servida, o modelo e o instante da decisão.
+
+- Nada é recalculado sobre o histórico: cada dia (UTC, data da decisão) de
+  cada modelo/versão guarda histogramas de score com N_BINS_SCORE bins
+  (positivos, negativos e soma das probabilidades), atualizados com um
+  np.bincount por lote
+- AUC, KS, PR-AUC e erro de calibração (ECE) saem dos histogramas somados na
+  janela; o erro de discretização é limitado pela largura do bin (0.001)
+- Cada prediction_id é contado uma única vez: outcomes repetidos são ignorados
+
+Run with:
+    python -m src.monitoring.performance --arquivo outcomes.csv
+    python -m src.monitoring.performance --relatorio --janela-dias 30
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.utils.paths import data_path
+
+logger = logging.getLogger(__name__)
+
+# Bins de largura fixa em [0, 1] para o score
+N_BINS_SCORE = 1000
+# Bins do erro de calibração esperado (ECE), agregados a partir dos bins de score
+N_BINS_CALIBRACAO = 10
+JANELA_DIAS_PADRAO = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outcomes (
+    prediction_id TEXT PRIMARY KEY,
+    model_name TEXT NOT NULL,
+    model_version INTEGER,
+    dia TEXT NOT NULL,
+    probabilidade REAL NOT NULL,
+    rotulo INTEGER NOT NULL,
+    recebido_em REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS histogramas (
+    model_name TEXT NOT NULL,
+    model_version INTEGER NOT NULL,
+    dia TEXT NOT NULL,
+    positivos BLOB NOT NULL,
+    negativos BLOB NOT NULL,
+    soma_prob BLOB NOT NULL,
+    PRIMARY KEY (model_name, model_version, dia)
+);
+"""
+
+
+def caminho_performance() -> Path:
+    """Banco das métricas (PERFORMANCE_DB ou data/performance/performance.sqlite)"""
+    return Path(os.environ.get("PERFORMANCE_DB") or data_path("performance.sqlite", "performance"))
+
+
+def _bins(prob: np.ndarray) -> np.ndarray:
+    return np.clip((np.asarray(prob, dtype=np.float64) * N_BINS_SCORE).astype(np.int64), 0, N_BINS_SCORE - 1)
+
+
+def metricas_binadas(positivos: np.ndarray, negativos: np.ndarray, soma_prob: np.ndarray) -> Dict[str, Any]:
+    """
+    Métricas a partir dos histogramas de score. Scores no mesmo bin contam como
+    empate (mesma convenção do roc_auc_score / average_precision_score).
+    """
+    n_pos, n_neg = float(positivos.sum()), float(negativos.sum())
+    n = n_pos + n_neg
+    resultado = {
+        "n": int(n),
+        "taxa_default": n_pos / n if n else None,
+        "prob_media": float(soma_prob.sum()) / n if n else None,
+        "roc_auc": None, "ks": None, "pr_auc": None, "ece": None,
+    }
+    if n == 0:
+        return resultado
+
+    # ECE: |média prevista - taxa observada| ponderado pelo peso de cada bin
+    grupos = N_BINS_SCORE // N_BINS_CALIBRACAO
+    total_bin = (positivos + negativos).reshape(N_BINS_CALIBRACAO, grupos).sum(axis=1)
+    pos_bin = positivos.reshape(N_BINS_CALIBRACAO, grupos).sum(axis=1)
+    prob_bin = soma_prob.reshape(N_BINS_CALIBRACAO, grupos).sum(axis=1)
+    resultado["ece"] = float(np.abs(prob_bin - pos_bin).sum() / n)
+
+    if n_pos == 0 or n_neg == 0:
+        return resultado
+
+    # AUC: P(score_pos > score_neg) + 0.5·P(empate), varrendo os bins em ordem crescente
+    neg_abaixo = np.cumsum(negativos) - negativos
+    resultado["roc_auc"] = float(np.sum(positivos * (neg_abaixo + 0.5 * negativos)) / (n_pos * n_neg))
+
+    resultado["ks"] = float(np.max(np.abs(np.cumsum(positivos) / n_pos - np.cumsum(negativos) / n_neg)))
+
+    # PR-AUC (average precision): thresholds decrescentes nas bordas dos bins
+    tp = np.cumsum(positivos[::-1])
+    fp = np.cumsum(negativos[::-1])
+    ocupados = (positivos[::-1] + negativos[::-1]) > 0
+    precisao = tp[ocupados] / (tp[ocupados] + fp[ocupados])
+    recall = tp[ocupados] / n_pos
+    resultado["pr_auc"] = float(np.sum(np.diff(recall, prepend=0.0) * precisao))
+
+    return resultado
+
+
+class MonitorPerformance:
+    """
+    Histogramas diários por modelo/versão em SQLite, seguro entre processos.
+
+    Cada lote de outcomes é gravado em uma transação BEGIN IMMEDIATE: a
+    deduplicação pelo prediction_id e a soma nos histogramas são atômicas
+    mesmo com vários workers da API recebendo outcomes.
+    """
+
+    def __init__(self, caminho: Optional[Path] = None):
+        self.caminho = Path(caminho) if caminho else caminho_performance()
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        with self._conectar() as conexao:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.executescript(_SCHEMA)
+
+    @contextmanager
+    def _conectar(self) -> Iterator[sqlite3.Connection]:
+        """Conexão em autocommit, sempre fechada (uma transação aberta é desfeita no close)"""
+        conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+        try:
+            yield conexao
+        finally:
+            conexao.close()
+
+    # ------------------------------------------------------------------
+    # Ingestão
+    # ------------------------------------------------------------------
+
+    def registrar(self, decisoes: pd.DataFrame) -> Dict[str, int]:
+        """
+        Soma outcomes já juntados às decisões. `decisoes` precisa das colunas
+        prediction_id, ts (segundos ou datetime UTC), model_name, model_version,
+        probabilidade e rotulo (0/1). Retorna contagens de novos e duplicados.
+        """
+        decisoes = decisoes.drop_duplicates("prediction_id")
+        if decisoes.empty:
+            return {"registrados": 0, "duplicados": 0}
+
+        ts = decisoes["ts"]
+        if not pd.api.types.is_datetime64_any_dtype(ts):
+            ts = pd.to_datetime(ts, unit="s", utc=True)
+        decisoes = decisoes.assign(
+            dia=ts.dt.strftime("%Y-%m-%d").to_numpy(),
+            model_version=decisoes["model_version"].fillna(-1).astype(int),
+            rotulo=decisoes["rotulo"].astype(int),
+            probabilidade=decisoes["probabilidade"].astype(float),
+        )
+        ids = decisoes["prediction_id"].tolist()
+
+        with self._conectar() as conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                existentes = set()
+                for inicio in range(0, len(ids), 500):
+                    lote = ids[inicio:inicio + 500]
+                    existentes.update(r[0] for r in conexao.execute(
+                        f"SELECT prediction_id FROM outcomes WHERE prediction_id IN ({', '.join('?' * len(lote))})",
+                        lote,
+                    ))
+                novos = decisoes[~decisoes["prediction_id"].isin(existentes)]
+
+                conexao.executemany(
+                    "INSERT INTO outcomes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    zip(novos["prediction_id"], novos["model_name"], novos["model_version"].tolist(),
+                        novos["dia"], novos["probabilidade"].tolist(), novos["rotulo"].tolist(),
+                        [time.time()] * len(novos)),
+                )
+                for (model_name, model_version, dia), grupo in novos.groupby(["model_name", "model_version", "dia"]):
+                    self._somar(conexao, model_name, int(model_version), dia, grupo)
+                conexao.execute("COMMIT")
+            except Exception:
+                conexao.execute("ROLLBACK")
+                raise
+
+        return {"registrados": len(novos), "duplicados": len(decisoes) - len(novos)}
+
+    @staticmethod
+    def _somar(conexao: sqlite3.Connection, model_name: str, model_version: int, dia: str, grupo: pd.DataFrame) -> None:
+        bins = _bins(grupo["probabilidade"].to_numpy())
+        positivo = grupo["rotulo"].to_numpy() == 1
+        linha = conexao.execute(
+            "SELECT positivos, negativos, soma_prob FROM histogramas WHERE model_name = ? AND model_version = ? AND dia = ?",
+            (model_name, model_version, dia),
+        ).fetchone()
+        if linha:
+            positivos, negativos = (np.frombuffer(b, dtype=np.int64).copy() for b in linha[:2])
+            soma_prob = np.frombuffer(linha[2], dtype=np.float64).copy()
+        else:
+            positivos = np.zeros(N_BINS_SCORE, dtype=np.int64)
+            negativos = np.zeros(N_BINS_SCORE, dtype=np.int64)
+            soma_prob = np.zeros(N_BINS_SCORE, dtype=np.float64)
+
+        positivos += np.bincount(bins[positivo], minlength=N_BINS_SCORE)
+        negativos += np.bincount(bins[~positivo], minlength=N_BINS_SCORE)
+        soma_prob += np.bincount(bins, weights=grupo["probabilidade"].to_numpy(), minlength=N_BINS_SCORE)
+
+        conexao.execute(
+            "INSERT OR REPLACE INTO histogramas VALUES (?, ?, ?, ?, ?, ?)",
+            (model_name, model_version, dia, positivos.tobytes(), negativos.tobytes(), soma_prob.tobytes()),
+        )
+
+    def ingerir(self, prediction_ids: Sequence[str], rotulos: Sequence[int], diretorio_auditoria: Path) -> Dict[str, int]:
+        """
+        Junta um lote de outcomes às decisões auditadas e atualiza os histogramas.
+        Ids sem decisão na auditoria são contados em `nao_encontrados`.
+        """
+        from src.monitoring.audit import buscar_decisoes
+
+        outcomes = pd.DataFrame({"prediction_id": list(prediction_ids), "rotulo": list(rotulos)})
+        repetidos_no_lote = int(outcomes["prediction_id"].duplicated().sum())
+        outcomes = outcomes.drop_duplicates("prediction_id", keep="last")
+
+        decisoes = buscar_decisoes(diretorio_auditoria, outcomes["prediction_id"].tolist())
+        juntados = decisoes.drop(columns=["entradas"], errors="ignore").merge(outcomes, on="prediction_id")
+
+        contagem = self.registrar(juntados)
+        contagem["duplicados"] += repetidos_no_lote
+        contagem["nao_encontrados"] = len(outcomes) - len(juntados)
+        contagem["recebidos"] = len(prediction_ids)
+        logger.info(f"Outcomes: {contagem}")
+        return contagem
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def modelos(self) -> List[Dict[str, Any]]:
+        """Modelos/versões com outcomes e o período coberto"""
+        with self._conectar() as conexao:
+            linhas = conexao.execute(
+                "SELECT model_name, model_version, MIN(dia), MAX(dia), COUNT(*) FROM histogramas "
+                "GROUP BY model_name, model_version ORDER BY model_name, model_version"
+            ).fetchall()
+        return [
+            {"model_name": m, "model_version": v, "primeiro_dia": i, "ultimo_dia": f, "dias": d}
+            for m, v, i, f, d in linhas
+        ]
+
+    def _histogramas(self, model_name: str, model_version: int):
+        with self._conectar() as conexao:
+            linhas = conexao.execute(
+                "SELECT dia, positivos, negativos, soma_prob FROM histogramas "
+                "WHERE model_name = ? AND model_version = ? ORDER BY dia",
+                (model_name, model_version),
+            ).fetchall()
+        dias = [linha[0] for linha in linhas]
+        positivos = np.array([np.frombuffer(linha[1], dtype=np.int64) for linha in linhas]).reshape(-1, N_BINS_SCORE)
+        negativos = np.array([np.frombuffer(linha[2], dtype=np.int64) for linha in linhas]).reshape(-1, N_BINS_SCORE)
+        soma_prob = np.array([np.frombuffer(linha[3], dtype=np.float64) for linha in linhas]).reshape(-1, N_BINS_SCORE)
+        return dias, positivos, negativos, soma_prob
+
+    def serie(self, model_name: str, model_version: int, janela_dias: int = JANELA_DIAS_PADRAO) -> List[Dict[str, Any]]:
+        """
+        Série diária das métricas sobre a janela móvel dos `janela_dias` dias
+        anteriores (inclusive) a cada dia com outcomes. As janelas são somas de
+        prefixos dos histogramas: custo O(dias × bins), independente do volume.
+        """
+        dias, positivos, negativos, soma_prob = self._histogramas(model_name, model_version)
+        if not dias:
+            return []
+
+        datas = pd.to_datetime(dias).to_numpy()
+        # Primeiro dia dentro da janela de cada ponto da série
+        inicio = np.searchsorted(datas, datas - np.timedelta64(janela_dias - 1, "D"))
+        acumulados = [
+            np.vstack([np.zeros((1, N_BINS_SCORE), dtype=h.dtype), np.cumsum(h, axis=0)])
+            for h in (positivos, negativos, soma_prob)
+        ]
+
+        serie = []
+        for i, dia in enumerate(dias):
+            janela = [a[i + 1] - a[inicio[i]] for a in acumulados]
+            serie.append({"dia": dia, "n_dia": int(positivos[i].sum() + negativos[i].sum()), **metricas_binadas(*janela)})
+        return serie
+
+    def metricas(
+        self,
+        model_name: str,
+        model_version: int,
+        janela_dias: Optional[int] = JANELA_DIAS_PADRAO,
+        fim: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """Métricas nos `janela_dias` dias até `fim` (padrão: hoje, UTC); None usa todo o histórico"""
+        dias, positivos, negativos, soma_prob = self._histogramas(model_name, model_version)
+        fim = fim or datetime.now(timezone.utc)
+        selecionados = np.array([d <= fim.strftime("%Y-%m-%d") for d in dias], dtype=bool)
+        if janela_dias is not None:
+            inicio = (fim - timedelta(days=janela_dias - 1)).strftime("%Y-%m-%d")
+            selecionados &= np.array([d >= inicio for d in dias], dtype=bool)
+
+        if not selecionados.any():
+            vazio = np.zeros(N_BINS_SCORE)
+            return metricas_binadas(vazio, vazio, vazio)
+        return metricas_binadas(
+            positivos[selecionados].sum(axis=0), negativos[selecionados].sum(axis=0), soma_prob[selecionados].sum(axis=0)
+        )
+
+
+def metricas_offline_comparaveis(offline: Dict[str, float]) -> Dict[str, Optional[float]]:
+    """Métricas de teste do mlruns com os mesmos nomes das métricas de produção"""
+    return {
+        "roc_auc": offline.get("test_roc_auc"),
+        "ks": offline.get("best_ks_score"),
+        "pr_auc": offline.get("test_pr_auc"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--arquivo", type=Path, default=None, help="Outcomes: CSV/Parquet com prediction_id e rótulo")
+    parser.add_argument("--coluna-id", default="prediction_id")
+    parser.add_argument("--coluna-rotulo", default="loan_status")
+    parser.add_argument("--auditoria", type=Path, default=None, help="Diretório da auditoria (padrão: AUDIT_DIR ou data/audit)")
+    parser.add_argument("--banco", type=Path, default=None, help="Banco das métricas (padrão: PERFORMANCE_DB)")
+    parser.add_argument("--relatorio", action="store_true", help="Série das métricas por modelo/versão")
+    parser.add_argument("--janela-dias", type=int, default=JANELA_DIAS_PADRAO)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+    monitor = MonitorPerformance(args.banco)
+
+    if args.arquivo is not None:
+        leitor = pd.read_parquet if args.arquivo.suffix == ".parquet" else pd.read_csv
+        outcomes = leitor(args.arquivo, columns=[args.coluna_id, args.coluna_rotulo])
+        auditoria = args.auditoria or Path(os.environ.get("AUDIT_DIR") or data_path("", "audit"))
+        print(monitor.ingerir(outcomes[args.coluna_id].astype(str), outcomes[args.coluna_rotulo], auditoria))
+
+    if args.relatorio:
+        from src.models.loader_model import metricas_offline
+
+        for item in monitor.modelos():
+            try:
+                offline = metricas_offline_comparaveis(metricas_offline(item["model_name"], item["model_version"]))
+            except FileNotFoundError:
+                offline = {}
+            print(f"{item['model_name']} v{item['model_version']}  offline (teste): {offline}")
+            print(f"{'dia':<12}{'n_dia':>8}{'n':>9}{'roc_auc':>9}{'ks':>8}{'pr_auc':>8}{'ece':>8}")
+            for ponto in monitor.serie(item["model_name"], item["model_version"], args.janela_dias):
+                valores = [ponto[m] for m in ("roc_auc", "ks", "pr_auc", "ece")]
+                print(f"{ponto['dia']:<12}{ponto['n_dia']:>8}{ponto['n']:>9}"
+                      + "".join(f"{v:>9.4f}" if v is not None else f"{'-':>9}" for v in valores[:1])
+                      + "".join(f"{v:>8.4f}" if v is not None else f"{'-':>8}" for v in valores[1:]))
+
+
+if __name__ == "__main__":
+    main()
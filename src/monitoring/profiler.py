@@ -0,0 +1,353 @@
+"""
+Diagnóstico sob demanda do processo da API: perfil por amostragem de pilhas e
+diff de alocações (tracemalloc) ao longo de N requisições.
+
+Nada roda enquanto não há sessão ativa: não há thread de amostragem, hooks de
+trace/profile nem tracemalloc ligados. A única parte permanente é o
+middleware de contagem, que com sessão inativa faz um teste de variável e
+repassa a requisição.
+
+- Amostragem: a thread que atende o /admin/profile lê sys._current_frames() a
+  cada `intervalo` durante `duracao` segundos e conta as pilhas de todas as
+  outras threads (event loop, threadpool do FastAPI, workers). Threads
+  ociosas (esperando em fila, lock ou select) são descartadas por padrão
+- tracemalloc: liga o rastreamento (se ainda não estava), tira um snapshot,
+  espera N requisições HTTP concluídas e compara com um segundo snapshot;
+  o resultado é o que foi alocado nesse intervalo e continua vivo
+
+Os dois formatos de saída são "collapsed" (uma pilha por linha, frames
+separados por ';' e o peso no fim, entrada do flamegraph.pl/speedscope) e json.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DURACAO_MAX_S = 60.0
+INTERVALO_MIN_MS = 1.0
+REQUISICOES_MAX = 100_000
+TOP_PADRAO = 30
+
+# Frame folha (arquivo, função) de threads bloqueadas esperando trabalho
+FRAMES_OCIOSOS = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+    ("socket.py", "accept"),
+}
+
+_RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) + os.sep
+
+_ocupado = threading.Lock()
+_contador: Optional["_Contador"] = None
+
+
+class PerfilOcupado(RuntimeError):
+    """Já existe uma sessão de diagnóstico em andamento neste processo"""
+
+
+@contextmanager
+def _reservar():
+    if not _ocupado.acquire(blocking=False):
+        raise PerfilOcupado("já existe uma sessão de profiling em andamento")
+    try:
+        yield
+    finally:
+        _ocupado.release()
+
+
+def nome_modulo(arquivo: str) -> str:
+    """Caminho do arquivo como módulo curto: src.api.app, lightgbm.basic, threading"""
+    if "site-packages" + os.sep in arquivo:
+        relativo = arquivo.split("site-packages" + os.sep, 1)[1]
+    elif arquivo.startswith(_RAIZ_PROJETO):
+        relativo = arquivo[len(_RAIZ_PROJETO):]
+    else:
+        relativo = os.path.basename(arquivo)
+    if relativo.endswith(".py"):
+        relativo = relativo[:-3]
+    return relativo.replace(os.sep, ".")
+
+
+# ----------------------------------------------------------------------
+# Perfil por amostragem
+# ----------------------------------------------------------------------
+
+def _ociosa(frame) -> bool:
+    codigo = frame.f_code
+    return (os.path.basename(codigo.co_filename), codigo.co_name) in FRAMES_OCIOSOS
+
+
+class PerfilAmostrado:
+    """
+    Contagem de pilhas amostradas. Chave: (nome da thread, frames da raiz à
+    folha), cada frame como (code object, linha ou 0).
+    """
+
+    def __init__(self, contagens: Counter, amostras: int, ociosas: int, duracao_s: float, intervalo_s: float):
+        self.contagens = contagens
+        self.amostras = amostras
+        self.ociosas = ociosas
+        self.duracao_s = duracao_s
+        self.intervalo_s = intervalo_s
+        self._rotulos: Dict[Tuple[Any, int], str] = {}
+
+    def _rotulo(self, frame: Tuple[Any, int]) -> str:
+        rotulo = self._rotulos.get(frame)
+        if rotulo is None:
+            codigo, linha = frame
+            rotulo = f"{nome_modulo(codigo.co_filename)}:{codigo.co_qualname}"
+            if linha:
+                rotulo += f":{linha}"
+            self._rotulos[frame] = rotulo
+        return rotulo
+
+    def colapsado(self) -> str:
+        """Formato collapsed: 'thread;frame;...;frame contagem', uma pilha por linha"""
+        linhas = []
+        for (thread, pilha), n in self.contagens.most_common():
+            linhas.append(";".join([thread] + [self._rotulo(f).replace(";", ",") for f in pilha]) + f" {n}")
+        return "\n".join(linhas) + ("\n" if linhas else "")
+
+    def resumo(self, top: int = TOP_PADRAO) -> Dict[str, Any]:
+        """Funções com mais amostras: `proprio` (no topo da pilha) e `total` (em qualquer ponto da pilha)"""
+        proprio: Counter = Counter()
+        total: Counter = Counter()
+        por_thread: Counter = Counter()
+        for (thread, pilha), n in self.contagens.items():
+            por_thread[thread] += n
+            rotulos = [self._rotulo(f) for f in pilha]
+            proprio[rotulos[-1]] += n
+            for rotulo in set(rotulos):
+                total[rotulo] += n
+
+        pilhas = sum(self.contagens.values())
+        return {
+            "amostras": self.amostras,
+            "pilhas_amostradas": pilhas,
+            "pilhas_ociosas_descartadas": self.ociosas,
+            "duracao_s": round(self.duracao_s, 3),
+            "intervalo_efetivo_ms": round(1000 * self.duracao_s / max(self.amostras, 1), 3),
+            "por_thread": dict(por_thread.most_common()),
+            "funcoes": [
+                {"funcao": rotulo, "total": n, "proprio": proprio[rotulo], "fracao_total": round(n / pilhas, 4)}
+                for rotulo, n in total.most_common(top)
+            ],
+        }
+
+
+def amostrar_pilhas(
+    duracao_s: float,
+    intervalo_s: float = 0.005,
+    incluir_ociosas: bool = False,
+    linhas: bool = False,
+) -> PerfilAmostrado:
+    """
+    Amostra as pilhas de todas as threads do processo (menos a chamadora)
+    durante `duracao_s`. Bloqueia a thread chamadora pelo período.
+
+    Args:
+        duracao_s: Duração da coleta (até DURACAO_MAX_S)
+        intervalo_s: Intervalo entre amostras
+        incluir_ociosas: Manter threads paradas em fila/lock/select
+        linhas: Distinguir frames pela linha em execução (não só pela função)
+    """
+    if not 0 < duracao_s <= DURACAO_MAX_S:
+        raise ValueError(f"duracao_s deve estar em (0, {DURACAO_MAX_S:g}]")
+    if intervalo_s * 1000 < INTERVALO_MIN_MS:
+        raise ValueError(f"intervalo deve ser >= {INTERVALO_MIN_MS:g}ms")
+
+    with _reservar():
+        propria = threading.get_ident()
+        nomes: Dict[int, str] = {}
+        contagens: Counter = Counter()
+        amostras = ociosas = 0
+
+        inicio = time.perf_counter()
+        fim = inicio + duracao_s
+        proxima = inicio
+        while True:
+            for ident, frame in sys._current_frames().items():
+                if ident == propria:
+                    continue
+                if not incluir_ociosas and _ociosa(frame):
+                    ociosas += 1
+                    continue
+                if ident not in nomes:
+                    nomes.update((t.ident, t.name) for t in threading.enumerate())
+                pilha = []
+                while frame is not None:
+                    pilha.append((frame.f_code, frame.f_lineno if linhas else 0))
+                    frame = frame.f_back
+                pilha.reverse()
+                contagens[(nomes.get(ident, f"thread-{ident}"), tuple(pilha))] += 1
+            amostras += 1
+
+            proxima += intervalo_s
+            agora = time.perf_counter()
+            if proxima >= fim:
+                break
+            if proxima > agora:
+                time.sleep(proxima - agora)
+            else:
+                # Atrasado (GIL disputado): não acumula amostras em rajada
+                proxima = agora
+
+        duracao = time.perf_counter() - inicio
+
+    logger.info(f"Perfil por amostragem: {amostras} amostras em {duracao:.1f}s, {len(contagens)} pilhas distintas")
+    return PerfilAmostrado(contagens, amostras, ociosas, duracao, intervalo_s)
+
+
+# ----------------------------------------------------------------------
+# Diff de alocações (tracemalloc)
+# ----------------------------------------------------------------------
+
+class _Contador:
+    def __init__(self, alvo: int):
+        self.alvo = alvo
+        self.valor = 0
+        self.atingido = threading.Event()
+        self._lock = threading.Lock()
+
+    def incrementar(self) -> None:
+        with self._lock:
+            self.valor += 1
+            if self.valor >= self.alvo:
+                self.atingido.set()
+
+
+def contar_requisicao() -> None:
+    """Registra uma requisição concluída (sem efeito fora de uma sessão de tracemalloc)"""
+    contador = _contador
+    if contador is not None:
+        contador.incrementar()
+
+
+class ContadorRequisicoes:
+    """Middleware ASGI que alimenta contar_requisicao() com as requisições HTTP fora de /admin"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if _contador is None or scope["type"] != "http" or scope["path"].startswith("/admin"):
+            return await self.app(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            contar_requisicao()
+
+
+def _filtrar(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+    return snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ])
+
+
+def _local(traceback: Iterable[tracemalloc.Frame]) -> List[str]:
+    return [f"{nome_modulo(f.filename)}:{f.lineno}" for f in traceback]
+
+
+class DiffAlocacoes:
+    """Comparação entre os snapshots do início e do fim da sessão de tracemalloc"""
+
+    def __init__(self, diferencas: List[tracemalloc.StatisticDiff], requisicoes: int, concluido: bool,
+                 duracao_s: float, atual: int, pico: int):
+        self.diferencas = diferencas
+        self.requisicoes = requisicoes
+        self.concluido = concluido
+        self.duracao_s = duracao_s
+        self.atual = atual
+        self.pico = pico
+
+    def colapsado(self) -> str:
+        """Pilhas de alocação com crescimento líquido, pesadas pelos bytes a mais"""
+        linhas = [
+            ";".join(_local(d.traceback)).replace(" ", "_") + f" {d.size_diff}"
+            for d in self.diferencas if d.size_diff > 0
+        ]
+        return "\n".join(linhas) + ("\n" if linhas else "")
+
+    def resumo(self, top: int = TOP_PADRAO) -> Dict[str, Any]:
+        return {
+            "requisicoes_observadas": self.requisicoes,
+            "concluido": self.concluido,
+            "duracao_s": round(self.duracao_s, 3),
+            "rastreado_atual_kb": round(self.atual / 1024, 1),
+            "rastreado_pico_kb": round(self.pico / 1024, 1),
+            "crescimento_kb": round(sum(d.size_diff for d in self.diferencas) / 1024, 1),
+            "crescimento_por_requisicao_b": (
+                round(sum(d.size_diff for d in self.diferencas) / self.requisicoes, 1) if self.requisicoes else None
+            ),
+            "alocacoes": [
+                {
+                    "local": _local(d.traceback),
+                    "crescimento_kb": round(d.size_diff / 1024, 2),
+                    "blocos": d.count_diff,
+                    "tamanho_kb": round(d.size / 1024, 2),
+                }
+                for d in self.diferencas[:top]
+            ],
+        }
+
+
+def diff_tracemalloc(requisicoes: int, timeout_s: float = DURACAO_MAX_S, frames: int = 1) -> DiffAlocacoes:
+    """
+    Snapshot de alocações antes e depois de `requisicoes` requisições
+    (ou de `timeout_s`, o que vier primeiro). Bloqueia a thread chamadora.
+    O tracemalloc é desligado ao final se não estava ligado antes.
+
+    Args:
+        requisicoes: Requisições HTTP concluídas a observar
+        timeout_s: Espera máxima (até DURACAO_MAX_S)
+        frames: Profundidade das pilhas de alocação (1 = só a linha que alocou)
+    """
+    global _contador
+
+    if not 1 <= requisicoes <= REQUISICOES_MAX:
+        raise ValueError(f"requisicoes deve estar em [1, {REQUISICOES_MAX}]")
+    if not 0 < timeout_s <= DURACAO_MAX_S:
+        raise ValueError(f"timeout_s deve estar em (0, {DURACAO_MAX_S:g}]")
+    if not 1 <= frames <= 50:
+        raise ValueError("frames deve estar em [1, 50]")
+
+    with _reservar():
+        ligado_aqui = not tracemalloc.is_tracing()
+        if ligado_aqui:
+            tracemalloc.start(frames)
+        try:
+            tracemalloc.reset_peak()
+            antes = _filtrar(tracemalloc.take_snapshot())
+            inicio = time.perf_counter()
+            contador = _contador = _Contador(requisicoes)
+            concluido = contador.atingido.wait(timeout_s)
+            _contador = None
+            duracao = time.perf_counter() - inicio
+            depois = _filtrar(tracemalloc.take_snapshot())
+            atual, pico = tracemalloc.get_traced_memory()
+        finally:
+            _contador = None
+            if ligado_aqui:
+                tracemalloc.stop()
+
+    chave = "lineno" if frames == 1 else "traceback"
+    diferencas = [d for d in depois.compare_to(antes, chave) if d.size_diff != 0]
+    logger.info(
+        f"tracemalloc: {contador.valor} requisições em {duracao:.1f}s, "
+        f"crescimento {sum(d.size_diff for d in diferencas) / 1024:.1f} KB"
+    )
+    return DiffAlocacoes(diferencas, contador.valor, concluido, duracao, atual, pico)
@@ -5,11 +5,19 @@ BASE_DIR = Path(__file__).resolve().parents[2]
 
 # Pastas principais
 DATA_DIR = BASE_DIR / "data"
+PROCESSED_DIR = DATA_DIR / "processed"
 CONFIGS_DIR = BASE_DIR / "configs"
 MODELS_DIR = BASE_DIR / "src" / "models"
 EXPERIMENTS_DIR = BASE_DIR / "experiments"
 MLRUNS_DIR = BASE_DIR / "mlruns"
 
+# Extensões suportadas para os datasets processados (X_train, y_test, ...)
+FORMATOS_DATASET = {
+    "parquet": ".parquet",
+    "feather": ".feather",
+    "pickle": ".pkl",
+}
+
 def ensure_folder(path: Path):
     """Cria a pasta se não existir"""
     path.mkdir(parents=True, exist_ok=True)
@@ -40,3 +48,18 @@ def mlruns_path(filename: str, subfolder: str = "") -> Path:
     folder = ensure_folder(MLRUNS_DIR / subfolder)
     return folder / filename
 
+def processed_path(nome: str, formato: str = "parquet") -> Path:
+    """Retorna caminho do dataset processado `nome` (ex.: X_train) no formato indicado"""
+    if formato not in FORMATOS_DATASET:
+        raise ValueError(f"Formato '{formato}' não suportado. Opções: {list(FORMATOS_DATASET)}")
+    return data_path(f"{nome}{FORMATOS_DATASET[formato]}", "processed")
+
+def resolve_processed_path(nome: str, preferencia=("feather", "parquet", "pickle")) -> Path:
+    """Retorna o primeiro arquivo existente do dataset `nome` seguindo a ordem de preferência de formato"""
+    for formato in preferencia:
+        caminho = processed_path(nome, formato)
+        if caminho.exists():
+            return caminho
+    raise FileNotFoundError(
+        f"Dataset '{nome}' não encontrado em {PROCESSED_DIR} nos formatos {list(preferencia)}"
+    )
@@ -0,0 +1,107 @@
+"""
+Testes do registro assíncrono de auditoria das decisões.
+"""
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.monitoring.audit import AuditSink, arquivos_no_intervalo, consultar_auditoria, novo_prediction_id
+
+
+class TestAuditSink:
+    """Testes para o AuditSink e a consulta por intervalo."""
+
+    @pytest.fixture
+    def sink(self, tmp_path):
+        # Flush manual: intervalo longo evita concorrência com a thread de escrita
+        sink = AuditSink(tmp_path, intervalo_flush=60.0)
+        yield sink
+        sink.fechar()
+
+    def _registrar(self, sink, n):
+        ids = [novo_prediction_id() for _ in range(n)]
+        entradas = [{"loan_amnt": float(i), "loan_grade": "B"} for i in range(n)]
+        probs = np.linspace(0, 1, n)
+        classes = np.where(probs >= 0.42, "Alto Risco", "Baixo Risco")
+        sink.registrar(ids, entradas, probs, classes, 0.42, "lgb_prob_default", 7)
+        return ids
+
+    def test_registro_nao_grava_ate_flush(self, sink, tmp_path):
+        """registrar() só enfileira; a gravação acontece no flush."""
+        ids = self._registrar(sink, 10)
+        assert consultar_auditoria(tmp_path).empty
+
+        assert sink.flush() == 10
+        resultado = consultar_auditoria(tmp_path)
+        assert list(resultado["prediction_id"]) == ids
+        assert set(resultado["model_version"]) == {7}
+        assert '"loan_grade": "B"' in resultado["entradas"].iloc[0]
+
+    def test_rotacao_por_tamanho(self, tmp_path):
+        sink = AuditSink(tmp_path, max_bytes=1, intervalo_flush=60.0)
+        for _ in range(3):
+            self._registrar(sink, 5)
+            sink.flush()
+            time.sleep(0.01)
+        sink.fechar()
+
+        assert len(list(tmp_path.glob("audit_*.sqlite"))) == 3
+        assert len(consultar_auditoria(tmp_path)) == 15
+
+    def test_consulta_ignora_arquivos_fora_do_intervalo(self, tmp_path):
+        sink = AuditSink(tmp_path, max_bytes=1, intervalo_flush=60.0)
+        self._registrar(sink, 5)
+        sink.flush()
+        time.sleep(0.05)
+        corte = datetime.now(timezone.utc)
+        time.sleep(0.05)
+        self._registrar(sink, 7)
+        sink.flush()
+        sink.fechar()
+
+        arquivos = arquivos_no_intervalo(tmp_path, corte.timestamp(), float("inf"))
+        assert len(arquivos) == 1
+        assert len(consultar_auditoria(tmp_path, inicio=corte)) == 7
+        assert len(consultar_auditoria(tmp_path, fim=corte)) == 5
+
+    def test_fechar_grava_pendentes(self, tmp_path):
+        sink = AuditSink(tmp_path, intervalo_flush=60.0)
+        self._registrar(sink, 4)
+        sink.fechar()
+        assert len(consultar_auditoria(tmp_path)) == 4
+
+    def test_falha_de_escrita_devolve_lotes_a_fila(self, sink, tmp_path, monkeypatch):
+        """Erro no executemany/rotação não perde decisões: elas são regravadas no flush seguinte."""
+        ids = self._registrar(sink, 5)
+
+        def rotacao_quebrada(primeiro_ts):
+            raise OSError("disco cheio")
+
+        with monkeypatch.context() as m:
+            m.setattr(sink, "_rotacionar", rotacao_quebrada)
+            with pytest.raises(OSError):
+                sink.flush()
+        assert sink.estatisticas()["falhas_escrita"] == 1
+        assert sink.estatisticas()["lotes_pendentes"] == 1
+
+        ids += self._registrar(sink, 3)
+        assert sink.flush() == 8
+        assert list(consultar_auditoria(tmp_path)["prediction_id"]) == ids
+        assert sink.estatisticas()["gravadas"] == 8
+
+    def test_fila_em_memoria_limitada(self, tmp_path):
+        sink = AuditSink(tmp_path, intervalo_flush=60.0, max_lotes_memoria=2)
+        try:
+            for _ in range(4):
+                self._registrar(sink, 10)
+            assert sink.estatisticas()["descartadas"] == 20
+            assert sink.flush() == 20
+        finally:
+            sink.fechar()
+
@@ -0,0 +1,93 @@
+"""
+Testes do bundle de inferência (arquivo único com preprocessor, seleção e modelo).
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+lightgbm = pytest.importorskip("lightgbm")
+
+from src.features.feature_store import COLUNAS_ENTRADA, FeatureStore
+from src.models.bundle import BundleInferencia, BundleInvalido, criar_bundle
+from src.models.predictor import ModelProducao
+from src.utils.paths import data_path
+
+
+class _ModeloTreinado:
+    """Mesma interface usada por criar_bundle (model_name, version, _modelo)"""
+
+    def __init__(self, modelo):
+        self.model_name = "modelo_teste"
+        self.version = 3
+        self._modelo = modelo
+
+
+class TestBundleInferencia:
+    """Testes para criar_bundle e BundleInferencia."""
+
+    @pytest.fixture(scope="class")
+    def store(self):
+        return FeatureStore.load()
+
+    @pytest.fixture(scope="class")
+    def dados(self, store):
+        df = pd.read_csv(data_path("dados_novos.csv", "interim")).head(3000)
+        df = df[store.mascara_categorias_validas(df[COLUNAS_ENTRADA])]
+        return df[COLUNAS_ENTRADA], df["loan_status"]
+
+    @pytest.fixture(scope="class")
+    def modelo(self, store, dados):
+        X, y = dados
+        lgbm = lightgbm.LGBMClassifier(n_estimators=30, num_leaves=7, verbose=-1)
+        return _ModeloTreinado(lgbm.fit(store.transform(X), y))
+
+    @pytest.fixture
+    def caminho(self, store, modelo, tmp_path):
+        return criar_bundle(store, modelo, tmp_path / "teste.riskbundle", threshold=0.37)
+
+    def test_roundtrip_reproduz_transformacao_e_predicao(self, store, modelo, dados, caminho):
+        X, _ = dados
+        bundle = BundleInferencia(caminho)
+
+        assert (bundle.model_name, bundle.version, bundle.threshold) == ("modelo_teste", 3, 0.37)
+        X_bundle = bundle.transform(X)
+        X_ref = store.transform(X)
+        pd.testing.assert_frame_equal(X_bundle, X_ref)
+        np.testing.assert_array_equal(
+            bundle.modelo.predict_proba(X_bundle), modelo._modelo.predict_proba(X_ref)
+        )
+
+    def test_feature_store_e_modelo_do_mesmo_arquivo(self, modelo, dados, caminho):
+        X, _ = dados
+        bundle = BundleInferencia(caminho)
+        store = FeatureStore.from_bundle(bundle)
+        producao = ModelProducao(bundle=bundle)
+
+        assert (producao.model_name, producao.version) == ("modelo_teste", 3)
+        proba = producao.predict_proba(store.transform(X))
+        np.testing.assert_array_equal(proba, modelo._modelo.predict_proba(store.transform(X)))
+
+    def test_secao_corrompida_e_rejeitada(self, caminho):
+        conteudo = bytearray(caminho.read_bytes())
+        conteudo[-10] ^= 0xFF
+        caminho.write_bytes(bytes(conteudo))
+        with pytest.raises(BundleInvalido, match="seção"):
+            BundleInferencia(caminho)
+
+    def test_cabecalho_adulterado_e_rejeitado(self, caminho):
+        """Trocar o threshold no cabeçalho sem recalcular o checksum invalida o bundle."""
+        conteudo = caminho.read_bytes().replace(b'"threshold": 0.37', b'"threshold": 0.99', 1)
+        caminho.write_bytes(conteudo)
+        with pytest.raises(BundleInvalido, match="cabeçalho"):
+            BundleInferencia(caminho)
+
+    def test_arquivo_que_nao_e_bundle(self, tmp_path):
+        caminho = tmp_path / "outro.riskbundle"
+        caminho.write_bytes(b"\x00" * 64)
+        with pytest.raises(BundleInvalido):
+            BundleInferencia(caminho)
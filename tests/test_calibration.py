@@ -0,0 +1,161 @@
+"""
+Testes da calibração incremental (Platt e isotônica) e dos snapshots versionados.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models.calibration import (
+    CalibradorIsotonico,
+    CalibradorOnline,
+    CalibradorPlatt,
+    RepositorioCalibracao,
+)
+
+
+def _amostra_descalibrada(n: int = 20000, seed: int = 0):
+    """Probabilidades brutas superconfiantes: a verdadeira é sigmoid(0.5·logit(p) - 1)"""
+    rng = np.random.default_rng(seed)
+    z = rng.normal(0, 3, size=n)
+    prob_bruta = 1 / (1 + np.exp(-z))
+    prob_real = 1 / (1 + np.exp(-(0.5 * z - 1)))
+    y = (rng.uniform(size=n) < prob_real).astype(float)
+    return prob_bruta, y, prob_real
+
+
+class TestCalibradores:
+    """Testes para CalibradorPlatt, CalibradorIsotonico e CalibradorOnline."""
+
+    def test_platt_recupera_parametros(self):
+        prob, y, _ = _amostra_descalibrada()
+        platt = CalibradorPlatt()
+        platt.atualizar(prob, y)
+        assert platt.a == pytest.approx(0.5, abs=0.05)
+        assert platt.b == pytest.approx(-1.0, abs=0.1)
+
+    def test_isotonico_monotono_e_proximo_do_real(self):
+        prob, y, prob_real = _amostra_descalibrada()
+        isotonico = CalibradorIsotonico()
+        isotonico.atualizar(prob, y)
+        assert np.all(np.diff(isotonico.mapa) >= 0)
+        assert np.abs(isotonico.aplicar(prob) - prob_real).mean() < 0.03
+
+    @pytest.mark.parametrize("metodo", ["platt", "isotonico"])
+    def test_inverter_e_aplicar(self, metodo):
+        prob, y, _ = _amostra_descalibrada()
+        calibrador = CalibradorOnline(metodo)
+        calibrador.atualizar(prob, y)
+        for threshold in (0.1, 0.42, 0.7):
+            bruto = calibrador.inverter(threshold)
+            # Acima do corte bruto, a calibrada atinge o threshold; abaixo, não
+            assert calibrador.aplicar(np.array([bruto * 1.001]))[0] >= threshold - 1e-6
+            assert calibrador.aplicar(np.array([bruto * 0.999]))[0] <= threshold + 1e-6
+
+    def test_atualizacao_incremental_equivale_a_lote_unico(self):
+        """Isotônica sem esquecimento: atualizar em partes dá o mesmo estado de uma vez."""
+        prob, y, _ = _amostra_descalibrada()
+        unico, partes = CalibradorIsotonico(), CalibradorIsotonico()
+        unico.atualizar(prob, y)
+        for inicio in range(0, len(y), 777):
+            partes.atualizar(prob[inicio:inicio + 777], y[inicio:inicio + 777])
+        np.testing.assert_allclose(unico.mapa, partes.mapa)
+
+    def test_metricas_prequenciais_melhoram(self):
+        prob, y, _ = _amostra_descalibrada()
+        calibrador = CalibradorOnline()
+        calibrador.atualizar(prob, y)
+        metricas = calibrador.resumo_metricas()
+        assert metricas["isotonico"]["log_loss"] < metricas["bruto"]["log_loss"]
+        assert metricas["platt"]["brier"] < metricas["bruto"]["brier"]
+
+
+class TestRepositorioCalibracao:
+    """Testes para snapshots versionados, ativação e rollback."""
+
+    def test_snapshots_ativacao_e_rollback(self, tmp_path):
+        prob, y, _ = _amostra_descalibrada()
+        repositorio = RepositorioCalibracao("modelo_teste", 3, diretorio=tmp_path)
+        assert repositorio.versao_ativa() is None
+
+        v1, _ = repositorio.atualizar(prob[:5000], y[:5000])
+        v2, calibrador = repositorio.atualizar(prob[5000:], y[5000:], metodo="platt", ativar=False)
+        assert (v1, v2) == (1, 2)
+        # Sem ativar: acumula dados, mas o ponteiro continua no snapshot anterior
+        assert repositorio.versao_ativa() == 1
+        assert calibrador.n_observacoes == len(y)
+
+        repositorio.ativar(2)
+        carregado, metadados = repositorio.carregar()
+        assert metadados["versao"] == 2 and carregado.metodo == "platt"
+        np.testing.assert_allclose(carregado.aplicar(prob[:100]), calibrador.aplicar(prob[:100]))
+
+        repositorio.ativar(1)
+        assert repositorio.versao_ativa() == 1
+        with pytest.raises(FileNotFoundError):
+            repositorio.ativar(9)
+
+
+class TestModelProducaoCalibrado:
+    """Calibração aplicada no ModelProducao sem recarregar o LightGBM."""
+
+    @pytest.fixture(scope="class")
+    def modelo(self):
+        pytest.importorskip("lightgbm")
+        from src.models.predictor import ModelProducao
+        return ModelProducao()
+
+    @pytest.fixture(scope="class")
+    def X(self):
+        from src.data.datasets import carregar_dataset
+        from src.features.feature_store import FeatureStore
+        return carregar_dataset("X_test", colunas=FeatureStore.load().selected_features).iloc[:500]
+
+    def test_troca_de_calibracao(self, modelo, X):
+        bruto = modelo.predict_proba(X)[:, 1]
+        calibrador = CalibradorOnline("platt")
+        calibrador.platt.a, calibrador.platt.b = 0.5, -1.0
+
+        modelo.definir_calibracao(calibrador, versao=1)
+        try:
+            calibrado = modelo.predict_proba(X)[:, 1]
+            np.testing.assert_allclose(calibrado, calibrador.aplicar(bruto))
+            np.testing.assert_allclose(modelo.predict_proba(X, calibrar=False)[:, 1], bruto)
+            np.testing.assert_allclose(modelo.classificar(X, 0.42), (calibrado >= 0.42).astype(int))
+        finally:
+            modelo.definir_calibracao(None)
+        np.testing.assert_allclose(modelo.predict_proba(X)[:, 1], bruto)
+
+
+class TestEndpointsCalibracao:
+    """Feedback e ativação de calibração mudam o score servido: só com X-Admin-Token."""
+
+    @pytest.fixture
+    def cliente(self):
+        pytest.importorskip("fastapi")
+        from fastapi.testclient import TestClient
+
+        from src.api import app as modulo_app
+        return TestClient(modulo_app.app), modulo_app
+
+    def test_exigem_token_de_admin(self, cliente, monkeypatch):
+        cliente, modulo_app = cliente
+        feedback = {"records": [{}], "rotulos": [1]}
+
+        monkeypatch.setattr(modulo_app, "ADMIN_TOKEN", None)
+        assert cliente.post("/calibration/feedback", json=feedback).status_code == 404
+        assert cliente.post("/calibration/ativar", json={"versao": 1}).status_code == 404
+
+        monkeypatch.setattr(modulo_app, "ADMIN_TOKEN", "segredo")
+        assert cliente.post("/calibration/feedback", json=feedback).status_code == 403
+        resposta = cliente.post("/calibration/ativar", json={"versao": 1}, headers={"X-Admin-Token": "errado"})
+        assert resposta.status_code == 403
+
+    def test_feedback_nao_ativa_por_padrao(self):
+        pytest.importorskip("fastapi")
+        from src.api.app import CalibracaoInput
+
+        assert CalibracaoInput(records=[], rotulos=[]).ativar is False
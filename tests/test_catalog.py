@@ -0,0 +1,161 @@
+"""
+Testes do catálogo SQLite do file store do MLflow (atualização incremental e consultas).
+"""
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models.catalog import CatalogoExperimentos
+
+
+def _run(mlruns: Path, experimento: str, run_id: str, params: dict, metricas: dict, tags: dict = None) -> Path:
+    pasta = mlruns / experimento / run_id
+    for sub in ("params", "metrics", "tags"):
+        (pasta / sub).mkdir(parents=True, exist_ok=True)
+    (pasta / "meta.yaml").write_text(yaml.safe_dump({
+        "run_id": run_id, "run_name": f"nome_{run_id}", "experiment_id": experimento, "status": 3,
+        "lifecycle_stage": "active", "user_id": "teste", "start_time": 1765571898400, "end_time": 1765571909001,
+    }))
+    for chave, valor in params.items():
+        (pasta / "params" / chave).write_text(str(valor))
+    for chave, valores in metricas.items():
+        # Lista de (valor, step); timestamps crescentes
+        linhas = [f"{1765571900000 + i} {v} {s}" for i, (v, s) in enumerate(valores)]
+        (pasta / "metrics" / chave).write_text("\n".join(linhas) + "\n")
+    for chave, valor in (tags or {}).items():
+        (pasta / "tags" / chave).write_text(valor)
+    return pasta
+
+
+@pytest.fixture
+def mlruns(tmp_path):
+    base = tmp_path / "mlruns"
+    for experimento, nome in (("1", "Exp_A"), ("2", "Exp_B")):
+        (base / experimento).mkdir(parents=True)
+        (base / experimento / "meta.yaml").write_text(yaml.safe_dump({"name": nome, "experiment_id": experimento}))
+    _run(base, "1", "r1", {"max_bin": 255, "num_leaves": 31, "boosting": "gbdt"}, {"ks": [(0.70, 0)], "auc": [(0.90, 0)]})
+    _run(base, "1", "r2", {"max_bin": 477, "num_leaves": 63, "boosting": "gbdt"},
+         {"ks": [(0.60, 0), (0.75, 1)], "auc": [(0.93, 0)]}, {"model_type": "LightGBM"})
+    _run(base, "2", "r3", {"max_bin": 477, "num_leaves": 15, "boosting": "dart"}, {"ks": [(0.72, 0)]})
+    # Modelos logados (MLflow 3) ficam em <experimento>/models e não são runs
+    (base / "1" / "models" / "m-abc" / "params").mkdir(parents=True)
+
+    registro = base / "models" / "modelo"
+    for versao, run_id in ((1, "r1"), (2, "r2")):
+        (registro / f"version-{versao}").mkdir(parents=True)
+        (registro / f"version-{versao}" / "meta.yaml").write_text(yaml.safe_dump(
+            {"version": versao, "run_id": run_id, "model_id": f"m-{versao}", "status": "READY"}
+        ))
+    (registro / "aliases").mkdir()
+    (registro / "aliases" / "Production").write_text("2")
+    return base
+
+
+def _tocar(caminho: Path, avancar_s: float = 5.0) -> None:
+    """Avança o mtime (a resolução do sistema de arquivos pode não separar escritas seguidas)"""
+    st = caminho.stat()
+    os.utime(caminho, ns=(st.st_atime_ns, st.st_mtime_ns + int(avancar_s * 1e9)))
+
+
+class TestAtualizacao:
+    """Testes para a indexação incremental por mtime."""
+
+    def test_indexa_e_so_rele_o_que_mudou(self, tmp_path, mlruns):
+        with CatalogoExperimentos(tmp_path / "catalogo.sqlite", mlruns) as catalogo:
+            assert catalogo.atualizar() == {"runs_lidos": 3, "runs_inalterados": 0, "runs_removidos": 0,
+                                            "modelos_lidos": 1, "modelos_inalterados": 0}
+            assert catalogo.atualizar()["runs_inalterados"] == 3
+
+            # Novo ponto de métrica em r1 e remoção de r3
+            with open(mlruns / "1" / "r1" / "metrics" / "ks", "a") as f:
+                f.write("1765571999999 0.8 1\n")
+            _tocar(mlruns / "1" / "r1" / "metrics" / "ks")
+            shutil.rmtree(mlruns / "2" / "r3")
+            estatisticas = catalogo.atualizar()
+            assert (estatisticas["runs_lidos"], estatisticas["runs_inalterados"], estatisticas["runs_removidos"]) == (1, 1, 1)
+            assert estatisticas["modelos_inalterados"] == 1
+
+            top = catalogo.top("ks", k=5)
+            assert list(top["run_id"]) == ["r1", "r2"]
+            assert top["ks"].tolist() == [0.8, 0.75]
+
+        # O catálogo persiste entre processos
+        with CatalogoExperimentos(tmp_path / "catalogo.sqlite", mlruns) as catalogo:
+            assert catalogo.atualizar()["runs_lidos"] == 0
+            assert len(catalogo.runs()) == 2
+
+    def test_registry_incremental(self, tmp_path, mlruns):
+        with CatalogoExperimentos(tmp_path / "catalogo.sqlite", mlruns) as catalogo:
+            catalogo.atualizar()
+            (mlruns / "models" / "modelo" / "aliases" / "Student").write_text("1")
+            assert catalogo.atualizar()["modelos_lidos"] == 1
+
+            versoes = catalogo.versoes("modelo")
+            assert versoes[["version", "aliases", "run_name"]].values.tolist() == [
+                [1, "Student", "nome_r1"], [2, "Production", "nome_r2"]
+            ]
+
+
+class TestConsultas:
+    """Testes para top, filtros de params, runs no formato largo e diff entre versões."""
+
+    @pytest.fixture
+    def catalogo(self, tmp_path, mlruns):
+        catalogo = CatalogoExperimentos(tmp_path / "catalogo.sqlite", mlruns)
+        catalogo.atualizar()
+        yield catalogo
+        catalogo.fechar()
+
+    def test_top_com_filtros(self, catalogo):
+        # Último valor de cada métrica: maior step
+        top = catalogo.top("ks", k=2)
+        assert list(top["run_id"]) == ["r2", "r3"] and top["ks"].tolist() == [0.75, 0.72]
+        assert top.loc[0, "versoes"] == "modelo v2" and top.loc[0, "experimento"] == "Exp_A"
+
+        assert list(catalogo.top("ks", maior=False)["run_id"]) == ["r1", "r3", "r2"]
+        assert list(catalogo.top("ks", filtros=["max_bin=477"])["run_id"]) == ["r2", "r3"]
+        assert list(catalogo.top("ks", filtros=["max_bin>=300", "num_leaves<63"])["run_id"]) == ["r3"]
+        assert list(catalogo.top("ks", filtros=["boosting!=dart"])["run_id"]) == ["r2", "r1"]
+        assert list(catalogo.top("ks", experimento="Exp_B")["run_id"]) == ["r3"]
+        assert catalogo.top("inexistente").empty
+
+        with pytest.raises(ValueError):
+            catalogo.top("ks", filtros=["boosting>dart"])
+        with pytest.raises(ValueError):
+            catalogo.top("ks", filtros=["sem operador"])
+
+    def test_runs_formato_largo(self, catalogo):
+        runs = catalogo.runs(filtros=["num_leaves>20"]).set_index("run_id")
+        assert list(runs.index) == ["r1", "r2"]
+        assert runs.loc["r2", "params.max_bin"] == "477" and runs.loc["r2", "metrics.ks"] == 0.75
+        assert runs.loc["r2", "tags.model_type"] == "LightGBM" and runs.loc["r1", "experimento"] == "Exp_A"
+
+    def test_diff_versoes(self, catalogo):
+        diff = catalogo.diff_versoes("modelo", 1, 2)
+        linhas = {(r.tipo, r.chave): (r.v1, r.v2) for r in diff.itertuples()}
+        assert linhas == {
+            ("param", "max_bin"): ("255", "477"),
+            ("param", "num_leaves"): ("31", "63"),
+            ("metric", "ks"): (0.70, 0.75),
+            ("metric", "auc"): (0.90, 0.93),
+            ("tag", "model_type"): (None, "LightGBM"),
+        }
+        assert len(catalogo.diff_versoes("modelo", 1, 2, todas=True)) == 6
+
+        with pytest.raises(KeyError):
+            catalogo.diff_versoes("modelo", 1, 9)
+
+    def test_exportar_parquet(self, catalogo, tmp_path):
+        pytest.importorskip("pyarrow")
+        arquivos = catalogo.exportar_parquet(tmp_path / "parquet")
+
+        runs = pd.read_parquet(arquivos["runs"])
+        assert len(runs) == 3 and runs["metrics.ks"].max() == 0.75
+        assert len(pd.read_parquet(arquivos["versoes"])) == 2
@@ -0,0 +1,225 @@
+"""
+Testes do cliente da API (síncrono e asyncio) contra um servidor HTTP local que imita /predict e /predict_batch.
+"""
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.client.sdk import ClienteRisco, ClienteRiscoAsync, ErroAPI, ResultadoLote, ResultadoPredicao
+
+
+def _pontuar(registro, threshold):
+    if registro.get("loan_amnt") is None or registro["loan_amnt"] < 0:
+        return {"status": "erro", "codigo": "valor_invalido", "erro": "loan_amnt inválido"}
+    p = registro["loan_amnt"] / 1e6
+    return {"status": "ok", "prediction_id": f"id{registro['loan_amnt']:g}", "probabilidade_default": p,
+            "classificacao": "Alto Risco" if p >= threshold else "Baixo Risco", "confianca": abs(p - threshold)}
+
+
+class _APILocal:
+    """API falsa: probabilidade = loan_amnt / 1e6; `falhas` respostas 503 antes de responder"""
+
+    def __init__(self, falhas: int = 0, status_falha: int = 503):
+        self.falhas = falhas
+        self.status_falha = status_falha
+        self.requisicoes = []
+        self._lock = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _responder(self, status, corpo, headers=()):
+                dados = json.dumps(corpo).encode()
+                self.send_response(status)
+                for nome, valor in headers:
+                    self.send_header(nome, valor)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def do_GET(self):
+                self._responder(200, {"status": "ok"})
+
+            def do_POST(self):
+                corpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with api._lock:
+                    api.requisicoes.append((self.path, corpo))
+                    falhar = api.falhas > 0
+                    api.falhas -= falhar
+                if falhar:
+                    return self._responder(api.status_falha, {"detail": "ocupado"}, [("Retry-After", "0")])
+
+                threshold = corpo.get("threshold", 0.42)
+                meta = {"threshold_usado": threshold, "model_name": "lgb_prob_default", "model_version": 7}
+                if self.path == "/predict":
+                    resultado = _pontuar(corpo["features"], threshold)
+                    if resultado["status"] != "ok":
+                        return self._responder(400, {"detail": f"invalid input: {resultado['erro']}"})
+                    return self._responder(200, {**resultado, **meta})
+                self._responder(200, {"results": [_pontuar(r, threshold) for r in corpo["records"]], **meta})
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}"
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def caminhos(self):
+        return [caminho for caminho, _ in self.requisicoes]
+
+
+@pytest.fixture
+def api():
+    criadas = []
+
+    def criar(**kwargs):
+        criadas.append(_APILocal(**kwargs))
+        return criadas[-1]
+
+    yield criar
+    for instancia in criadas:
+        instancia.servidor.shutdown()
+        instancia.servidor.server_close()
+
+
+def _registros(n: int = 200) -> pd.DataFrame:
+    return pd.DataFrame({"loan_amnt": np.arange(n, dtype=float) * 1000, "person_income": 50000.0,
+                         "loan_status": 1})
+
+
+class TestClienteRisco:
+    """Testes para o cliente síncrono (resultado tipado, novas tentativas, lotes e agrupamento)."""
+
+    def test_predict_tipado(self, api):
+        servidor = api()
+        with ClienteRisco(servidor.url, model_version=7) as cliente:
+            resultado = cliente.predict({"loan_amnt": 500000.0})
+
+        assert isinstance(resultado, ResultadoPredicao)
+        assert resultado.probabilidade_default == 0.5 and resultado.classificacao == "Alto Risco"
+        assert resultado.nivel_risco == "Médio" and resultado.model_version == 7
+        assert resultado.como_dict()["probabilidade_percentual"] == 50.0
+        assert servidor.requisicoes[0][1] == {"features": {"loan_amnt": 500000.0}, "threshold": 0.42, "model_version": 7}
+
+    def test_repete_503_e_nao_repete_400(self, api):
+        servidor = api(falhas=2)
+        with ClienteRisco(servidor.url, max_tentativas=3) as cliente:
+            assert cliente.predict({"loan_amnt": 1000.0}).probabilidade_default == 0.001
+            assert len(servidor.requisicoes) == 3
+
+            with pytest.raises(ErroAPI) as erro:
+                cliente.predict({"loan_amnt": -1.0})
+        assert erro.value.status_code == 400 and "invalid input" in str(erro.value)
+        assert len(servidor.requisicoes) == 4
+
+    def test_tentativas_esgotadas(self, api):
+        servidor = api(falhas=10, status_falha=429)
+        with ClienteRisco(servidor.url, max_tentativas=2) as cliente:
+            with pytest.raises(ErroAPI) as erro:
+                cliente.predict({"loan_amnt": 1000.0})
+        assert erro.value.status_code == 429 and len(servidor.requisicoes) == 2
+
+    def test_predict_batch_em_chunks_paralelos(self, api):
+        servidor = api()
+        df = _registros()
+        df.loc[7, "loan_amnt"] = np.nan
+        progresso = []
+
+        with ClienteRisco(servidor.url) as cliente:
+            lote = cliente.predict_batch(df, tamanho_chunk=30, paralelo=4, progresso=lambda c, t: progresso.append((c, t)))
+
+        assert len(lote) == len(df) and len(servidor.requisicoes) == 7
+        assert progresso[-1] == (7, 7)
+        # Só as colunas de entrada são enviadas; NaN vira null
+        assert set(servidor.requisicoes[0][1]["records"][0]) == {"loan_amnt", "person_income"}
+        assert lote.probabilidade_default.dtype == np.float64 and np.isnan(lote.probabilidade_default[7])
+        np.testing.assert_allclose(np.delete(lote.probabilidade_default, 7), np.delete(df["loan_amnt"].to_numpy() / 1e6, 7))
+        assert lote.resumo() == {"ok": 199, "valor_invalido": 1}
+        assert list(lote.como_dataframe(index=df.index).columns[:3]) == ["status", "codigo", "erro"]
+
+    def test_agrupa_predicts_de_varias_threads(self, api):
+        servidor = api()
+        with ClienteRisco(servidor.url, agrupar=True, agrupar_max_lote=16, agrupar_espera_ms=50) as cliente:
+            with ThreadPoolExecutor(32) as executor:
+                futuros = [executor.submit(cliente.predict, {"loan_amnt": float(v)}) for v in range(1000, 33000, 1000)]
+                resultados = [f.result() for f in futuros]
+
+            with pytest.raises(ErroAPI, match="valor_invalido"):
+                cliente.predict({"loan_amnt": -5.0})
+
+        assert [r.probabilidade_default for r in resultados] == pytest.approx([v / 1e6 for v in range(1000, 33000, 1000)])
+        assert set(servidor.caminhos()) == {"/predict_batch"}
+        assert len(servidor.requisicoes) < 32 - 1
+        assert max(len(corpo["records"]) for _, corpo in servidor.requisicoes) <= 16
+
+
+class TestResultadoLote:
+    """Conversão da resposta do /predict_batch."""
+
+    def test_versao_ausente_fica_none(self):
+        corpo = {"threshold_usado": 0.42, "results": [_pontuar({"loan_amnt": 1000.0}, 0.42)]}
+        lote = ResultadoLote.de_resposta(corpo)
+        assert lote.model_version.tolist() == [None]
+        assert lote.predicao(0).model_version is None
+
+        com_versao = ResultadoLote.de_resposta({**corpo, "model_version": 7})
+        juntos = ResultadoLote.concatenar([lote, com_versao])
+        assert juntos.model_version.tolist() == [None, 7]
+        assert juntos.predicao(1).model_version == 7
+
+    def test_importar_o_cliente_nao_carrega_o_feature_store(self):
+        codigo = "import sys; import src.client.sdk; print('src.features.feature_store' in sys.modules)"
+        saida = subprocess.run([sys.executable, "-c", codigo], cwd=Path(__file__).parent.parent,
+                               capture_output=True, text=True, check=True)
+        assert saida.stdout.strip() == "False"
+
+
+class TestClienteRiscoAsync:
+    """Testes para o cliente asyncio (httpx)."""
+
+    @pytest.fixture(autouse=True)
+    def _httpx(self):
+        pytest.importorskip("httpx")
+
+    def test_predict_e_lote(self, api):
+        servidor = api(falhas=1)
+
+        async def rodar():
+            async with ClienteRiscoAsync(servidor.url) as cliente:
+                unico = await cliente.predict({"loan_amnt": 420000.0})
+                lote = await cliente.predict_batch(_registros(), tamanho_chunk=50, paralelo=2)
+            return unico, lote
+
+        unico, lote = asyncio.run(rodar())
+        assert unico.classificacao == "Alto Risco"
+        np.testing.assert_allclose(lote.probabilidade_default, _registros()["loan_amnt"] / 1e6)
+        assert servidor.caminhos().count("/predict_batch") == 4
+
+    def test_agrupa_tasks(self, api):
+        servidor = api()
+
+        async def rodar():
+            async with ClienteRiscoAsync(servidor.url, agrupar=True, agrupar_max_lote=10, agrupar_espera_ms=20) as cliente:
+                return await asyncio.gather(
+                    *(cliente.predict({"loan_amnt": float(v)}) for v in [-1] + list(range(1000, 25000, 1000))),
+                    return_exceptions=True,
+                )
+
+        resultados = asyncio.run(rodar())
+        assert isinstance(resultados[0], ErroAPI) and resultados[0].status_code == 400
+        assert [r.probabilidade_default for r in resultados[1:]] == pytest.approx([v / 1e6 for v in range(1000, 25000, 1000)])
+        assert [len(corpo["records"]) for _, corpo in servidor.requisicoes] == [10, 10, 5]
@@ -0,0 +1,71 @@
+"""
+Testes da camada de datasets processados (Parquet/Feather).
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data import datasets
+from src.utils import paths
+
+
+class TestDatasetsProcessados:
+    """Testes de conversão, projeção e filtros dos datasets."""
+
+    @pytest.fixture(autouse=True)
+    def data_dir_temporario(self, tmp_path, monkeypatch):
+        """Redireciona data/ para um diretório temporário."""
+        monkeypatch.setattr(paths, "DATA_DIR", tmp_path)
+        return tmp_path
+
+    @pytest.fixture
+    def X(self):
+        rng = np.random.default_rng(42)
+        return pd.DataFrame(
+            {
+                "loan_amnt": rng.normal(size=1000),
+                "loan_grade": rng.integers(0, 7, size=1000).astype(float),
+                "person_income": rng.normal(size=1000),
+            },
+            index=rng.permutation(5000)[:1000],
+        )
+
+    @pytest.mark.parametrize("formato", ["parquet", "feather"])
+    def test_roundtrip_preserva_indice(self, X, formato):
+        """Salvar e carregar deve devolver o mesmo DataFrame, com índice original."""
+        datasets.salvar_dataset(X, "X_train", formato, row_group_size=128)
+        carregado = datasets.carregar_dataset("X_train", formato=formato)
+        pd.testing.assert_frame_equal(X, carregado)
+
+    @pytest.mark.parametrize("formato", ["parquet", "feather", "pickle"])
+    def test_projecao_e_filtro(self, X, formato):
+        """Projeção de colunas e filtros retornam apenas o subconjunto pedido."""
+        datasets.salvar_dataset(X, "X_train", formato, row_group_size=128)
+        carregado = datasets.carregar_dataset(
+            "X_train",
+            colunas=["loan_amnt"],
+            filtros=[("loan_grade", ">=", 3.0)],
+            formato=formato,
+        )
+        esperado = X.loc[X["loan_grade"] >= 3.0, ["loan_amnt"]]
+        pd.testing.assert_frame_equal(esperado, carregado)
+
+    def test_series_e_migracao(self):
+        """Alvos (Series) são migrados do pickle e reconstruídos como Series."""
+        y = pd.Series([0, 1, 1, 0], index=[10, 3, 7, 1], name="loan_status")
+        y.to_pickle(paths.processed_path("y_train", "pickle"))
+
+        gerados = datasets.migrar_pickles(nomes=["y_train"])
+
+        assert [p.suffix for p in gerados["y_train"]] == [".parquet", ".feather"]
+        # Sem formato explícito, o feather (mmap) tem prioridade
+        pd.testing.assert_series_equal(y, datasets.carregar_dataset("y_train"))
+
+    def test_dataset_inexistente(self):
+        with pytest.raises(FileNotFoundError):
+            datasets.carregar_dataset("X_inexistente")
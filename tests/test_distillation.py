@@ -0,0 +1,167 @@
+"""
+Testes da destilação (aluno treinado na probabilidade do professor), do modo escalonado e do registro de versões.
+"""
+import sys
+from pathlib import Path
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import distillation, loader_model
+from src.models.calibration import CalibradorOnline
+from src.models.distillation import ModeloEscalonado
+
+
+def _dados(n: int = 3000, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, 4)), columns=["a", "b", "c", "d"])
+    y = (X["a"] + 0.5 * X["b"] * X["c"] + rng.normal(scale=0.7, size=n) > 0.3).astype(int)
+    return X, y
+
+
+class _ModeloFixo:
+    """Probabilidade bruta = coluna "p"; conta as linhas pontuadas"""
+
+    def __init__(self, model_name="m", version=1, deslocamento=0.0):
+        self.model_name = model_name
+        self.version = version
+        self.backend = "lightgbm"
+        self.deslocamento = deslocamento
+        self.linhas = []
+        self.calibracao = None
+        self.versao_calibracao = None
+
+    def definir_calibracao(self, calibracao, versao=None):
+        self.calibracao, self.versao_calibracao = calibracao, versao
+
+    def predict_proba(self, X, calibrar=True):
+        self.linhas.extend(X.index)
+        prob = X["p"].to_numpy() + self.deslocamento
+        if calibrar and self.calibracao is not None:
+            prob = self.calibracao.aplicar(prob)
+        return np.column_stack([1 - prob, prob])
+
+
+class TestDestilacao:
+    """Testes para treinar_aluno, aumentar_dados e a escolha da margem."""
+
+    def test_aluno_imita_professor(self):
+        X, y = _dados()
+        professor = lgb.LGBMClassifier(n_estimators=100, learning_rate=0.05, verbose=-1).fit(X, y)
+        p_professor = professor.predict_proba(X)[:, 1]
+
+        aluno = distillation.treinar_aluno(X, p_professor, n_arvores=50, num_leaves=15)
+        p_aluno = aluno.predict_proba(X)[:, 1]
+
+        assert aluno.booster_.num_trees() == 50
+        assert np.mean(np.abs(p_aluno - p_professor)) < 0.06
+        assert distillation.concordancia(p_aluno, p_professor, 0.42) > 0.93
+
+    def test_aumentar_dados(self):
+        X, _ = _dados(500)
+        aumentado = distillation.aumentar_dados(X, copias=2, prob_troca=0.3)
+
+        assert len(aumentado) == 1500 and list(aumentado.columns) == list(X.columns)
+        pd.testing.assert_frame_equal(aumentado.iloc[:500], X)
+        copia = aumentado.iloc[500:1000].to_numpy()
+        # Cerca de 30% dos valores trocados; os valores continuam vindo da própria coluna
+        assert 0.25 < np.mean(copia != X.to_numpy()) < 0.35
+        assert np.isin(copia[:, 0], X["a"].to_numpy()).all()
+
+    def test_margem_para_concordancia(self):
+        p_professor = np.array([0.1, 0.5, 0.9, 0.45, 0.3, 0.41, 0.8, 0.2, 0.6, 0.05])
+        p_aluno = np.array([0.1, 0.40, 0.9, 0.45, 0.3, 0.43, 0.8, 0.2, 0.3, 0.05])
+        # Discordâncias a 0.02, 0.01 e 0.12 do threshold
+
+        assert distillation.margem_para_concordancia(p_aluno, p_professor, 0.42, 1.0) == pytest.approx(0.12, abs=1e-5)
+        assert distillation.margem_para_concordancia(p_aluno, p_professor, 0.42, 0.9) == pytest.approx(0.02, abs=1e-5)
+        assert distillation.margem_para_concordancia(p_aluno, p_professor, 0.42, 0.7) == 0.0
+
+        margem = distillation.margem_para_concordancia(p_aluno, p_professor, 0.42, 1.0)
+        p_final, escaladas = distillation.escalonar(p_aluno, p_professor, 0.42, margem)
+        assert distillation.concordancia(p_final, p_professor, 0.42) == 1.0 and escaladas.sum() == 5
+
+        relatorio = distillation.avaliar(p_aluno, p_professor, 0.42, margens=[0.0, margem])
+        assert relatorio["concordancia"] == 0.7
+        assert [m["concordancia"] for m in relatorio["escalonamento"]] == [0.7, 1.0]
+
+
+class TestModeloEscalonado:
+    """Testes para o ModeloEscalonado (aluno primeiro, professor perto do threshold)."""
+
+    def _modelo(self, margem=0.05):
+        professor = _ModeloFixo("lgb_prob_default", 7)
+        aluno = _ModeloFixo("lgb_prob_default", 8, deslocamento=0.01)
+        return ModeloEscalonado(professor, aluno, threshold=0.42, margem=margem), professor, aluno
+
+    def test_escala_so_perto_do_threshold(self):
+        escalonado, professor, aluno = self._modelo()
+        X = pd.DataFrame({"p": [0.05, 0.40, 0.44, 0.9, 0.46]})
+
+        prob = escalonado.predict_proba(X)[:, 1]
+
+        assert escalonado.model_name == "lgb_prob_default" and escalonado.version == 7
+        assert len(aluno.linhas) == 5 and professor.linhas == [1, 2]
+        np.testing.assert_allclose(prob, [0.06, 0.40, 0.44, 0.91, 0.47])
+        assert list(escalonado.classificar(X, 0.42)) == [0, 0, 1, 1, 1]
+        assert escalonado.estatisticas()["escaladas"] == 2 + 2
+        assert escalonado.estatisticas()["fracao_escalada"] == 0.4
+
+    def test_calibracao_do_professor(self):
+        escalonado, professor, _ = self._modelo(margem=0.02)
+        calibracao = CalibradorOnline(metodo="platt")
+        rng = np.random.default_rng(1)
+        p = rng.uniform(0.05, 0.95, 2000)
+        calibracao.atualizar(p, (rng.uniform(size=2000) < p ** 2).astype(int))
+        escalonado.definir_calibracao(calibracao, 3)
+
+        assert professor.versao_calibracao == 3 and escalonado.calibracao is calibracao
+        # A faixa fica em torno do threshold levado para a escala bruta
+        limiar = calibracao.inverter(0.42)
+        X = pd.DataFrame({"p": [limiar - 0.01, 0.05, 0.95]})
+        prob = escalonado.predict_proba(X)[:, 1]
+        assert professor.linhas == [0]
+        np.testing.assert_allclose(prob[1:], calibracao.aplicar(np.array([0.06, 0.96])))
+
+        # Saída bruta (usada para ajustar a calibração) vem só do professor
+        bruta = escalonado.predict_proba(X, calibrar=False)[:, 1]
+        np.testing.assert_allclose(bruta, X["p"])
+
+
+class TestRegistrarVersao:
+    """Testes para registrar_versao no layout do file store do MLflow."""
+
+    def test_registra_versao_e_alias(self, tmp_path, monkeypatch):
+        (tmp_path / "123" / "run0").mkdir(parents=True)
+        registro = tmp_path / "models" / "modelo"
+        (registro / "version-3").mkdir(parents=True)
+        (registro / "version-3" / "meta.yaml").write_text(yaml.safe_dump({"run_id": "run0", "version": 3}))
+        (registro / "aliases").mkdir()
+        (registro / "aliases" / "Production").write_text("3")
+        (registro / "meta.yaml").write_text(yaml.safe_dump({"aliases": {"Production": "3"}, "name": "modelo"}))
+        monkeypatch.setattr(loader_model, "MLRUNS_BASE", tmp_path)
+
+        X, y = _dados(500)
+        modelo = lgb.LGBMClassifier(n_estimators=10, verbose=-1).fit(X, y)
+        versao = loader_model.registrar_versao(
+            "modelo", modelo, run_id_origem="run0", run_name="Destilacao_v3",
+            params={"n_estimators": 10}, metricas={"margem_escalonamento": 0.125}, tags={"descricao": "aluno"},
+            alias="Student",
+        )
+
+        assert versao == 4
+        assert loader_model.resolve_model_version("modelo", alias="Student") == 4
+        assert loader_model.resolve_model_version("modelo") == 3
+        assert loader_model.listar_modelos()["modelo"] == {"versoes": [3, 4], "aliases": {"Production": 3, "Student": 4}}
+        with open(registro / "meta.yaml") as f:
+            assert yaml.safe_load(f)["aliases"] == {"Production": "3", "Student": "4"}
+
+        carregado = loader_model.load_production_model("modelo", 4)
+        np.testing.assert_allclose(carregado.predict_proba(X), modelo.predict_proba(X))
+        assert distillation.margem_registrada("modelo", 4) == 0.125
+        assert distillation.margem_registrada("modelo", 3) == distillation.MARGEM_PADRAO
@@ -0,0 +1,94 @@
+"""
+Testes do monitor de drift (histogramas fixos, PSI e KS).
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.monitoring.drift import MonitorDrift, calcular_bordas
+
+
+class TestMonitorDrift:
+    """Testes para o MonitorDrift."""
+
+    @pytest.fixture
+    def referencia(self):
+        rng = np.random.default_rng(0)
+        X = np.column_stack([
+            rng.normal(size=20000),                    # contínua
+            rng.integers(0, 4, size=20000).astype(float),  # ordinal
+        ])
+        return X
+
+    @pytest.fixture
+    def monitor(self, referencia):
+        bordas = [calcular_bordas(referencia[:, j]) for j in range(referencia.shape[1])]
+        monitor = MonitorDrift(["continua", "ordinal"], bordas)
+        monitor._referencia = monitor._contar(referencia).astype(float)
+        return monitor
+
+    def test_bordas_discretas_um_bin_por_valor(self, referencia):
+        """Features ordinais ganham um bin por categoria."""
+        np.testing.assert_allclose(calcular_bordas(referencia[:, 1]), [0.5, 1.5, 2.5])
+
+    def test_lote_equivale_a_linha_a_linha(self, monitor, referencia):
+        """Atualização vetorizada e caminho de linha única produzem as mesmas contagens."""
+        lote = referencia[:500]
+        monitor.atualizar(lote)
+        contagens_lote = monitor._contagens.copy()
+
+        monitor.resetar()
+        for linha in lote:
+            monitor.atualizar(linha[None, :])
+
+        np.testing.assert_array_equal(contagens_lote, monitor._contagens)
+
+    def test_psi_baixo_sem_drift_e_alto_com_drift(self, monitor):
+        rng = np.random.default_rng(1)
+        monitor.atualizar(np.column_stack([rng.normal(size=5000), rng.integers(0, 4, size=5000)]))
+        estavel = monitor.relatorio()["features"]
+
+        monitor.resetar()
+        monitor.atualizar(np.column_stack([rng.normal(1.0, size=5000), np.zeros(5000)]))
+        deslocado = monitor.relatorio()["features"]
+
+        assert estavel["continua"]["psi"] < 0.01
+        assert deslocado["continua"]["psi"] > 0.25
+        assert deslocado["ordinal"]["ks"] > 0.5
+
+    def test_colunas_incompativeis(self, monitor):
+        with pytest.raises(ValueError):
+            monitor.atualizar(np.zeros((3, 5)))
+
+
+class TestConstrucaoMonitor:
+    """Testes para a construção do monitor de drift no runtime da API (cooldown após falha)."""
+
+    def test_falha_espera_antes_de_nova_tentativa(self, monkeypatch):
+        from src.api import runtime
+
+        tentativas = []
+
+        def feature_store_quebrado():
+            tentativas.append(1)
+            raise FileNotFoundError("preprocessor.pkl")
+
+        monkeypatch.setattr(runtime, "obter_feature_store", feature_store_quebrado)
+        for nome, valor in (("_monitor_drift", None), ("_thread_drift", None), ("_falhas_drift", 0), ("_drift_retry_em", 0.0)):
+            monkeypatch.setattr(runtime, nome, valor)
+
+        assert runtime.obter_monitor_drift(bloquear=True) is None
+        assert runtime.obter_monitor_drift(bloquear=True) is None
+        assert len(tentativas) == 1 and runtime._falhas_drift == 1
+
+        # Fim do cooldown: nova tentativa, com espera dobrada
+        monkeypatch.setattr(runtime, "_drift_retry_em", 0.0)
+        inicio = runtime.time.monotonic()
+        assert runtime.obter_monitor_drift(bloquear=True) is None
+        assert len(tentativas) == 2
+        assert runtime._drift_retry_em - inicio == pytest.approx(2 * runtime.DRIFT_RETRY_BASE_S, abs=1.0)
+
@@ -0,0 +1,66 @@
+"""
+Testes da inferência com saída antecipada (early exit) sobre um LightGBM sintético.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+lightgbm = pytest.importorskip("lightgbm")
+
+from src.models.early_exit import ClassificadorEarlyExit
+
+
+class TestClassificadorEarlyExit:
+    """Testes para o ClassificadorEarlyExit."""
+
+    @pytest.fixture(scope="class")
+    def dados(self):
+        rng = np.random.default_rng(42)
+        X = pd.DataFrame(rng.normal(size=(4000, 6)), columns=[f"f{i}" for i in range(6)])
+        logit = 2.5 * X["f0"] - 1.5 * X["f1"] + X["f2"] * X["f3"]
+        y = (rng.uniform(size=len(X)) < 1 / (1 + np.exp(-logit))).astype(int)
+        # Ausentes para exercitar o caminho sem caixa definida
+        X.loc[X.sample(frac=0.05, random_state=0).index, "f0"] = np.nan
+        return X, y
+
+    @pytest.fixture(scope="class")
+    def modelo(self, dados):
+        X, y = dados
+        modelo = lightgbm.LGBMClassifier(n_estimators=300, learning_rate=0.05, num_leaves=15, verbose=-1)
+        return modelo.fit(X, y)
+
+    @pytest.mark.parametrize("threshold", [0.1, 0.42, 0.5, 0.9])
+    def test_classificacoes_identicas_ao_modelo_completo(self, modelo, dados, threshold):
+        X, _ = dados
+        early = ClassificadorEarlyExit(modelo, tamanho_estagio=20)
+
+        classes, arvores = early.classificar(X, threshold)
+        esperado = (modelo.predict_proba(X)[:, 1] >= threshold).astype(int)
+
+        np.testing.assert_array_equal(classes, esperado)
+        assert arvores.max() <= early.n_arvores
+
+    def test_avalia_menos_arvores_em_media(self, modelo, dados):
+        X, _ = dados
+        early = ClassificadorEarlyExit(modelo, tamanho_estagio=20)
+        early.classificar(X, 0.42)
+
+        assert early.media_arvores < early.n_arvores
+
+    def test_limites_contem_o_score_restante(self, modelo, dados):
+        """A contribuição real das árvores restantes fica sempre dentro dos limites."""
+        X, _ = dados
+        early = ClassificadorEarlyExit(modelo)
+        valores = X[early.feature_names].to_numpy(dtype=float)
+        caixas, com_ausente = early._caixas(valores)
+        validas = ~com_ausente
+
+        for inicio in (0, 100, 250):
+            restante = early.booster.predict(valores, raw_score=True, start_iteration=inicio)
+            assert (restante[validas] >= early._limites_min[caixas[validas], inicio] - 1e-9).all()
+            assert (restante[validas] <= early._limites_max[caixas[validas], inicio] + 1e-9).all()
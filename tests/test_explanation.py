@@ -0,0 +1,103 @@
+"""
+Testes do job de explicação global (contribuições por chunks/processos, armazém Parquet e resumos).
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+lgb = pytest.importorskip("lightgbm")
+pytest.importorskip("pyarrow")
+
+from src.models.explanation import (
+    ArmazemContribuicoes,
+    calcular_contribuicoes,
+    gravar_contribuicoes,
+)
+
+COLUNAS = ["renda", "idade", "divida"]
+
+
+@pytest.fixture(scope="module")
+def modelo():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1200, 3))
+    y = (X[:, 0] - 2 * X[:, 2] + rng.normal(scale=0.5, size=1200) > 0).astype(int)
+    booster = lgb.train(
+        {"objective": "binary", "num_leaves": 15, "learning_rate": 0.1, "verbose": -1},
+        lgb.Dataset(X, y, feature_name=COLUNAS), num_boost_round=30,
+    )
+    return booster, X, y
+
+
+class TestContribuicoes:
+    """Testes para o cálculo em chunks e no pool de processos."""
+
+    def test_chunks_e_processos_batem_com_predict_direto(self, modelo):
+        booster, X, _ = modelo
+        referencia = booster.predict(X, pred_contrib=True)
+
+        em_chunks = calcular_contribuicoes(booster, X, processos=1, chunk=257)
+        em_processos = calcular_contribuicoes(booster, X, processos=2, chunk=257)
+        np.testing.assert_allclose(em_chunks, referencia, rtol=0, atol=1e-12)
+        np.testing.assert_allclose(em_processos, referencia, rtol=0, atol=1e-12)
+
+        # Bias + contribuições = margem (log-odds)
+        np.testing.assert_allclose(em_processos.sum(axis=1), booster.predict(X, raw_score=True), atol=1e-9)
+
+
+class TestArmazem:
+    """Testes para o Parquet de contribuições e os resumos lidos dele."""
+
+    @pytest.fixture
+    def armazem(self, modelo, tmp_path):
+        booster, X, y = modelo
+        phi = calcular_contribuicoes(booster, X)
+        partes = {
+            "X_train": {"X": X[:1000], "phi": phi[:1000], "y": y[:1000]},
+            "X_test": {"X": X[1000:], "phi": phi[1000:], "y": None},
+        }
+        caminho = gravar_contribuicoes(tmp_path / "contribuicoes.parquet", partes, COLUNAS, linhas_por_grupo=300)
+        return ArmazemContribuicoes(caminho)
+
+    def test_layout_do_parquet(self, armazem, modelo):
+        booster, X, _ = modelo
+        assert armazem.features == COLUNAS
+
+        teste = armazem.ler(["linha", "y", "margem", "x.divida"], dataset="X_test")
+        assert len(teste) == 200 and teste["linha"].tolist() == list(range(200))
+        assert (teste["y"] == -1).all()
+        np.testing.assert_allclose(teste["x.divida"], X[1000:, 2])
+        np.testing.assert_allclose(teste["margem"], booster.predict(X[1000:], raw_score=True), atol=1e-9)
+        assert len(armazem.ler(["y"])) == 1200
+
+    def test_importancia_global_e_segmentos(self, armazem):
+        global_ = armazem.importancia_global("X_train")
+        # Feature sem sinal no alvo fica por último
+        assert list(global_.index[:2]) == ["divida", "renda"] and global_.index[-1] == "idade"
+        assert global_["participacao"].sum() == pytest.approx(1.0)
+
+        por_classe = armazem.importancia_por_segmento("y", "X_train")
+        assert list(por_classe.index) == [0, 1] and por_classe["linhas"].sum() == 1000
+
+        por_decil = armazem.importancia_por_segmento("decil_score", "X_train")
+        assert len(por_decil) == 10 and por_decil["linhas"].sum() == 1000
+
+        with pytest.raises(ValueError):
+            armazem.importancia_por_segmento("inexistente")
+
+    def test_dependencia_e_resumo(self, armazem):
+        dependencia = armazem.dependencia("divida", n_faixas=5)
+        assert len(dependencia) == 5 and dependencia["linhas"].sum() == 1200
+        # Mais dívida reduz a margem: phi médio decrescente nas faixas
+        assert dependencia["phi_medio"].is_monotonic_decreasing
+        assert (dependencia["phi_p10"] <= dependencia["phi_p90"]).all()
+
+        resumo = armazem.resumo(top_dependencia=2)
+        assert resumo["global"][0]["feature"] == "divida"
+        assert set(resumo["dependencia"]) == {"divida", "renda"}
+        assert len(resumo["por_decil_score"]) == 10
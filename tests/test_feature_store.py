@@ -0,0 +1,69 @@
+"""
+Testes da FeatureStore: transformação de grades de sensibilidade.
+"""
+import itertools
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.features.feature_store import FeatureStore
+
+
+class TestTransformVariacoes:
+    """Testes para FeatureStore.transform_variacoes."""
+
+    @pytest.fixture(scope="class")
+    def store(self):
+        return FeatureStore.load()
+
+    @pytest.fixture
+    def base(self):
+        return pd.DataFrame([{
+            "person_income": 50000.0, "person_home_ownership": "RENT", "person_emp_length": 5.0,
+            "loan_intent": "EDUCATION", "loan_grade": "C", "loan_amnt": 10000.0,
+            "loan_int_rate": 12.0, "loan_percent_income": 0.2, "cb_person_default_on_file": "N",
+            "cb_person_cred_hist_length": 3, "faixa_etaria": "20-29",
+        }])
+
+    def test_equivale_a_transformar_a_grade_completa(self, store, base):
+        """Retransformar apenas os grupos variados dá o mesmo resultado que transform_all."""
+        variacoes = {"loan_amnt": [1000.0, 5000.0, 20000.0], "loan_grade": ["A", "D", "G"]}
+        X = store.transform_variacoes(base, variacoes)
+
+        linhas = [base.assign(loan_amnt=a, loan_grade=g) for a, g in itertools.product(*variacoes.values())]
+        esperado = store.transform_all(pd.concat(linhas, ignore_index=True))
+
+        assert list(X.columns) == list(esperado.columns)
+        np.testing.assert_allclose(X.to_numpy(float), esperado.to_numpy(float))
+
+    def test_colunas_nao_variadas_repetem_o_base(self, store, base):
+        X = store.transform_variacoes(base, {"loan_int_rate": [5.0, 10.0, 15.0, 20.0]})
+        base_full = store.transform_all(base)
+
+        fixas = [c for c in X.columns if not c.endswith("loan_int_rate")]
+        assert len(X) == 4
+        assert (X[fixas].to_numpy() == base_full[fixas].to_numpy()).all()
+
+    def test_base_com_mais_de_uma_linha(self, store, base):
+        with pytest.raises(ValueError):
+            store.transform_variacoes(pd.concat([base, base]), {"loan_amnt": [1.0]})
+
+
+class TestCategoriasValidas:
+    """Testes para a máscara de categorias vistas no treino."""
+
+    def test_mascara_marca_categorias_desconhecidas(self):
+        store = FeatureStore.load()
+        df = pd.DataFrame({
+            "person_home_ownership": ["RENT", "RENT", None],
+            "loan_intent": ["EDUCATION", "EDUCATION", "MEDICAL"],
+            "loan_grade": ["A", "Z", "B"],
+            "cb_person_default_on_file": ["N", "N", "Y"],
+            "faixa_etaria": ["20-29", "30-39", "20-29"],
+        })
+        assert store.mascara_categorias_validas(df).tolist() == [True, False, True]
@@ -0,0 +1,64 @@
+"""
+Testes do micro-batcher assíncrono do canal WebSocket.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.api import inference
+from src.api.inference import MicroBatcher
+
+
+class TestMicroBatcher:
+    """Testes para o MicroBatcher (pontuação substituída por uma função determinística)."""
+
+    def _pontuar_falso(self, lotes):
+        def pontuar(registros, threshold):
+            lotes.append(len(registros))
+            return [{"valor": r["v"] * 2, "threshold": threshold} for r in registros]
+        return pontuar
+
+    def test_agrupa_mensagens_concorrentes(self, monkeypatch):
+        lotes = []
+        monkeypatch.setattr(inference, "pontuar_registros", self._pontuar_falso(lotes))
+
+        async def cenario():
+            batcher = MicroBatcher(tamanho_max=64, espera_max_ms=20)
+            return await asyncio.gather(*(batcher.submeter({"v": i}, 0.42) for i in range(100)))
+
+        resultados = asyncio.run(cenario())
+
+        # Cada chamador recebe o próprio resultado e os lotes respeitam o tamanho máximo
+        assert [r["valor"] for r in resultados] == [i * 2 for i in range(100)]
+        assert sum(lotes) == 100
+        assert max(lotes) <= 64
+        assert len(lotes) < 100
+
+    def test_separa_lotes_por_threshold(self, monkeypatch):
+        lotes = []
+        monkeypatch.setattr(inference, "pontuar_registros", self._pontuar_falso(lotes))
+
+        async def cenario():
+            batcher = MicroBatcher(tamanho_max=64, espera_max_ms=20)
+            return await asyncio.gather(
+                batcher.submeter({"v": 1}, 0.3), batcher.submeter({"v": 2}, 0.5)
+            )
+
+        resultados = asyncio.run(cenario())
+        assert [r["threshold"] for r in resultados] == [0.3, 0.5]
+
+    def test_erro_propaga_para_todos_do_lote(self, monkeypatch):
+        def falhar(registros, threshold):
+            raise RuntimeError("modelo indisponível")
+        monkeypatch.setattr(inference, "pontuar_registros", falhar)
+
+        async def cenario():
+            batcher = MicroBatcher(espera_max_ms=5)
+            return await asyncio.gather(
+                *(batcher.submeter({"v": i}, 0.42) for i in range(3)), return_exceptions=True
+            )
+
+        resultados = asyncio.run(cenario())
+        assert all(isinstance(r, RuntimeError) for r in resultados)
@@ -0,0 +1,275 @@
+"""
+Testes da fila de jobs de pontuação em massa (SQLite) e da execução de um job.
+"""
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.api.jobs import (
+    CANCELADO,
+    CONCLUIDO,
+    EXECUTANDO,
+    FALHOU,
+    PENDENTE,
+    FilaJobs,
+    JobPerdido,
+    SupervisorJobs,
+    caminho_resultado,
+    caminho_temporario,
+    executar_job,
+)
+
+
+class TestFilaJobs:
+    """Testes para FilaJobs (ciclo de vida, cancelamento e recuperação)."""
+
+    @pytest.fixture
+    def fila(self, tmp_path):
+        return FilaJobs(tmp_path / "fila.sqlite")
+
+    def test_reserva_em_ordem_e_sem_duplicar(self, fila):
+        primeiro = fila.submeter(Path("a.csv"), {"threshold": 0.42})
+        segundo = fila.submeter(Path("b.csv"), {"threshold": 0.42})
+
+        assert fila.reservar(worker_pid=1)["id"] == primeiro
+        assert fila.reservar(worker_pid=2)["id"] == segundo
+        assert fila.reservar(worker_pid=3) is None
+        assert fila.obter(primeiro)["status"] == EXECUTANDO
+        assert fila.contar_ativos() == 2
+
+    def test_cancelamento(self, fila):
+        pendente = fila.submeter(Path("a.csv"), {})
+        assert fila.cancelar(pendente) == CANCELADO
+
+        em_execucao = fila.submeter(Path("b.csv"), {})
+        fila.reservar(worker_pid=1)
+        # Em execução: apenas sinaliza; o worker vê o pedido no próximo progresso
+        assert fila.cancelar(em_execucao) == EXECUTANDO
+        assert fila.registrar_progresso(em_execucao, 10, {"ok": 10}) is True
+        assert fila.cancelar("inexistente") is None
+
+    def test_worker_morto_gera_nova_tentativa_ate_o_limite(self, fila):
+        job_id = fila.submeter(Path("a.csv"), {}, max_tentativas=2)
+
+        fila.reservar(worker_pid=10)
+        assert fila.recuperar(worker_pid=10) == [job_id]
+        assert fila.obter(job_id)["status"] == PENDENTE
+
+        fila.reservar(worker_pid=11)
+        assert fila.recuperar(worker_pid=11) == []
+        job = fila.obter(job_id)
+        assert job["status"] == FALHOU and job["tentativas"] == 2
+
+    def test_recupera_por_heartbeat_expirado(self, fila):
+        job_id = fila.submeter(Path("a.csv"), {})
+        fila.reservar(worker_pid=10)
+        assert fila.recuperar(heartbeat_antes_de=time.time() - 60) == []
+        assert fila.recuperar(heartbeat_antes_de=time.time() + 1) == [job_id]
+
+    def test_heartbeat_so_renova_o_proprio_job(self, fila):
+        job_id = fila.submeter(Path("a.csv"), {})
+        fila.reservar(worker_pid=10)
+        assert fila.registrar_heartbeat(job_id, worker_pid=10) is True
+        # Outro worker (ou o job já devolvido à fila) não renova
+        assert fila.registrar_heartbeat(job_id, worker_pid=11) is False
+        fila.recuperar(worker_pid=10)
+        assert fila.registrar_heartbeat(job_id, worker_pid=10) is False
+
+    def test_worker_antigo_nao_atualiza_job_recuperado(self, fila):
+        job_id = fila.submeter(Path("a.csv"), {})
+        fila.reservar(worker_pid=10)
+        fila.recuperar(heartbeat_antes_de=time.time() + 1)
+        fila.reservar(worker_pid=11)
+
+        with pytest.raises(JobPerdido):
+            fila.registrar_progresso(job_id, 10, {"ok": 10}, worker_pid=10)
+        with pytest.raises(JobPerdido):
+            fila.finalizar(job_id, CONCLUIDO, worker_pid=10)
+        job = fila.obter(job_id)
+        assert job["status"] == EXECUTANDO and job["worker_pid"] == 11
+        assert job["linhas_processadas"] == 0
+
+        fila.finalizar(job_id, CONCLUIDO, worker_pid=11)
+        assert fila.obter(job_id)["status"] == CONCLUIDO
+
+
+class TestIsolamentoWorker:
+    """Threads do worker de jobs independentes das threads da API."""
+
+    def test_threads_do_worker_sobrepoem_as_da_api(self, monkeypatch):
+        import threadpoolctl
+
+        from src.api.jobs import _limitar_recursos
+        from src.api.run import VARIAVEIS_BLAS
+
+        limites = []
+        monkeypatch.setattr(threadpoolctl, "threadpool_limits", limites.append)
+        monkeypatch.setenv("JOBS_NICE", "0")
+        monkeypatch.setenv("JOBS_LGBM_THREADS", "2")
+        # Herdadas do processo da API (configs/serving.json aplicado por src/api/run.py)
+        monkeypatch.setenv("LGBM_NUM_THREADS", "8")
+        for variavel in VARIAVEIS_BLAS:
+            monkeypatch.setenv(variavel, "8")
+
+        assert _limitar_recursos() == 2
+        assert os.environ["LGBM_NUM_THREADS"] == "2"
+        assert all(os.environ[v] == "2" for v in VARIAVEIS_BLAS)
+        assert limites == [2]
+
+
+class TestSupervisorJobs:
+    """Um único supervisor por fila, mesmo com vários processos da API."""
+
+    @staticmethod
+    def _esperar(condicao, timeout=5.0):
+        limite = time.time() + timeout
+        while not condicao() and time.time() < limite:
+            time.sleep(0.02)
+        return condicao()
+
+    def test_apenas_um_supervisor_eleito(self, tmp_path):
+        fila = tmp_path / "fila.sqlite"
+        primeiro = SupervisorJobs(0, fila, intervalo=0.05)
+        segundo = SupervisorJobs(0, fila, intervalo=0.05)
+        try:
+            primeiro.iniciar_quando_eleito()
+            assert self._esperar(lambda: primeiro.eleito)
+            segundo.iniciar_quando_eleito()
+            time.sleep(0.3)
+            assert not segundo.eleito
+            assert segundo.estado()["eleito"] is False
+
+            # Eleito encerra (ou morre): o lock é liberado e o outro assume
+            primeiro.parar()
+            assert self._esperar(lambda: segundo.eleito)
+        finally:
+            primeiro.parar()
+            segundo.parar()
+
+
+class TestExecutarJob:
+    """Execução de um job com FeatureStore e modelo reais."""
+
+    @pytest.fixture(scope="class")
+    def artefatos(self):
+        pytest.importorskip("lightgbm")
+        from src.features.feature_store import FeatureStore
+        from src.models.predictor import ModelProducao
+        return FeatureStore.load(), ModelProducao()
+
+    def test_resultado_parquet_por_linha(self, artefatos, tmp_path):
+        feature_store, modelo = artefatos
+        dados = pd.read_csv(Path(__file__).parent.parent / "data" / "interim" / "dados_novos.csv", nrows=250)
+        dados.loc[3, "loan_grade"] = "Z"
+        entrada = tmp_path / "entrada.csv"
+        dados.to_csv(entrada, index=False)
+
+        fila = FilaJobs(tmp_path / "fila.sqlite")
+        job_id = fila.submeter(entrada, {"threshold": 0.42, "chunk_size": 100})
+        job = fila.reservar(worker_pid=1)
+        try:
+            assert executar_job(fila, job, feature_store, modelo) == CONCLUIDO
+            resultado = pd.read_parquet(caminho_resultado(job_id))
+        finally:
+            caminho_resultado(job_id).unlink(missing_ok=True)
+
+        final = fila.obter(job_id)
+        assert final["status"] == CONCLUIDO
+        assert final["linhas_processadas"] == final["linhas_total"] == len(dados)
+        assert list(resultado["linha"]) == list(range(len(dados)))
+        assert resultado.loc[3, "status"] == "categoria_desconhecida"
+        assert np.isnan(resultado.loc[3, "probabilidade_default"])
+
+        # As demais linhas têm o mesmo score da pontuação direta
+        validas = feature_store.mascara_categorias_validas(dados)
+        esperado = modelo.predict_proba(feature_store.transform(dados[validas]))[:, 1]
+        np.testing.assert_allclose(resultado.loc[validas, "probabilidade_default"], esperado)
+
+    def test_chunk_longo_mantem_heartbeat(self, artefatos, tmp_path):
+        """O heartbeat é renovado durante um chunk mais longo que o timeout do supervisor."""
+        feature_store, modelo = artefatos
+        entrada = tmp_path / "entrada.csv"
+        pd.read_csv(Path(__file__).parent.parent / "data" / "interim" / "dados_novos.csv", nrows=20).to_csv(entrada, index=False)
+
+        class ModeloLento:
+            model_name = modelo.model_name
+
+            def pontuar(self, df, fs):
+                time.sleep(1.0)
+                return modelo.pontuar(df, fs)
+
+        fila = FilaJobs(tmp_path / "fila.sqlite")
+        job_id = fila.submeter(entrada, {"chunk_size": 100})
+        job = fila.reservar(worker_pid=1)
+        recuperados = []
+
+        def supervisionar():
+            while fila.obter(job_id)["status"] == EXECUTANDO:
+                recuperados.extend(fila.recuperar(heartbeat_antes_de=time.time() - 0.3))
+                time.sleep(0.05)
+
+        supervisor = threading.Thread(target=supervisionar)
+        supervisor.start()
+        try:
+            assert executar_job(fila, job, feature_store, ModeloLento(), intervalo_heartbeat=0.1) == CONCLUIDO
+        finally:
+            supervisor.join()
+            caminho_resultado(job_id).unlink(missing_ok=True)
+        assert recuperados == []
+
+    def test_falha_remove_entrada_temporaria(self, artefatos, tmp_path):
+        feature_store, _ = artefatos
+        entrada = tmp_path / "upload.csv"
+        pd.read_csv(Path(__file__).parent.parent / "data" / "interim" / "dados_novos.csv", nrows=10).to_csv(entrada, index=False)
+
+        class ModeloQuebrado:
+            model_name = "quebrado"
+
+            def pontuar(self, df, fs):
+                raise RuntimeError("falha na pontuação")
+
+        fila = FilaJobs(tmp_path / "fila.sqlite")
+        job_id = fila.submeter(entrada, {}, entrada_temporaria=True)
+        job = fila.reservar(worker_pid=1)
+        try:
+            with pytest.raises(RuntimeError):
+                executar_job(fila, job, feature_store, ModeloQuebrado())
+        finally:
+            caminho_temporario(job).unlink(missing_ok=True)
+        assert not entrada.exists()
+
+    def test_worker_antigo_nao_sobrescreve_a_tentativa_nova(self, artefatos, tmp_path):
+        feature_store, modelo = artefatos
+        entrada = tmp_path / "upload.csv"
+        pd.read_csv(Path(__file__).parent.parent / "data" / "interim" / "dados_novos.csv", nrows=10).to_csv(entrada, index=False)
+
+        fila = FilaJobs(tmp_path / "fila.sqlite")
+        job_id = fila.submeter(entrada, {}, entrada_temporaria=True)
+        antigo = fila.reservar(worker_pid=1)
+        # Heartbeat expirado: o supervisor devolve o job e outro worker o reserva
+        fila.recuperar(heartbeat_antes_de=time.time() + 1)
+        novo = fila.reservar(worker_pid=2)
+        assert caminho_temporario(antigo) != caminho_temporario(novo)
+
+        with pytest.raises(JobPerdido):
+            executar_job(fila, antigo, feature_store, modelo)
+        assert not caminho_temporario(antigo).exists()
+        assert not caminho_resultado(job_id).exists()
+        # A tentativa nova ainda lê o upload
+        assert entrada.exists()
+        job = fila.obter(job_id)
+        assert job["status"] == EXECUTANDO and job["worker_pid"] == 2 and job["linhas_processadas"] == 0
+
+        try:
+            assert executar_job(fila, novo, feature_store, modelo) == CONCLUIDO
+        finally:
+            caminho_resultado(job_id).unlink(missing_ok=True)
+        assert not entrada.exists()
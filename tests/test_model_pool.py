@@ -0,0 +1,104 @@
+"""
+Testes do pool de modelos com orçamento de memória (carga substituída por objetos sintéticos).
+"""
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models.model_pool import PoolModelos
+
+MB = 1024 * 1024
+
+
+class _ModeloFalso:
+    def __init__(self, model_name, version, tamanho):
+        self.model_name = model_name
+        self.version = version
+        # Bytes aleatórios: páginas efetivamente escritas, visíveis no RSS
+        self._modelo = os.urandom(tamanho)
+
+
+class TestPoolModelos:
+    """Testes para o PoolModelos."""
+
+    def _carregador(self, cargas, tamanho=4 * MB, espera=0.0):
+        def carregar(model_name, version):
+            cargas.append((model_name, version))
+            time.sleep(espera)
+            return _ModeloFalso(model_name, version, tamanho)
+        return carregar
+
+    def test_reutiliza_modelo_residente(self):
+        cargas = []
+        pool = PoolModelos(64 * MB, carregar=self._carregador(cargas))
+        primeiro = pool.obter("m", version=1)
+        assert pool.obter("m", version=1) is primeiro
+        assert cargas == [("m", 1)]
+        assert pool.estado()["residentes"][0]["usos"] == 2
+
+    def test_despeja_menos_usado_recentemente(self):
+        cargas = []
+        pool = PoolModelos(10 * MB, carregar=self._carregador(cargas))
+        pool.obter("m", version=1)
+        pool.obter("m", version=2)
+        pool.obter("m", version=1)   # v1 passa a ser a mais recente
+        pool.obter("m", version=3)   # excede o orçamento: sai a v2
+
+        residentes = [(r["model_name"], r["version"]) for r in pool.estado()["residentes"]]
+        assert residentes == [("m", 1), ("m", 3)]
+        assert pool.despejos == 1
+        assert pool.memoria_bytes <= 10 * MB
+
+    def test_deduplica_cargas_concorrentes(self):
+        cargas = []
+        pool = PoolModelos(64 * MB, carregar=self._carregador(cargas, espera=0.2))
+        resultados = []
+        threads = [threading.Thread(target=lambda: resultados.append(pool.obter("m", version=7))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert cargas == [("m", 7)]
+        assert len(resultados) == 8 and all(r is resultados[0] for r in resultados)
+
+    def test_erro_de_carga_propaga_e_permite_nova_tentativa(self):
+        tentativas = []
+
+        def falhar(model_name, version):
+            tentativas.append(version)
+            time.sleep(0.1)
+            raise FileNotFoundError("artefato ausente")
+
+        pool = PoolModelos(64 * MB, carregar=falhar)
+        erros = []
+
+        def pedir():
+            try:
+                pool.obter("m", version=2)
+            except FileNotFoundError as e:
+                erros.append(e)
+
+        threads = [threading.Thread(target=pedir) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(erros) == 4 and tentativas == [2]
+
+        with pytest.raises(FileNotFoundError):
+            pool.obter("m", version=2)
+        assert tentativas == [2, 2]
+
+    def test_estado_reporta_tempo_e_memoria(self):
+        pool = PoolModelos(64 * MB, carregar=self._carregador([], tamanho=4 * MB, espera=0.05))
+        pool.obter("m", version=1)
+        residente = pool.estado()["residentes"][0]
+        assert residente["tempo_carga_s"] >= 0.05
+        assert residente["memoria_mb"] >= 4
@@ -0,0 +1,102 @@
+"""
+Testes do benchmark de modelos: folds materializados em cache, execução em processos e registro dos runs.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import loader_model, model_zoo
+from src.models.model_zoo import FOLD_TESTE, FoldsCV
+
+
+@pytest.fixture
+def folds(tmp_path):
+    return FoldsCV.materializar(n_folds=3, raiz=tmp_path / "cv_folds")
+
+
+class TestFoldsCV:
+    """Testes para a materialização dos folds."""
+
+    def test_cache_e_estratificacao(self, tmp_path, folds):
+        assert folds.colunas and folds.n_folds == 3
+        arquivo = folds.diretorio / "X_train.npy"
+        mtime = arquivo.stat().st_mtime_ns
+
+        # Mesma chave: reaproveita sem regravar; outra seed: outro diretório
+        assert FoldsCV.materializar(n_folds=3, raiz=tmp_path / "cv_folds").diretorio == folds.diretorio
+        assert arquivo.stat().st_mtime_ns == mtime
+        assert FoldsCV.materializar(n_folds=3, seed=7, raiz=tmp_path / "cv_folds").diretorio != folds.diretorio
+
+        y = np.asarray(folds._arrays["y_train"])
+        assert isinstance(folds._arrays["X_train"], np.memmap)
+        tamanhos = []
+        for fold in range(3):
+            X_treino, y_treino, X_validacao, y_validacao = folds.particao(fold)
+            assert len(X_treino) + len(X_validacao) == len(y) and X_validacao.shape[1] == len(folds.colunas)
+            assert abs(y_validacao.mean() - y.mean()) < 0.005
+            tamanhos.append(len(y_validacao))
+        assert sum(tamanhos) == len(y)
+
+        X_treino, _, X_teste, y_teste = folds.particao(FOLD_TESTE)
+        assert len(X_treino) == len(y) and len(X_teste) == len(y_teste) == folds.meta["linhas_teste"]
+
+
+class TestExecucao:
+    """Testes para a execução das tarefas e a tabela comparativa."""
+
+    def test_processos_igual_sequencial(self, folds):
+        sequencial = model_zoo.executar(folds, ["LogisticRegression"], processos=1)
+        paralelo = model_zoo.executar(folds, ["LogisticRegression", "KNN"], processos=2, threads={"KNN": 2})
+
+        assert len(paralelo) == 2 * (3 + 1)
+        assert {r["pid"] for r in paralelo}.isdisjoint({sequencial[0]["pid"]})
+        por_fold = {r["fold"]: r["pr_auc"] for r in paralelo if r["modelo"] == "LogisticRegression"}
+        assert por_fold == pytest.approx({r["fold"]: r["pr_auc"] for r in sequencial})
+
+        tabela = model_zoo.tabela_comparativa(paralelo)
+        assert list(tabela.index) == ["KNN", "LogisticRegression"]
+        assert tabela.loc["KNN", "threads"] == 2
+        assert (tabela[["fit_s", "predict_ms_por_mil", "cv_pr_auc_std", "ks_teste"]] > 0).all().all()
+
+    def test_candidatos_e_threads(self):
+        assert "LightGBM" in model_zoo.candidatos_disponiveis()
+        with pytest.raises(ValueError):
+            model_zoo.candidatos_disponiveis(["SVM"])
+        assert model_zoo._threads_por_modelo(["LightGBM=4"]) == {"LightGBM": 4}
+        with pytest.raises(Exception):
+            model_zoo._threads_por_modelo(["LightGBM=0"])
+
+
+class TestRegistro:
+    """Testes para o registro dos runs sem mlflow instalado."""
+
+    def test_registra_um_run_por_modelo(self, tmp_path, monkeypatch, folds):
+        try:
+            import mlflow  # noqa: F401
+            pytest.skip("mlflow instalado: o registro usa a API do mlflow")
+        except ImportError:
+            pass
+        # Sem mlflow os runs vão para o mesmo file store do ramo com mlflow (experiments/mlruns)
+        monkeypatch.setattr(model_zoo, "experiments_path", lambda nome: tmp_path / nome)
+        monkeypatch.setattr(loader_model, "MLRUNS_BASE", tmp_path / "outro_mlruns")
+
+        resultados = model_zoo.executar(folds, ["LogisticRegression"], processos=1)
+        run_ids = model_zoo.registrar_resultados(resultados, experimento="Zoo")
+
+        experimentos = [p for p in (tmp_path / "mlruns").iterdir() if p.is_dir()]
+        assert len(experimentos) == 1
+        assert yaml.safe_load((experimentos[0] / "meta.yaml").read_text())["name"] == "Zoo"
+        pasta_run = experimentos[0] / run_ids["LogisticRegression"]
+        assert (pasta_run / "params" / "solver").read_text() == "liblinear"
+        assert (pasta_run / "params" / "cv_n_folds").read_text() == "3"
+        assert float((pasta_run / "metrics" / "cv_pr_auc_mean").read_text().split()[1]) > 0.5
+        assert (pasta_run / "tags" / "mlflow.runName").read_text() == "LogisticRegression"
+
+        # Segundo registro reaproveita o experimento pelo nome
+        model_zoo.registrar_resultados(resultados, experimento="Zoo")
+        assert len([p for p in (tmp_path / "mlruns").iterdir() if p.is_dir()]) == 1
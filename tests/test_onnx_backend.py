@@ -0,0 +1,73 @@
+"""
+Testes de paridade do backend ONNX com o caminho pandas → sklearn → LightGBM.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("skl2onnx")
+pytest.importorskip("onnxmltools")
+
+from src.features.feature_store import COLUNAS_ENTRADA, FeatureStore
+from src.models.onnx_backend import TOLERANCIA_PARIDADE, BackendOnnx, exportar_onnx, verificar_paridade
+
+
+class TestBackendOnnx:
+    """Testes para exportar_onnx e BackendOnnx com os artefatos de produção."""
+
+    @pytest.fixture(scope="class")
+    def artefatos(self, tmp_path_factory):
+        try:
+            from src.models.predictor import ModelProducao
+            feature_store = FeatureStore.load()
+            modelo = ModelProducao()
+        except Exception as e:
+            pytest.skip(f"Artefatos de produção indisponíveis: {e}")
+
+        caminho = exportar_onnx(feature_store, modelo, tmp_path_factory.mktemp("onnx") / "modelo.onnx")
+        return feature_store, modelo, BackendOnnx(caminho)
+
+    @pytest.fixture(scope="class")
+    def teste_bruto(self):
+        from src.data.datasets import carregar_teste_bruto
+        return carregar_teste_bruto()[COLUNAS_ENTRADA]
+
+    def test_paridade_no_conjunto_de_teste_completo(self, artefatos, teste_bruto):
+        feature_store, modelo, backend = artefatos
+        assert verificar_paridade(feature_store, modelo, backend, teste_bruto) <= TOLERANCIA_PARIDADE
+
+    def test_features_selecionadas_iguais_ao_feature_store(self, artefatos, teste_bruto):
+        feature_store, _, backend = artefatos
+        X_onnx, _ = backend.executar(teste_bruto)
+        X_ref = feature_store.transform(teste_bruto)
+        assert list(X_onnx.columns) == list(X_ref.columns)
+        assert (X_onnx.index == X_ref.index).all()
+        np.testing.assert_allclose(X_onnx.to_numpy(), X_ref.to_numpy(), atol=1e-5)
+
+    def test_valores_ausentes_imputados_como_no_preprocessor(self, artefatos, teste_bruto):
+        """NaN numérico e categórico seguem a mediana/moda aprendidas no treino."""
+        feature_store, modelo, backend = artefatos
+        amostra = teste_bruto.head(50).copy()
+        amostra.loc[amostra.index[::2], "person_emp_length"] = np.nan
+        amostra.loc[amostra.index[::3], "loan_intent"] = np.nan
+        assert verificar_paridade(feature_store, modelo, backend, amostra) <= TOLERANCIA_PARIDADE
+
+    def test_bundle_resolve_o_onnx_pelo_proprio_nome(self, monkeypatch):
+        """Com bundle, o grafo ONNX é o do modelo do bundle, não o do argumento model_name."""
+        from types import SimpleNamespace
+
+        from src.models import onnx_backend
+        from src.models.predictor import ModelProducao
+
+        caminhos = []
+        monkeypatch.setattr(onnx_backend, "caminho_onnx", lambda nome, versao: caminhos.append((nome, versao)) or nome)
+        monkeypatch.setattr(onnx_backend, "BackendOnnx", lambda caminho, num_threads=None: caminho)
+
+        bundle = SimpleNamespace(model_name="lgb_outro", version=3, modelo=object())
+        modelo = ModelProducao(bundle=bundle, backend="onnx")
+        assert caminhos == [("lgb_outro", 3)] and modelo.model_name == "lgb_outro"
@@ -0,0 +1,99 @@
+"""
+Testes das métricas de performance com outcomes (histogramas binados) e da junção com a auditoria.
+"""
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.monitoring.audit import AuditSink
+from src.monitoring.performance import MonitorPerformance
+
+DIA_0 = datetime(2026, 10, 1, tzinfo=timezone.utc).timestamp()
+
+
+def _decisoes(n: int = 20000, dias: int = 10, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    prob = 1 / (1 + np.exp(-rng.normal(-1.5, 2, size=n)))
+    return pd.DataFrame({
+        "prediction_id": [f"p{i}" for i in range(n)],
+        "ts": DIA_0 + rng.integers(0, dias * 86400, size=n),
+        "model_name": "lgb_prob_default",
+        "model_version": 7,
+        "probabilidade": prob,
+        "rotulo": (rng.uniform(size=n) < prob).astype(int),
+    })
+
+
+class TestMonitorPerformance:
+    """Testes para MonitorPerformance (métricas binadas, janelas e deduplicação)."""
+
+    @pytest.fixture
+    def monitor(self, tmp_path):
+        return MonitorPerformance(tmp_path / "performance.sqlite")
+
+    def test_metricas_binadas_proximas_das_exatas(self, monitor):
+        from sklearn.metrics import average_precision_score, roc_auc_score, roc_curve
+
+        decisoes = _decisoes()
+        for inicio in range(0, len(decisoes), 3000):
+            monitor.registrar(decisoes.iloc[inicio:inicio + 3000])
+        metricas = monitor.metricas("lgb_prob_default", 7, janela_dias=None)
+
+        y, p = decisoes["rotulo"], decisoes["probabilidade"]
+        fpr, tpr, _ = roc_curve(y, p)
+        assert metricas["n"] == len(decisoes)
+        assert metricas["roc_auc"] == pytest.approx(roc_auc_score(y, p), abs=1e-3)
+        assert metricas["ks"] == pytest.approx(np.max(tpr - fpr), abs=2e-3)
+        assert metricas["pr_auc"] == pytest.approx(average_precision_score(y, p), abs=2e-3)
+        # Rótulos sorteados com a própria probabilidade: bem calibrado
+        assert metricas["ece"] < 0.02
+
+    def test_outcome_repetido_nao_conta_duas_vezes(self, monitor):
+        decisoes = _decisoes(n=500)
+        assert monitor.registrar(decisoes) == {"registrados": 500, "duplicados": 0}
+        assert monitor.registrar(decisoes.iloc[:100]) == {"registrados": 0, "duplicados": 100}
+        assert monitor.metricas("lgb_prob_default", 7, janela_dias=None)["n"] == 500
+
+    def test_serie_com_janela_movel(self, monitor):
+        decisoes = _decisoes(dias=10)
+        monitor.registrar(decisoes)
+        serie = monitor.serie("lgb_prob_default", 7, janela_dias=3)
+
+        assert [p["dia"] for p in serie] == [f"2026-10-{d:02d}" for d in range(1, 11)]
+        dia = pd.to_datetime(decisoes["ts"], unit="s", utc=True).dt.strftime("%Y-%m-%d")
+        assert serie[0]["n"] == serie[0]["n_dia"] == (dia == "2026-10-01").sum()
+        assert serie[-1]["n"] == dia.isin(["2026-10-08", "2026-10-09", "2026-10-10"]).sum()
+
+        fim = datetime(2026, 10, 10, tzinfo=timezone.utc)
+        metricas = monitor.metricas("lgb_prob_default", 7, janela_dias=3, fim=fim)
+        for nome, valor in metricas.items():
+            assert serie[-1][nome] == pytest.approx(valor)
+
+
+class TestIngestaoComAuditoria:
+    """Junção dos outcomes com as decisões gravadas pelo AuditSink."""
+
+    def test_ingerir_por_prediction_id(self, tmp_path):
+        sink = AuditSink(tmp_path / "audit", intervalo_flush=60)
+        ids = [f"id{i}" for i in range(6)]
+        prob = np.array([0.1, 0.8, 0.3, 0.9, 0.2, 0.7])
+        # Dois arquivos de auditoria: a busca precisa percorrer ambos
+        sink.registrar(ids[:3], [{}] * 3, prob[:3], ["baixo"] * 3, 0.42, "lgb_prob_default", 7)
+        sink.flush()
+        sink.rotacao_segundos = 0
+        sink.registrar(ids[3:], [{}] * 3, prob[3:], ["alto"] * 3, 0.42, "lgb_prob_default", 7)
+        sink.fechar()
+
+        monitor = MonitorPerformance(tmp_path / "performance.sqlite")
+        contagem = monitor.ingerir(ids + ["desconhecido", "id0"], [0, 1, 0, 1, 0, 1, 1, 0], tmp_path / "audit")
+
+        assert contagem == {"registrados": 6, "duplicados": 1, "nao_encontrados": 1, "recebidos": 8}
+        metricas = monitor.metricas("lgb_prob_default", 7, janela_dias=None)
+        assert metricas["n"] == 6
+        assert metricas["roc_auc"] == 1.0 and metricas["ks"] == 1.0
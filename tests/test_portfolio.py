@@ -0,0 +1,64 @@
+"""
+Testes da agregação de risco da carteira.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models.portfolio import AgregadorCarteira, iterar_chunks
+
+
+class TestAgregadorCarteira:
+    """Testes para o AgregadorCarteira."""
+
+    def _dados(self, n=1000, seed=0):
+        rng = np.random.default_rng(seed)
+        prob = rng.uniform(size=n)
+        valor = rng.uniform(500, 35000, size=n)
+        categoricas = {
+            "loan_grade": rng.choice(list("ABCDEFGX"), size=n),
+            "loan_intent": rng.choice(["EDUCATION", "MEDICAL", "VENTURE"], size=n),
+        }
+        return prob, valor, categoricas
+
+    def test_chunks_equivalem_a_lote_unico(self):
+        prob, valor, categoricas = self._dados()
+
+        unico = AgregadorCarteira()
+        unico.atualizar(prob, valor, categoricas)
+
+        em_chunks = AgregadorCarteira()
+        for inicio in range(0, len(prob), 137):
+            fatia = slice(inicio, inicio + 137)
+            em_chunks.atualizar(prob[fatia], valor[fatia], {g: v[fatia] for g, v in categoricas.items()})
+
+        assert em_chunks.resumo() == unico.resumo()
+
+    def test_totais_e_grupos(self):
+        prob, valor, categoricas = self._dados()
+        agregador = AgregadorCarteira(threshold=0.42)
+        agregador.atualizar(prob, valor, categoricas)
+        resumo = agregador.resumo()
+
+        assert resumo["total"]["quantidade"] == len(prob)
+        assert resumo["total"]["perda_esperada"] == round(float((prob * valor).sum()), 2)
+        assert resumo["total"]["acima_threshold"] == int((prob >= 0.42).sum())
+
+        niveis = resumo["grupos"]["nivel_risco"]
+        assert niveis["Baixo"]["quantidade"] == int((prob <= 0.30).sum())
+        assert niveis["Alto"]["quantidade"] == int((prob > 0.60).sum())
+
+        # Grade desconhecida ("X") cai em OUTROS
+        grades = resumo["grupos"]["loan_grade"]
+        assert grades["OUTROS"]["quantidade"] == int((categoricas["loan_grade"] == "X").sum())
+        assert sum(g["quantidade"] for g in grades.values()) == len(prob)
+        assert sum(grades["A"]["histograma_probabilidade"]) == grades["A"]["quantidade"]
+
+    def test_iterar_chunks_csv(self, tmp_path):
+        caminho = tmp_path / "carteira.csv"
+        pd.DataFrame({"loan_amnt": range(25)}).to_csv(caminho, index=False)
+        assert [len(c) for c in iterar_chunks(caminho, chunk_size=10)] == [10, 10, 5]
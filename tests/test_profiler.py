@@ -0,0 +1,107 @@
+"""
+Testes do profiler sob demanda: amostragem de pilhas e diff de alocações com tracemalloc.
+"""
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.monitoring import profiler
+
+_retidos = []
+
+
+def _laco_ocupado(parar: threading.Event):
+    while not parar.is_set():
+        sum(i * i for i in range(1000))
+
+
+@pytest.fixture
+def threads_de_teste():
+    parar = threading.Event()
+    ocupada = threading.Thread(target=_laco_ocupado, args=(parar,), name="ocupada", daemon=True)
+    ociosa = threading.Thread(target=parar.wait, name="ociosa", daemon=True)
+    ocupada.start()
+    ociosa.start()
+    yield
+    parar.set()
+    ocupada.join()
+    ociosa.join()
+
+
+class TestAmostragem:
+    """Testes para amostrar_pilhas e os formatos collapsed/json."""
+
+    def test_pilhas_da_thread_ocupada(self, threads_de_teste):
+        perfil = profiler.amostrar_pilhas(0.3, intervalo_s=0.002)
+        colapsado = perfil.colapsado()
+
+        linhas = colapsado.splitlines()
+        assert linhas and all(linha.rsplit(" ", 1)[1].isdigit() for linha in linhas)
+        assert any(linha.startswith("ocupada;") and "tests.test_profiler:_laco_ocupado" in linha for linha in linhas)
+        # Thread parada em Event.wait é descartada; a própria thread amostradora também
+        assert not any(linha.startswith(("ociosa;", "MainThread;")) for linha in linhas)
+        assert perfil.ociosas > 0 and perfil.amostras > 20
+
+        resumo = perfil.resumo(top=5)
+        assert resumo["por_thread"]["ocupada"] == sum(resumo["por_thread"].values())
+        assert any(f["funcao"] == "tests.test_profiler:_laco_ocupado" and f["fracao_total"] == 1.0
+                   for f in resumo["funcoes"])
+
+    def test_incluir_ociosas_e_linhas(self, threads_de_teste):
+        perfil = profiler.amostrar_pilhas(0.1, intervalo_s=0.005, incluir_ociosas=True, linhas=True)
+        colapsado = perfil.colapsado()
+        assert "\nociosa;" in "\n" + colapsado and perfil.ociosas == 0
+        assert "threading:Event.wait:" in colapsado
+
+    def test_limites_e_sessao_unica(self):
+        with pytest.raises(ValueError):
+            profiler.amostrar_pilhas(120)
+
+        erros = []
+        segundo = threading.Thread(
+            target=lambda: erros.append(pytest.raises(profiler.PerfilOcupado, profiler.amostrar_pilhas, 0.1))
+        )
+        primeiro = threading.Thread(target=profiler.amostrar_pilhas, args=(0.5,))
+        primeiro.start()
+        time.sleep(0.1)
+        segundo.start()
+        segundo.join()
+        primeiro.join()
+        assert len(erros) == 1
+
+
+class TestDiffTracemalloc:
+    """Testes para diff_tracemalloc e a contagem de requisições."""
+
+    def test_crescimento_ao_longo_das_requisicoes(self):
+        def requisicoes():
+            time.sleep(0.1)
+            for _ in range(5):
+                _retidos.append(bytearray(200_000))
+                profiler.contar_requisicao()
+
+        _retidos.clear()
+        thread = threading.Thread(target=requisicoes)
+        thread.start()
+        diff = profiler.diff_tracemalloc(5, timeout_s=10)
+        thread.join()
+
+        resumo = diff.resumo(top=3)
+        assert resumo["concluido"] and resumo["requisicoes_observadas"] == 5
+        assert resumo["alocacoes"][0]["local"][0].startswith("tests.test_profiler:")
+        assert resumo["alocacoes"][0]["crescimento_kb"] >= 5 * 195
+        assert resumo["crescimento_por_requisicao_b"] >= 200_000
+        assert "tests.test_profiler:" in diff.colapsado()
+        # Desligado ao final e sem contagem fora da sessão
+        assert not tracemalloc.is_tracing() and profiler._contador is None
+        _retidos.clear()
+
+    def test_timeout_sem_requisicoes(self):
+        diff = profiler.diff_tracemalloc(3, timeout_s=0.2, frames=5)
+        assert not diff.concluido and diff.requisicoes == 0
@@ -0,0 +1,135 @@
+"""
+Testes do esquema bruto: derivação vetorizada de features e regras de limpeza do notebook 3.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.features.feature_store import FeatureStore
+from src.features.raw_schema import (
+    COLUNAS_LIMPEZA,
+    aplicar_limpeza,
+    calcular_faixa_etaria,
+    calcular_regras_limpeza,
+    colunas_faltantes,
+    derivar_colunas,
+)
+from src.features.validation import OK, registros_para_dataframe, validar_lote
+
+RAIZ = Path(__file__).parent.parent
+
+
+class TestDerivacao:
+    """Testes para faixa_etaria, loan_percent_income e colunas faltantes."""
+
+    def test_faixa_etaria_igual_ao_pd_cut_do_notebook(self):
+        idades = np.array([15, 20, 29.9, 30, 59, 60, 64, 65, 94, 95, 144, np.nan])
+        esperado = pd.cut(
+            idades, bins=[20, 30, 40, 50, 60, 65, 95],
+            labels=["20-29", "30-39", "40-49", "50-59", "60-64", "65+"], right=False,
+        ).astype(object)
+        obtido = calcular_faixa_etaria(idades)
+        assert list(pd.Series(obtido).fillna("NA")) == list(pd.Series(esperado).fillna("NA"))
+
+    def test_derivar_so_preenche_ausentes(self):
+        df = pd.DataFrame({
+            "person_age": [25, 45, 33],
+            "faixa_etaria": ["30-39", None, np.nan],
+            "loan_amnt": [1000, 5000, 2000],
+            "person_income": [10000, 20000, 0],
+        })
+        derivado = derivar_colunas(df)
+
+        assert list(derivado["faixa_etaria"]) == ["30-39", "40-49", "30-39"]
+        np.testing.assert_allclose(derivado["loan_percent_income"], [0.1, 0.25, np.nan])
+        # A entrada não é alterada
+        assert df["faixa_etaria"].isna().sum() == 2 and "loan_percent_income" not in df
+
+    def test_colunas_faltantes_considera_origens(self):
+        esperadas = ["loan_amnt", "loan_percent_income", "faixa_etaria"]
+        assert colunas_faltantes(["loan_amnt", "person_income", "person_age"], esperadas) == []
+        assert colunas_faltantes(["loan_amnt"], esperadas) == ["loan_percent_income", "faixa_etaria"]
+
+
+class TestLimpeza:
+    """Regras IQR do notebook 3 e limitação dos outliers na inferência."""
+
+    def test_regras_reproduzem_o_notebook(self):
+        dados = pd.read_csv(RAIZ / "data" / "interim" / "dados_novos.csv")
+        regras = calcular_regras_limpeza(dados)
+        # 16843 linhas de treino + 7219 de teste sobreviveram à remoção de outliers
+        assert regras["linhas_mantidas"] == 24062
+        assert list(regras["limites"]) == COLUNAS_LIMPEZA
+        assert regras["limites"]["person_emp_length"] == pytest.approx([-5.5, 14.5])
+
+    def test_aplicar_limpeza_limita_e_preserva_nulos(self):
+        df = pd.DataFrame({"person_emp_length": [123.0, 5.0, np.nan], "loan_grade": ["A", "B", "C"]})
+        limpo = aplicar_limpeza(df, {"person_emp_length": [-5.5, 14.5], "loan_amnt": [0, 10]})
+        np.testing.assert_allclose(limpo["person_emp_length"], [14.5, 5.0, np.nan])
+        assert df.loc[0, "person_emp_length"] == 123.0
+        assert aplicar_limpeza(df, None) is df
+
+
+class TestFeatureStoreEsquemaBruto:
+    """FeatureStore e validação aceitando data/raw/credit_risk_dataset.csv diretamente."""
+
+    @pytest.fixture(scope="class")
+    def store(self):
+        return FeatureStore.load()
+
+    @pytest.fixture(scope="class")
+    def dados(self):
+        bruto = pd.read_csv(RAIZ / "data" / "raw" / "credit_risk_dataset.csv", nrows=2000)
+        interim = pd.read_csv(RAIZ / "data" / "interim" / "dados_novos.csv", nrows=2000)
+        return bruto, interim
+
+    def test_esquema_bruto_equivale_ao_interim(self, store, dados):
+        bruto, interim = dados
+        validacao_bruto = validar_lote(store, bruto)
+        validacao_interim = validar_lote(store, interim)
+        np.testing.assert_array_equal(validacao_bruto.codigos, validacao_interim.codigos)
+
+        validas = validacao_bruto.validas
+        pd.testing.assert_frame_equal(
+            store.transform(validacao_bruto.df[validas]), store.transform(validacao_interim.df[validas])
+        )
+
+    def test_outliers_limitados_sem_mudar_o_score(self, store, dados):
+        pytest.importorskip("lightgbm")
+        from src.models.predictor import ModelProducao
+
+        _, interim = dados
+        interim = interim[store.mascara_categorias_validas(interim)]
+        assert (interim["person_emp_length"] > 14.5).any()
+
+        X_limpo = store.transform(interim)
+        X_sem_limpeza = store.select_features(pd.DataFrame(
+            store.preprocessor.transform(interim), columns=store.preprocessor.get_feature_names_out(),
+            index=interim.index,
+        ))
+        emp_length = X_limpo.filter(like="person_emp_length").iloc[:, 0]
+        assert emp_length.max() < X_sem_limpeza.filter(like="person_emp_length").iloc[:, 0].max()
+
+        # Os limites contêm todos os valores de treino, logo todos os splits das árvores
+        modelo = ModelProducao()
+        np.testing.assert_array_equal(modelo.predict_proba(X_limpo), modelo.predict_proba(X_sem_limpeza))
+
+    def test_registros_com_person_age(self, store):
+        registro = {
+            "person_age": 41, "person_income": 50000.0, "person_home_ownership": "RENT",
+            "person_emp_length": 5.0, "loan_intent": "EDUCATION", "loan_grade": "C",
+            "loan_amnt": 10000.0, "loan_int_rate": 12.0, "cb_person_default_on_file": "N",
+            "cb_person_cred_hist_length": 3,
+        }
+        df, ausentes = registros_para_dataframe([registro, {**registro, "person_age": "quarenta"}])
+        validacao = validar_lote(store, df, ausentes)
+
+        assert ausentes == [[], []]
+        assert list(validacao.codigos) == [OK, "valor_invalido"]
+        assert validacao.df.loc[0, "faixa_etaria"] == "40-49"
+        assert validacao.df.loc[0, "loan_percent_income"] == pytest.approx(0.2)
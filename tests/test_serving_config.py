@@ -0,0 +1,53 @@
+"""
+Testes da configuração de serving lida por src/api/run.py.
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.api.run import VARIAVEIS_BLAS, aplicar_config, carregar_config
+
+VARIAVEIS_SERVING = (*VARIAVEIS_BLAS, "LGBM_NUM_THREADS", "WS_BATCH_MAX")
+
+
+@pytest.fixture
+def ambiente_limpo(monkeypatch):
+    """
+    Remove as variáveis de serving e garante que o estado original volte ao fim.
+    delenv de uma variável ausente não registra nada para desfazer, e
+    aplicar_config usa os.environ.setdefault: o setenv antes registra o valor original.
+    """
+    for variavel in VARIAVEIS_SERVING:
+        monkeypatch.setenv(variavel, "")
+        monkeypatch.delenv(variavel)
+    return monkeypatch
+
+
+class TestConfigServing:
+    """Testes para carregar_config e aplicar_config."""
+
+    def test_arquivo_ausente_retorna_vazio(self, tmp_path):
+        assert carregar_config(tmp_path / "nao_existe.json") == {}
+
+    def test_aplica_variaveis_de_ambiente(self, tmp_path, ambiente_limpo):
+        caminho = tmp_path / "serving.json"
+        caminho.write_text(json.dumps({"workers": 2, "lgbm_num_threads": 2, "blas_threads": 1,
+                                       "ws_batch_max": 64, "cpu_afinidade": None}))
+
+        aplicar_config(carregar_config(caminho))
+
+        assert os.environ["LGBM_NUM_THREADS"] == "2"
+        assert os.environ["WS_BATCH_MAX"] == "64"
+        assert all(os.environ[v] == "1" for v in VARIAVEIS_BLAS)
+
+    def test_ambiente_tem_precedencia(self, ambiente_limpo):
+        """Variáveis já definidas não são sobrescritas pelo arquivo."""
+        ambiente_limpo.setenv("LGBM_NUM_THREADS", "8")
+        aplicar_config({"lgbm_num_threads": 1, "ws_batch_max": 32})
+        assert os.environ["LGBM_NUM_THREADS"] == "8"
+        assert os.environ["WS_BATCH_MAX"] == "32"
@@ -0,0 +1,135 @@
+"""
+Testes do cliente shardeado contra réplicas HTTP locais que imitam o /predict_batch.
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.client.sharded import ClienteShardeado, ErroPontuacao
+
+
+class _ReplicaLocal:
+    """Servidor em thread: responde com probabilidade = loan_amnt / 1e6 e mede a concorrência"""
+
+    def __init__(self, status: int = 200, atraso: float = 0.02):
+        self.status = status
+        self.atraso = atraso
+        self.em_voo = 0
+        self.max_em_voo = 0
+        self.requisicoes = 0
+        self._lock = threading.Lock()
+        replica = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                corpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with replica._lock:
+                    replica.em_voo += 1
+                    replica.requisicoes += 1
+                    replica.max_em_voo = max(replica.max_em_voo, replica.em_voo)
+                time.sleep(replica.atraso)
+                with replica._lock:
+                    replica.em_voo -= 1
+
+                if replica.status != 200:
+                    resposta = {"detail": "falha simulada"}
+                else:
+                    resposta = {"model_version": 7, "results": [
+                        {"status": "ok", "probabilidade_default": r["loan_amnt"] / 1e6} if r["loan_amnt"] >= 0
+                        else {"status": "erro", "codigo": "valor_invalido", "erro": "loan_amnt"}
+                        for r in corpo["records"]
+                    ]}
+                dados = json.dumps(resposta).encode()
+                self.send_response(replica.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}"
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def parar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+@pytest.fixture
+def replicas():
+    criadas = []
+
+    def criar(*args, **kwargs):
+        criadas.append(_ReplicaLocal(*args, **kwargs))
+        return criadas[-1]
+
+    yield criar
+    for replica in criadas:
+        replica.parar()
+
+
+def _lote(n: int = 1000) -> pd.DataFrame:
+    return pd.DataFrame({
+        "loan_amnt": np.arange(n, dtype=float),
+        "person_income": 50000.0,
+        "loan_status": 0,
+    }, index=np.arange(n) * 10)
+
+
+class TestClienteShardeado:
+    """Testes para ClienteShardeado (ordem, concorrência por réplica e novas tentativas)."""
+
+    def test_resultado_na_ordem_com_limite_por_replica(self, replicas):
+        a, b = replicas(), replicas()
+        df = _lote()
+        df.loc[df.index[5], "loan_amnt"] = -1
+
+        with ClienteShardeado([a.url, b.url], limite_por_replica=[3, 1], tamanho_shard=37) as cliente:
+            resultado = cliente.pontuar(df)
+            estatisticas = cliente.estatisticas()
+
+        assert list(resultado.index) == list(df.index)
+        esperado = df["loan_amnt"] / 1e6
+        np.testing.assert_allclose(resultado["probabilidade_default"].drop(df.index[5]), esperado.drop(df.index[5]))
+        assert resultado.loc[df.index[5], "codigo"] == "valor_invalido"
+        assert a.max_em_voo <= 3 and b.max_em_voo == 1
+        assert a.requisicoes + b.requisicoes == 28
+        assert sum(e["linhas"] for e in estatisticas) == len(df)
+
+    def test_shards_com_falha_vao_para_outra_replica(self, replicas):
+        saudavel, quebrada = replicas(), replicas(status=503)
+
+        with ClienteShardeado([quebrada.url, saudavel.url], limite_por_replica=2, tamanho_shard=100) as cliente:
+            resultado = cliente.pontuar(_lote())
+            por_url = {e["url"]: e for e in cliente.estatisticas()}
+
+        assert (resultado["status"] == "ok").all()
+        assert por_url[quebrada.url]["falhas"] >= 1 and por_url[quebrada.url]["shards"] == 0
+        assert por_url[saudavel.url]["shards"] == 10
+
+    def test_tentativas_esgotadas(self, replicas):
+        quebrada = replicas(status=503, atraso=0)
+        with ClienteShardeado([quebrada.url], tamanho_shard=500, max_tentativas=2) as cliente:
+            with pytest.raises(ErroPontuacao, match="falhou 2 vezes"):
+                cliente.pontuar(_lote())
+
+    def test_erro_4xx_interrompe(self, replicas):
+        indisponivel = replicas(status=404, atraso=0)
+        with ClienteShardeado([indisponivel.url], tamanho_shard=500) as cliente:
+            with pytest.raises(ErroPontuacao, match="HTTP 404"):
+                cliente.pontuar(_lote())
+        assert indisponivel.requisicoes <= 2
@@ -0,0 +1,80 @@
+"""
+Testes da validação vetorizada de lotes e do isolamento de erros por linha.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.features.feature_store import FeatureStore
+from src.features.validation import (
+    CATEGORIA_DESCONHECIDA,
+    COLUNA_AUSENTE,
+    OK,
+    VALOR_INVALIDO,
+    registros_para_dataframe,
+    validar_lote,
+)
+
+REGISTRO = {
+    "person_income": 50000.0, "person_home_ownership": "RENT", "person_emp_length": 5.0,
+    "loan_intent": "EDUCATION", "loan_grade": "C", "loan_amnt": 10000.0,
+    "loan_int_rate": 12.0, "loan_percent_income": 0.2, "cb_person_default_on_file": "N",
+    "cb_person_cred_hist_length": 3, "faixa_etaria": "20-29",
+}
+
+
+class TestValidarLote:
+    """Testes para validar_lote com a FeatureStore real."""
+
+    @pytest.fixture(scope="class")
+    def store(self):
+        return FeatureStore.load()
+
+    def test_codigo_por_linha(self, store):
+        sem_renda = {k: v for k, v in REGISTRO.items() if k != "person_income"}
+        registros = [
+            REGISTRO,
+            sem_renda,
+            {**REGISTRO, "loan_amnt": "dez mil"},
+            {**REGISTRO, "loan_int_rate": float("inf")},
+            {**REGISTRO, "loan_grade": "Z"},
+            {**REGISTRO, "person_emp_length": None},
+        ]
+        df, ausentes = registros_para_dataframe(registros)
+        validacao = validar_lote(store, df, ausentes)
+
+        assert list(validacao.codigos) == [OK, COLUNA_AUSENTE, VALOR_INVALIDO, VALOR_INVALIDO, CATEGORIA_DESCONHECIDA, OK]
+        assert "person_income" in validacao.erros[1]
+        assert "loan_grade='Z'" in validacao.erros[4]
+        assert validacao.erros[0] is None and validacao.erros[5] is None
+        assert validacao.contagem() == {OK: 2, COLUNA_AUSENTE: 1, VALOR_INVALIDO: 2, CATEGORIA_DESCONHECIDA: 1}
+
+    def test_prioridade_e_acumulo_de_mensagens(self, store):
+        """Valor inválido prevalece sobre categoria; erros do mesmo tipo são concatenados."""
+        df = pd.DataFrame([{**REGISTRO, "loan_grade": "Z", "loan_amnt": "x", "loan_int_rate": "y"}])
+        validacao = validar_lote(store, df)
+
+        assert validacao.codigos[0] == VALOR_INVALIDO
+        assert "loan_amnt" in validacao.erros[0] and "loan_int_rate" in validacao.erros[0]
+        assert "loan_grade" not in validacao.erros[0]
+
+    def test_linhas_validas_pontuam_igual_ao_lote_limpo(self, store):
+        """As linhas válidas de um lote misto produzem as mesmas features de um lote só com elas."""
+        registros = [REGISTRO, {**REGISTRO, "loan_grade": "Z"}, {**REGISTRO, "loan_amnt": 2500}]
+        df, ausentes = registros_para_dataframe(registros)
+        validacao = validar_lote(store, df, ausentes)
+
+        X_misto = store.transform(validacao.df[validacao.validas])
+        X_limpo = store.transform(pd.DataFrame([registros[0], registros[2]]))
+        np.testing.assert_allclose(X_misto.to_numpy(), X_limpo.to_numpy())
+
+    def test_coluna_inteira_ausente(self, store):
+        df = pd.DataFrame([REGISTRO] * 3).drop(columns="faixa_etaria")
+        validacao = validar_lote(store, df)
+        assert (validacao.codigos == COLUNA_AUSENTE).all()
+        assert not validacao.validas.any()